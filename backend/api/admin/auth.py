@@ -2,18 +2,29 @@
 Admin authentication API endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from pydantic import BaseModel, EmailStr, ConfigDict
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 from db.base import async_session, get_db
 from models import ClubAdmin
-from core.password import hash_password, verify_password
+from core.cache import cache
+from core.config import settings
+from core.password import ahash_password, averify_password, needs_rehash
 from core.jwt import create_access_token, decode_access_token
+from .principals import (
+    invalidate_admin,
+    issued_before_password_change,
+    load_principal,
+    matches_token,
+    to_admin
+)
 
 router = APIRouter()
 security = HTTPBearer()
@@ -52,6 +63,12 @@ class ChangePasswordRequest(BaseModel):
     new_password: str
 
 
+class ChangePasswordResponse(BaseModel):
+    message: str
+    access_token: str
+    token_type: str = "bearer"
+
+
 # Dependency to get current admin user from JWT token
 async def get_current_admin(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -59,6 +76,9 @@ async def get_current_admin(
 ) -> ClubAdmin:
     """
     Validate JWT token and return current admin user
+
+    The returned ClubAdmin is detached and has no password hash; endpoints
+    that change the admin load the row themselves.
     """
     token = credentials.credentials
 
@@ -78,32 +98,75 @@ async def get_current_admin(
             detail="Invalid token payload"
         )
 
-    result = await db.execute(select(ClubAdmin).filter(ClubAdmin.email == email))
-    admin = result.scalar_one_or_none()
+    # Cached principal; the database is only read on a miss
+    issued_at = payload.get("iat", 0)
+    principal = await load_principal(db, email, issued_at)
 
-    if not admin:
+    if not principal:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
 
-    if not admin.is_active:
+    if not principal["is_active"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive"
         )
 
-    return admin
+    if not matches_token(principal, payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Role changed, please log in again",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    if issued_before_password_change(principal, issued_at):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Password changed, please log in again",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return to_admin(principal)
+
+
+async def check_login_attempts(email: str, ip: str) -> str:
+    """
+    Count a login attempt per email and per client IP in the current
+    ADMIN_LOGIN_WINDOW; 429 once either limit is exceeded, before any bcrypt
+    work is done. Returns the email counter key (cleared on success).
+    """
+    window = settings.ADMIN_LOGIN_WINDOW
+    now = int(time.time())
+    slot = now // window
+    email_key = f"admin:login:email:{email.lower()}:{slot}"
+    limits = (
+        (email_key, settings.ADMIN_LOGIN_MAX_ATTEMPTS_PER_EMAIL),
+        (f"admin:login:ip:{ip}:{slot}", settings.ADMIN_LOGIN_MAX_ATTEMPTS_PER_IP),
+    )
+    for key, limit in limits:
+        if await cache.aincr(key, window) > limit:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, try again later",
+                headers={"Retry-After": str(window - now % window)},
+            )
+    return email_key
 
 
 @router.post("/login", response_model=LoginResponse)
 async def login(
     request: LoginRequest,
+    http_request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Login with email and password, returns JWT token
     """
+    client_ip = http_request.client.host if http_request.client else "unknown"
+    attempts_key = await check_login_attempts(request.email, client_ip)
+
     # Find admin by email
     result = await db.execute(select(ClubAdmin).filter(ClubAdmin.email == request.email))
     admin = result.scalar_one_or_none()
@@ -114,8 +177,8 @@ async def login(
             detail="Incorrect email or password"
         )
 
-    # Verify password
-    if not verify_password(request.password, admin.password_hash):
+    # Verify password (off the event loop)
+    if not await averify_password(request.password, admin.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -128,6 +191,14 @@ async def login(
             detail="Account is inactive"
         )
 
+    await cache.adelete(attempts_key)
+
+    # Upgrade the hash if the configured bcrypt cost has changed
+    if needs_rehash(admin.password_hash):
+        admin.password_hash = await ahash_password(request.password)
+        await db.commit()
+        await db.refresh(admin)
+
     # Create JWT token
     token_data = {
         "email": admin.email,
@@ -161,16 +232,19 @@ async def update_profile(
     """
     Update current user's profile
     """
+    profile = await db.get(ClubAdmin, admin.id)
+
     if request.name:
-        admin.name = request.name
+        profile.name = request.name
 
     await db.commit()
-    await db.refresh(admin)
+    await db.refresh(profile)
+    await invalidate_admin(profile.email)
 
-    return AdminUserResponse.model_validate(admin)
+    return AdminUserResponse.model_validate(profile)
 
 
-@router.put("/change-password")
+@router.put("/change-password", response_model=ChangePasswordResponse)
 async def change_password(
     request: ChangePasswordRequest,
     admin: ClubAdmin = Depends(get_current_admin),
@@ -178,17 +252,30 @@ async def change_password(
 ):
     """
     Change current user's password
+
+    Signs out every session of the account, this one included; the
+    response carries a new token to continue with.
     """
+    account = await db.get(ClubAdmin, admin.id)
+
     # Verify old password
-    if not verify_password(request.old_password, admin.password_hash):
+    if not await averify_password(request.old_password, account.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect old password"
         )
 
-    # Hash and set new password
-    admin.password_hash = hash_password(request.new_password)
+    # Hash and set new password, revoking tokens issued until now
+    account.password_hash = await ahash_password(request.new_password)
+    account.password_changed_at = datetime.now(timezone.utc)
 
     await db.commit()
+    await invalidate_admin(account.email)
+
+    access_token = create_access_token(data={
+        "email": account.email,
+        "role": account.role,
+        "club_id": account.club_id
+    })
 
-    return {"message": "Password changed successfully"}
+    return ChangePasswordResponse(message="Password changed successfully", access_token=access_token)
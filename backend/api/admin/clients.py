@@ -2,16 +2,19 @@
 Admin clients management API
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import exists, func, select
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
 from db.session import get_db
-from models import User, UserRole, Booking, TrainerClient, ClubAdmin
+from models import User, UserRole, Booking, BookingStatus, TrainerClient, Club, ClubAdmin
+from repositories.read_models import ReadModel, dump_json
+from services.search import search_users
 from .auth import get_current_admin
+from .pagination import page_total
 
 router = APIRouter()
 
@@ -61,6 +64,15 @@ class ClientDetail(BaseModel):
         from_attributes = True
 
 
+class ClientListRow(ReadModel):
+    """ClientListItem fields, in select order"""
+
+    __slots__ = (
+        "id", "telegram_id", "name", "phone", "is_active", "total_trainers",
+        "total_bookings", "last_booking_date", "created_at",
+    )
+
+
 @router.get("/", response_model=List[ClientListItem])
 async def list_clients(
     admin: ClubAdmin = Depends(get_current_admin),
@@ -76,91 +88,75 @@ async def list_clients(
 
     For super_admin: can see all clients
     For club_admin: can only see clients who have bookings with trainers from their club
+
+    The page and its counters come from one column-projected query,
+    serialized without ORM instances; the total number of matching clients
+    is returned in X-Total-Count header.
     """
     # Check permissions
     is_super_admin = admin.role == "super_admin" and admin.club_id is None
 
-    query = db.query(User).filter(User.role == UserRole.CLIENT)
+    # Trainers, bookings and last booking from trainer_clients counters
+    counters = (
+        select(
+            TrainerClient.client_id,
+            func.count(TrainerClient.id).label("total_trainers"),
+            func.sum(TrainerClient.total_bookings).label("total_bookings"),
+            func.max(TrainerClient.last_booking_at).label("last_booking_date")
+        )
+        .group_by(TrainerClient.client_id)
+        .subquery()
+    )
+
+    query = db.query(
+        User.id, User.telegram_id, User.name, User.phone, User.is_active,
+        func.coalesce(counters.c.total_trainers, 0),
+        func.coalesce(counters.c.total_bookings, 0),
+        counters.c.last_booking_date,
+        User.created_at,
+        func.count().over()
+    ).outerjoin(counters, counters.c.client_id == User.id).filter(User.role == UserRole.CLIENT)
 
     # Apply club filter for club admins
     if not is_super_admin:
         if not admin.club_id:
             raise HTTPException(status_code=403, detail="Access denied")
 
-        # Get trainer IDs from admin's club
-        trainer_ids = db.query(User.id).filter(
-            User.role == UserRole.TRAINER,
-            User.club_id == admin.club_id
-        ).all()
-        trainer_ids = [t[0] for t in trainer_ids]
-
-        # Filter clients who have bookings with these trainers
-        client_ids = db.query(Booking.client_id).filter(
-            Booking.trainer_id.in_(trainer_ids)
-        ).distinct().all()
-        client_ids = [c[0] for c in client_ids]
-
-        query = query.filter(User.id.in_(client_ids))
+        # Clients who have bookings with trainers from the admin's club
+        trainer = aliased(User)
+        query = query.filter(
+            exists()
+            .where(Booking.client_id == User.id)
+            .where(trainer.id == Booking.trainer_id, trainer.club_id == admin.club_id)
+        )
 
     # Apply trainer filter
     if trainer_id is not None:
-        # Filter clients who have bookings with this trainer
-        client_ids = db.query(Booking.client_id).filter(
-            Booking.trainer_id == trainer_id
-        ).distinct().all()
-        client_ids = [c[0] for c in client_ids]
-        query = query.filter(User.id.in_(client_ids))
+        # Clients who have bookings with this trainer
+        query = query.filter(
+            exists().where(Booking.client_id == User.id, Booking.trainer_id == trainer_id)
+        )
 
     # Apply active filter
     if is_active is not None:
         query = query.filter(User.is_active == is_active)
 
-    # Apply search filter
+    # Apply search filter, best matches first
+    order = [User.created_at.desc(), User.id.desc()]
     if search:
-        query = query.filter(
-            or_(
-                User.name.ilike(f"%{search}%"),
-                User.telegram_id.ilike(f"%{search}%"),
-                User.phone.ilike(f"%{search}%")
-            )
-        )
+        condition, rank = search_users(db.get_bind().dialect.name, search)
+        if condition is not None:
+            query = query.filter(condition)
+            order.insert(0, rank.desc())
 
     # Apply pagination
-    clients = query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
-
-    # Build response with additional data
-    result = []
-    for client in clients:
-        # Count trainers
-        total_trainers = db.query(TrainerClient).filter(
-            TrainerClient.client_id == client.id
-        ).count()
-
-        # Count bookings
-        total_bookings = db.query(Booking).filter(
-            Booking.client_id == client.id
-        ).count()
-
-        # Get last booking date
-        last_booking = db.query(Booking).filter(
-            Booking.client_id == client.id
-        ).order_by(Booking.datetime.desc()).first()
-        last_booking_date = last_booking.datetime if last_booking else None
-
-        item = ClientListItem(
-            id=client.id,
-            telegram_id=client.telegram_id,
-            name=client.name,
-            phone=client.phone,
-            is_active=client.is_active,
-            total_trainers=total_trainers,
-            total_bookings=total_bookings,
-            last_booking_date=last_booking_date,
-            created_at=client.created_at
-        )
-        result.append(item)
+    rows = query.order_by(*order).offset(skip).limit(limit).all()
 
-    return result
+    return Response(
+        dump_json(ClientListRow.from_rows(rows), ClientListItem),
+        media_type="application/json",
+        headers={"X-Total-Count": str(page_total(rows, query, skip))}
+    )
 
 
 @router.get("/{client_id}", response_model=ClientDetail)
@@ -199,52 +195,35 @@ async def get_client(
             raise HTTPException(status_code=403, detail="Access denied")
 
     # Get trainers list with details
-    trainer_clients = db.query(TrainerClient).filter(
+    trainer_rows = db.query(TrainerClient, User, Club.name).join(
+        User, User.id == TrainerClient.trainer_id
+    ).outerjoin(
+        Club, Club.id == User.club_id
+    ).filter(
         TrainerClient.client_id == client_id
     ).all()
 
     trainers_info = []
-    for tc in trainer_clients:
-        trainer = db.query(User).filter(User.id == tc.trainer_id).first()
-        if not trainer:
-            continue
-
-        # Get club name
-        club_name = None
-        if trainer.club_id:
-            from models import Club
-            club = db.query(Club).filter(Club.id == trainer.club_id).first()
-            club_name = club.name if club else None
-
+    for tc, trainer, club_name in trainer_rows:
         trainers_info.append(TrainerInfo(
             id=trainer.id,
             name=trainer.name,
             telegram_id=trainer.telegram_id,
             club_name=club_name,
             total_bookings=tc.total_bookings or 0,
-            status=tc.status or "active",
-            first_booking_date=tc.first_booking_date,
-            last_booking_date=tc.last_booking_date
+            status="active" if tc.is_active else "inactive",
+            first_booking_date=tc.created_at,
+            last_booking_date=tc.last_booking_at
         ))
 
-    # Count bookings by status
-    total_bookings = db.query(Booking).filter(
-        Booking.client_id == client_id
-    ).count()
+    # Totals from trainer_clients counters; confirmed is not a counter
+    total_bookings = sum(tc.total_bookings or 0 for tc, _, _ in trainer_rows)
+    completed_bookings = sum(tc.completed_bookings or 0 for tc, _, _ in trainer_rows)
+    cancelled_bookings = sum(tc.cancelled_bookings or 0 for tc, _, _ in trainer_rows)
 
     confirmed_bookings = db.query(Booking).filter(
         Booking.client_id == client_id,
-        Booking.status == "confirmed"
-    ).count()
-
-    completed_bookings = db.query(Booking).filter(
-        Booking.client_id == client_id,
-        Booking.status == "completed"
-    ).count()
-
-    cancelled_bookings = db.query(Booking).filter(
-        Booking.client_id == client_id,
-        Booking.status == "cancelled"
+        Booking.status == BookingStatus.CONFIRMED
     ).count()
 
     return ClientDetail(
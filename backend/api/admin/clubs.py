@@ -2,17 +2,21 @@
 Admin clubs management API (super_admin only)
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import func, select
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
 from datetime import datetime
 
 from db.session import get_db
 from models import Club, ClubAdmin, User, UserRole
-from core.password import hash_password
+from core.password import ahash_password
+from repositories.read_models import ReadModel, dump_json
+from services.search import search_clubs
 from .auth import get_current_admin
+from .principals import invalidate_admin_sync
+from .pagination import page_total
 
 router = APIRouter()
 
@@ -97,6 +101,12 @@ class ClubAdminCreate(BaseModel):
     role: str = "admin"  # admin, owner, manager
 
 
+class ClubAdminUpdate(BaseModel):
+    name: Optional[str] = None
+    role: Optional[str] = None
+    is_active: Optional[bool] = None
+
+
 class ClubAdminResponse(BaseModel):
     id: int
     club_id: int
@@ -110,6 +120,15 @@ class ClubAdminResponse(BaseModel):
         from_attributes = True
 
 
+class ClubListRow(ReadModel):
+    """ClubListItem fields, in select order"""
+
+    __slots__ = (
+        "id", "name", "address", "phone", "email", "tariff", "tariff_expires_at",
+        "is_active", "total_trainers", "total_admins", "created_at",
+    )
+
+
 @router.get("/", response_model=List[ClubListItem])
 async def list_clubs(
     admin: ClubAdmin = Depends(require_super_admin),
@@ -122,8 +141,26 @@ async def list_clubs(
 ):
     """
     Get list of all clubs (super_admin only)
+
+    Trainer counts come from the maintained Club.total_trainers counter and
+    admin counts from a grouped subquery, so the page is one column-projected
+    query, serialized without ORM instances; the total number of matching
+    clubs is returned in X-Total-Count header.
     """
-    query = db.query(Club)
+    admins = (
+        select(ClubAdmin.club_id, func.count(ClubAdmin.id).label("total_admins"))
+        .group_by(ClubAdmin.club_id)
+        .subquery()
+    )
+
+    query = db.query(
+        Club.id, Club.name, Club.address, Club.phone, Club.email, Club.tariff,
+        Club.tariff_expires_at, Club.is_active,
+        func.coalesce(Club.total_trainers, 0),
+        func.coalesce(admins.c.total_admins, 0),
+        Club.created_at,
+        func.count().over()
+    ).outerjoin(admins, admins.c.club_id == Club.id)
 
     # Apply filters
     if is_active is not None:
@@ -132,46 +169,22 @@ async def list_clubs(
     if tariff:
         query = query.filter(Club.tariff == tariff)
 
+    # Best matches first when searching
+    order = [Club.created_at.desc(), Club.id.desc()]
     if search:
-        query = query.filter(
-            or_(
-                Club.name.ilike(f"%{search}%"),
-                Club.address.ilike(f"%{search}%"),
-                Club.email.ilike(f"%{search}%")
-            )
-        )
+        condition, rank = search_clubs(db.get_bind().dialect.name, search)
+        if condition is not None:
+            query = query.filter(condition)
+            order.insert(0, rank.desc())
 
     # Apply pagination
-    clubs = query.order_by(Club.created_at.desc()).offset(skip).limit(limit).all()
-
-    # Build response with counts
-    result = []
-    for club in clubs:
-        total_trainers = db.query(User).filter(
-            User.role == UserRole.TRAINER,
-            User.club_id == club.id
-        ).count()
-
-        total_admins = db.query(ClubAdmin).filter(
-            ClubAdmin.club_id == club.id
-        ).count()
-
-        item = ClubListItem(
-            id=club.id,
-            name=club.name,
-            address=club.address,
-            phone=club.phone,
-            email=club.email,
-            tariff=club.tariff,
-            tariff_expires_at=club.tariff_expires_at,
-            is_active=club.is_active,
-            total_trainers=total_trainers,
-            total_admins=total_admins,
-            created_at=club.created_at
-        )
-        result.append(item)
-
-    return result
+    rows = query.order_by(*order).offset(skip).limit(limit).all()
+
+    return Response(
+        dump_json(ClubListRow.from_rows(rows), ClubListItem),
+        media_type="application/json",
+        headers={"X-Total-Count": str(page_total(rows, query, skip))}
+    )
 
 
 @router.post("/", response_model=ClubDetail)
@@ -363,7 +376,7 @@ async def create_club_admin(
     new_admin = ClubAdmin(
         club_id=club_id,
         email=admin_data.email,
-        password_hash=hash_password(admin_data.password),
+        password_hash=await ahash_password(admin_data.password),
         name=admin_data.name,
         role=admin_data.role,
         is_active=True
@@ -393,3 +406,33 @@ async def list_club_admins(
     admins = db.query(ClubAdmin).filter(ClubAdmin.club_id == club_id).all()
 
     return [ClubAdminResponse.from_orm(a) for a in admins]
+
+
+@router.put("/{club_id}/admins/{admin_id}", response_model=ClubAdminResponse)
+async def update_club_admin(
+    club_id: int,
+    admin_id: int,
+    update_data: ClubAdminUpdate,
+    admin: ClubAdmin = Depends(require_super_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Update or deactivate a club admin (super_admin only)
+
+    Takes effect on the admin's next request: the cached principal is dropped.
+    """
+    club_admin = db.query(ClubAdmin).filter(
+        ClubAdmin.id == admin_id,
+        ClubAdmin.club_id == club_id
+    ).first()
+    if not club_admin:
+        raise HTTPException(status_code=404, detail="Club admin not found")
+
+    for field, value in update_data.model_dump(exclude_unset=True).items():
+        setattr(club_admin, field, value)
+
+    db.commit()
+    db.refresh(club_admin)
+    invalidate_admin_sync(club_admin.email)
+
+    return ClubAdminResponse.from_orm(club_admin)
@@ -2,14 +2,20 @@
 Admin dashboard statistics API
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, select
 from pydantic import BaseModel
 from datetime import datetime, timedelta
+from typing import List
 
 from db.session import get_db
-from models import User, UserRole, Booking, BookingStatus, Club, ClubAdmin
+from db.base import get_db as get_async_db
+from models import User, UserRole, Club, ClubAdmin
+from bot.utils.taps import get_tap_stats
+from core.cache import cache
+from services.booking_stats import daily_series, period_counts_statement, series_start
 from .auth import get_current_admin
 
 router = APIRouter()
@@ -32,6 +38,10 @@ class DashboardStats(BaseModel):
     bookings_this_month: int
 
 
+# Dashboard snapshots are reused within the same minute
+STATS_TTL = 60
+
+
 @router.get("/stats", response_model=DashboardStats)
 def get_dashboard_stats(
     admin: ClubAdmin = Depends(get_current_admin),
@@ -45,137 +55,126 @@ def get_dashboard_stats(
     """
     # Determine if super_admin or club_admin
     is_super_admin = admin.role == "super_admin" and admin.club_id is None
+    if not is_super_admin and not admin.club_id:
+        raise HTTPException(status_code=403, detail="Access denied")
 
-    # Count trainers (users with role=TRAINER)
-    if is_super_admin:
-        total_trainers = db.query(User).filter(User.role == UserRole.TRAINER).count()
-        active_trainers = db.query(User).filter(
-            User.role == UserRole.TRAINER,
-            User.is_active == True
-        ).count()
-    else:
-        if not admin.club_id:
-            raise HTTPException(status_code=403, detail="Access denied")
-        total_trainers = db.query(User).filter(
-            User.role == UserRole.TRAINER,
-            User.club_id == admin.club_id
-        ).count()
-        active_trainers = db.query(User).filter(
-            User.role == UserRole.TRAINER,
-            User.club_id == admin.club_id,
-            User.is_active == True
-        ).count()
-
-    # Count clients (users with role=CLIENT)
-    if is_super_admin:
-        total_clients = db.query(User).filter(User.role == UserRole.CLIENT).count()
-        active_clients = db.query(User).filter(
-            User.role == UserRole.CLIENT,
-            User.is_active == True
-        ).count()
-    else:
-        # For club admin, count clients who have bookings with club's trainers
-        trainer_ids = [u.id for u in db.query(User.id).filter(
-            User.role == UserRole.TRAINER,
-            User.club_id == admin.club_id
-        ).all()]
-
-        total_clients = db.query(User).filter(
-            User.role == UserRole.CLIENT,
-            User.id.in_(
-                db.query(Booking.client_id).filter(
-                    Booking.trainer_id.in_(trainer_ids)
-                ).distinct()
-            )
-        ).count()
-        active_clients = total_clients
-
-    # Count bookings
-    if is_super_admin:
-        total_bookings = db.query(Booking).count()
-        confirmed_bookings = db.query(Booking).filter(Booking.status == BookingStatus.CONFIRMED).count()
-        pending_bookings = db.query(Booking).filter(Booking.status == BookingStatus.PENDING).count()
-        completed_bookings = db.query(Booking).filter(Booking.status == BookingStatus.COMPLETED).count()
-        cancelled_bookings = db.query(Booking).filter(Booking.status == BookingStatus.CANCELLED).count()
-    else:
-        trainer_ids = [u.id for u in db.query(User.id).filter(
-            User.role == UserRole.TRAINER,
-            User.club_id == admin.club_id
-        ).all()]
-
-        total_bookings = db.query(Booking).filter(Booking.trainer_id.in_(trainer_ids)).count()
-        confirmed_bookings = db.query(Booking).filter(
-            Booking.trainer_id.in_(trainer_ids),
-            Booking.status == BookingStatus.CONFIRMED
-        ).count()
-        pending_bookings = db.query(Booking).filter(
-            Booking.trainer_id.in_(trainer_ids),
-            Booking.status == BookingStatus.PENDING
-        ).count()
-        completed_bookings = db.query(Booking).filter(
-            Booking.trainer_id.in_(trainer_ids),
-            Booking.status == BookingStatus.COMPLETED
-        ).count()
-        cancelled_bookings = db.query(Booking).filter(
-            Booking.trainer_id.in_(trainer_ids),
-            Booking.status == BookingStatus.CANCELLED
-        ).count()
-
-    # Count clubs
-    if is_super_admin:
-        total_clubs = db.query(Club).count()
-        active_clubs = db.query(Club).filter(Club.is_active == True).count()
-    else:
-        total_clubs = 1
-        club = db.query(Club).filter(Club.id == admin.club_id).first()
-        active_clubs = 1 if (club and club.is_active) else 0
-
-    # Time-based bookings
     now = datetime.now()
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    week_start = today_start - timedelta(days=today_start.weekday())
-    month_start = today_start.replace(day=1)
-
+    scope = "all" if is_super_admin else f"club:{admin.club_id}"
+    cache_key = f"admin:dashboard:{scope}:{now:%Y%m%d%H%M}"
+    cached = cache.get(cache_key)
+    if cached:
+        return DashboardStats.model_validate_json(cached)
+
+    stats = DashboardStats(**_count_users(db, admin, is_super_admin), **_count_bookings(db, admin, is_super_admin, now))
+    cache.set(cache_key, stats.model_dump_json(), STATS_TTL)
+    return stats
+
+
+def _count_users(db: Session, admin: ClubAdmin, is_super_admin: bool) -> dict:
+    """Trainer, client and club counts in one pass over users"""
+    is_trainer = User.role == UserRole.TRAINER
+    is_client = User.role == UserRole.CLIENT
+    clubs = select(func.count()).select_from(Club)
+    club_clients = select(func.coalesce(func.sum(Club.total_clients), 0))
+    if not is_super_admin:
+        clubs = clubs.where(Club.id == admin.club_id)
+        club_clients = club_clients.where(Club.id == admin.club_id)
+
+    query = select(
+        func.count().filter(is_trainer),
+        func.count().filter(is_trainer, User.is_active == True),
+        func.count().filter(is_client),
+        func.count().filter(is_client, User.is_active == True),
+        clubs.scalar_subquery(),
+        clubs.where(Club.is_active == True).scalar_subquery(),
+        club_clients.scalar_subquery(),
+    ).select_from(User)
+    if not is_super_admin:
+        query = query.where(User.club_id == admin.club_id)
+
+    row = db.execute(query).one()
+    counts = {
+        "total_trainers": row[0],
+        "active_trainers": row[1],
+        "total_clubs": row[4],
+        "active_clubs": row[5],
+    }
     if is_super_admin:
-        bookings_today = db.query(Booking).filter(
-            Booking.datetime >= today_start,
-            Booking.datetime < today_start + timedelta(days=1)
-        ).count()
-        bookings_this_week = db.query(Booking).filter(Booking.datetime >= week_start).count()
-        bookings_this_month = db.query(Booking).filter(Booking.datetime >= month_start).count()
+        counts.update(total_clients=row[2], active_clients=row[3])
     else:
-        trainer_ids = [u.id for u in db.query(User.id).filter(
-            User.role == UserRole.TRAINER,
-            User.club_id == admin.club_id
-        ).all()]
-
-        bookings_today = db.query(Booking).filter(
-            Booking.trainer_id.in_(trainer_ids),
-            Booking.datetime >= today_start,
-            Booking.datetime < today_start + timedelta(days=1)
-        ).count()
-        bookings_this_week = db.query(Booking).filter(
-            Booking.trainer_id.in_(trainer_ids),
-            Booking.datetime >= week_start
-        ).count()
-        bookings_this_month = db.query(Booking).filter(
-            Booking.trainer_id.in_(trainer_ids),
-            Booking.datetime >= month_start
-        ).count()
-
-    return DashboardStats(
-        total_trainers=total_trainers,
-        active_trainers=active_trainers,
-        total_clients=total_clients,
-        active_clients=active_clients,
-        total_bookings=total_bookings,
-        confirmed_bookings=confirmed_bookings,
-        pending_bookings=pending_bookings,
-        completed_bookings=completed_bookings,
-        cancelled_bookings=cancelled_bookings,
-        total_clubs=total_clubs,
-        active_clubs=active_clubs,
-        bookings_today=bookings_today,
-        bookings_this_week=bookings_this_week,
-        bookings_this_month=bookings_this_month
+        # For club admin, clients are those with bookings at the club (Club.total_clients counter)
+        counts.update(total_clients=row[6], active_clients=row[6])
+    return counts
+
+
+def _count_bookings(db: Session, admin: ClubAdmin, is_super_admin: bool, now: datetime) -> dict:
+    """Booking counts by status and period in one pass over the daily rollup"""
+    today = now.date()
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+
+    row = db.execute(period_counts_statement(
+        today, week_start, month_start,
+        club_id=None if is_super_admin else admin.club_id
+    )).one()
+    return {
+        "total_bookings": row[0],
+        "confirmed_bookings": row[1],
+        "pending_bookings": row[2],
+        "completed_bookings": row[3],
+        "cancelled_bookings": row[4],
+        "bookings_today": row[5],
+        "bookings_this_week": row[6],
+        "bookings_this_month": row[7],
+    }
+
+
+class DailyBookings(BaseModel):
+    date: str
+    bookings: int
+    completed: int
+    cancelled: int
+    revenue: int
+
+
+@router.get("/bookings-per-day", response_model=List[DailyBookings])
+async def get_bookings_per_day(
+    months: int = Query(3, ge=1, le=24),
+    admin: ClubAdmin = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Bookings, completed, cancelled and completed revenue per day for the
+    current and previous months - 1 months, from the daily rollup
+    """
+    is_super_admin = admin.role == "super_admin" and admin.club_id is None
+    if not is_super_admin and not admin.club_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    today = datetime.now().date()
+    return await daily_series(
+        db, series_start(today, months), today,
+        club_id=None if is_super_admin else admin.club_id
     )
+
+
+class BotTapStats(BaseModel):
+    date: str
+    handled: int
+    collapsed: int
+    cached: int
+
+
+@router.get("/bot-taps", response_model=List[BotTapStats])
+def get_bot_tap_stats(
+    days: int = Query(7, ge=1, le=8),
+    admin: ClubAdmin = Depends(get_current_admin)
+):
+    """
+    Booking button taps per day: handled, collapsed while in flight,
+    answered from the result cache
+    """
+    if admin.role != "super_admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return get_tap_stats(days)
@@ -122,7 +122,7 @@ async def test_dashboard(db: AsyncSession = Depends(get_db)):
 @router.post("/test-login")
 async def test_login(db: AsyncSession = Depends(get_db)):
     """Test login flow to debug 500 error"""
-    from core.password import verify_password
+    from core.password import averify_password
     from core.jwt import create_access_token
     from pydantic import BaseModel, ConfigDict
     from typing import Optional
@@ -147,7 +147,7 @@ async def test_login(db: AsyncSession = Depends(get_db)):
             return {"error": "Admin not found"}
 
         # Verify password
-        password_valid = verify_password("changeme", admin.password_hash)
+        password_valid = await averify_password("changeme", admin.password_hash)
 
         # Try to create response
         user_response = AdminUserResponse.model_validate(admin)
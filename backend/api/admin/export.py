@@ -0,0 +1,132 @@
+"""
+Admin export API: bookings and client balances as CSV or NDJSON
+
+GET /export/{kind} streams the file as rows are read (compressed on the fly
+by GZipMiddleware when the client accepts gzip). Ranges longer than
+EXPORT_STREAM_MAX_DAYS go through POST /export/{kind}/jobs, which writes a
+gzipped file in a Celery worker; poll GET /export/jobs/{job_id} and fetch
+GET /export/jobs/{job_id}/download.
+"""
+
+import os
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from fastapi.responses import FileResponse, StreamingResponse
+
+from core.config import settings
+from models import ClubAdmin
+from services.export import MEDIA_TYPES, export_filename, export_path, get_job, iter_export, update_job
+from tasks.export import export_to_file
+from .auth import get_current_admin
+
+router = APIRouter()
+
+KIND_PATTERN = "^(bookings|balances)$"
+FORMAT_PATTERN = "^(csv|ndjson)$"
+
+# Range when none is given: the last 30 days
+DEFAULT_DAYS = 30
+
+
+def _export_club(admin: ClubAdmin, club_id: Optional[int]) -> Optional[int]:
+    """Club to export: any (or all) for super_admin, own club for club admins"""
+    if admin.role == "super_admin" and admin.club_id is None:
+        return club_id
+    if not admin.club_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return admin.club_id
+
+
+def _date_range(start: Optional[date], end: Optional[date]):
+    end = end or date.today()
+    start = start or end - timedelta(days=DEFAULT_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    return start, end
+
+
+def _attachment(filename: str) -> dict:
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
+@router.get("/{kind}")
+async def export(
+    kind: str = Path(..., pattern=KIND_PATTERN),
+    fmt: str = Query("csv", alias="format", pattern=FORMAT_PATTERN),
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    club_id: Optional[int] = Query(None),
+    admin: ClubAdmin = Depends(get_current_admin)
+):
+    """
+    Stream bookings (by booking date, 'from' and 'to' inclusive) or current
+    client balances. Scoped to the admin's club.
+    """
+    club_id = _export_club(admin, club_id)
+    start, end = _date_range(start, end)
+    if kind == "bookings" and (end - start).days + 1 > settings.EXPORT_STREAM_MAX_DAYS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Ranges over {settings.EXPORT_STREAM_MAX_DAYS} days are exported by POST /export/{kind}/jobs"
+        )
+
+    return StreamingResponse(
+        iter_export(kind, fmt, club_id, start, end),
+        media_type=MEDIA_TYPES[fmt],
+        headers=_attachment(export_filename(kind, fmt, start, end))
+    )
+
+
+@router.post("/{kind}/jobs", status_code=202)
+async def create_export_job(
+    kind: str = Path(..., pattern=KIND_PATTERN),
+    fmt: str = Query("csv", alias="format", pattern=FORMAT_PATTERN),
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    club_id: Optional[int] = Query(None),
+    admin: ClubAdmin = Depends(get_current_admin)
+):
+    """Export any range in the background; the result is kept for EXPORT_TTL seconds"""
+    club_id = _export_club(admin, club_id)
+    start, end = _date_range(start, end)
+
+    job_id = uuid.uuid4().hex
+    job = update_job(
+        job_id,
+        job_id=job_id,
+        status="pending",
+        admin_id=admin.id,
+        kind=kind,
+        format=fmt,
+        filename=f"{export_filename(kind, fmt, start, end)}.gz",
+        created_at=datetime.utcnow().isoformat()
+    )
+    export_to_file.delay(job_id, kind, fmt, club_id, start.isoformat(), end.isoformat())
+    return job
+
+
+def _get_job(job_id: str, admin: ClubAdmin) -> dict:
+    job = get_job(job_id)
+    is_super_admin = admin.role == "super_admin" and admin.club_id is None
+    if not job or (job["admin_id"] != admin.id and not is_super_admin):
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}")
+async def get_export_job(job_id: str, admin: ClubAdmin = Depends(get_current_admin)):
+    """Status of an export job: pending, running, done or failed"""
+    return _get_job(job_id, admin)
+
+
+@router.get("/jobs/{job_id}/download")
+async def download_export(job_id: str, admin: ClubAdmin = Depends(get_current_admin)):
+    """Gzipped export file of a finished job"""
+    job = _get_job(job_id, admin)
+    path = export_path(job_id, job["format"])
+    if job["status"] != "done" or not os.path.exists(path):
+        raise HTTPException(status_code=409, detail=f"Export is {job['status']}")
+    return FileResponse(path, media_type="application/gzip", filename=job["filename"])
@@ -0,0 +1,21 @@
+"""
+Pagination helpers for admin list endpoints
+"""
+
+from typing import Sequence
+
+from sqlalchemy.orm import Query
+
+
+def page_total(rows: Sequence, query: Query, skip: int) -> int:
+    """
+    Total number of matching rows for a page whose last column is count(*) OVER ()
+
+    The window count comes with the page itself; a separate COUNT only runs
+    when the page is past the end and so carries no rows.
+    """
+    if rows:
+        return rows[0][-1]
+    if skip == 0:
+        return 0
+    return query.order_by(None).count()
@@ -0,0 +1,155 @@
+"""
+Admin principal cache for get_current_admin
+
+A dashboard page fires several admin API calls at once; each used to load
+its ClubAdmin row. Principals (the admin fields requests need, without the
+password hash) are now cached in two tiers:
+
+- in-process LRU keyed by (email, token iat), LOCAL_TTL seconds;
+- Redis, keyed by email, PRINCIPAL_TTL seconds.
+
+Profile and password changes and deactivation call invalidate_admin(),
+which drops the Redis entry and this process's local entries; other
+processes pick the change up within LOCAL_TTL. It also bumps a per-email
+generation, and a fill is only stored if the generation is still the one
+read before the database load, so a request that read the row just before
+the change cannot put it back for PRINCIPAL_TTL.
+
+Tokens carry a role / club_id snapshot. A principal whose role or club no
+longer matches the token is rejected, so a reassigned admin logs in again
+instead of acting on stale claims. Tokens issued before the admin's last
+password change are rejected the same way.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.cache import cache
+from models import ClubAdmin
+
+PRINCIPAL_TTL = 300
+LOCAL_TTL = 5
+LOCAL_SIZE = 1024
+
+FIELDS = ("id", "email", "name", "role", "club_id", "is_active", "created_at", "password_changed_at")
+DATETIME_FIELDS = ("created_at", "password_changed_at")
+
+_local: "OrderedDict[Tuple[str, int], Tuple[float, dict]]" = OrderedDict()
+
+
+def _key(email: str) -> str:
+    return f"admin:principal:{email}"
+
+
+def _generation_key(email: str) -> str:
+    return f"admin:principal:{email}:gen"
+
+
+def _to_principal(admin: ClubAdmin) -> dict:
+    principal = {field: getattr(admin, field) for field in FIELDS}
+    for field in DATETIME_FIELDS:
+        if principal[field] is not None:
+            principal[field] = principal[field].isoformat()
+    return principal
+
+
+def to_admin(principal: dict) -> ClubAdmin:
+    """Detached ClubAdmin carrying the principal's fields (no password hash)"""
+    fields = dict(principal)
+    for field in DATETIME_FIELDS:
+        if fields.get(field) is not None:
+            fields[field] = datetime.fromisoformat(fields[field])
+    return ClubAdmin(**fields)
+
+
+def _local_get(key: Tuple[str, int]) -> Optional[dict]:
+    entry = _local.get(key)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        _local.pop(key, None)
+        return None
+    _local.move_to_end(key)
+    return entry[1]
+
+
+def _local_set(key: Tuple[str, int], principal: dict):
+    _local[key] = (time.monotonic() + LOCAL_TTL, principal)
+    _local.move_to_end(key)
+    while len(_local) > LOCAL_SIZE:
+        _local.popitem(last=False)
+
+
+async def load_principal(db: AsyncSession, email: str, issued_at: int) -> Optional[dict]:
+    """Principal for a token's email and iat: local LRU, then Redis, then the database"""
+    local_key = (email, issued_at)
+    principal = _local_get(local_key)
+    if principal is not None:
+        return principal
+
+    raw, generation = await cache.aget_many(_key(email), _generation_key(email))
+    if raw is not None:
+        principal = json.loads(raw)
+    else:
+        admin = (await db.execute(select(ClubAdmin).where(ClubAdmin.email == email))).scalar_one_or_none()
+        if admin is None:
+            return None
+        principal = _to_principal(admin)
+        # Invalidated while loading: serve this request, cache nothing
+        if not await cache.aset_if_unchanged(
+            _key(email), json.dumps(principal), PRINCIPAL_TTL, _generation_key(email), generation
+        ):
+            return principal
+
+    _local_set(local_key, principal)
+    return principal
+
+
+def matches_token(principal: dict, payload: Dict) -> bool:
+    """False if the token's role / club_id snapshot is outdated (tokens without one always match)"""
+    for claim in ("role", "club_id"):
+        if claim in payload and payload[claim] != principal[claim]:
+            return False
+    return True
+
+
+def issued_before_password_change(principal: dict, issued_at: int) -> bool:
+    """
+    True if the token predates the last password change
+
+    iat has whole seconds, so a token from the second of the change is
+    still accepted: the one change_password() returns must be.
+    """
+    changed_at = principal.get("password_changed_at")
+    if changed_at is None:
+        return False
+    changed_at = datetime.fromisoformat(changed_at)
+    if changed_at.tzinfo is None:
+        changed_at = changed_at.replace(tzinfo=timezone.utc)
+    return issued_at < int(changed_at.timestamp())
+
+
+def _forget_local(email: str):
+    for key in [key for key in _local if key[0] == email]:
+        _local.pop(key, None)
+
+
+async def invalidate_admin(email: str):
+    """Drop a cached principal after its ClubAdmin row changed"""
+    _forget_local(email)
+    # Bumped before the delete: fills that started earlier are not stored
+    await cache.aincr(_generation_key(email), PRINCIPAL_TTL)
+    await cache.adelete(_key(email))
+
+
+def invalidate_admin_sync(email: str):
+    """invalidate_admin() for endpoints on the sync session"""
+    _forget_local(email)
+    cache.incr(_generation_key(email), PRINCIPAL_TTL)
+    cache.delete(_key(email))
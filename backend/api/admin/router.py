@@ -10,6 +10,7 @@ def setup_routers():
     from .clients import router as clients_router
     from .dashboard import router as dashboard_router
     from .debug import router as debug_router
+    from .export import router as export_router
 
     router.include_router(auth_router, prefix="/auth", tags=["admin-auth"])
     router.include_router(clubs_router, prefix="/clubs", tags=["admin-clubs"])
@@ -17,6 +18,7 @@ def setup_routers():
     router.include_router(clients_router, prefix="/clients", tags=["admin-clients"])
     router.include_router(dashboard_router, prefix="/dashboard", tags=["admin-dashboard"])
     router.include_router(debug_router, prefix="/debug", tags=["admin-debug"])
+    router.include_router(export_router, prefix="/export", tags=["admin-export"])
 
 # Setup routers on module load
 setup_routers()
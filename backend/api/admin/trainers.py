@@ -2,16 +2,19 @@
 Admin trainers management API
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy import func, select
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
 from db.session import get_db
-from models import User, UserRole, Booking, TrainerClient, Club, ClubAdmin
+from models import User, UserRole, Booking, BookingStatus, TrainerClient, Club, ClubAdmin
+from repositories.read_models import ReadModel, dump_json
+from services.search import search_users
 from .auth import get_current_admin
+from .pagination import page_total
 
 router = APIRouter()
 
@@ -78,6 +81,15 @@ class TrainerUpdate(BaseModel):
     timezone: Optional[str] = None
 
 
+class TrainerListRow(ReadModel):
+    """TrainerListItem fields, in select order"""
+
+    __slots__ = (
+        "id", "telegram_id", "name", "phone", "club_id", "club_name", "specialization",
+        "price", "rating", "is_active", "total_clients", "total_bookings", "created_at",
+    )
+
+
 @router.get("/", response_model=List[TrainerListItem])
 async def list_trainers(
     admin: ClubAdmin = Depends(get_current_admin),
@@ -93,11 +105,35 @@ async def list_trainers(
 
     For super_admin: can see all trainers and filter by club_id
     For club_admin: can only see trainers from their club
+
+    The page, club names and counters come from one column-projected query,
+    serialized without ORM instances; the total number of matching trainers
+    is returned in X-Total-Count header.
     """
     # Check permissions
     is_super_admin = admin.role == "super_admin" and admin.club_id is None
 
-    query = db.query(User).filter(User.role == UserRole.TRAINER)
+    # Clients and bookings from trainer_clients counters
+    counters = (
+        select(
+            TrainerClient.trainer_id,
+            func.count(TrainerClient.id).label("total_clients"),
+            func.sum(TrainerClient.total_bookings).label("total_bookings")
+        )
+        .group_by(TrainerClient.trainer_id)
+        .subquery()
+    )
+
+    query = db.query(
+        User.id, User.telegram_id, User.name, User.phone, User.club_id, Club.name,
+        User.specialization, User.price, User.rating, User.is_active,
+        func.coalesce(counters.c.total_clients, 0),
+        func.coalesce(counters.c.total_bookings, 0),
+        User.created_at,
+        func.count().over()
+    ).outerjoin(Club, Club.id == User.club_id).outerjoin(
+        counters, counters.c.trainer_id == User.id
+    ).filter(User.role == UserRole.TRAINER)
 
     # Apply club filter
     if not is_super_admin:
@@ -113,59 +149,22 @@ async def list_trainers(
     if is_active is not None:
         query = query.filter(User.is_active == is_active)
 
-    # Apply search filter
+    # Apply search filter, best matches first
+    order = [User.created_at.desc(), User.id.desc()]
     if search:
-        query = query.filter(
-            or_(
-                User.name.ilike(f"%{search}%"),
-                User.telegram_id.ilike(f"%{search}%"),
-                User.phone.ilike(f"%{search}%")
-            )
-        )
-
-    # Get total count before pagination
-    total_count = query.count()
+        condition, rank = search_users(db.get_bind().dialect.name, search)
+        if condition is not None:
+            query = query.filter(condition)
+            order.insert(0, rank.desc())
 
     # Apply pagination
-    trainers = query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
-
-    # Build response with additional data
-    result = []
-    for trainer in trainers:
-        # Get club name
-        club_name = None
-        if trainer.club_id:
-            club = db.query(Club).filter(Club.id == trainer.club_id).first()
-            club_name = club.name if club else None
-
-        # Count clients
-        total_clients = db.query(TrainerClient).filter(
-            TrainerClient.trainer_id == trainer.id
-        ).count()
-
-        # Count bookings
-        total_bookings = db.query(Booking).filter(
-            Booking.trainer_id == trainer.id
-        ).count()
-
-        item = TrainerListItem(
-            id=trainer.id,
-            telegram_id=trainer.telegram_id,
-            name=trainer.name,
-            phone=trainer.phone,
-            club_id=trainer.club_id,
-            club_name=club_name,
-            specialization=trainer.specialization,
-            price=trainer.price,
-            rating=trainer.rating,
-            is_active=trainer.is_active,
-            total_clients=total_clients,
-            total_bookings=total_bookings,
-            created_at=trainer.created_at
-        )
-        result.append(item)
+    rows = query.order_by(*order).offset(skip).limit(limit).all()
 
-    return result
+    return Response(
+        dump_json(TrainerListRow.from_rows(rows), TrainerListItem),
+        media_type="application/json",
+        headers={"X-Total-Count": str(page_total(rows, query, skip))}
+    )
 
 
 @router.get("/{trainer_id}", response_model=TrainerDetail)
@@ -197,24 +196,18 @@ async def get_trainer(
         club = db.query(Club).filter(Club.id == trainer.club_id).first()
         club_name = club.name if club else None
 
-    # Count clients
-    total_clients = db.query(TrainerClient).filter(
+    # Clients and bookings from trainer_clients counters; confirmed is not a counter
+    total_clients, total_bookings, completed_bookings = db.query(
+        func.count(TrainerClient.id),
+        func.coalesce(func.sum(TrainerClient.total_bookings), 0),
+        func.coalesce(func.sum(TrainerClient.completed_bookings), 0)
+    ).filter(
         TrainerClient.trainer_id == trainer.id
-    ).count()
-
-    # Count bookings
-    total_bookings = db.query(Booking).filter(
-        Booking.trainer_id == trainer.id
-    ).count()
+    ).one()
 
     confirmed_bookings = db.query(Booking).filter(
         Booking.trainer_id == trainer.id,
-        Booking.status == "confirmed"
-    ).count()
-
-    completed_bookings = db.query(Booking).filter(
-        Booking.trainer_id == trainer.id,
-        Booking.status == "completed"
+        Booking.status == BookingStatus.CONFIRMED
     ).count()
 
     return TrainerDetail(
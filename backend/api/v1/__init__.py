@@ -3,10 +3,11 @@ API v1 router
 """
 
 from fastapi import APIRouter
-from api.v1 import users, bookings, slots, trainers, debug
+from api.v1 import auth, users, bookings, slots, trainers, debug
 
 router = APIRouter()
 
+router.include_router(auth.router, prefix="/auth", tags=["auth"])
 router.include_router(users.router, prefix="/users", tags=["users"])
 router.include_router(bookings.router, prefix="/bookings", tags=["bookings"])
 router.include_router(slots.router, prefix="/slots", tags=["slots"])
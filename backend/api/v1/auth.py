@@ -0,0 +1,30 @@
+"""
+Mini-app authentication: exchange Telegram init_data for a session token
+"""
+
+from fastapi import APIRouter, Header
+from pydantic import BaseModel
+
+from core.telegram_auth import create_session_token, get_user_id_from_header
+
+router = APIRouter()
+
+
+class SessionResponse(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int
+    telegram_id: str
+
+
+@router.post("/session", response_model=SessionResponse)
+async def create_session(x_telegram_init_data: str = Header(None)):
+    """
+    Verify X-Telegram-Init-Data once and return a short-lived session token
+
+    Send it as `Authorization: Bearer <access_token>`; request a new one
+    with the same init_data when it expires.
+    """
+    telegram_id = get_user_id_from_header(x_telegram_init_data)
+    access_token, expires_in = create_session_token(telegram_id)
+    return SessionResponse(access_token=access_token, expires_in=expires_in, telegram_id=telegram_id)
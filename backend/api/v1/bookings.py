@@ -2,23 +2,23 @@
 Booking API endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta, timezone
+import datetime as dt
 import asyncio
 
-from db.session import get_db
-from models import User, UserRole, Booking, BookingStatus, Club
+from db.base import get_db
+from models import User, UserRole, Booking, BookingStatus
 from core.security import get_current_user
-from services.notifications import (
-    notify_booking_confirmed,
-    notify_booking_cancelled,
-    notify_booking_rescheduled,
-    notify_booking_created_by_trainer,
-    notify_booking_created_by_client
-)
+from repositories import bookings as booking_repo, slots as slot_repo, users as user_repo
+from repositories.read_models import dump_json
+from services.slot_finder import serialize_slot, day_candidates, get_trainer_timezone
+from services.booking_state import TRAINER, CLIENT, TRANSITIONS
+from services.snapshots import aget_user_snapshot
 
 router = APIRouter()
 
@@ -35,7 +35,8 @@ class BookingCreate(BaseModel):
 
 
 class BookingUpdate(BaseModel):
-    datetime: Optional[datetime] = None
+    # Field name shadows the datetime class inside the class body
+    datetime: Optional[dt.datetime] = None
     status: Optional[BookingStatus] = None
     notes: Optional[str] = None
     cancellation_reason: Optional[str] = None
@@ -65,11 +66,63 @@ class BookingResponse(BaseModel):
         from_attributes = True
 
 
+class CalendarDayResponse(BaseModel):
+    """Per-day booking counters for the month grid"""
+    date: str
+    pending: int = 0
+    confirmed: int = 0
+    completed: int = 0
+    cancelled: int = 0
+    no_show: int = 0
+    free: int = 0
+
+
+def booking_response(
+    booking: Booking,
+    trainer: Optional[User],
+    client: Optional[User],
+    club_name: Optional[str] = None
+) -> BookingResponse:
+    """BookingResponse with names and telegram ids of both parties"""
+    response = BookingResponse.from_orm(booking)
+    response.club_name = club_name
+    if trainer:
+        response.trainer_name = trainer.name
+        response.trainer_telegram_id = trainer.telegram_id
+        response.trainer_telegram_username = trainer.telegram_username
+        response.trainer_timezone = trainer.timezone if hasattr(trainer, 'timezone') else "Europe/Moscow"
+    if client:
+        response.client_name = client.name
+        response.client_telegram_id = client.telegram_id
+    return response
+
+
+async def slot_conflict_response(
+    db: AsyncSession,
+    trainer: User,
+    requested: datetime,
+    duration: Optional[int] = None,
+    exclude_booking_id: Optional[int] = None
+) -> JSONResponse:
+    """400 response for a taken slot with nearest free alternatives"""
+    suggestions = await slot_repo.suggest_slots(
+        db, trainer, requested,
+        duration=duration,
+        exclude_booking_id=exclude_booking_id
+    )
+    return JSONResponse(
+        status_code=400,
+        content={
+            "detail": "Time slot already booked",
+            "suggestions": [serialize_slot(slot) for slot in suggestions]
+        }
+    )
+
+
 @router.post("/", response_model=BookingResponse)
 async def create_booking(
     booking: BookingCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new booking"""
     # DETAILED LOGGING FOR DEBUGGING
@@ -82,34 +135,22 @@ async def create_booking(
     print(f"=" * 80)
 
     # Get trainer and client
-    trainer = db.query(User).filter_by(
-        telegram_id=booking.trainer_telegram_id,
-        role=UserRole.TRAINER
-    ).first()
-
+    trainer = await user_repo.get_user(db, booking.trainer_telegram_id, UserRole.TRAINER)
     if not trainer:
         raise HTTPException(status_code=404, detail="Trainer not found")
 
-    client = db.query(User).filter_by(
-        telegram_id=booking.client_telegram_id,
-        role=UserRole.CLIENT
-    ).first()
-
+    client = await user_repo.get_user(db, booking.client_telegram_id, UserRole.CLIENT)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
 
     # Check for conflicts
-    existing = db.query(Booking).filter(
-        Booking.trainer_id == trainer.id,
-        Booking.datetime == booking.datetime,
-        Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.PENDING])
-    ).first()
-
-    if existing:
-        raise HTTPException(status_code=400, detail="Time slot already booked")
+    if await booking_repo.find_conflict(db, trainer.id, booking.datetime):
+        return await slot_conflict_response(db, trainer, booking.datetime, booking.duration)
 
-    # Create booking
-    new_booking = Booking(
+    # Notifications based on who created the booking (TZ 10.6) are sent by the
+    # notifications consumer from the event committed with the booking
+    created_by = booking.created_by if booking.created_by in ("trainer", "client") else None
+    new_booking = await booking_repo.add_booking(db, Booking(
         trainer_id=trainer.id,
         client_id=client.id,
         club_id=trainer.club_id,
@@ -118,39 +159,18 @@ async def create_booking(
         price=booking.price or trainer.price,
         status=BookingStatus.PENDING,
         notes=booking.notes
-    )
-
-    db.add(new_booking)
-    db.commit()
-    db.refresh(new_booking)
+    ), created_by)
 
-    # Send notifications based on who created the booking (TZ 10.6)
     print(f"DEBUG: Creating booking with created_by='{booking.created_by}', booking_id={new_booking.id}")
-
-    if booking.created_by == "trainer":
-        # No notifications sent (TZ 10.6: first reminder = first notification)
-        print(f"DEBUG: Trainer created booking - NO notifications sent")
-        background_tasks.add_task(notify_booking_created_by_trainer, new_booking, db)
-    elif booking.created_by == "client":
-        # Send notification to trainer for approval
-        print(f"DEBUG: Client created booking - sending notification to trainer")
-        background_tasks.add_task(notify_booking_created_by_client, new_booking, db)
-    else:
+    if created_by is None:
         # Should never happen - log error and do NOT send any notifications
         print(f"ERROR: Unknown created_by value: '{booking.created_by}' for booking {new_booking.id}")
         print(f"ERROR: No notifications will be sent (correct behavior per TZ 10.6)")
-        # Do NOT send any notifications if created_by is unknown
-        pass
 
-    response = BookingResponse.from_orm(new_booking)
-    response.trainer_name = trainer.name
-    response.client_name = client.name
-    response.trainer_telegram_id = trainer.telegram_id
-    response.client_telegram_id = client.telegram_id
-    response.trainer_telegram_username = trainer.telegram_username
-    response.trainer_timezone = trainer.timezone if trainer and hasattr(trainer, 'timezone') else "Europe/Moscow"
+    await db.commit()
+    await db.refresh(new_booking)
 
-    return response
+    return booking_response(new_booking, trainer, client)
 
 
 @router.get("/trainer/{telegram_id}", response_model=List[BookingResponse])
@@ -159,46 +179,71 @@ async def get_trainer_bookings(
     status: Optional[BookingStatus] = None,
     from_date: Optional[datetime] = None,
     to_date: Optional[datetime] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all bookings for a trainer"""
-    trainer = db.query(User).filter_by(
-        telegram_id=telegram_id,
-        role=UserRole.TRAINER
-    ).first()
+    trainer = await aget_user_snapshot(db, telegram_id, UserRole.TRAINER)
+    if not trainer:
+        raise HTTPException(status_code=404, detail="Trainer not found")
 
+    criteria = [Booking.trainer_id == trainer.id]
+    if status:
+        criteria.append(Booking.status == status)
+    if from_date:
+        criteria.append(Booking.datetime >= from_date)
+    if to_date:
+        criteria.append(Booking.datetime <= to_date)
+
+    # Names and club come from the same query, serialized without ORM instances
+    rows = await booking_repo.list_booking_rows(db, *criteria)
+    return Response(dump_json(rows, BookingResponse), media_type="application/json")
+
+
+@router.get("/trainer/{telegram_id}/calendar", response_model=List[CalendarDayResponse])
+async def get_trainer_calendar(
+    telegram_id: str,
+    month: str = Query(..., pattern=r"^\d{4}-\d{2}$", description="Month (YYYY-MM)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get per-day booking counts and free capacity for a month"""
+    trainer = await user_repo.get_user(db, telegram_id, UserRole.TRAINER)
     if not trainer:
         raise HTTPException(status_code=404, detail="Trainer not found")
 
-    query = db.query(Booking).filter(Booking.trainer_id == trainer.id)
+    try:
+        first_day = datetime.strptime(month, "%Y-%m").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="month must be in YYYY-MM format")
+    next_month = (first_day + timedelta(days=32)).replace(day=1)
 
-    if status:
-        query = query.filter(Booking.status == status)
+    # Month boundaries and day grouping in trainer's timezone
+    tz = get_trainer_timezone(trainer)
+    month_start = datetime.combine(first_day, datetime.min.time(), tzinfo=tz)
+    month_end = datetime.combine(next_month, datetime.min.time(), tzinfo=tz)
 
-    if from_date:
-        query = query.filter(Booking.datetime >= from_date)
+    rows = await booking_repo.count_by_local_day(db, trainer.id, month_start, month_end, tz.key)
 
-    if to_date:
-        query = query.filter(Booking.datetime <= to_date)
+    counts = {}
+    for day, status, count in rows:
+        day_key = day.date() if isinstance(day, datetime) else day
+        counts.setdefault(day_key, {})[status.value] = count
 
-    bookings = query.order_by(Booking.datetime.asc()).all()
+    # Free capacity = slots in work hours minus active bookings
+    work_hours = await slot_repo.get_work_hours(db, trainer)
+    duration = trainer.session_duration or 60
 
-    # Add names to response
     result = []
-    for booking in bookings:
-        client = db.query(User).filter_by(id=booking.client_id).first()
-        response = BookingResponse.from_orm(booking)
-        response.trainer_name = trainer.name
-        response.client_name = client.name if client else None
-        response.trainer_telegram_id = trainer.telegram_id
-        response.trainer_telegram_username = trainer.telegram_username
-        response.trainer_timezone = trainer.timezone if trainer and hasattr(trainer, 'timezone') else "Europe/Moscow"
-        if client:
-            response.client_telegram_id = client.telegram_id
-        if booking.club_id:
-            club = db.query(Club).filter_by(id=booking.club_id).first()
-            response.club_name = club.name if club else None
-        result.append(response)
+    current = first_day
+    while current < next_month:
+        day_counts = counts.get(current, {})
+        capacity = len(day_candidates(current, work_hours, duration, tz))
+        taken = day_counts.get("pending", 0) + day_counts.get("confirmed", 0)
+        result.append(CalendarDayResponse(
+            date=current.isoformat(),
+            free=max(0, capacity - taken),
+            **day_counts
+        ))
+        current += timedelta(days=1)
 
     return result
 
@@ -208,80 +253,35 @@ async def get_client_bookings(
     telegram_id: str,
     status: Optional[BookingStatus] = None,
     upcoming_only: bool = False,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all bookings for a client"""
-    client = db.query(User).filter_by(
-        telegram_id=telegram_id,
-        role=UserRole.CLIENT
-    ).first()
-
+    client = await aget_user_snapshot(db, telegram_id, UserRole.CLIENT)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
 
-    query = db.query(Booking).filter(Booking.client_id == client.id)
-
+    criteria = [Booking.client_id == client.id]
     if status:
-        query = query.filter(Booking.status == status)
-
+        criteria.append(Booking.status == status)
     if upcoming_only:
-        query = query.filter(
-            Booking.datetime > datetime.now(),
-            Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.PENDING])
-        )
-
-    bookings = query.order_by(Booking.datetime.asc()).all()
-
-    # Add names to response
-    result = []
-    for booking in bookings:
-        trainer = db.query(User).filter_by(id=booking.trainer_id).first()
-        response = BookingResponse.from_orm(booking)
-        response.trainer_name = trainer.name if trainer else None
-        response.client_name = client.name
-        response.client_telegram_id = client.telegram_id
-        if trainer:
-            response.trainer_telegram_id = trainer.telegram_id
-            response.trainer_telegram_username = trainer.telegram_username
-            response.trainer_timezone = trainer.timezone if hasattr(trainer, 'timezone') else "Europe/Moscow"
-        if booking.club_id:
-            club = db.query(Club).filter_by(id=booking.club_id).first()
-            response.club_name = club.name if club else None
-        result.append(response)
+        criteria.append(Booking.datetime > datetime.now())
+        criteria.append(Booking.status.in_(booking_repo.ACTIVE_STATUSES))
 
-    return result
+    rows = await booking_repo.list_booking_rows(db, *criteria)
+    return Response(dump_json(rows, BookingResponse), media_type="application/json")
 
 
 @router.get("/{booking_id}", response_model=BookingResponse)
 async def get_booking(
     booking_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get booking details"""
-    booking = db.query(Booking).filter_by(id=booking_id).first()
-
-    if not booking:
+    row = await booking_repo.get_booking_details(db, booking_id)
+    if not row:
         raise HTTPException(status_code=404, detail="Booking not found")
 
-    trainer = db.query(User).filter_by(id=booking.trainer_id).first()
-    client = db.query(User).filter_by(id=booking.client_id).first()
-
-    response = BookingResponse.from_orm(booking)
-    response.trainer_name = trainer.name if trainer else None
-    response.client_name = client.name if client else None
-
-    if trainer:
-        response.trainer_telegram_id = trainer.telegram_id
-        response.trainer_telegram_username = trainer.telegram_username
-        response.trainer_timezone = trainer.timezone if hasattr(trainer, 'timezone') else "Europe/Moscow"
-    if client:
-        response.client_telegram_id = client.telegram_id
-
-    if booking.club_id:
-        club = db.query(Club).filter_by(id=booking.club_id).first()
-        response.club_name = club.name if club else None
-
-    return response
+    return booking_response(*row)
 
 
 @router.put("/{booking_id}", response_model=BookingResponse)
@@ -289,16 +289,15 @@ async def update_booking(
     booking_id: int,
     update_data: BookingUpdate,
     telegram_id: str = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update booking (confirm, cancel, reschedule)"""
-    booking = db.query(Booking).filter_by(id=booking_id).first()
-
+    booking = await booking_repo.get_booking(db, booking_id)
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
 
     # Check permissions
-    user = db.query(User).filter_by(telegram_id=telegram_id).first()
+    user = await user_repo.get_user(db, telegram_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -306,111 +305,85 @@ async def update_booking(
     if user.id != booking.trainer_id and user.id != booking.client_id:
         raise HTTPException(status_code=403, detail="Not authorized to update this booking")
 
+    actor = TRAINER if user.id == booking.trainer_id else CLIENT
+
     # Update fields
+    values = {}
     if update_data.datetime:
         # Check for conflicts when rescheduling
-        existing = db.query(Booking).filter(
-            Booking.trainer_id == booking.trainer_id,
-            Booking.datetime == update_data.datetime,
-            Booking.id != booking_id,
-            Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.PENDING])
-        ).first()
+        if await booking_repo.find_conflict(db, booking.trainer_id, update_data.datetime, exclude_booking_id=booking_id):
+            trainer = user if actor == TRAINER else await db.get(User, booking.trainer_id)
+            return await slot_conflict_response(
+                db, trainer, update_data.datetime, booking.duration,
+                exclude_booking_id=booking_id
+            )
 
-        if existing:
-            raise HTTPException(status_code=400, detail="Time slot already booked")
-
-        booking.datetime = update_data.datetime
-
-    if update_data.status:
-        booking.status = update_data.status
-
-        if update_data.status == BookingStatus.CONFIRMED:
-            booking.confirmed_at = datetime.now()
-        elif update_data.status == BookingStatus.CANCELLED:
-            booking.cancelled_at = datetime.now()
-            if update_data.cancellation_reason:
-                booking.cancellation_reason = update_data.cancellation_reason
-        elif update_data.status == BookingStatus.COMPLETED:
-            booking.completed_at = datetime.now()
+        values["datetime"] = update_data.datetime
 
     if update_data.notes:
-        booking.notes = update_data.notes
-
-    db.commit()
-    db.refresh(booking)
+        values["notes"] = update_data.notes
 
-    # Send reschedule notification if datetime was changed
-    if old_datetime and update_data.datetime:
-        background_tasks.add_task(
-            notify_booking_rescheduled,
-            booking, old_datetime, db, is_trainer
+    if update_data.status:
+        # Status and other fields in one conditional statement; the transition event drives notifications
+        change = await booking_repo.transition(
+            db, booking_id, update_data.status,
+            actor=actor,
+            reason=update_data.cancellation_reason,
+            values=values
         )
+        if not change:
+            await db.refresh(booking)
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot change booking status from {booking.status.value} to {update_data.status.value}"
+            )
+    else:
+        # Reschedule notification is sent from the event
+        await booking_repo.reschedule(db, booking, values, actor)
 
-    trainer = db.query(User).filter_by(id=booking.trainer_id).first()
-    client = db.query(User).filter_by(id=booking.client_id).first()
+    await db.commit()
+    await db.refresh(booking)
 
-    response = BookingResponse.from_orm(booking)
-    response.trainer_name = trainer.name if trainer else None
-    response.client_name = client.name if client else None
-
-    if trainer:
-        response.trainer_telegram_id = trainer.telegram_id
-        response.trainer_telegram_username = trainer.telegram_username
-        response.trainer_timezone = trainer.timezone if hasattr(trainer, 'timezone') else "Europe/Moscow"
-    if client:
-        response.client_telegram_id = client.telegram_id
-
-    return response
+    return booking_response(*await booking_repo.get_booking_details(db, booking_id))
 
 
 @router.put("/{booking_id}/confirm")
 async def confirm_booking(
     booking_id: int,
     telegram_id: str = Query(...),
-    background_tasks: BackgroundTasks = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Confirm booking by client (no balance check - can go negative)"""
-    booking = db.query(Booking).filter_by(id=booking_id).first()
-
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-
     # Get client
-    client = db.query(User).filter_by(telegram_id=telegram_id).first()
+    client = await user_repo.get_user(db, telegram_id)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
 
-    # Check if user is the client of this booking
-    if client.id != booking.client_id:
-        raise HTTPException(status_code=403, detail="Only client can confirm this booking")
-
-    # Check if already confirmed
-    if booking.status == BookingStatus.CONFIRMED:
-        raise HTTPException(status_code=400, detail="Booking is already confirmed")
+    # Confirm booking (no balance check - balance can go negative)
+    change = await booking_repo.transition(
+        db, booking_id, BookingStatus.CONFIRMED,
+        Booking.client_id == client.id,
+        actor=CLIENT
+    )
 
-    # Check if status allows confirmation
-    if booking.status != BookingStatus.PENDING:
+    if not change:
+        # Rejected: find out why
+        booking = await booking_repo.get_booking(db, booking_id)
+        if not booking:
+            raise HTTPException(status_code=404, detail="Booking not found")
+        if client.id != booking.client_id:
+            raise HTTPException(status_code=403, detail="Only client can confirm this booking")
+        if booking.status == BookingStatus.CONFIRMED:
+            raise HTTPException(status_code=400, detail="Booking is already confirmed")
         raise HTTPException(
             status_code=400,
             detail=f"Cannot confirm booking with status {booking.status}"
         )
 
-    # Confirm booking (no balance check - balance can go negative)
-    booking.status = BookingStatus.CONFIRMED
-    booking.confirmed_at = datetime.now()
-
-    db.commit()
-    db.refresh(booking)
-
-    # Send notification to trainer
-    if background_tasks:
-        background_tasks.add_task(
-            notify_booking_confirmed,
-            booking, db
-        )
+    # Trainer is notified from the transition event
+    await db.commit()
 
-    return {"message": "Booking confirmed successfully", "booking_id": booking.id}
+    return {"message": "Booking confirmed successfully", "booking_id": booking_id}
 
 
 @router.delete("/{booking_id}")
@@ -418,16 +391,15 @@ async def delete_booking(
     booking_id: int,
     telegram_id: str = Query(...),
     reason: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Cancel booking"""
-    booking = db.query(Booking).filter_by(id=booking_id).first()
-
+    booking = await booking_repo.get_booking(db, booking_id)
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
 
     # Check permissions
-    user = db.query(User).filter_by(telegram_id=telegram_id).first()
+    user = await user_repo.get_user(db, telegram_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -435,17 +407,29 @@ async def delete_booking(
     if user.id != booking.trainer_id and user.id != booking.client_id:
         raise HTTPException(status_code=403, detail="Not authorized to cancel this booking")
 
-    # Check if can be cancelled
-    if not booking.can_cancel:
+    # Cancellable status and 24 hour rule are checked by the update itself
+    change = await booking_repo.transition(
+        db, booking_id, BookingStatus.CANCELLED,
+        Booking.datetime > datetime.now(timezone.utc) + timedelta(hours=24),
+        actor=TRAINER if user.id == booking.trainer_id else CLIENT,
+        reason=reason
+    )
+    if not change:
+        # Rejected: find out why (the loaded booking was expired by the update)
+        await db.refresh(booking, ["status"])
+        if booking.status == BookingStatus.CANCELLED:
+            raise HTTPException(status_code=400, detail="Booking is already cancelled")
+        if booking.status not in TRANSITIONS[BookingStatus.CANCELLED]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot cancel booking with status {booking.status}"
+            )
         raise HTTPException(
             status_code=400,
             detail="Booking cannot be cancelled (less than 24 hours before training)"
         )
 
-    booking.status = BookingStatus.CANCELLED
-    booking.cancelled_at = datetime.now()
-    booking.cancellation_reason = reason
-
-    db.commit()
+    # Other party is notified from the transition event
+    await db.commit()
 
-    return {"message": "Booking cancelled successfully"}
\ No newline at end of file
+    return {"message": "Booking cancelled successfully"}
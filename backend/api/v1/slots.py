@@ -10,6 +10,8 @@ from sqlalchemy import and_, or_
 from db.session import SessionLocal
 from models import User, UserRole, Schedule, TimeSlot, DayOfWeek, SlotStatus
 from schemas.slot import SlotCreate, SlotUpdate, SlotResponse
+from services.slot_finder import suggest_slots, serialize_slot
+from services.bootstrap import serialize_schedule
 
 router = APIRouter()
 
@@ -37,46 +39,16 @@ def get_trainer_schedule(
     if not trainer:
         raise HTTPException(status_code=404, detail="Trainer not found")
 
-    # Get schedule from trainer settings (new approach)
+    # Settings-based schedule (new approach) needs no Schedule rows
     if trainer.settings and 'work_hours' in trainer.settings:
-        work_hours = trainer.settings['work_hours']
-        schedule_data = []
-
-        for day_name, day_info in work_hours.items():
-            schedule_data.append({
-                "id": None,  # No database ID for settings-based schedule
-                "day_of_week": day_name.capitalize(),
-                "start_time": day_info.get('start', '09:00'),
-                "end_time": day_info.get('end', '18:00'),
-                "is_recurring": True,
-                "is_active": day_info.get('is_working', True),
-                "is_break": False,
-                "has_break": day_info.get('hasBreak', False)  # Lunch break flag
-            })
-
-        return schedule_data
+        return serialize_schedule(trainer, [])
 
     # Fallback: Get schedule from Schedule table (old approach)
     schedule = db.query(Schedule).filter_by(
         trainer_id=trainer.id
     ).order_by(Schedule.day_of_week, Schedule.start_time).all()
 
-    if schedule:
-        return [
-            {
-                "id": s.id,
-                "day_of_week": s.day_of_week,
-                "start_time": s.start_time.strftime("%H:%M"),
-                "end_time": s.end_time.strftime("%H:%M"),
-                "is_recurring": s.is_recurring,
-                "is_active": s.is_active,
-                "is_break": False
-            }
-            for s in schedule
-        ]
-
-    # Default schedule if nothing found
-    return []
+    return serialize_schedule(trainer, schedule)
 
 
 @router.get("/trainer/{telegram_id}/slots")
@@ -121,6 +93,36 @@ def get_trainer_slots(
     ]
 
 
+@router.get("/trainer/{telegram_id}/nearest")
+def get_nearest_free_slots(
+    telegram_id: str,
+    around: datetime = Query(..., description="Requested datetime (ISO 8601)"),
+    k: int = Query(3, ge=1, le=10, description="Number of suggestions"),
+    duration: Optional[int] = Query(None, ge=30, le=240, description="Session duration in minutes"),
+    exclude_booking_id: Optional[int] = Query(None, description="Booking being rescheduled"),
+    db: Session = Depends(get_db)
+):
+    """Get K nearest free start times around requested datetime"""
+
+    # Get trainer
+    trainer = db.query(User).filter_by(
+        telegram_id=telegram_id,
+        role=UserRole.TRAINER
+    ).first()
+
+    if not trainer:
+        raise HTTPException(status_code=404, detail="Trainer not found")
+
+    slots = suggest_slots(
+        db, trainer, around,
+        k=k,
+        duration=duration,
+        exclude_booking_id=exclude_booking_id
+    )
+
+    return [serialize_slot(slot) for slot in slots]
+
+
 @router.post("/trainer/{telegram_id}/schedule")
 def add_schedule_slot(
     telegram_id: str,
@@ -2,18 +2,47 @@
 Trainers API endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy import select, func
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 from pydantic import BaseModel
 
 from db.session import get_db
-from models import User, UserRole, Booking, BookingStatus, Club
+from repositories.read_models import ReadModel, dump_json
+from models import User, UserRole, TrainerClient, Club
+from services.search import search, set_fuzzy_threshold
+from services.snapshots import (
+    TrainerProfile, UserSnapshot, get_club_snapshot, get_user_snapshot, trainer_profiles
+)
 
 router = APIRouter()
 
 
+def _trainer_counters(db: Session, trainer_ids: List[int]) -> dict:
+    """
+    Clients and completed sessions per trainer from trainer_clients counters.
+
+    Returns:
+        Dict trainer_id -> (total_clients, total_sessions)
+    """
+    if not trainer_ids:
+        return {}
+    rows = db.execute(
+        select(
+            TrainerClient.trainer_id,
+            func.count(TrainerClient.id),
+            func.coalesce(func.sum(TrainerClient.completed_bookings), 0)
+        )
+        .where(
+            TrainerClient.trainer_id.in_(trainer_ids),
+            TrainerClient.is_active == True
+        )
+        .group_by(TrainerClient.trainer_id)
+    ).all()
+    return {trainer_id: (clients, sessions) for trainer_id, clients, sessions in rows}
+
+
 class TrainerPublicInfo(BaseModel):
     id: int
     telegram_id: str
@@ -33,15 +62,50 @@ class TrainerPublicInfo(BaseModel):
         from_attributes = True
 
 
+class TrainerRow(ReadModel):
+    """Trainer columns behind TrainerPublicInfo"""
+
+    __slots__ = (
+        "id", "telegram_id", "telegram_username", "name", "specialization", "price",
+        "description", "rating", "club_id", "is_active", "club_name",
+    )
+
+
+def _public_dict(trainer: Union[User, UserSnapshot, TrainerRow], club_name: Optional[str], counters: dict) -> dict:
+    """Fields of TrainerPublicInfo"""
+    total_clients, total_sessions = counters.get(trainer.id, (0, 0))
+
+    # Convert rating from 0-50 to 0.0-5.0
+    rating = float(trainer.rating / 10) if trainer.rating else None
+
+    return {
+        "id": trainer.id,
+        "telegram_id": trainer.telegram_id,
+        "telegram_username": trainer.telegram_username,
+        "name": trainer.name,
+        "specialization": trainer.specialization,
+        "price": trainer.price,
+        "description": trainer.description,
+        "rating": rating,
+        "club_id": trainer.club_id,
+        "club_name": club_name,
+        "total_clients": total_clients,
+        "total_sessions": total_sessions,
+        "is_active": trainer.is_active
+    }
+
+
 @router.get("/", response_model=List[TrainerPublicInfo])
 def get_trainers(
     club_id: Optional[int] = None,
     is_active: bool = True,
     db: Session = Depends(get_db)
-) -> List[TrainerPublicInfo]:
+):
     """Get list of all trainers"""
 
-    query = db.query(User).filter(
+    query = db.query(
+        *[getattr(User, name) for name in TrainerRow.__slots__[:-1]], Club.name
+    ).outerjoin(Club, Club.id == User.club_id).filter(
         User.role == UserRole.TRAINER,
         User.is_active == is_active
     )
@@ -49,97 +113,68 @@ def get_trainers(
     if club_id:
         query = query.filter(User.club_id == club_id)
 
-    trainers = query.all()
-
-    response = []
-    for trainer in trainers:
-        # Get trainer statistics
-        total_clients = db.query(func.count(func.distinct(Booking.client_id))).filter(
-            Booking.trainer_id == trainer.id,
-            Booking.status.in_([BookingStatus.COMPLETED, BookingStatus.CONFIRMED])
-        ).scalar() or 0
-
-        total_sessions = db.query(func.count(Booking.id)).filter(
-            Booking.trainer_id == trainer.id,
-            Booking.status == BookingStatus.COMPLETED
-        ).scalar() or 0
-
-        # Get club name if exists
-        club_name = None
-        if trainer.club_id:
-            club = db.query(Club).filter(Club.id == trainer.club_id).first()
-            club_name = club.name if club else None
-
-        # Convert rating from 0-50 to 0.0-5.0
-        rating = float(trainer.rating / 10) if trainer.rating else None
-
-        trainer_info = TrainerPublicInfo(
-            id=trainer.id,
-            telegram_id=trainer.telegram_id,
-            telegram_username=trainer.telegram_username,
-            name=trainer.name,
-            specialization=trainer.specialization,
-            price=trainer.price,
-            description=trainer.description,
-            rating=rating,
-            club_id=trainer.club_id,
-            club_name=club_name,
-            total_clients=total_clients,
-            total_sessions=total_sessions,
-            is_active=trainer.is_active
-        )
-        response.append(trainer_info)
+    trainers = TrainerRow.from_rows(query.all())
+    counters = _trainer_counters(db, [trainer.id for trainer in trainers])
 
-    return response
+    return Response(
+        dump_json((_public_dict(trainer, trainer.club_name, counters) for trainer in trainers), TrainerPublicInfo),
+        media_type="application/json"
+    )
 
 
-@router.get("/{telegram_id}", response_model=TrainerPublicInfo)
-def get_trainer(
-    telegram_id: str,
+@router.get("/search", response_model=List[TrainerPublicInfo])
+def search_trainers(
+    q: str = Query(..., min_length=2, max_length=100),
+    club_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db)
-) -> TrainerPublicInfo:
-    """Get trainer details by telegram ID"""
-
-    trainer = db.query(User).filter(
-        User.telegram_id == telegram_id,
-        User.role == UserRole.TRAINER
-    ).first()
+) -> List[TrainerPublicInfo]:
+    """
+    Search active trainers by name, username or specialization
+
+    Public, so phones are not searchable here (admin lists only). Tolerates typos on PostgreSQL (pg_trgm word similarity); best matches first.
+    """
+    dialect_name = db.get_bind().dialect.name
+    condition, rank = search(
+        dialect_name, q,
+        text_columns=(User.name, User.telegram_username, User.specialization),
+        fuzzy=True
+    )
+    if condition is None:
+        return []
+    set_fuzzy_threshold(db)
 
-    if not trainer:
-        raise HTTPException(status_code=404, detail="Trainer not found")
+    query = db.query(User, Club.name).outerjoin(Club, Club.id == User.club_id).filter(
+        User.role == UserRole.TRAINER,
+        User.is_active == True,
+        condition
+    )
+    if club_id:
+        query = query.filter(User.club_id == club_id)
 
-    # Get trainer statistics
-    total_clients = db.query(func.count(func.distinct(Booking.client_id))).filter(
-        Booking.trainer_id == trainer.id,
-        Booking.status.in_([BookingStatus.COMPLETED, BookingStatus.CONFIRMED])
-    ).scalar() or 0
+    rows = query.order_by(rank.desc(), User.rating.desc(), User.id).limit(limit).all()
+    counters = _trainer_counters(db, [trainer.id for trainer, _ in rows])
 
-    total_sessions = db.query(func.count(Booking.id)).filter(
-        Booking.trainer_id == trainer.id,
-        Booking.status == BookingStatus.COMPLETED
-    ).scalar() or 0
+    return [TrainerPublicInfo(**_public_dict(trainer, club_name, counters)) for trainer, club_name in rows]
 
-    # Get club name if exists
-    club_name = None
-    if trainer.club_id:
-        club = db.query(Club).filter(Club.id == trainer.club_id).first()
-        club_name = club.name if club else None
 
-    # Convert rating from 0-50 to 0.0-5.0
-    rating = float(trainer.rating / 10) if trainer.rating else None
+@router.get("/{telegram_id}", response_model=TrainerPublicInfo)
+def get_trainer(
+    telegram_id: str,
+    db: Session = Depends(get_db)
+) -> TrainerPublicInfo:
+    """Get trainer details by telegram ID (cached card, see services.snapshots)"""
+
+    def load() -> Optional[TrainerProfile]:
+        trainer = get_user_snapshot(db, telegram_id, UserRole.TRAINER)
+        if not trainer:
+            return None
+        club = get_club_snapshot(db, trainer.club_id)
+        counters = _trainer_counters(db, [trainer.id])
+        return TrainerProfile(**_public_dict(trainer, club.name if club else None, counters))
+
+    profile = trainer_profiles.get_or_load(telegram_id, load)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Trainer not found")
 
-    return TrainerPublicInfo(
-        id=trainer.id,
-        telegram_id=trainer.telegram_id,
-        telegram_username=trainer.telegram_username,
-        name=trainer.name,
-        specialization=trainer.specialization,
-        price=trainer.price,
-        description=trainer.description,
-        rating=rating,
-        club_id=trainer.club_id,
-        club_name=club_name,
-        total_clients=total_clients,
-        total_sessions=total_sessions,
-        is_active=trainer.is_active
-    )
\ No newline at end of file
+    return TrainerPublicInfo(**profile._asdict())
@@ -2,15 +2,22 @@
 User API endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
-from db.session import get_db
-from models import User, UserRole, TrainerClient, Booking, BookingStatus
+from db.base import get_db
+from models import User, UserRole
 from core.security import get_current_user
+from api.v1.bookings import BookingResponse
+from repositories import users as user_repo, trainer_clients as trainer_client_repo
+from services.bootstrap import build_trainer_bootstrap, build_client_bootstrap
+from services.client_stats import serialize_client_row
+from services.booking_stats import daily_series, series_start
+from services.slot_finder import get_trainer_timezone
+from services.snapshots import aget_user_snapshot
 
 router = APIRouter()
 
@@ -65,6 +72,7 @@ class TrainerWithBalanceResponse(BaseModel):
     timezone: Optional[str] = "Europe/Moscow"
     # Balance from TrainerClient relationship
     balance: int
+    remaining_trainings: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -96,6 +104,20 @@ class ClientWithBalanceResponse(BaseModel):
         from_attributes = True
 
 
+class TrainerBootstrapResponse(BaseModel):
+    """Everything the trainer mini app loads on startup"""
+    trainer: TrainerResponse
+    schedule: List[dict]  # Same format as GET /slots/trainer/{id}/schedule
+    bookings: List[BookingResponse]  # Date tabs window in trainer's timezone
+    clients: List[ClientWithBalanceResponse]
+
+
+class ClientBootstrapResponse(BaseModel):
+    """Everything the client mini app loads on startup"""
+    client: ClientResponse
+    bookings: List[BookingResponse]
+
+
 class TopupBalanceRequest(BaseModel):
     """Request model for topping up client balance"""
     amount: int
@@ -131,10 +153,10 @@ class TrainerSettingsUpdate(BaseModel):
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
     telegram_id: str = Query(..., description="Telegram user ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get current user information"""
-    user = db.query(User).filter_by(telegram_id=telegram_id).first()
+    user = await user_repo.get_user(db, telegram_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -143,26 +165,16 @@ async def get_current_user_info(
 @router.get("/trainer/{telegram_id}", response_model=TrainerResponse)
 async def get_trainer_info(
     telegram_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get trainer information with statistics"""
-    trainer = db.query(User).filter_by(
-        telegram_id=telegram_id,
-        role=UserRole.TRAINER
-    ).first()
+    trainer = await user_repo.get_user(db, telegram_id, UserRole.TRAINER)
 
     if not trainer:
         raise HTTPException(status_code=404, detail="Trainer not found")
 
-    # Get statistics
-    total_clients = db.query(TrainerClient).filter_by(
-        trainer_id=trainer.id,
-        is_active=True
-    ).count()
-
-    total_bookings = db.query(Booking).filter_by(
-        trainer_id=trainer.id
-    ).count()
+    # Get statistics from trainer_clients counters
+    total_clients, total_bookings = await user_repo.get_trainer_stats(db, trainer.id)
 
     response = TrainerResponse.from_orm(trainer)
     response.total_clients = total_clients
@@ -171,138 +183,98 @@ async def get_trainer_info(
     return response
 
 
+@router.get("/trainer/{telegram_id}/stats/daily")
+async def get_trainer_daily_stats(
+    telegram_id: str,
+    months: int = Query(3, ge=1, le=24),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Trainer's bookings per day (total, completed, cancelled, completed revenue)
+    for the current and previous months - 1 months, from the daily rollup
+    """
+    trainer = await aget_user_snapshot(db, telegram_id, UserRole.TRAINER)
+    if not trainer:
+        raise HTTPException(status_code=404, detail="Trainer not found")
+
+    today = datetime.now(get_trainer_timezone(trainer)).date()
+    return await daily_series(db, series_start(today, months), today, trainer_id=trainer.id)
+
+
 @router.get("/trainer/{telegram_id}/clients", response_model=List[ClientWithBalanceResponse])
 async def get_trainer_clients(
     telegram_id: str,
-    db: Session = Depends(get_db)
+    response: Response,
+    sort: str = Query("created", pattern="^(created|name|balance|last_booking|spent)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all clients of a trainer with balance and statistics"""
-    from datetime import datetime, timedelta, timezone
+    """
+    Get clients of a trainer with balance and statistics
 
-    trainer = db.query(User).filter_by(
-        telegram_id=telegram_id,
-        role=UserRole.TRAINER
-    ).first()
+    Stats for all clients are computed in one grouped query. Total number of
+    clients (before limit/offset) is returned in X-Total-Count header.
+    """
+    trainer = await aget_user_snapshot(db, telegram_id, UserRole.TRAINER)
 
     if not trainer:
         raise HTTPException(status_code=404, detail="Trainer not found")
 
-    # Get all trainer-client relationships
-    relationships = db.query(TrainerClient).filter_by(
-        trainer_id=trainer.id,
-        is_active=True
-    ).all()
-
-    # Build response with balance and stats
-    result = []
-    for rel in relationships:
-        client = db.query(User).filter_by(id=rel.client_id).first()
-        if not client:
-            continue
-
-        # Calculate total spent (sum of all charged bookings)
-        charged_bookings = db.query(Booking).filter_by(
-            trainer_id=trainer.id,
-            client_id=client.id,
-            is_charged=True
-        ).all()
-        total_spent = sum(b.price or 0 for b in charged_bookings)
-
-        # Calculate remaining trainings (balance / trainer price)
-        trainer_price = trainer.price or 2000
-        remaining_trainings = max(0, rel.balance // trainer_price) if trainer_price > 0 else 0
-
-        # Calculate avg bookings per month based on completed bookings
-        if rel.created_at:
-            # Use timezone-aware datetime for comparison
-            now = datetime.now(timezone.utc)
-            # Handle both timezone-aware and naive datetimes
-            created_at = rel.created_at
-            if created_at.tzinfo is None:
-                # If created_at is naive, make it aware (assume UTC)
-                from datetime import timezone as tz
-                created_at = created_at.replace(tzinfo=tz.utc)
-
-            months_active = max(1, (now - created_at).days / 30)
-
-            # Count confirmed bookings (not just completed)
-            confirmed_count = db.query(Booking).filter(
-                Booking.trainer_id == trainer.id,
-                Booking.client_id == client.id,
-                Booking.status == BookingStatus.CONFIRMED
-            ).count()
-
-            avg_bookings_per_month = round(confirmed_count / months_active, 1)
-        else:
-            avg_bookings_per_month = 0.0
-
-        client_data = ClientWithBalanceResponse(
-            id=client.id,
-            telegram_id=client.telegram_id,
-            telegram_username=client.telegram_username,
-            name=client.name,
-            phone=client.phone,
-            email=client.email,
-            balance=rel.balance,
-            remaining_trainings=remaining_trainings,
-            total_bookings=rel.total_bookings,
-            completed_bookings=rel.completed_bookings,
-            cancelled_bookings=rel.cancelled_bookings,
-            total_spent=total_spent,
-            avg_bookings_per_month=avg_bookings_per_month,
-            created_at=rel.created_at
-        )
-        result.append(client_data)
+    rows, total = await trainer_client_repo.list_trainer_clients(
+        db, trainer.id, sort=sort, descending=order == "desc", limit=limit, offset=offset
+    )
+    response.headers["X-Total-Count"] = str(total)
 
-    return result
+    return [ClientWithBalanceResponse(**serialize_client_row(row, trainer.price)) for row in rows]
+
+
+@router.get("/trainer/{telegram_id}/bootstrap", response_model=TrainerBootstrapResponse)
+async def get_trainer_bootstrap(telegram_id: str, response: Response):
+    """Get profile, schedule template, week bookings and clients in one request"""
+    data = await build_trainer_bootstrap(telegram_id)
+    if not data:
+        raise HTTPException(status_code=404, detail="Trainer not found")
+
+    trainer = TrainerResponse.from_orm(data["trainer"])
+    trainer.total_clients = data["stats"]["total_clients"]
+    trainer.total_bookings = data["stats"]["total_bookings"]
+
+    response.headers["X-Query-Count"] = str(data["queries"])
+    return TrainerBootstrapResponse(
+        trainer=trainer,
+        schedule=data["schedule"],
+        bookings=data["bookings"],
+        clients=data["clients"]
+    )
+
+
+@router.get("/client/{telegram_id}/bootstrap", response_model=ClientBootstrapResponse)
+async def get_client_bootstrap(telegram_id: str, response: Response):
+    """Get profile, trainers with balances and bookings in one request"""
+    data = await build_client_bootstrap(telegram_id)
+    if not data:
+        raise HTTPException(status_code=404, detail="Client not found")
+
+    home = data["client"]
+    client = ClientResponse(**home["profile"], trainers=home["trainers"])
+
+    response.headers["X-Query-Count"] = str(data["queries"])
+    return ClientBootstrapResponse(client=client, bookings=data["bookings"])
 
 
 @router.get("/client/{telegram_id}", response_model=ClientResponse)
 async def get_client_info(
     telegram_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get client information with trainers"""
-    client = db.query(User).filter_by(
-        telegram_id=telegram_id,
-        role=UserRole.CLIENT
-    ).first()
-
-    if not client:
+    """Get client information with trainers (from client_home read model)"""
+    home = await user_repo.get_client_document(db, telegram_id)
+    if not home:
         raise HTTPException(status_code=404, detail="Client not found")
 
-    # Get all trainers with balance
-    relationships = db.query(TrainerClient).filter_by(
-        client_id=client.id,
-        is_active=True
-    ).all()
-
-    # Build trainers list with balance from relationship
-    trainers_with_balance = []
-    for rel in relationships:
-        trainer = db.query(User).filter_by(id=rel.trainer_id).first()
-        if trainer:
-            trainer_data = TrainerWithBalanceResponse(
-                id=trainer.id,
-                telegram_id=trainer.telegram_id,
-                telegram_username=trainer.telegram_username,
-                name=trainer.name,
-                phone=trainer.phone,
-                email=trainer.email,
-                specialization=trainer.specialization,
-                price=trainer.price,
-                session_duration=trainer.session_duration,
-                description=trainer.description,
-                rating=trainer.rating,
-                timezone=trainer.timezone if hasattr(trainer, 'timezone') else "Europe/Moscow",
-                balance=rel.balance  # Balance from TrainerClient relationship
-            )
-            trainers_with_balance.append(trainer_data)
-
-    response = ClientResponse.from_orm(client)
-    response.trainers = trainers_with_balance
-
-    return response
+    return ClientResponse(**home["profile"], trainers=home["trainers"])
 
 
 @router.put("/profile")
@@ -314,10 +286,10 @@ async def update_profile(
     price: Optional[int] = None,
     session_duration: Optional[int] = None,
     description: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update user profile"""
-    user = db.query(User).filter_by(telegram_id=telegram_id).first()
+    user = await user_repo.get_user(db, telegram_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -338,8 +310,8 @@ async def update_profile(
     if description and user.role == UserRole.TRAINER:
         user.description = description
 
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     return {"message": "Profile updated successfully", "user": UserResponse.from_orm(user)}
 
@@ -348,13 +320,10 @@ async def update_profile(
 async def update_trainer_settings(
     telegram_id: str,
     settings: TrainerSettingsUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update trainer-specific settings"""
-    trainer = db.query(User).filter_by(
-        telegram_id=telegram_id,
-        role=UserRole.TRAINER
-    ).first()
+    trainer = await user_repo.get_user(db, telegram_id, UserRole.TRAINER)
 
     if not trainer:
         raise HTTPException(status_code=404, detail="Trainer not found")
@@ -409,8 +378,8 @@ async def update_trainer_settings(
         else:
             raise HTTPException(status_code=400, detail="auto_cancel_hours_after must be 1, 2, or 3")
 
-    db.commit()
-    db.refresh(trainer)
+    await db.commit()
+    await db.refresh(trainer)
 
     return trainer
 
@@ -420,7 +389,7 @@ async def topup_client_balance(
     trainer_telegram_id: str,
     client_telegram_id: str,
     topup_data: TopupBalanceRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Top up client balance with specified amount"""
     # Validate amount
@@ -428,35 +397,25 @@ async def topup_client_balance(
         raise HTTPException(status_code=400, detail="Amount must be positive")
 
     # Get trainer
-    trainer = db.query(User).filter_by(
-        telegram_id=trainer_telegram_id,
-        role=UserRole.TRAINER
-    ).first()
+    trainer = await user_repo.get_user(db, trainer_telegram_id, UserRole.TRAINER)
     if not trainer:
         raise HTTPException(status_code=404, detail="Trainer not found")
 
     # Get client
-    client = db.query(User).filter_by(
-        telegram_id=client_telegram_id,
-        role=UserRole.CLIENT
-    ).first()
+    client = await user_repo.get_user(db, client_telegram_id, UserRole.CLIENT)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
 
     # Get trainer-client relationship
-    trainer_client = db.query(TrainerClient).filter_by(
-        trainer_id=trainer.id,
-        client_id=client.id,
-        is_active=True
-    ).first()
+    trainer_client = await trainer_client_repo.get_relation(db, trainer.id, client.id)
 
     if not trainer_client:
         raise HTTPException(status_code=404, detail="Client relationship not found")
 
     # Add to balance
     trainer_client.balance += topup_data.amount
-    db.commit()
-    db.refresh(trainer_client)
+    await db.commit()
+    await db.refresh(trainer_client)
 
     return {
         "message": "Balance topped up successfully",
@@ -469,7 +428,7 @@ async def topup_client_balance(
 @router.post("/topup-request")
 async def request_topup_from_trainer(
     request_data: TopupRequestData,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Client reports topup payment to trainer (trainer needs to confirm)"""
     # Validate amount
@@ -477,26 +436,14 @@ async def request_topup_from_trainer(
         raise HTTPException(status_code=400, detail="Amount must be positive")
 
     # Get client
-    client = db.query(User).filter_by(
-        telegram_id=request_data.client_telegram_id,
-        role=UserRole.CLIENT
-    ).first()
+    client = await user_repo.get_user(db, request_data.client_telegram_id, UserRole.CLIENT)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
 
     # Find trainer by name (from trainer profile opened by client)
     # We need to find the trainer_client relationship to get the exact trainer
-    relationships = db.query(TrainerClient).filter_by(
-        client_id=client.id,
-        is_active=True
-    ).all()
-
-    trainer = None
-    for rel in relationships:
-        t = db.query(User).filter_by(id=rel.trainer_id).first()
-        if t and t.name == request_data.trainer_name:
-            trainer = t
-            break
+    trainers = await trainer_client_repo.get_client_trainers(db, client.id)
+    trainer = next((t for t in trainers if t.name == request_data.trainer_name), None)
 
     if not trainer:
         raise HTTPException(status_code=404, detail="Trainer not found")
@@ -527,13 +474,10 @@ async def request_topup_from_trainer(
 async def update_client_reminder_settings(
     telegram_id: str,
     settings: ClientReminderSettingsUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update client reminder settings"""
-    client = db.query(User).filter_by(
-        telegram_id=telegram_id,
-        role=UserRole.CLIENT
-    ).first()
+    client = await user_repo.get_user(db, telegram_id, UserRole.CLIENT)
 
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
@@ -548,7 +492,7 @@ async def update_client_reminder_settings(
     if settings.reminder_15m is not None:
         client.client_reminder_15m_enabled = settings.reminder_15m
 
-    db.commit()
-    db.refresh(client)
+    await db.commit()
+    await db.refresh(client)
 
     return client
\ No newline at end of file
@@ -5,19 +5,20 @@ Callback handlers for booking actions via inline buttons
 from telegram import Update
 from telegram.ext import ContextTypes
 from datetime import datetime, timezone
-import asyncio
 import logging
 
-from db.session import get_db
+from db.base import async_session
 from models import User, Booking, BookingStatus
-from services.notifications import (
-    notify_booking_confirmed,
-    notify_booking_cancelled
-)
+from repositories import bookings as booking_repo, slots as slot_repo, trainer_clients as trainer_client_repo
+from services.booking_state import TRAINER, CLIENT
+from services.snapshots import aget_user_snapshot
+from bot.utils.keyboards import get_slot_suggestions_keyboard
+from bot.utils.taps import DONE_TEXT, collapse_taps
 
 logger = logging.getLogger(__name__)
 
 
+@collapse_taps
 async def handle_confirm_booking(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle booking confirmation by trainer"""
     query = update.callback_query
@@ -26,49 +27,49 @@ async def handle_confirm_booking(update: Update, context: ContextTypes.DEFAULT_T
     # Extract booking ID from callback data
     booking_id = int(query.data.split(":")[1])
 
-    db = next(get_db())
-    try:
-        # Get booking
-        booking = db.query(Booking).filter_by(id=booking_id).first()
-        if not booking:
-            await query.message.reply_text("❌ Запись не найдена")
-            return
-
-        # Check if the user is the trainer for this booking
-        trainer = db.query(User).filter_by(telegram_id=str(query.from_user.id)).first()
-        if not trainer or trainer.id != booking.trainer_id:
-            await query.message.reply_text("❌ Вы не можете подтвердить эту запись")
-            return
-
-        # Check if booking can be confirmed
-        if booking.status != BookingStatus.PENDING:
-            await query.message.reply_text("ℹ️ Запись уже обработана")
-            return
-
-        # Confirm booking
-        booking.status = BookingStatus.CONFIRMED
-        booking.confirmed_at = datetime.now()
-        db.commit()
-
-        # Send notification to client
-        await notify_booking_confirmed(booking, db)
-
-        # Update message
-        await query.edit_message_text(
-            query.message.text + "\n\n✅ <b>Запись подтверждена</b>",
-            parse_mode="HTML"
-        )
-
-        await query.message.reply_text("✅ Запись успешно подтверждена!")
+    async with async_session() as db:
+        try:
+            trainer = await aget_user_snapshot(db, str(query.from_user.id))
+
+            # Confirm booking if it is still pending and belongs to this trainer
+            change = None
+            if trainer:
+                change = await booking_repo.transition(
+                    db, booking_id, BookingStatus.CONFIRMED,
+                    Booking.trainer_id == trainer.id,
+                    actor=TRAINER
+                )
+
+            if not change:
+                booking = await booking_repo.get_booking(db, booking_id)
+                if not booking:
+                    await query.message.reply_text("❌ Запись не найдена")
+                elif not trainer or trainer.id != booking.trainer_id:
+                    await query.message.reply_text("❌ Вы не можете подтвердить эту запись")
+                else:
+                    await query.message.reply_text("ℹ️ Запись уже обработана")
+                    return DONE_TEXT
+                return
+
+            # Client is notified from the transition event
+            await db.commit()
+
+            # Update message
+            await query.edit_message_text(
+                query.message.text + "\n\n✅ <b>Запись подтверждена</b>",
+                parse_mode="HTML"
+            )
 
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error confirming booking: {e}")
-        await query.message.reply_text(f"❌ Ошибка при подтверждении: {str(e)}")
-    finally:
-        db.close()
+            await query.message.reply_text("✅ Запись успешно подтверждена!")
+            return DONE_TEXT
+
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error confirming booking: {e}")
+            await query.message.reply_text(f"❌ Ошибка при подтверждении: {str(e)}")
 
 
+@collapse_taps
 async def handle_cancel_booking(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle booking cancellation"""
     query = update.callback_query
@@ -94,74 +95,69 @@ async def handle_cancel_booking(update: Update, context: ContextTypes.DEFAULT_TY
         await query.message.reply_text("❌ Ошибка обработки данных")
         return
 
-    db = next(get_db())
-    try:
-        # Get booking
-        booking = db.query(Booking).filter_by(id=booking_id).first()
-        if not booking:
-            logger.error(f"❌ Booking {booking_id} not found in database")
-            await query.message.reply_text("❌ Запись не найдена")
-            return
-
-        logger.info(f"✅ Found booking {booking_id}, status: {booking.status}")
-
-        # Check if the user is the trainer or client for this booking
-        user = db.query(User).filter_by(telegram_id=str(query.from_user.id)).first()
-        if not user:
-            await query.message.reply_text("❌ Пользователь не найден")
-            return
-
-        is_trainer = user.id == booking.trainer_id
-        is_client = user.id == booking.client_id
-
-        if not is_trainer and not is_client:
-            await query.message.reply_text("❌ Вы не можете отменить эту запись")
-            return
-
-        # Check if booking can be cancelled
-        if booking.status in [BookingStatus.CANCELLED, BookingStatus.COMPLETED]:
-            await query.message.reply_text("ℹ️ Запись уже отменена или завершена")
-            return
-
-        # Check 24-hour rule
-        hours_before = (booking.datetime - datetime.now(timezone.utc)).total_seconds() / 3600
-        if hours_before < 24:
-            await query.message.reply_text(
-                "⚠️ Отмена менее чем за 24 часа до тренировки.\n"
-                "Обратитесь к тренеру для согласования отмены.",
-                parse_mode="HTML"
+    async with async_session() as db:
+        try:
+            # Get booking
+            booking = await booking_repo.get_booking(db, booking_id)
+            if not booking:
+                logger.error(f"❌ Booking {booking_id} not found in database")
+                await query.message.reply_text("❌ Запись не найдена")
+                return
+
+            logger.info(f"✅ Found booking {booking_id}, status: {booking.status}")
+
+            # Check if the user is the trainer or client for this booking
+            user = await aget_user_snapshot(db, str(query.from_user.id))
+            if not user:
+                await query.message.reply_text("❌ Пользователь не найден")
+                return
+
+            is_trainer = user.id == booking.trainer_id
+            is_client = user.id == booking.client_id
+
+            if not is_trainer and not is_client:
+                await query.message.reply_text("❌ Вы не можете отменить эту запись")
+                return
+
+            # Check 24-hour rule
+            hours_before = (booking.datetime - datetime.now(timezone.utc)).total_seconds() / 3600
+            if hours_before < 24:
+                await query.message.reply_text(
+                    "⚠️ Отмена менее чем за 24 часа до тренировки.\n"
+                    "Обратитесь к тренеру для согласования отмены.",
+                    parse_mode="HTML"
+                )
+                # For now, still allow cancellation
+
+            # Cancel booking unless it was cancelled or completed meanwhile
+            change = await booking_repo.transition(
+                db, booking_id, BookingStatus.CANCELLED,
+                actor=TRAINER if is_trainer else CLIENT,
+                reason="Отменено через Telegram"
             )
-            # For now, still allow cancellation
-
-        # Cancel booking
-        booking.status = BookingStatus.CANCELLED
-        booking.cancelled_at = datetime.now()
-        booking.cancellation_reason = "Отменено через Telegram"
-        db.commit()
+            if not change:
+                await query.message.reply_text("ℹ️ Запись уже отменена или завершена")
+                return DONE_TEXT
 
-        # Send notification to the other party
-        await notify_booking_cancelled(
-            booking, db,
-            reason="Отменено через Telegram",
-            cancelled_by_trainer=is_trainer
-        )
+            # Other party is notified from the transition event
+            await db.commit()
 
-        # Update message
-        await query.edit_message_text(
-            query.message.text + "\n\n❌ <b>Запись отменена</b>",
-            parse_mode="HTML"
-        )
+            # Update message
+            await query.edit_message_text(
+                query.message.text + "\n\n❌ <b>Запись отменена</b>",
+                parse_mode="HTML"
+            )
 
-        await query.message.reply_text("✅ Запись успешно отменена!")
+            await query.message.reply_text("✅ Запись успешно отменена!")
+            return DONE_TEXT
 
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error cancelling booking: {e}")
-        await query.message.reply_text(f"❌ Ошибка при отмене: {str(e)}")
-    finally:
-        db.close()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error cancelling booking: {e}")
+            await query.message.reply_text(f"❌ Ошибка при отмене: {str(e)}")
 
 
+@collapse_taps
 async def handle_accept_reschedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle rescheduled booking acceptance by client"""
     query = update.callback_query
@@ -169,39 +165,47 @@ async def handle_accept_reschedule(update: Update, context: ContextTypes.DEFAULT
 
     booking_id = int(query.data.split(":")[1])
 
-    db = next(get_db())
-    try:
-        booking = db.query(Booking).filter_by(id=booking_id).first()
-        if not booking:
-            await query.message.reply_text("❌ Запись не найдена")
-            return
-
-        # Verify user is the client
-        client = db.query(User).filter_by(telegram_id=str(query.from_user.id)).first()
-        if not client or client.id != booking.client_id:
-            await query.message.reply_text("❌ Вы не можете подтвердить эту запись")
-            return
-
-        # Confirm the rescheduled booking
-        booking.status = BookingStatus.CONFIRMED
-        booking.confirmed_at = datetime.now()
-        db.commit()
+    async with async_session() as db:
+        try:
+            client = await aget_user_snapshot(db, str(query.from_user.id))
+
+            # Confirm the rescheduled booking if it is still awaiting this client
+            change = None
+            if client:
+                change = await booking_repo.transition(
+                    db, booking_id, BookingStatus.CONFIRMED,
+                    Booking.client_id == client.id,
+                    actor=CLIENT
+                )
+
+            if not change:
+                booking = await booking_repo.get_booking(db, booking_id)
+                if not booking:
+                    await query.message.reply_text("❌ Запись не найдена")
+                elif not client or client.id != booking.client_id:
+                    await query.message.reply_text("❌ Вы не можете подтвердить эту запись")
+                else:
+                    await query.message.reply_text("ℹ️ Запись уже обработана")
+                    return DONE_TEXT
+                return
+
+            await db.commit()
 
-        await query.edit_message_text(
-            query.message.text + "\n\n✅ <b>Новое время подтверждено</b>",
-            parse_mode="HTML"
-        )
+            await query.edit_message_text(
+                query.message.text + "\n\n✅ <b>Новое время подтверждено</b>",
+                parse_mode="HTML"
+            )
 
-        await query.message.reply_text("✅ Новое время тренировки подтверждено!")
+            await query.message.reply_text("✅ Новое время тренировки подтверждено!")
+            return DONE_TEXT
 
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error accepting reschedule: {e}")
-        await query.message.reply_text(f"❌ Ошибка: {str(e)}")
-    finally:
-        db.close()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error accepting reschedule: {e}")
+            await query.message.reply_text(f"❌ Ошибка: {str(e)}")
 
 
+@collapse_taps
 async def handle_decline_reschedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle rescheduled booking decline by client"""
     query = update.callback_query
@@ -209,49 +213,134 @@ async def handle_decline_reschedule(update: Update, context: ContextTypes.DEFAUL
 
     booking_id = int(query.data.split(":")[1])
 
-    db = next(get_db())
+    async with async_session() as db:
+        try:
+            booking = await booking_repo.get_booking(db, booking_id)
+            if not booking:
+                await query.message.reply_text("❌ Запись не найдена")
+                return
+
+            # Verify user is the client
+            client = await aget_user_snapshot(db, str(query.from_user.id))
+            if not client or client.id != booking.client_id:
+                await query.message.reply_text("❌ Вы не можете отменить эту запись")
+                return
+
+            # Cancel the rescheduled booking
+            change = await booking_repo.transition(
+                db, booking_id, BookingStatus.CANCELLED,
+                actor=CLIENT,
+                reason="Новое время не подходит клиенту"
+            )
+            if not change:
+                await query.message.reply_text("ℹ️ Запись уже обработана")
+                return DONE_TEXT
+
+            # Trainer is notified from the transition event
+            await db.commit()
+            await db.refresh(booking)
+
+            await query.edit_message_text(
+                query.message.text + "\n\n❌ <b>Новое время отклонено</b>",
+                parse_mode="HTML"
+            )
+
+            # Offer nearest free times instead of manual trial and error
+            trainer = await db.get(User, booking.trainer_id)
+            slots = await slot_repo.suggest_slots(db, trainer, booking.datetime, exclude_booking_id=booking.id) if trainer else []
+
+            if slots:
+                await query.message.reply_text(
+                    "❌ Новое время отклонено.\n\n"
+                    "Ближайшее свободное время у тренера — выберите подходящее:",
+                    reply_markup=get_slot_suggestions_keyboard(booking.id, slots)
+                )
+            else:
+                await query.message.reply_text(
+                    "❌ Новое время отклонено. Свяжитесь с тренером для выбора другого времени."
+                )
+            return DONE_TEXT
+
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error declining reschedule: {e}")
+            await query.message.reply_text(f"❌ Ошибка: {str(e)}")
+
+
+@collapse_taps
+async def handle_pick_slot(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle client's choice of a suggested free time"""
+    query = update.callback_query
+    await query.answer()
+
+    # Parse callback data: pick_slot:booking_id:unix_timestamp
     try:
-        booking = db.query(Booking).filter_by(id=booking_id).first()
-        if not booking:
-            await query.message.reply_text("❌ Запись не найдена")
-            return
-
-        # Verify user is the client
-        client = db.query(User).filter_by(telegram_id=str(query.from_user.id)).first()
-        if not client or client.id != booking.client_id:
-            await query.message.reply_text("❌ Вы не можете отменить эту запись")
-            return
-
-        # Cancel the rescheduled booking
-        booking.status = BookingStatus.CANCELLED
-        booking.cancelled_at = datetime.now()
-        booking.cancellation_reason = "Новое время не подходит клиенту"
-        db.commit()
-
-        # Notify trainer
-        await notify_booking_cancelled(
-            booking, db,
-            reason="Новое время не подходит клиенту",
-            cancelled_by_trainer=False
-        )
-
-        await query.edit_message_text(
-            query.message.text + "\n\n❌ <b>Новое время отклонено</b>",
-            parse_mode="HTML"
-        )
-
-        await query.message.reply_text(
-            "❌ Новое время отклонено. Свяжитесь с тренером для выбора другого времени."
-        )
+        _, booking_id, timestamp = query.data.split(":")
+        booking_id = int(booking_id)
+        new_datetime = datetime.fromtimestamp(int(timestamp), tz=timezone.utc)
+    except (IndexError, ValueError) as e:
+        logger.error(f"Failed to parse pick_slot callback data: {query.data}, error: {e}")
+        await query.message.reply_text("❌ Ошибка обработки данных")
+        return
 
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error declining reschedule: {e}")
-        await query.message.reply_text(f"❌ Ошибка: {str(e)}")
-    finally:
-        db.close()
+    async with async_session() as db:
+        try:
+            booking = await booking_repo.get_booking(db, booking_id)
+            if not booking:
+                await query.message.reply_text("❌ Запись не найдена")
+                return
+
+            # Verify user is the client
+            client = await aget_user_snapshot(db, str(query.from_user.id))
+            if not client or client.id != booking.client_id:
+                await query.message.reply_text("❌ Вы не можете изменить эту запись")
+                return
+
+            trainer = await db.get(User, booking.trainer_id)
+            if not trainer:
+                await query.message.reply_text("❌ Тренер не найден")
+                return
+
+            # Slot may have been taken since suggestions were shown
+            if not await slot_repo.is_slot_free(db, trainer, new_datetime, booking.duration, exclude_booking_id=booking.id):
+                slots = await slot_repo.suggest_slots(db, trainer, new_datetime, exclude_booking_id=booking.id)
+                if slots:
+                    await query.edit_message_text(
+                        "⚠️ Это время уже занято. Ближайшее свободное время:",
+                        reply_markup=get_slot_suggestions_keyboard(booking.id, slots)
+                    )
+                else:
+                    await query.edit_message_text(
+                        "⚠️ Это время уже занято. Свяжитесь с тренером для выбора другого времени."
+                    )
+                return
+
+            # Move booking to the chosen time, trainer has to approve it
+            change = await booking_repo.transition(
+                db, booking_id, BookingStatus.PENDING,
+                actor=CLIENT,
+                values={"datetime": new_datetime, "cancelled_at": None, "cancellation_reason": None}
+            )
+            if not change:
+                await query.message.reply_text("ℹ️ Запись уже завершена")
+                return DONE_TEXT
+
+            # Trainer is notified from the transition event
+            await db.commit()
+
+            await query.edit_message_text(
+                "🔄 Запрос на новое время отправлен тренеру.\n"
+                "Мы сообщим, когда тренер подтвердит запись."
+            )
+            return DONE_TEXT
 
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error picking suggested slot: {e}")
+            await query.message.reply_text(f"❌ Ошибка: {str(e)}")
 
+
+@collapse_taps
 async def handle_confirm_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle attendance confirmation for reminders"""
     query = update.callback_query
@@ -277,68 +366,72 @@ async def handle_confirm_attendance(update: Update, context: ContextTypes.DEFAUL
         await query.message.reply_text("❌ Ошибка обработки данных")
         return
 
-    db = next(get_db())
-    try:
-        # Get booking
-        booking = db.query(Booking).filter_by(id=booking_id).first()
-        if not booking:
-            logger.error(f"❌ Booking {booking_id} not found in database")
-            await query.message.reply_text("❌ Запись не найдена")
-            return
-
-        logger.info(f"✅ Found booking {booking_id}, status: {booking.status}")
-
-        # Verify user is the client
-        client = db.query(User).filter_by(telegram_id=str(query.from_user.id)).first()
-        if not client:
-            logger.error(f"❌ User {query.from_user.id} not found in database")
-            await query.message.reply_text("❌ Пользователь не найден")
-            return
-
-        if client.id != booking.client_id:
-            logger.error(f"❌ User {client.id} is not the client for booking {booking_id} (client_id={booking.client_id})")
-            await query.message.reply_text("❌ Вы не можете подтвердить эту запись")
-            return
-
-        logger.info(f"✅ User verified: {client.name} (id={client.id})")
-
-        # If booking is PENDING, change status to CONFIRMED
-        if booking.status == BookingStatus.PENDING:
-            logger.info(f"📝 Changing booking {booking_id} status from PENDING to CONFIRMED")
-            booking.status = BookingStatus.CONFIRMED
-            booking.confirmed_at = datetime.now()
-            db.commit()
-            logger.info(f"✅ Booking {booking_id} confirmed in database")
-
-            # Send notification to trainer
-            logger.info(f"📧 Sending confirmation notification to trainer")
-            await notify_booking_confirmed(booking, db)
-            logger.info(f"✅ Notification sent to trainer")
-
-            await query.edit_message_text(
-                query.message.text + "\n\n✅ <b>Тренировка подтверждена</b>",
-                parse_mode="HTML"
-            )
-            logger.info(f"✅ Message edited successfully")
-        else:
-            # Already confirmed - just acknowledge
-            logger.info(f"ℹ️ Booking {booking_id} already has status {booking.status}, just acknowledging")
-            await query.edit_message_text(
-                query.message.text + "\n\n✅ <b>Присутствие подтверждено</b>",
-                parse_mode="HTML"
-            )
-
-    except Exception as e:
-        db.rollback()
-        logger.error(f"❌ Error confirming attendance: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-        await query.message.reply_text(f"❌ Ошибка: {str(e)}")
-    finally:
-        db.close()
-        logger.info(f"✅ handle_confirm_attendance completed")
-
-
+    async with async_session() as db:
+        try:
+            # Get booking
+            booking = await booking_repo.get_booking(db, booking_id)
+            if not booking:
+                logger.error(f"❌ Booking {booking_id} not found in database")
+                await query.message.reply_text("❌ Запись не найдена")
+                return
+
+            logger.info(f"✅ Found booking {booking_id}, status: {booking.status}")
+
+            # Verify user is the client
+            client = await aget_user_snapshot(db, str(query.from_user.id))
+            if not client:
+                logger.error(f"❌ User {query.from_user.id} not found in database")
+                await query.message.reply_text("❌ Пользователь не найден")
+                return
+
+            if client.id != booking.client_id:
+                logger.error(f"❌ User {client.id} is not the client for booking {booking_id} (client_id={booking.client_id})")
+                await query.message.reply_text("❌ Вы не можете подтвердить эту запись")
+                return
+
+            logger.info(f"✅ User verified: {client.name} (id={client.id})")
+
+            # If booking is still PENDING, change status to CONFIRMED; loses to a concurrent auto-cancel
+            change = await booking_repo.transition(db, booking_id, BookingStatus.CONFIRMED, actor=CLIENT)
+            if change:
+                # Trainer is notified from the transition event
+                await db.commit()
+                logger.info(f"✅ Booking {booking_id} confirmed in database")
+
+                await query.edit_message_text(
+                    query.message.text + "\n\n✅ <b>Тренировка подтверждена</b>",
+                    parse_mode="HTML"
+                )
+                logger.info(f"✅ Message edited successfully")
+            else:
+                await db.refresh(booking)
+                if booking.status == BookingStatus.CANCELLED:
+                    # Auto-cancel or trainer got there first
+                    logger.info(f"ℹ️ Booking {booking_id} was cancelled before confirmation")
+                    await query.edit_message_text(
+                        query.message.text + "\n\n❌ <b>Запись уже отменена</b>",
+                        parse_mode="HTML"
+                    )
+                else:
+                    # Already confirmed - just acknowledge
+                    logger.info(f"ℹ️ Booking {booking_id} already has status {booking.status}, just acknowledging")
+                    await query.edit_message_text(
+                        query.message.text + "\n\n✅ <b>Присутствие подтверждено</b>",
+                        parse_mode="HTML"
+                    )
+            return DONE_TEXT
+
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"❌ Error confirming attendance: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            await query.message.reply_text(f"❌ Ошибка: {str(e)}")
+        finally:
+            logger.info(f"✅ handle_confirm_attendance completed")
+
+
+@collapse_taps
 async def handle_topup_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle topup confirmation by trainer"""
     query = update.callback_query
@@ -355,58 +448,53 @@ async def handle_topup_confirm(update: Update, context: ContextTypes.DEFAULT_TYP
         logger.error(f"Error parsing topup callback data: {e}")
         return
 
-    db = next(get_db())
-    try:
-        # Verify user is the trainer
-        trainer = db.query(User).filter_by(telegram_id=trainer_telegram_id).first()
-        if not trainer or str(query.from_user.id) != trainer_telegram_id:
-            await query.message.reply_text("❌ Вы не можете подтвердить это пополнение")
-            return
-
-        # Get client
-        client = db.query(User).filter_by(telegram_id=client_telegram_id).first()
-        if not client:
-            await query.message.reply_text("❌ Клиент не найден")
-            return
-
-        # Call existing topup API endpoint logic
-        from models import TrainerClient
-        trainer_client = db.query(TrainerClient).filter_by(
-            trainer_id=trainer.id,
-            client_id=client.id,
-            is_active=True
-        ).first()
-
-        if not trainer_client:
-            await query.message.reply_text("❌ Связь с клиентом не найдена")
-            return
-
-        # Add to balance
-        old_balance = trainer_client.balance
-        trainer_client.balance += amount
-        db.commit()
-
-        # Update message
-        await query.edit_message_text(
-            query.message.text + f"\n\n✅ <b>Пополнение подтверждено</b>\n"
-            f"Баланс клиента: {old_balance:,}₽ → {trainer_client.balance:,}₽",
-            parse_mode="HTML"
-        )
-
-        await query.message.reply_text(
-            f"✅ Баланс клиента <b>{client.name}</b> пополнен на <b>{amount:,}₽</b>\n"
-            f"Новый баланс: <b>{trainer_client.balance:,}₽</b>",
-            parse_mode="HTML"
-        )
+    async with async_session() as db:
+        try:
+            # Verify user is the trainer
+            trainer = await aget_user_snapshot(db, trainer_telegram_id)
+            if not trainer or str(query.from_user.id) != trainer_telegram_id:
+                await query.message.reply_text("❌ Вы не можете подтвердить это пополнение")
+                return
+
+            # Get client
+            client = await aget_user_snapshot(db, client_telegram_id)
+            if not client:
+                await query.message.reply_text("❌ Клиент не найден")
+                return
+
+            # Call existing topup API endpoint logic
+            trainer_client = await trainer_client_repo.get_relation(db, trainer.id, client.id)
+
+            if not trainer_client:
+                await query.message.reply_text("❌ Связь с клиентом не найдена")
+                return
+
+            # Add to balance
+            old_balance = trainer_client.balance
+            trainer_client.balance += amount
+            await db.commit()
+
+            # Update message
+            await query.edit_message_text(
+                query.message.text + f"\n\n✅ <b>Пополнение подтверждено</b>\n"
+                f"Баланс клиента: {old_balance:,}₽ → {trainer_client.balance:,}₽",
+                parse_mode="HTML"
+            )
 
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error confirming topup: {e}")
-        await query.message.reply_text(f"❌ Ошибка при подтверждении пополнения: {str(e)}")
-    finally:
-        db.close()
+            await query.message.reply_text(
+                f"✅ Баланс клиента <b>{client.name}</b> пополнен на <b>{amount:,}₽</b>\n"
+                f"Новый баланс: <b>{trainer_client.balance:,}₽</b>",
+                parse_mode="HTML"
+            )
+            return DONE_TEXT
 
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error confirming topup: {e}")
+            await query.message.reply_text(f"❌ Ошибка при подтверждении пополнения: {str(e)}")
 
+
+@collapse_taps
 async def handle_topup_pending(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle topup pending (money not received yet) by trainer"""
     query = update.callback_query
@@ -423,27 +511,26 @@ async def handle_topup_pending(update: Update, context: ContextTypes.DEFAULT_TYP
         logger.error(f"Error parsing topup callback data: {e}")
         return
 
-    db = next(get_db())
-    try:
-        # Get client name for display
-        client = db.query(User).filter_by(telegram_id=client_telegram_id).first()
-        client_name = client.name if client else "Клиент"
-
-        # Update message
-        await query.edit_message_text(
-            query.message.text + f"\n\n⏳ <b>Ожидание поступления средств</b>\n"
-            f"Вы можете подтвердить пополнение позже, когда деньги поступят.",
-            parse_mode="HTML"
-        )
-
-        await query.message.reply_text(
-            f"ℹ️ Уведомление о пополнении от <b>{client_name}</b> сохранено.\n"
-            f"Когда деньги поступят, вы сможете пополнить баланс вручную через Mini App.",
-            parse_mode="HTML"
-        )
+    async with async_session() as db:
+        try:
+            # Get client name for display
+            client = await aget_user_snapshot(db, client_telegram_id)
+            client_name = client.name if client else "Клиент"
 
-    except Exception as e:
-        logger.error(f"Error handling pending topup: {e}")
-        await query.message.reply_text(f"❌ Ошибка: {str(e)}")
-    finally:
-        db.close()
\ No newline at end of file
+            # Update message
+            await query.edit_message_text(
+                query.message.text + f"\n\n⏳ <b>Ожидание поступления средств</b>\n"
+                f"Вы можете подтвердить пополнение позже, когда деньги поступят.",
+                parse_mode="HTML"
+            )
+
+            await query.message.reply_text(
+                f"ℹ️ Уведомление о пополнении от <b>{client_name}</b> сохранено.\n"
+                f"Когда деньги поступят, вы сможете пополнить баланс вручную через Mini App.",
+                parse_mode="HTML"
+            )
+            return DONE_TEXT
+
+        except Exception as e:
+            logger.error(f"Error handling pending topup: {e}")
+            await query.message.reply_text(f"❌ Ошибка: {str(e)}")
\ No newline at end of file
@@ -1,6 +1,8 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from services.agenda import get_agenda_text
+
 
 async def book_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start booking process for client"""
@@ -16,16 +18,8 @@ async def book_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def my_bookings_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show client's upcoming bookings"""
-    # TODO: Load from database
-    await update.message.reply_text(
-        "📋 *Ваши предстоящие тренировки*\n\n"
-        "*Сегодня:*\n"
-        "15:00 - Иван Петров (Фитнес ЭНЕРГИЯ)\n\n"
-        "*Завтра:*\n"
-        "10:00 - Мария Сидорова (World Class)\n\n"
-        "Для отмены используйте /cancel",
-        parse_mode='Markdown'
-    )
+    message = await get_agenda_text(str(update.effective_user.id), "my")
+    await update.message.reply_text(message, parse_mode='Markdown')
 
 
 async def handle_show_my_bookings(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -34,15 +28,8 @@ async def handle_show_my_bookings(update: Update, context: ContextTypes.DEFAULT_
     await query.answer()
 
     # Show same message as /my command
-    await query.message.reply_text(
-        "📋 *Ваши предстоящие тренировки*\n\n"
-        "*Сегодня:*\n"
-        "15:00 - Иван Петров (Фитнес ЭНЕРГИЯ)\n\n"
-        "*Завтра:*\n"
-        "10:00 - Мария Сидорова (World Class)\n\n"
-        "Для отмены используйте /cancel",
-        parse_mode='Markdown'
-    )
+    message = await get_agenda_text(str(update.effective_user.id), "my")
+    await query.message.reply_text(message, parse_mode='Markdown')
 
 
 async def cancel_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1,6 +1,7 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import ContextTypes
 from services import registration as reg_service
+from bot.utils.menu import forget_menu
 import asyncio
 
 
@@ -12,35 +13,30 @@ async def handle_role_selection(update: Update, context: ContextTypes.DEFAULT_TY
     if query.data == "role_trainer":
         # Check if user is already a client
         user = update.effective_user
-        from db.session import SessionLocal
-        from models import User as UserModel, UserRole
+        from models import UserRole
 
-        db = SessionLocal()
-        try:
-            existing_user = db.query(UserModel).filter_by(telegram_id=str(user.id)).first()
+        existing_user = await reg_service.get_user_by_telegram_id(str(user.id))
 
-            if existing_user and existing_user.role == UserRole.CLIENT:
-                # Show warning and ask for confirmation
-                keyboard = [
-                    [InlineKeyboardButton("✅ Да, стать тренером", callback_data="confirm_switch_to_trainer")],
-                    [InlineKeyboardButton("❌ Отмена", callback_data="cancel_switch_role")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
+        if existing_user and existing_user.role == UserRole.CLIENT:
+            # Show warning and ask for confirmation
+            keyboard = [
+                [InlineKeyboardButton("✅ Да, стать тренером", callback_data="confirm_switch_to_trainer")],
+                [InlineKeyboardButton("❌ Отмена", callback_data="cancel_switch_role")]
+            ]
+            reply_markup = InlineKeyboardMarkup(keyboard)
 
-                await query.edit_message_text(
-                    "⚠️ *Смена роли*\n\n"
-                    "Вы зарегистрированы как клиент.\n\n"
-                    "При смене роли на тренера будут удалены:\n"
-                    "• Все ваши записи на тренировки\n"
-                    "• История тренировок\n"
-                    "• Связи с тренерами\n\n"
-                    "Продолжить?",
-                    reply_markup=reply_markup,
-                    parse_mode='Markdown'
-                )
-                return
-        finally:
-            db.close()
+            await query.edit_message_text(
+                "⚠️ *Смена роли*\n\n"
+                "Вы зарегистрированы как клиент.\n\n"
+                "При смене роли на тренера будут удалены:\n"
+                "• Все ваши записи на тренировки\n"
+                "• История тренировок\n"
+                "• Связи с тренерами\n\n"
+                "Продолжить?",
+                reply_markup=reply_markup,
+                parse_mode='Markdown'
+            )
+            return
 
         await start_trainer_registration(update, context)
     elif query.data == "role_client":
@@ -115,29 +111,28 @@ async def start_client_registration_standalone(update: Update, context: ContextT
 async def show_club_info(update: Update, context: ContextTypes.DEFAULT_TYPE, club_qr: str):
     """Show club info when user scans QR code"""
     # Load club info from database
-    from db.session import SessionLocal
+    from sqlalchemy import select
+    from db.base import async_session
     from models import Club
 
-    db = SessionLocal()
-    try:
-        club = db.query(Club).filter_by(qr_code=club_qr).first()
-        if not club:
-            await update.message.reply_text(
-                "❌ Клуб не найден. Проверьте QR-код.",
-                parse_mode='Markdown'
-            )
-            return
+    async with async_session() as db:
+        club = (await db.execute(select(Club).filter_by(qr_code=club_qr))).scalars().first()
 
+    if not club:
         await update.message.reply_text(
-            f"🏢 *Добро пожаловать в Trenergram!*\n\n"
-            f"Вы в клубе: {club.name}\n"
-            f"📍 Адрес: {club.address}\n"
-            f"⏰ Город: {club.city}\n\n"
-            "Выберите тренера для записи:",
+            "❌ Клуб не найден. Проверьте QR-код.",
             parse_mode='Markdown'
         )
-    finally:
-        db.close()
+        return
+
+    await update.message.reply_text(
+        f"🏢 *Добро пожаловать в Trenergram!*\n\n"
+        f"Вы в клубе: {club.name}\n"
+        f"📍 Адрес: {club.address}\n"
+        f"⏰ Город: {club.city}\n\n"
+        "Выберите тренера для записи:",
+        parse_mode='Markdown'
+    )
 
 
 async def handle_club_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -158,7 +153,7 @@ async def handle_club_selection(update: Update, context: ContextTypes.DEFAULT_TY
 
     elif query.data == "club_list":
         # Показываем список клубов из БД
-        clubs = reg_service.get_clubs()
+        clubs = await reg_service.get_clubs()
 
         keyboard = []
         for club in clubs:
@@ -184,7 +179,7 @@ async def handle_club_selection(update: Update, context: ContextTypes.DEFAULT_TY
 
     elif query.data.startswith("club_select_"):
         # Выбран конкретный клуб
-        club_id = query.data.replace("club_select_", "")
+        club_id = int(query.data.replace("club_select_", ""))
         context.user_data['club_id'] = club_id
 
         await query.edit_message_text(
@@ -320,6 +315,11 @@ async def complete_trainer_registration(update: Update, context: ContextTypes.DE
         )
         return
 
+    # Flow is done; user_data is persisted, so don't leave the step behind
+    context.user_data.pop('registration_step', None)
+    # Role may have changed: next /start sets the full trainer menu
+    await forget_menu(user.id)
+
     # Set trainer commands menu
     from telegram import BotCommand, BotCommandScopeChat
     trainer_commands = [
@@ -407,6 +407,9 @@ async def complete_client_registration(update: Update, context: ContextTypes.DEF
         )
         return
 
+    context.user_data.pop('registration_step', None)
+    await forget_menu(user.id)
+
     # Set client commands menu
     from telegram import BotCommand, BotCommandScopeChat
     client_commands = [
@@ -474,39 +477,43 @@ async def handle_confirm_switch_to_trainer(update: Update, context: ContextTypes
     await query.answer()
 
     user = update.effective_user
-    from db.session import SessionLocal
-    from models import User as UserModel, UserRole, Booking, TrainerClient
+    from sqlalchemy import select, delete
+    from db.base import async_session
+    from models import UserRole, Booking, TrainerClient
+    from repositories import users as user_repo
 
-    db = SessionLocal()
-    try:
-        existing_user = db.query(UserModel).filter_by(telegram_id=str(user.id)).first()
+    async with async_session() as db:
+        try:
+            existing_user = await user_repo.get_user(db, str(user.id))
 
-        if not existing_user or existing_user.role != UserRole.CLIENT:
-            await query.edit_message_text(
-                "⚠️ Ошибка: пользователь не найден или уже не является клиентом.",
-                parse_mode='Markdown'
-            )
-            return
+            if not existing_user or existing_user.role != UserRole.CLIENT:
+                await query.edit_message_text(
+                    "⚠️ Ошибка: пользователь не найден или уже не является клиентом.",
+                    parse_mode='Markdown'
+                )
+                return
 
-        # Delete all client bookings
-        db.query(Booking).filter_by(client_id=existing_user.id).delete()
+            # Delete all client bookings (per object, so club counters are adjusted)
+            bookings = await db.execute(select(Booking).filter_by(client_id=existing_user.id))
+            for booking in bookings.scalars().all():
+                await db.delete(booking)
+            await db.flush()
 
-        # Delete all trainer-client relationships where user is client
-        db.query(TrainerClient).filter_by(client_id=existing_user.id).delete()
+            # Delete all trainer-client relationships where user is client
+            await db.execute(delete(TrainerClient).filter_by(client_id=existing_user.id))
 
-        db.commit()
-        logger.info(f"Deleted client data for user {user.id} before switching to trainer")
+            await db.commit()
+            logger.info(f"Deleted client data for user {user.id} before switching to trainer")
+            await forget_menu(user.id)
 
-    except Exception as e:
-        logger.error(f"Error deleting client data: {e}")
-        db.rollback()
-        await query.edit_message_text(
-            "❌ Произошла ошибка при смене роли. Попробуйте позже.",
-            parse_mode='Markdown'
-        )
-        return
-    finally:
-        db.close()
+        except Exception as e:
+            logger.error(f"Error deleting client data: {e}")
+            await db.rollback()
+            await query.edit_message_text(
+                "❌ Произошла ошибка при смене роли. Попробуйте позже.",
+                parse_mode='Markdown'
+            )
+            return
 
     # Continue with trainer registration
     await query.edit_message_text(
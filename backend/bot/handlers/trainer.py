@@ -2,81 +2,28 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, WebAppI
 from telegram.ext import ContextTypes
 
 from db.base import async_session
+from models import UserRole
+from services.snapshots import aget_user_snapshot
 from services.trainer import TrainerService
-from models.enums import BookingStatus
+from services.booking_stats import trainer_stats
+from services.agenda import get_agenda_text
 
 
 async def schedule_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show trainer's schedule for today"""
-    telegram_id = str(update.effective_user.id)
-
-    async with async_session() as db:
-        schedule = await TrainerService.get_today_schedule(db, telegram_id)
-
-    if not schedule:
-        await update.message.reply_text(
-            "📅 *Ваше расписание на сегодня*\n\n"
-            "У вас пока нет записей на сегодня.",
-            parse_mode='Markdown'
-        )
-        return
-
-    message = "📅 *Ваше расписание на сегодня*\n\n"
-
-    for item in schedule:
-        status_emoji = "✅" if item['status'] == BookingStatus.CONFIRMED else "⏳"
-        message += f"{item['time']} - {item['client_name']} {status_emoji}\n"
-
-    message += "\n✅ - подтверждено\n⏳ - ожидает подтверждения"
-
+    message = await get_agenda_text(str(update.effective_user.id), "schedule")
     await update.message.reply_text(message, parse_mode='Markdown')
 
 
 async def today_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show clients for today"""
-    telegram_id = str(update.effective_user.id)
-
-    async with async_session() as db:
-        clients = await TrainerService.get_today_clients(db, telegram_id)
-
-    if not clients:
-        await update.message.reply_text(
-            "👥 *Клиенты на сегодня*\n\n"
-            "У вас пока нет записей на сегодня.",
-            parse_mode='Markdown'
-        )
-        return
-
-    message = "👥 *Клиенты на сегодня*\n\n"
-    for i, client in enumerate(clients, 1):
-        message += f"{i}. {client['time']} - {client['name']}\n"
-
-    message += f"\nВсего: {len(clients)} клиент(ов)"
-
+    message = await get_agenda_text(str(update.effective_user.id), "today")
     await update.message.reply_text(message, parse_mode='Markdown')
 
 
 async def tomorrow_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show clients for tomorrow"""
-    telegram_id = str(update.effective_user.id)
-
-    async with async_session() as db:
-        clients = await TrainerService.get_tomorrow_clients(db, telegram_id)
-
-    if not clients:
-        await update.message.reply_text(
-            "👥 *Клиенты на завтра*\n\n"
-            "У вас пока нет записей на завтра.",
-            parse_mode='Markdown'
-        )
-        return
-
-    message = "👥 *Клиенты на завтра*\n\n"
-    for i, client in enumerate(clients, 1):
-        message += f"{i}. {client['time']} - {client['name']}\n"
-
-    message += f"\nВсего: {len(clients)} клиент(ов)"
-
+    message = await get_agenda_text(str(update.effective_user.id), "tomorrow")
     await update.message.reply_text(message, parse_mode='Markdown')
 
 
@@ -122,7 +69,12 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     telegram_id = str(update.effective_user.id)
 
     async with async_session() as db:
-        stats = await TrainerService.get_trainer_stats(db, telegram_id)
+        trainer = await aget_user_snapshot(db, telegram_id, UserRole.TRAINER)
+        if not trainer:
+            await update.message.reply_text("Статистика доступна только тренерам.")
+            return
+        # Read from the daily rollup, so revenue is the sum of actual booking prices
+        stats = await trainer_stats(db, trainer)
 
     await update.message.reply_text(
         f"📊 *Ваша статистика*\n\n"
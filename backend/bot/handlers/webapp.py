@@ -1,9 +1,8 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
 from telegram.ext import ContextTypes
-import asyncio
 
-from db.session import SessionLocal
-from models import User, UserRole
+from models import UserRole
+from services.registration import get_user_by_telegram_id
 
 
 async def cabinet_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -13,14 +12,7 @@ async def cabinet_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     trainer_link = f"https://t.me/{context.bot.username}?start=trainer_{user_id}"
 
     # Check user role from database
-    def get_user():
-        db = SessionLocal()
-        try:
-            return db.query(User).filter_by(telegram_id=telegram_id).first()
-        finally:
-            db.close()
-
-    user = await asyncio.to_thread(get_user)
+    user = await get_user_by_telegram_id(telegram_id)
 
     if not user:
         await update.message.reply_text(
@@ -5,6 +5,14 @@ from telegram.ext import Application, CommandHandler, CallbackQueryHandler, Mess
 from core.config import settings
 from bot.handlers import registration, trainer, client, common, webapp, booking_callbacks
 from bot.utils import keyboards
+from bot.utils.menu import menu_is_current, remember_menu
+from bot.utils.persistence import RedisPersistence
+from bot.utils.updates import ChatOrderedApplication
+from services.counters import install_counter_hooks
+from services.client_home import install_client_home_hooks
+from services.agenda import install_agenda_hooks
+from services.events import install_event_hooks
+from services.snapshots import install_snapshot_hooks
 
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -15,6 +23,10 @@ logger = logging.getLogger(__name__)
 
 async def set_user_commands(bot, user_id: int, role: str):
     """Set commands menu based on user role"""
+    # The chat keeps its menu; skip the two Bot API calls if it is up to date
+    if await menu_is_current(user_id, role):
+        return
+
     if role == "trainer":
         commands = [
             BotCommand("start", "Начать работу"),
@@ -54,6 +66,7 @@ async def set_user_commands(bot, user_id: int, role: str):
         if menu_button:
             await bot.set_chat_menu_button(chat_id=user_id, menu_button=menu_button)
             logger.info(f"Menu button set for user {user_id} with role {role}")
+        await remember_menu(user_id, role)
     except Exception as e:
         logger.error(f"Failed to set commands/menu button for user {user_id}: {e}")
 
@@ -66,18 +79,8 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info(f"Start command from user {user.id} (@{user.username}) with args: {args}")
 
     # Check if user is already registered
-    import asyncio
-    from db.session import SessionLocal
-    from models import User as UserModel
-
-    def get_user():
-        db = SessionLocal()
-        try:
-            return db.query(UserModel).filter_by(telegram_id=str(user.id)).first()
-        finally:
-            db.close()
-
-    existing_user = await asyncio.to_thread(get_user)
+    from services.registration import get_user_by_telegram_id
+    existing_user = await get_user_by_telegram_id(str(user.id))
 
     if existing_user:
         logger.info(f"User {user.id} already registered as {existing_user.role}")
@@ -256,10 +259,24 @@ async def post_init(application: Application) -> None:
     logger.info("Bot initialized - commands menu will be set per user after registration")
 
 
-def main():
-    """Start the bot"""
-    # Create the Application
-    application = Application.builder().token(settings.BOT_TOKEN).post_init(post_init).build()
+def build_application() -> Application:
+    """Create the bot Application with all handlers registered"""
+    # Create the Application: updates run concurrently, in order within a chat,
+    # and registration state in user_data survives restarts
+    persistence = RedisPersistence(
+        ttl=settings.BOT_PERSISTENCE_TTL,
+        update_interval=settings.BOT_PERSISTENCE_UPDATE_INTERVAL,
+        local_ttl=settings.BOT_PERSISTENCE_LOCAL_TTL,
+    )
+    application = (
+        Application.builder()
+        .token(settings.BOT_TOKEN)
+        .application_class(ChatOrderedApplication)
+        .concurrent_updates(settings.BOT_CONCURRENT_UPDATES)
+        .persistence(persistence)
+        .post_init(post_init)
+        .build()
+    )
 
     # Common handlers
     application.add_handler(CommandHandler("start", start))
@@ -279,6 +296,7 @@ def main():
     application.add_handler(CallbackQueryHandler(booking_callbacks.handle_accept_reschedule, pattern="^accept_reschedule:"))
     application.add_handler(CallbackQueryHandler(booking_callbacks.handle_decline_reschedule, pattern="^decline_reschedule:"))
     application.add_handler(CallbackQueryHandler(booking_callbacks.handle_confirm_attendance, pattern="^confirm_attendance:"))
+    application.add_handler(CallbackQueryHandler(booking_callbacks.handle_pick_slot, pattern="^pick_slot:"))
 
     # Topup callback handlers
     application.add_handler(CallbackQueryHandler(booking_callbacks.handle_topup_confirm, pattern="^topup_confirm:"))
@@ -292,6 +310,9 @@ def main():
     application.add_handler(CommandHandler("my_link", webapp.my_link_command))
     application.add_handler(CommandHandler("settings", webapp.settings_command))
 
+    # Trainer statistics from the daily booking rollup
+    application.add_handler(CommandHandler("stats", trainer.stats_command))
+
     # Client commands (keep minimal)
     application.add_handler(CommandHandler("my", client.my_bookings_command))
 
@@ -303,6 +324,24 @@ def main():
     application.add_handler(MessageHandler(filters.CONTACT, registration.handle_contact))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, registration.handle_text_input))
 
+    return application
+
+
+def main():
+    """Start the bot"""
+    if settings.BOT_MODE == "webhook":
+        logger.info("BOT_MODE=webhook: updates are served by the API app at /telegram/webhook")
+        return
+
+    # Keep counters, client_home read model, cached agendas, snapshots and the event outbox in sync with bot handlers
+    install_counter_hooks()
+    install_client_home_hooks()
+    install_agenda_hooks()
+    install_event_hooks()
+    install_snapshot_hooks()
+
+    application = build_application()
+
     # Start the bot
     logger.info(f"Starting bot @{settings.BOT_USERNAME}...")
     application.run_polling(allowed_updates=Update.ALL_TYPES)
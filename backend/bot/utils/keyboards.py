@@ -68,4 +68,16 @@ def get_time_slots_keyboard(available_slots):
 
     keyboard.append([InlineKeyboardButton("❌ Отмена", callback_data="cancel")])
 
-    return InlineKeyboardMarkup(keyboard)
\ No newline at end of file
+    return InlineKeyboardMarkup(keyboard)
+
+def get_slot_suggestions_keyboard(booking_id, slots):
+    """Get keyboard with nearest free times for rescheduling a booking"""
+    weekdays = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+    keyboard = [
+        [InlineKeyboardButton(
+            f"🕐 {weekdays[slot.weekday()]} {slot.strftime('%d.%m %H:%M')}",
+            callback_data=f"pick_slot:{booking_id}:{int(slot.timestamp())}"
+        )]
+        for slot in slots
+    ]
+    return InlineKeyboardMarkup(keyboard)
@@ -0,0 +1,35 @@
+"""
+Remember which command menu each user already has
+
+set_my_commands and set_chat_menu_button are sent on /start, but a chat keeps
+its menu, so they only need resending when the user's role or the menus
+themselves changed. The role and MENU_VERSION last applied are cached per
+telegram_id; registration and role switches drop the entry.
+"""
+
+from core.cache import cache
+
+# Bump when the commands or menu buttons in set_user_commands change
+MENU_VERSION = 1
+MENU_TTL = 7 * 24 * 3600
+
+
+def _key(user_id) -> str:
+    return f"bot:menu:{user_id}"
+
+
+def _value(role) -> str:
+    return f"{getattr(role, 'value', role)}:{MENU_VERSION}"
+
+
+async def menu_is_current(user_id, role) -> bool:
+    """True if the user's chat already has the menu for this role"""
+    return await cache.aget(_key(user_id)) == _value(role)
+
+
+async def remember_menu(user_id, role):
+    await cache.aset(_key(user_id), _value(role), MENU_TTL)
+
+
+async def forget_menu(user_id):
+    await cache.adelete(_key(user_id))
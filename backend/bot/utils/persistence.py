@@ -0,0 +1,169 @@
+"""
+Redis-backed persistence for bot user/chat data
+
+Registration keeps its step and answers in context.user_data. Stored here,
+a half-finished registration survives a restart and can continue on another
+bot process.
+
+- Writes are behind: PTB hands over changed entries every update_interval
+  seconds and they go to Redis in one pipeline.
+- Every entry has a TTL refreshed on write, so abandoned flows expire.
+- Reads are served from the process' own copy while it is younger than
+  local_ttl, or while it has changes not written yet; otherwise the entry is
+  re-read from Redis, where another process may have moved the flow on.
+
+Data is stored as JSON, so it must be JSON-serializable with str keys.
+bot_data and callback_data are not persisted.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+USER_KEY = "bot:user_data:{}"
+CHAT_KEY = "bot:chat_data:{}"
+CONVERSATION_KEY = "bot:conversations:{}"
+
+
+def _dump(data) -> str:
+    return json.dumps(data, ensure_ascii=False, sort_keys=True)
+
+
+class RedisPersistence(BasePersistence):
+    """BasePersistence storing user_data, chat_data and conversations in Redis"""
+
+    def __init__(
+        self,
+        ttl: int = 24 * 3600,
+        update_interval: float = 1,
+        local_ttl: float = 3,
+        store_data: PersistenceInput = None,
+    ):
+        super().__init__(
+            store_data=store_data or PersistenceInput(bot_data=False, callback_data=False),
+            update_interval=update_interval,
+        )
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        # key -> (monotonic time, JSON) of the last value read from or written to Redis
+        self._synced: Dict[str, Tuple[float, str]] = {}
+        # key -> JSON to write, None to delete
+        self._pending: Dict[str, Optional[str]] = {}
+        self._conversations: Dict[str, dict] = {}
+        self._write_task: Optional[asyncio.Task] = None
+
+    # Entries are loaded on first use by refresh_*_data, not all at startup
+    async def get_user_data(self) -> Dict[int, dict]:
+        return {}
+
+    async def get_chat_data(self) -> Dict[int, dict]:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def get_conversations(self, name: str) -> dict:
+        raw = await cache.aget(CONVERSATION_KEY.format(name))
+        conversations = {tuple(key): state for key, state in json.loads(raw)} if raw else {}
+        self._conversations[name] = conversations
+        return dict(conversations)
+
+    async def update_conversation(self, name: str, key: tuple, new_state: Optional[object]) -> None:
+        conversations = self._conversations.setdefault(name, {})
+        if new_state is None:
+            conversations.pop(key, None)
+        else:
+            conversations[key] = new_state
+        self._queue(CONVERSATION_KEY.format(name), _dump([[list(k), s] for k, s in conversations.items()]))
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        self._queue(USER_KEY.format(user_id), _dump(data) if data else None)
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        self._queue(CHAT_KEY.format(chat_id), _dump(data) if data else None)
+
+    async def update_bot_data(self, data: dict) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._queue(USER_KEY.format(user_id), None)
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        self._queue(CHAT_KEY.format(chat_id), None)
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        await self._refresh(USER_KEY.format(user_id), user_data)
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        await self._refresh(CHAT_KEY.format(chat_id), chat_data)
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+    async def flush(self) -> None:
+        if self._write_task is not None:
+            await self._write_task
+        await self._write()
+
+    async def _refresh(self, key: str, data: dict):
+        synced = self._synced.get(key)
+        if synced is not None:
+            synced_at, synced_raw = synced
+            # Local changes not written yet win over Redis
+            if key in self._pending or _dump(data) != synced_raw:
+                return
+            if time.monotonic() - synced_at < self.local_ttl:
+                return
+
+        raw = await cache.aget(key)
+        self._synced[key] = (time.monotonic(), raw or _dump({}))
+        data.clear()
+        if raw:
+            data.update(json.loads(raw))
+
+    def _queue(self, key: str, raw: Optional[str]):
+        self._pending[key] = raw
+        # PTB hands over all changed entries at once; write them together
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.create_task(self._write_soon())
+
+    async def _write_soon(self):
+        await asyncio.sleep(0)
+        await self._write()
+
+    async def _write(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        values = {key: raw for key, raw in pending.items() if raw is not None}
+        deleted = [key for key, raw in pending.items() if raw is None]
+        try:
+            await cache.aset_many(values, self.ttl)
+            await cache.adelete(*deleted)
+        except Exception as e:
+            logger.error(f"Failed to persist bot data: {e}")
+            # Keep newer changes queued meanwhile
+            self._pending = {**pending, **self._pending}
+            return
+
+        now = time.monotonic()
+        for key, raw in pending.items():
+            self._synced[key] = (now, raw or _dump({}))
+        # Forget entries that have expired in Redis by now
+        expired = [key for key, (synced_at, _) in self._synced.items() if now - synced_at > self.ttl]
+        for key in expired:
+            del self._synced[key]
@@ -0,0 +1,93 @@
+"""
+Collapse repeated taps on inline buttons
+
+Users double- and triple-tap booking buttons. Without a guard every tap
+re-runs the handler: DB reads, a commit attempt, a message to the other
+party. collapse_taps wraps a callback handler so that per (user,
+callback_data):
+
+- a tap while the first one is still running gets an immediate
+  query.answer and nothing else (lock shared through Redis, so this holds
+  across bot processes);
+- a tap shortly after it succeeded is answered from the cached result.
+
+Handlers return the text repeats are answered with (usually DONE_TEXT)
+when the tap took effect or there is nothing left to do, and None when it
+failed: the next tap then runs the handler again.
+
+Absorbed taps are counted per day for the admin dashboard.
+"""
+
+import functools
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from core.cache import cache
+
+# Longest a handler is expected to run; the lock expires after that anyway
+LOCK_TTL = 30
+# How long a finished tap answers repeats
+RESULT_TTL = 60
+STATS_TTL = 8 * 24 * 3600
+
+BUSY_TEXT = "⏳ Уже обрабатываем, подождите"
+DONE_TEXT = "ℹ️ Уже обработано"
+
+KINDS = ("handled", "collapsed", "cached")
+
+
+def _stats_key(day: str, kind: str) -> str:
+    return f"bot:taps:{day}:{kind}"
+
+
+async def record_tap(kind: str):
+    day = datetime.now(timezone.utc).date().isoformat()
+    await cache.aincr(_stats_key(day, kind), STATS_TTL)
+
+
+def get_tap_stats(days: int = 7) -> List[Dict]:
+    """Handled and absorbed taps per UTC day, newest first"""
+    today = datetime.now(timezone.utc).date()
+    stats = []
+    for offset in range(days):
+        day = (today - timedelta(days=offset)).isoformat()
+        counts = {kind: int(cache.get(_stats_key(day, kind)) or 0) for kind in KINDS}
+        stats.append({"date": day, **counts})
+    return stats
+
+
+def collapse_taps(handler):
+    """Run a callback handler once per burst of identical taps"""
+
+    @functools.wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        key = f"bot:tap:{query.from_user.id}:{query.data}"
+
+        result = await cache.aget(f"{key}:result")
+        if result is not None:
+            await record_tap("cached")
+            await query.answer(result)
+            return
+
+        # Our own token: a handler outliving LOCK_TTL must not release the next tap's lock
+        token = secrets.token_hex(8)
+        if not await cache.aadd(f"{key}:lock", token, LOCK_TTL):
+            await record_tap("collapsed")
+            await query.answer(BUSY_TEXT)
+            return
+
+        try:
+            result = await handler(update, context)
+            if result is not None:
+                await cache.aset(f"{key}:result", result, RESULT_TTL)
+        finally:
+            await cache.adelete_if_equals(f"{key}:lock", token)
+        await record_tap("handled")
+        return result
+
+    return wrapper
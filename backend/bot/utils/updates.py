@@ -0,0 +1,75 @@
+"""
+Concurrent update processing with per-chat ordering
+
+With concurrent_updates enabled, python-telegram-bot processes updates as
+independent tasks, so one slow handler no longer holds up every other user.
+Taps of one user still have to be handled in the order they were made (a
+cancel must not overtake the confirm before it), so updates of the same chat
+wait on a per-chat lock.
+
+The library takes its concurrent_updates semaphore before process_update()
+runs, so an update waiting for its chat would hold one of the slots: a
+burst of taps from one chat could take all of them and stall every other
+chat. ChatOrderedApplication therefore leaves the library's semaphore
+effectively unbounded and applies the configured limit itself, after the
+chat lock: only updates that can run right away take a slot.
+"""
+
+import asyncio
+import weakref
+from typing import Optional, Union
+
+from telegram import Update
+from telegram.ext import Application
+
+
+def update_chat_key(update: object) -> Optional[int]:
+    """Chat (or user) an update belongs to, None for updates without one"""
+    if not isinstance(update, Update):
+        return None
+    if update.effective_chat:
+        return update.effective_chat.id
+    if update.effective_user:
+        return update.effective_user.id
+    return None
+
+
+# Library-side limit: updates waiting for their chat are only tasks
+WAITING_UPDATES_LIMIT = 2 ** 20
+
+
+class ChatOrderedApplication(Application):
+    """Application that runs updates concurrently but one at a time per chat"""
+
+    __slots__ = ("_chat_locks", "_handler_limit", "_handler_slots")
+
+    def __init__(self, *, concurrent_updates: Union[bool, int] = False, **kwargs):
+        limit = 256 if concurrent_updates is True else int(concurrent_updates or 0)
+        super().__init__(concurrent_updates=WAITING_UPDATES_LIMIT if limit else 0, **kwargs)
+        self._handler_limit = limit
+        self._handler_slots = asyncio.BoundedSemaphore(limit or 1)
+        # Locks disappear once no update of the chat holds or waits on them
+        self._chat_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    @property
+    def concurrent_updates(self) -> int:
+        """Updates handled at the same time (0: one after another)"""
+        return self._handler_limit
+
+    def _chat_lock(self, key: int) -> asyncio.Lock:
+        lock = self._chat_locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._chat_locks[key] = lock
+        return lock
+
+    async def process_update(self, update: object) -> None:
+        key = update_chat_key(update)
+        if key is None:
+            async with self._handler_slots:
+                await super().process_update(update)
+            return
+        # Chat first, then a slot
+        async with self._chat_lock(key):
+            async with self._handler_slots:
+                await super().process_update(update)
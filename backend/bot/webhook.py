@@ -0,0 +1,164 @@
+"""
+Webhook mode for the bot
+
+With BOT_MODE=webhook the API app owns the bot: Telegram POSTs updates to
+/api/telegram/webhook, the route checks the secret token and handles the
+update before answering, up to BOT_CONCURRENT_UPDATES at once per replica.
+Every API replica runs its own Application, so the bot scales with the API.
+
+Both guarantees polling gives are kept across replicas through Redis:
+- an update_id is first marked "processing" (short TTL) and only marked
+  "done" once its handlers succeeded; a redelivery of a done update is
+  acknowledged, one still in flight gets 503, and a failed update has its
+  marker removed so Telegram's redelivery runs it again;
+- updates of one chat wait their turn in a per-chat queue ordered by
+  update_id, whichever replica they arrived at. An entry whose processing
+  marker expired belongs to a replica that died and is skipped.
+"""
+
+import asyncio
+import contextvars
+import hmac
+import logging
+import time
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from telegram import Update
+from telegram.ext import Application
+
+from bot.utils.updates import update_chat_key
+from core.cache import cache
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Telegram gives up redelivering an update well within a day
+DEDUP_TTL = 24 * 3600
+# Longest a handler may run before its update counts as abandoned
+PROCESSING_TTL = 60
+# Longest an update waits for earlier updates of its chat
+TURN_TIMEOUT = 30
+TURN_POLL = 0.05
+
+PROCESSING = "processing"
+DONE = "done"
+
+application: Optional[Application] = None
+
+# Set by _record_error while the route's own update is processed
+_handler_failed: contextvars.ContextVar[bool] = contextvars.ContextVar("handler_failed", default=False)
+
+
+async def _record_error(update: object, context) -> None:
+    """Error handler: tell the route that a handler of its update raised"""
+    # Blocking error handlers run inside process_update, in the route's task
+    _handler_failed.set(True)
+
+
+async def _wait_turn(chat_key: int, update_id: int) -> bool:
+    """Queue update_id behind earlier updates of the chat; False on timeout"""
+    queue = f"bot:chat:{chat_key}:turns"
+    await cache.aqueue_push(queue, str(update_id), update_id, PROCESSING_TTL + TURN_TIMEOUT)
+    deadline = time.monotonic() + TURN_TIMEOUT
+    while True:
+        head = await cache.aqueue_head(queue)
+        if head is None or head == str(update_id):
+            return True
+        # A replica that died mid-update leaves its entry behind
+        if await cache.aget(f"bot:update:{head}") != PROCESSING:
+            await cache.aqueue_remove(queue, head)
+            continue
+        if time.monotonic() >= deadline:
+            await cache.aqueue_remove(queue, str(update_id))
+            return False
+        await asyncio.sleep(TURN_POLL)
+
+
+async def start_webhook_bot():
+    """Build and start the bot Application, register the webhook if a URL is set"""
+    global application
+    from bot.main import build_application
+
+    # Without it anyone who finds the URL can post updates as any user
+    if not settings.BOT_WEBHOOK_SECRET:
+        raise RuntimeError("BOT_WEBHOOK_SECRET must be set when BOT_MODE=webhook")
+
+    application = build_application()
+    application.add_error_handler(_record_error, block=True)
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+
+    if settings.BOT_WEBHOOK_URL:
+        await application.bot.set_webhook(
+            url=settings.BOT_WEBHOOK_URL,
+            secret_token=settings.BOT_WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES,
+            max_connections=settings.BOT_WEBHOOK_MAX_CONNECTIONS,
+        )
+        logger.info(f"Webhook set to {settings.BOT_WEBHOOK_URL}")
+    else:
+        logger.info("BOT_WEBHOOK_URL is not set, webhook registration skipped")
+
+
+async def stop_webhook_bot():
+    """Finish queued updates and shut the Application down"""
+    global application
+    if application is None:
+        return
+    await application.stop()
+    await application.shutdown()
+    application = None
+
+
+@router.post("/webhook")
+async def telegram_webhook(request: Request):
+    """Handle an update from Telegram, in order within its chat"""
+    if application is None:
+        raise HTTPException(status_code=503, detail="Bot is not running in webhook mode")
+
+    token = request.headers.get("X-Telegram-Bot-Api-Secret-Token")
+    if not token or not settings.BOT_WEBHOOK_SECRET or not hmac.compare_digest(token, settings.BOT_WEBHOOK_SECRET):
+        raise HTTPException(status_code=403, detail="Invalid secret token")
+
+    try:
+        data = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid update")
+    update_id = data.get("update_id") if isinstance(data, dict) else None
+    if not isinstance(update_id, int):
+        raise HTTPException(status_code=400, detail="Invalid update")
+
+    # First delivery wins across all replicas
+    marker = f"bot:update:{update_id}"
+    if not await cache.aadd(marker, PROCESSING, PROCESSING_TTL):
+        if await cache.aget(marker) == DONE:
+            return {"ok": True, "duplicate": True}
+        # Still being handled elsewhere: let Telegram retry later
+        raise HTTPException(status_code=503, detail="Update is being processed")
+
+    update = Update.de_json(data, application.bot)
+    chat_key = update_chat_key(update)
+    if chat_key is not None and not await _wait_turn(chat_key, update_id):
+        await cache.adelete(marker)
+        raise HTTPException(status_code=503, detail="Earlier updates of the chat are still being processed")
+
+    _handler_failed.set(False)
+    try:
+        await application.process_update(update)
+    except Exception:
+        logger.exception(f"Update {update_id} failed")
+        _handler_failed.set(True)
+    finally:
+        if chat_key is not None:
+            await cache.aqueue_remove(f"bot:chat:{chat_key}:turns", str(update_id))
+
+    if _handler_failed.get():
+        await cache.adelete(marker)
+        raise HTTPException(status_code=500, detail="Update failed")
+    await cache.aset(marker, DONE, DEDUP_TTL)
+    return {"ok": True}
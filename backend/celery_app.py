@@ -5,13 +5,18 @@ Celery application configuration for periodic tasks
 from celery import Celery
 from celery.schedules import crontab
 from core.config import settings
+from services.counters import install_counter_hooks
+from services.client_home import install_client_home_hooks
+from services.agenda import install_agenda_hooks
+from services.events import install_event_hooks
+from services.snapshots import install_snapshot_hooks
 
 # Initialize Celery app
 celery_app = Celery(
     "trenergram",
     broker=settings.REDIS_URL,
     backend=settings.REDIS_URL,
-    include=["tasks.reminders", "tasks.balance"]
+    include=["tasks.reminders", "tasks.balance", "tasks.counters", "tasks.booking_stats", "tasks.export"]
 )
 
 # Celery configuration
@@ -41,7 +46,27 @@ celery_app.conf.beat_schedule = {
         "task": "tasks.balance.check_and_charge_bookings",
         "schedule": 300.0,  # Run every 5 minutes
     },
+    "reconcile-counters": {
+        "task": "tasks.counters.reconcile_counters",
+        "schedule": crontab(hour=3, minute=30),  # Nightly drift repair
+    },
+    "refresh-booking-stats": {
+        "task": "tasks.booking_stats.refresh_booking_stats",
+        "schedule": 300.0,  # Run every 5 minutes
+    },
+    "cleanup-exports": {
+        "task": "tasks.export.cleanup_exports",
+        "schedule": 3600.0,  # Run every hour
+    },
 }
 
+# Charging and auto-cancel change booking counters, balances and bookings shown in client_home;
+# auto-cancel notifications go through the event outbox; user/club changes drop cached snapshots
+install_counter_hooks()
+install_client_home_hooks()
+install_agenda_hooks()
+install_event_hooks()
+install_snapshot_hooks()
+
 if __name__ == "__main__":
     celery_app.start()
@@ -0,0 +1,373 @@
+"""
+Shared key-value cache
+
+Backed by Redis (settings.REDIS_URL) so API, bot and Celery workers see the
+same entries and invalidations. If Redis is unreachable, an in-process TTL
+dict is used instead and Redis is retried after a short pause; in that mode
+invalidation only reaches the current process, so keep TTLs short.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds to skip Redis after a connection failure
+RETRY_AFTER = 30
+
+# Delete a key only while it still holds the caller's value (lock release)
+_DELETE_IF_EQUALS = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Strong references: the loop only keeps weak ones to running tasks
+_background: Set[asyncio.Task] = set()
+
+
+def _log_failure(task: asyncio.Task):
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background cache call failed: {task.exception()}")
+
+
+def run_soon(call: Callable[[], Awaitable[None]], fallback: Callable[[], None]) -> bool:
+    """
+    Run call() as a task if this thread runs an event loop, else fallback()
+
+    For commit hooks: they also fire for AsyncSession commits, on the loop's
+    thread, where a blocking Redis round trip would stall every request.
+    Returns True if the call was scheduled rather than done.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        fallback()
+        return False
+    task = loop.create_task(call())
+    _background.add(task)
+    task.add_done_callback(_log_failure)
+    return True
+
+
+class Cache:
+    """String cache with TTL, sync and async interfaces"""
+
+    def __init__(self, url: str):
+        self._url = url
+        self._client: Optional[redis.Redis] = None
+        self._async_client: Optional[aioredis.Redis] = None
+        self._local: Dict[str, Tuple[float, str]] = {}
+        self._local_queues: Dict[str, Dict[str, float]] = {}
+        self._down_until = 0.0
+
+    # Redis clients are created lazily: importing this module never connects
+    def _redis(self) -> Optional[redis.Redis]:
+        if time.monotonic() < self._down_until:
+            return None
+        if self._client is None:
+            self._client = redis.Redis.from_url(
+                self._url, decode_responses=True, socket_timeout=0.5, socket_connect_timeout=0.5
+            )
+        return self._client
+
+    def _async_redis(self) -> Optional[aioredis.Redis]:
+        if time.monotonic() < self._down_until:
+            return None
+        if self._async_client is None:
+            self._async_client = aioredis.Redis.from_url(
+                self._url, decode_responses=True, socket_timeout=0.5, socket_connect_timeout=0.5
+            )
+        return self._async_client
+
+    def _mark_down(self, error: Exception):
+        logger.warning(f"Redis unavailable, using local cache for {RETRY_AFTER}s: {error}")
+        self._down_until = time.monotonic() + RETRY_AFTER
+
+    def _local_get(self, key: str) -> Optional[str]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._local.pop(key, None)
+            return None
+        return entry[1]
+
+    def _local_set(self, key: str, value: str, ttl: int):
+        self._local[key] = (time.monotonic() + ttl, value)
+
+    def _local_delete(self, keys):
+        for key in keys:
+            self._local.pop(key, None)
+
+    def get(self, key: str) -> Optional[str]:
+        client = self._redis()
+        if client is not None:
+            try:
+                return client.get(key)
+            except redis.RedisError as e:
+                self._mark_down(e)
+        return self._local_get(key)
+
+    def get_many(self, *keys: str) -> List[Optional[str]]:
+        """Values of several keys in one round trip"""
+        client = self._redis()
+        if client is not None:
+            try:
+                return client.mget(keys)
+            except redis.RedisError as e:
+                self._mark_down(e)
+        return [self._local_get(key) for key in keys]
+
+    def set(self, key: str, value: str, ttl: int):
+        client = self._redis()
+        if client is not None:
+            try:
+                client.set(key, value, ex=ttl)
+                return
+            except redis.RedisError as e:
+                self._mark_down(e)
+        self._local_set(key, value, ttl)
+
+    def set_if_unchanged(self, key: str, value: str, ttl: int, guard: str, expected: Optional[str]) -> bool:
+        """Set key only if guard still holds expected (None: absent); True if stored"""
+        client = self._redis()
+        if client is not None:
+            try:
+                with client.pipeline() as pipe:
+                    pipe.watch(guard)
+                    if pipe.get(guard) != expected:
+                        return False
+                    pipe.multi()
+                    pipe.set(key, value, ex=ttl)
+                    pipe.execute()
+                return True
+            except redis.WatchError:
+                return False
+            except redis.RedisError as e:
+                self._mark_down(e)
+        if self._local_get(guard) != expected:
+            return False
+        self._local_set(key, value, ttl)
+        return True
+
+    def incr(self, key: str, ttl: int) -> int:
+        """Increment an integer counter, setting its TTL on creation"""
+        client = self._redis()
+        if client is not None:
+            try:
+                with client.pipeline(transaction=False) as pipe:
+                    pipe.incr(key)
+                    pipe.expire(key, ttl, nx=True)
+                    value, _ = pipe.execute()
+                return value
+            except redis.RedisError as e:
+                self._mark_down(e)
+        value = int(self._local_get(key) or 0) + 1
+        self._local_set(key, str(value), ttl)
+        return value
+
+    def delete(self, *keys: str):
+        if not keys:
+            return
+        self._local_delete(keys)
+        client = self._redis()
+        if client is not None:
+            try:
+                client.delete(*keys)
+            except redis.RedisError as e:
+                self._mark_down(e)
+
+    def delete_soon(self, *keys: str):
+        """delete() that never blocks a running event loop (see run_soon)"""
+        if keys:
+            self._local_delete(keys)
+            run_soon(lambda: self.adelete(*keys), lambda: self.delete(*keys))
+
+    def publish(self, channel: str, message: str):
+        """Publish to a Redis channel; dropped while Redis is unavailable"""
+        client = self._redis()
+        if client is not None:
+            try:
+                client.publish(channel, message)
+            except redis.RedisError as e:
+                self._mark_down(e)
+
+    async def apublish(self, channel: str, message: str):
+        client = self._async_redis()
+        if client is not None:
+            try:
+                await client.publish(channel, message)
+            except redis.RedisError as e:
+                self._mark_down(e)
+
+    async def aget(self, key: str) -> Optional[str]:
+        client = self._async_redis()
+        if client is not None:
+            try:
+                return await client.get(key)
+            except redis.RedisError as e:
+                self._mark_down(e)
+        return self._local_get(key)
+
+    async def aget_many(self, *keys: str) -> List[Optional[str]]:
+        client = self._async_redis()
+        if client is not None:
+            try:
+                return await client.mget(keys)
+            except redis.RedisError as e:
+                self._mark_down(e)
+        return [self._local_get(key) for key in keys]
+
+    async def aset(self, key: str, value: str, ttl: int):
+        client = self._async_redis()
+        if client is not None:
+            try:
+                await client.set(key, value, ex=ttl)
+                return
+            except redis.RedisError as e:
+                self._mark_down(e)
+        self._local_set(key, value, ttl)
+
+    async def aset_many(self, values: Dict[str, str], ttl: int):
+        """Set several keys in one round trip"""
+        if not values:
+            return
+        client = self._async_redis()
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for key, value in values.items():
+                        pipe.set(key, value, ex=ttl)
+                    await pipe.execute()
+                return
+            except redis.RedisError as e:
+                self._mark_down(e)
+        for key, value in values.items():
+            self._local_set(key, value, ttl)
+
+    async def aset_if_unchanged(self, key: str, value: str, ttl: int, guard: str, expected: Optional[str]) -> bool:
+        client = self._async_redis()
+        if client is not None:
+            try:
+                async with client.pipeline() as pipe:
+                    await pipe.watch(guard)
+                    if await pipe.get(guard) != expected:
+                        return False
+                    pipe.multi()
+                    pipe.set(key, value, ex=ttl)
+                    await pipe.execute()
+                return True
+            except redis.WatchError:
+                return False
+            except redis.RedisError as e:
+                self._mark_down(e)
+        if self._local_get(guard) != expected:
+            return False
+        self._local_set(key, value, ttl)
+        return True
+
+    async def aincr(self, key: str, ttl: int) -> int:
+        """Increment an integer counter, setting its TTL on creation"""
+        client = self._async_redis()
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.incr(key)
+                    pipe.expire(key, ttl, nx=True)
+                    value, _ = await pipe.execute()
+                return value
+            except redis.RedisError as e:
+                self._mark_down(e)
+        value = int(self._local_get(key) or 0) + 1
+        self._local_set(key, str(value), ttl)
+        return value
+
+    async def aadd(self, key: str, value: str, ttl: int) -> bool:
+        """Set key only if it is absent; True if this call stored it"""
+        client = self._async_redis()
+        if client is not None:
+            try:
+                return bool(await client.set(key, value, ex=ttl, nx=True))
+            except redis.RedisError as e:
+                self._mark_down(e)
+        if self._local_get(key) is not None:
+            return False
+        self._local_set(key, value, ttl)
+        return True
+
+    async def adelete_if_equals(self, key: str, value: str) -> bool:
+        """Delete key only if it still holds value; True if this call deleted it"""
+        client = self._async_redis()
+        if client is not None:
+            try:
+                return bool(await client.eval(_DELETE_IF_EQUALS, 1, key, value))
+            except redis.RedisError as e:
+                self._mark_down(e)
+        if self._local_get(key) != value:
+            return False
+        self._local_delete([key])
+        return True
+
+    async def aqueue_push(self, key: str, member: str, score: float, ttl: int):
+        """Add member to a queue ordered by score, (re)setting the queue's TTL"""
+        client = self._async_redis()
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.zadd(key, {member: score})
+                    pipe.expire(key, ttl)
+                    await pipe.execute()
+                return
+            except redis.RedisError as e:
+                self._mark_down(e)
+        self._local_queues.setdefault(key, {})[member] = score
+
+    async def aqueue_head(self, key: str) -> Optional[str]:
+        """Member with the lowest score, None if the queue is empty"""
+        client = self._async_redis()
+        if client is not None:
+            try:
+                head = await client.zrange(key, 0, 0)
+                return head[0] if head else None
+            except redis.RedisError as e:
+                self._mark_down(e)
+        queue = self._local_queues.get(key)
+        return min(queue, key=queue.get) if queue else None
+
+    async def aqueue_remove(self, key: str, member: str):
+        client = self._async_redis()
+        if client is not None:
+            try:
+                await client.zrem(key, member)
+                return
+            except redis.RedisError as e:
+                self._mark_down(e)
+        queue = self._local_queues.get(key)
+        if queue is not None:
+            queue.pop(member, None)
+            if not queue:
+                del self._local_queues[key]
+
+    async def adelete(self, *keys: str):
+        if not keys:
+            return
+        self._local_delete(keys)
+        client = self._async_redis()
+        if client is not None:
+            try:
+                await client.delete(*keys)
+            except redis.RedisError as e:
+                self._mark_down(e)
+
+
+cache = Cache(settings.REDIS_URL)
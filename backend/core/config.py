@@ -14,6 +14,14 @@ class Settings(BaseSettings):
     SECRET_KEY: str = Field(default="test-secret-key-for-ci", description="Secret key for JWT encoding")
     ALGORITHM: str = Field(default="HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=10080)  # 7 days
+    # bcrypt cost; hashes with another cost are upgraded on the next login
+    PASSWORD_BCRYPT_ROUNDS: int = Field(default=12)
+    # Threads hashing passwords at once (per API process)
+    PASSWORD_HASH_WORKERS: int = Field(default=2)
+    # Admin login attempts allowed per ADMIN_LOGIN_WINDOW seconds
+    ADMIN_LOGIN_MAX_ATTEMPTS_PER_EMAIL: int = Field(default=5)
+    ADMIN_LOGIN_MAX_ATTEMPTS_PER_IP: int = Field(default=30)
+    ADMIN_LOGIN_WINDOW: int = Field(default=300)
 
     # Database
     DATABASE_URL: str = Field(default="sqlite+aiosqlite:///./test.db", description="Database connection URL")
@@ -24,6 +32,22 @@ class Settings(BaseSettings):
     # Telegram Bot
     BOT_TOKEN: str = Field(default="test-bot-token", description="Telegram bot token")
     BOT_USERNAME: str = Field(default="trenergram_bot")
+    # Updates processed at the same time (per-chat order is kept)
+    BOT_CONCURRENT_UPDATES: int = Field(default=64)
+    # "polling" runs bot.main; "webhook" serves updates from the API app
+    BOT_MODE: str = Field(default="polling")
+    BOT_WEBHOOK_URL: Optional[str] = Field(default=None, description="Public URL of /telegram/webhook")
+    # Required with BOT_MODE=webhook
+    BOT_WEBHOOK_SECRET: str = Field(default="", description="X-Telegram-Bot-Api-Secret-Token value")
+    BOT_WEBHOOK_MAX_CONNECTIONS: int = Field(default=40)
+    # user_data in Redis: abandoned flows expire after BOT_PERSISTENCE_TTL seconds
+    BOT_PERSISTENCE_TTL: int = Field(default=24 * 3600)
+    BOT_PERSISTENCE_UPDATE_INTERVAL: float = Field(default=1.0)
+    BOT_PERSISTENCE_LOCAL_TTL: float = Field(default=3.0)
+    # Mini-app init_data is accepted for TELEGRAM_INIT_DATA_TTL seconds after
+    # its auth_date; session tokens issued from it last TELEGRAM_SESSION_TTL
+    TELEGRAM_INIT_DATA_TTL: int = Field(default=24 * 3600)
+    TELEGRAM_SESSION_TTL: int = Field(default=3600)
 
     # Domain
     DOMAIN: str = Field(default="trenergram.ru")
@@ -47,6 +71,12 @@ class Settings(BaseSettings):
     MAX_UPLOAD_SIZE: int = Field(default=10 * 1024 * 1024)  # 10 MB
     UPLOAD_DIR: str = Field(default="static/uploads")
 
+    # Admin exports: longer ranges run as background jobs writing to EXPORT_DIR
+    # (shared by the API and Celery workers), kept for EXPORT_TTL seconds
+    EXPORT_DIR: str = Field(default="exports")
+    EXPORT_STREAM_MAX_DAYS: int = Field(default=366)
+    EXPORT_TTL: int = Field(default=24 * 3600)
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,275 @@
+"""
+Two-tier read-through cache for entity snapshots
+
+Values are immutable snapshots (NamedTuples of plain values), never ORM
+instances. A lookup goes through
+
+- an in-process LRU (LOCAL_SIZE entries per cache, LOCAL_TTL seconds),
+- the shared cache (core.cache, Redis) as JSON, with the cache's own TTL,
+- the loader, whose result is stored in both tiers.
+
+A loader can read a row just before a commit and finish after that
+commit's invalidate(). To keep such a stale fill out of the shared cache,
+invalidate() also bumps a per-key generation; a fill is stored only if the
+generation is the one read before loading (set_if_unchanged).
+
+invalidate() deletes the shared entries and publishes the keys on
+CHANNEL (from a task when called on an event loop, e.g. by the commit hooks
+of an AsyncSession, so the loop never waits on Redis); every process (API, bot, Celery workers) runs a listener thread
+that drops them from its LRU. While the listener is disconnected the LRU is
+cleared on reconnect, and LOCAL_TTL bounds how stale a process can get.
+
+Hits and misses are counted per cache; see entity_cache_stats().
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Generic, List, Optional, Type, TypeVar
+
+import redis
+
+from core.cache import cache, run_soon, RETRY_AFTER
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "entity-cache:invalidate"
+
+LOCAL_TTL = 30
+LOCAL_SIZE = 4096
+
+T = TypeVar("T")
+
+_registry: Dict[str, "EntityCache"] = {}
+_listener_pid: Optional[int] = None
+_listener_lock = threading.Lock()
+
+
+class EntityCache(Generic[T]):
+    """Snapshots of one kind (e.g. users) by string key"""
+
+    def __init__(
+        self,
+        name: str,
+        snapshot_type: Type[T],
+        ttl: int,
+        local_ttl: int = LOCAL_TTL,
+        local_size: int = LOCAL_SIZE,
+        decode: Optional[Callable[[dict], T]] = None
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.local_ttl = min(local_ttl, ttl)
+        self.local_size = local_size
+        self._decode = decode or (lambda fields: snapshot_type(**fields))
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        _registry[name] = self
+
+    def _shared_key(self, key: str) -> str:
+        return f"entity:{self.name}:{key}"
+
+    def _generation_key(self, key: str) -> str:
+        return f"entity:{self.name}:{key}:gen"
+
+    def _local_get(self, key: str) -> Optional[T]:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._local.pop(key, None)
+                return None
+            self._local.move_to_end(key)
+            return entry[1]
+
+    def _local_set(self, key: str, value: T):
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.local_ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def drop_local(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def _encode(self, value: T) -> str:
+        return json.dumps(value._asdict())
+
+    def _from_shared(self, key: str, raw: Optional[str]) -> Optional[T]:
+        if raw is None:
+            return None
+        value = self._decode(json.loads(raw))
+        self._local_set(key, value)
+        self.shared_hits += 1
+        return value
+
+    def get(self, key: str) -> Optional[T]:
+        """Cached snapshot or None, without loading"""
+        _ensure_listener()
+        value = self._local_get(key)
+        if value is not None:
+            self.local_hits += 1
+            return value
+        return self._from_shared(key, cache.get(self._shared_key(key)))
+
+    async def aget(self, key: str) -> Optional[T]:
+        _ensure_listener()
+        value = self._local_get(key)
+        if value is not None:
+            self.local_hits += 1
+            return value
+        return self._from_shared(key, await cache.aget(self._shared_key(key)))
+
+    def set(self, key: str, value: T):
+        cache.set(self._shared_key(key), self._encode(value), self.ttl)
+        self._local_set(key, value)
+
+    async def aset(self, key: str, value: T):
+        await cache.aset(self._shared_key(key), self._encode(value), self.ttl)
+        self._local_set(key, value)
+
+    def get_or_load(self, key: str, loader: Callable[[], Optional[T]]) -> Optional[T]:
+        """
+        Cached snapshot, or loader() stored in both tiers (None is not cached)
+
+        The loaded value is returned but not stored if the key was
+        invalidated while loading.
+        """
+        _ensure_listener()
+        value = self._local_get(key)
+        if value is not None:
+            self.local_hits += 1
+            return value
+        raw, generation = cache.get_many(self._shared_key(key), self._generation_key(key))
+        value = self._from_shared(key, raw)
+        if value is not None:
+            return value
+
+        self.misses += 1
+        value = loader()
+        if value is not None and cache.set_if_unchanged(
+            self._shared_key(key), self._encode(value), self.ttl, self._generation_key(key), generation
+        ):
+            self._local_set(key, value)
+        return value
+
+    async def aget_or_load(self, key: str, loader: Callable[[], Awaitable[Optional[T]]]) -> Optional[T]:
+        _ensure_listener()
+        value = self._local_get(key)
+        if value is not None:
+            self.local_hits += 1
+            return value
+        raw, generation = await cache.aget_many(self._shared_key(key), self._generation_key(key))
+        value = self._from_shared(key, raw)
+        if value is not None:
+            return value
+
+        self.misses += 1
+        value = await loader()
+        if value is not None and await cache.aset_if_unchanged(
+            self._shared_key(key), self._encode(value), self.ttl, self._generation_key(key), generation
+        ):
+            self._local_set(key, value)
+        return value
+
+    def invalidate(self, *keys: str):
+        """Drop keys here, in the shared cache and in every other process"""
+        keys = [str(key) for key in keys if key is not None]
+        if not keys:
+            return
+        self.invalidations += len(keys)
+        self.drop_local(*keys)
+        run_soon(lambda: self._ainvalidate_shared(keys), lambda: self._invalidate_shared(keys))
+
+    def _invalidate_shared(self, keys: List[str]):
+        # Bumped before the delete: fills that started earlier are not stored
+        for key in keys:
+            cache.incr(self._generation_key(key), self.ttl)
+        cache.delete(*[self._shared_key(key) for key in keys])
+        cache.publish(CHANNEL, json.dumps({"cache": self.name, "keys": keys}))
+
+    async def _ainvalidate_shared(self, keys: List[str]):
+        for key in keys:
+            await cache.aincr(self._generation_key(key), self.ttl)
+        await cache.adelete(*[self._shared_key(key) for key in keys])
+        await cache.apublish(CHANNEL, json.dumps({"cache": self.name, "keys": keys}))
+
+    def stats(self) -> dict:
+        hits = self.local_hits + self.shared_hits
+        lookups = hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            "local_entries": len(self._local),
+        }
+
+
+def entity_cache_stats() -> Dict[str, dict]:
+    """Hit / miss counters of every entity cache in this process"""
+    return {name: entity_cache.stats() for name, entity_cache in _registry.items()}
+
+
+def handle_invalidation(message: str):
+    """Apply an invalidation published by any process"""
+    try:
+        data = json.loads(message)
+        entity_cache = _registry.get(data["cache"])
+    except (ValueError, KeyError, TypeError):
+        logger.warning(f"Ignoring malformed entity cache invalidation: {message!r}")
+        return
+    if entity_cache is not None:
+        entity_cache.drop_local(*data["keys"])
+
+
+def _clear_all_local():
+    for entity_cache in _registry.values():
+        entity_cache.clear_local()
+
+
+def _listen():
+    client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True, socket_connect_timeout=0.5)
+    while True:
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(CHANNEL)
+            # Invalidations may have been missed while disconnected
+            _clear_all_local()
+            for message in pubsub.listen():
+                if message["type"] == "message":
+                    handle_invalidation(message["data"])
+        except redis.RedisError as e:
+            logger.warning(f"Entity cache invalidation listener disconnected, retrying in {RETRY_AFTER}s: {e}")
+        finally:
+            pubsub.close()
+        time.sleep(RETRY_AFTER)
+
+
+def _ensure_listener():
+    # Started lazily and per pid: forked workers (Celery prefork) need their own thread
+    global _listener_pid
+    pid = os.getpid()
+    if _listener_pid == pid:
+        return
+    with _listener_lock:
+        if _listener_pid == pid:
+            return
+        threading.Thread(target=_listen, name="entity-cache-invalidation", daemon=True).start()
+        _listener_pid = pid
@@ -1,22 +1,39 @@
 """
 Password hashing and verification utilities using bcrypt
+
+bcrypt takes ~250 ms per call at the default cost. Async endpoints must use
+ahash_password / averify_password, which run it on a small bounded thread
+pool (bcrypt releases the GIL), so the event loop keeps serving other
+requests and at most PASSWORD_HASH_WORKERS hashes compete for CPU at once.
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 import bcrypt
 
+from core.config import settings
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
 
-def hash_password(password: str) -> str:
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
     """
     Hash a plain password using bcrypt
 
     Args:
         password: Plain text password
+        rounds: bcrypt cost factor, settings.PASSWORD_BCRYPT_ROUNDS by default
 
     Returns:
         Hashed password string
     """
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds or settings.PASSWORD_BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
@@ -35,3 +52,25 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     password_bytes = plain_password.encode('utf-8')
     hashed_bytes = hashed_password.encode('utf-8')
     return bcrypt.checkpw(password_bytes, hashed_bytes)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with a cost factor other than the configured one"""
+    # $2b$12$<salt+hash>
+    try:
+        rounds = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != settings.PASSWORD_BCRYPT_ROUNDS
+
+
+async def ahash_password(password: str) -> str:
+    """hash_password() off the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(_executor, hash_password, password)
+
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """verify_password() off the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _executor, verify_password, plain_password, hashed_password
+    )
@@ -1,58 +1,76 @@
 """
 Security utilities
+
+The current-user dependencies return cached, read-only UserSnapshots
+(services.snapshots); endpoints that modify the user load it themselves.
 """
 
 from typing import Optional
 from fastapi import HTTPException, Query, Depends, Header
 from sqlalchemy.orm import Session
 from db.session import get_db
-from models import User, UserRole
-from core.telegram_auth import get_user_id_from_header
+from models import UserRole
+from core.telegram_auth import get_session_user_id, get_telegram_id
+from services.snapshots import UserSnapshot, get_user_snapshot
 
 
-def get_current_user(telegram_id: str = Query(...), db: Session = Depends(get_db)) -> User:
+def get_current_user(
+    telegram_id: Optional[str] = Query(None),
+    authorization: str = Header(None),
+    db: Session = Depends(get_db)
+) -> UserSnapshot:
     """
-    Get current user from telegram_id query parameter
+    Get current user from a session token, or from the telegram_id query parameter
 
     DEPRECATED: Use get_current_user_from_telegram() instead for better security
 
-    This method is kept for backward compatibility with existing endpoints
+    This method is kept for backward compatibility with existing endpoints.
+    When a session token is sent, a telegram_id parameter must match it.
     """
-    user = db.query(User).filter_by(telegram_id=telegram_id).first()
+    session_id = get_session_user_id(authorization)
+    if session_id:
+        if telegram_id and telegram_id != session_id:
+            raise HTTPException(status_code=403, detail="telegram_id does not match the session")
+        telegram_id = session_id
+    if not telegram_id:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    user = get_user_snapshot(db, telegram_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
 def get_current_user_from_telegram(
-    telegram_id: str = Depends(get_user_id_from_header),
+    telegram_id: str = Depends(get_telegram_id),
     db: Session = Depends(get_db)
-) -> User:
+) -> UserSnapshot:
     """
-    Get current user from Telegram WebApp init_data (secure method)
+    Get current user from a session token or Telegram WebApp init_data (secure method)
 
-    Validates X-Telegram-Init-Data header and extracts user ID
+    Checks the Authorization session token, or validates the
+    X-Telegram-Init-Data header, and extracts user ID
 
     Usage:
         @app.get("/my-profile")
-        def get_my_profile(current_user: User = Depends(get_current_user_from_telegram)):
+        def get_my_profile(current_user: UserSnapshot = Depends(get_current_user_from_telegram)):
             return current_user
     """
-    user = db.query(User).filter_by(telegram_id=telegram_id).first()
+    user = get_user_snapshot(db, telegram_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
 def get_current_trainer(
-    current_user: User = Depends(get_current_user_from_telegram)
-) -> User:
+    current_user: UserSnapshot = Depends(get_current_user_from_telegram)
+) -> UserSnapshot:
     """
     Ensure current user is a trainer
 
     Usage:
         @app.get("/trainer/clients")
-        def get_my_clients(trainer: User = Depends(get_current_trainer)):
+        def get_my_clients(trainer: UserSnapshot = Depends(get_current_trainer)):
             ...
     """
     if current_user.role != UserRole.TRAINER:
@@ -61,14 +79,14 @@ def get_current_trainer(
 
 
 def get_current_client(
-    current_user: User = Depends(get_current_user_from_telegram)
-) -> User:
+    current_user: UserSnapshot = Depends(get_current_user_from_telegram)
+) -> UserSnapshot:
     """
     Ensure current user is a client
 
     Usage:
         @app.get("/client/bookings")
-        def get_my_bookings(client: User = Depends(get_current_client)):
+        def get_my_bookings(client: UserSnapshot = Depends(get_current_client)):
             ...
     """
     if current_user.role != UserRole.CLIENT:
@@ -1,16 +1,60 @@
 """
 Telegram WebApp authentication utilities
 Validates init_data from Telegram Mini Apps
+
+Verifying init_data costs two HMACs, so the mini-app verifies it once via
+POST /api/v1/auth/session and then sends the returned session token
+(`Authorization: Bearer ...`) with each request. A session token is a JWT
+(typ "tg_session") carrying only the Telegram id: checking it needs no
+init_data parsing and no database query.
+
+Within a process, the derived secret key is computed once per bot token and
+verified init_data is remembered until auth_date + TELEGRAM_INIT_DATA_TTL.
 """
 
 import hmac
 import hashlib
-from typing import Optional, Dict
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from functools import lru_cache
+from typing import Optional, Dict, Tuple
 from urllib.parse import parse_qs, unquote_plus
 from fastapi import HTTPException, Header
 import json
 
 from core.config import settings
+from core.jwt import create_access_token, decode_access_token
+
+SESSION_TOKEN_TYPE = "tg_session"
+
+# Verified init_data kept in process: (bot_token, init_data) -> (expires_at, data)
+VERIFIED_CACHE_SIZE = 4096
+_verified: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+
+
+@lru_cache(maxsize=8)
+def _secret_key(bot_token: str) -> bytes:
+    """HMAC("WebAppData", bot_token), the key init_data hashes are signed with"""
+    return hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+
+
+def _cached(key: Tuple[str, str]) -> Optional[Dict]:
+    entry = _verified.get(key)
+    if entry is None:
+        return None
+    if entry[0] < time.time():
+        _verified.pop(key, None)
+        return None
+    _verified.move_to_end(key)
+    return entry[1]
+
+
+def _remember(key: Tuple[str, str], expires_at: float, data: Dict):
+    _verified[key] = (expires_at, data)
+    _verified.move_to_end(key)
+    while len(_verified) > VERIFIED_CACHE_SIZE:
+        _verified.popitem(last=False)
 
 
 def validate_telegram_web_app_data(init_data: str, bot_token: Optional[str] = None) -> Dict:
@@ -22,10 +66,12 @@ def validate_telegram_web_app_data(init_data: str, bot_token: Optional[str] = No
         bot_token: Bot token (defaults to settings.BOT_TOKEN)
 
     Returns:
-        Dict with parsed and validated data
+        Dict with parsed and validated data (shared between calls with the
+        same init_data; do not modify)
 
     Raises:
-        HTTPException: If validation fails
+        HTTPException: If validation fails or auth_date is older than
+            TELEGRAM_INIT_DATA_TTL
     """
     if not init_data:
         raise HTTPException(status_code=401, detail="Missing init_data")
@@ -33,6 +79,11 @@ def validate_telegram_web_app_data(init_data: str, bot_token: Optional[str] = No
     if not bot_token:
         bot_token = settings.BOT_TOKEN
 
+    cache_key = (bot_token, init_data)
+    cached = _cached(cache_key)
+    if cached is not None:
+        return cached
+
     try:
         # Parse init_data to extract parameters
         # Note: parse_qs URL-decodes values automatically
@@ -61,16 +112,9 @@ def validate_telegram_web_app_data(init_data: str, bot_token: Optional[str] = No
 
         data_check_string = '\n'.join(data_check_arr)
 
-        # Create secret key
-        secret_key = hmac.new(
-            b"WebAppData",
-            bot_token.encode(),
-            hashlib.sha256
-        ).digest()
-
         # Calculate hash
         calculated_hash = hmac.new(
-            secret_key,
+            _secret_key(bot_token),
             data_check_string.encode(),
             hashlib.sha256
         ).hexdigest()
@@ -91,6 +135,16 @@ def validate_telegram_web_app_data(init_data: str, bot_token: Optional[str] = No
             else:
                 result[key] = decoded_value
 
+        try:
+            auth_date = int(result.get('auth_date', ''))
+        except ValueError:
+            raise HTTPException(status_code=401, detail="Invalid auth_date in init_data")
+
+        expires_at = auth_date + settings.TELEGRAM_INIT_DATA_TTL
+        if expires_at < time.time():
+            raise HTTPException(status_code=401, detail="init_data has expired")
+
+        _remember(cache_key, expires_at, result)
         return result
 
     except HTTPException:
@@ -166,3 +220,62 @@ def get_user_id_from_header(x_telegram_init_data: str = Header(None)) -> str:
         raise HTTPException(status_code=401, detail="User ID not found")
 
     return str(telegram_data['user']['id'])
+
+
+def create_session_token(telegram_id: str) -> Tuple[str, int]:
+    """
+    Issue a mini-app session token for a verified Telegram user
+
+    Returns:
+        (token, lifetime in seconds)
+    """
+    lifetime = settings.TELEGRAM_SESSION_TTL
+    token = create_access_token(
+        {"telegram_id": str(telegram_id), "typ": SESSION_TOKEN_TYPE},
+        expires_delta=timedelta(seconds=lifetime)
+    )
+    return token, lifetime
+
+
+def get_session_user_id(authorization: Optional[str]) -> Optional[str]:
+    """
+    Telegram user ID from an `Authorization: Bearer <session token>` header
+
+    Returns:
+        str: Telegram user ID, or None when no Authorization header is sent
+
+    Raises:
+        HTTPException: If the header is malformed or the token is invalid,
+            expired or not a session token (e.g. an admin token)
+    """
+    if not authorization:
+        return None
+
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Invalid Authorization header format")
+
+    payload = decode_access_token(token.strip())
+    if payload.get("typ") != SESSION_TOKEN_TYPE or not payload.get("telegram_id"):
+        raise HTTPException(status_code=401, detail="Invalid session token")
+
+    return str(payload["telegram_id"])
+
+
+def get_telegram_id(
+    authorization: str = Header(None),
+    x_telegram_init_data: str = Header(None)
+) -> str:
+    """
+    FastAPI dependency to authenticate a mini-app request
+
+    Accepts a session token (Authorization header) or, failing that, the
+    X-Telegram-Init-Data header.
+
+    Returns:
+        str: Telegram user ID
+    """
+    telegram_id = get_session_user_id(authorization)
+    if telegram_id:
+        return telegram_id
+    return get_user_id_from_header(x_telegram_init_data)
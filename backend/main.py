@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 # from fastapi.staticfiles import StaticFiles
 import uvicorn
 
@@ -8,8 +9,14 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.config import settings
+from core.entity_cache import entity_cache_stats
 from api.v1 import router as api_v1_router
 from api.admin import router as admin_router
+from services.counters import install_counter_hooks
+from services.client_home import install_client_home_hooks
+from services.agenda import install_agenda_hooks
+from services.events import install_event_hooks
+from services.snapshots import install_snapshot_hooks
 
 
 def create_app() -> FastAPI:
@@ -21,6 +28,17 @@ def create_app() -> FastAPI:
         redoc_url="/api/redoc" if settings.DEBUG else None,
     )
 
+    # Maintain trainer_clients/clubs booking counters in the booking's transaction
+    install_counter_hooks()
+    # Keep client_home read model in sync with booking/balance/relationship changes
+    install_client_home_hooks()
+    # Drop cached bot agendas when bookings change
+    install_agenda_hooks()
+    # Write booking transitions to the outbox for the event consumers
+    install_event_hooks()
+    # Drop cached user / club / trainer snapshots when they change
+    install_snapshot_hooks()
+
     # CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -28,8 +46,12 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Total-Count"],
     )
 
+    # Compress JSON responses (bootstrap documents are the largest)
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+
     # Static files - commented for now since we don't have static files yet
     # app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -37,6 +59,14 @@ def create_app() -> FastAPI:
     app.include_router(api_v1_router, prefix="/api/v1")
     app.include_router(admin_router, prefix="/api/admin")
 
+    # Bot updates arrive over HTTP instead of bot.main polling
+    if settings.BOT_MODE == "webhook":
+        from bot import webhook
+
+        app.include_router(webhook.router, prefix="/api/telegram")
+        app.add_event_handler("startup", webhook.start_webhook_bot)
+        app.add_event_handler("shutdown", webhook.stop_webhook_bot)
+
     @app.get("/")
     async def root():
         return {
@@ -65,6 +95,9 @@ def create_app() -> FastAPI:
             health_status["database"] = f"error: {str(e)[:100]}"
             health_status["status"] = "degraded"
 
+        # Per-process hit ratios of the user / club / trainer snapshot caches
+        health_status["entity_cache"] = entity_cache_stats()
+
         # CHECK: Does notifications.py have the exception code?
         import os
         notifications_file = "/app/services/notifications.py"
@@ -0,0 +1,6 @@
+-- Revoke admin tokens issued before a password change
+-- Date: 2026-10-19
+
+ALTER TABLE club_admins ADD COLUMN IF NOT EXISTS password_changed_at TIMESTAMP WITH TIME ZONE;
+
+COMMENT ON COLUMN club_admins.password_changed_at IS 'Admin JWTs with an earlier iat are rejected';
@@ -0,0 +1,6 @@
+-- Index for club-scoped booking aggregates (admin dashboard)
+-- Date: 2026-10-19
+
+-- COUNT(*) FILTER over one club's bookings reads only this index
+CREATE INDEX IF NOT EXISTS idx_bookings_club
+ON bookings (club_id) INCLUDE (status, datetime, client_id);
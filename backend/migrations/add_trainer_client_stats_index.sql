@@ -0,0 +1,6 @@
+-- Index for per-client stats of a trainer's client list
+-- Date: 2026-10-19
+
+-- GROUP BY client_id over one trainer's bookings reads only this index
+CREATE INDEX IF NOT EXISTS idx_bookings_trainer_client
+ON bookings (trainer_id, client_id) INCLUDE (status, is_charged, price);
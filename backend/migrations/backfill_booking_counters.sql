@@ -0,0 +1,43 @@
+-- Backfill denormalized booking counters on trainer_clients and clubs
+-- Date: 2026-10-19
+
+-- Counters are maintained by session hooks from now on; this brings existing
+-- rows in line. Only drifted rows are written, so re-running is cheap.
+
+UPDATE trainer_clients tc
+SET total_bookings = fresh.total,
+    completed_bookings = fresh.completed,
+    cancelled_bookings = fresh.cancelled,
+    last_booking_at = fresh.last_at
+FROM (
+    SELECT tc2.id,
+           COUNT(b.id) AS total,
+           COUNT(b.id) FILTER (WHERE UPPER(b.status::text) = 'COMPLETED') AS completed,
+           COUNT(b.id) FILTER (WHERE UPPER(b.status::text) = 'CANCELLED') AS cancelled,
+           MAX(b.datetime) AS last_at
+    FROM trainer_clients tc2
+    LEFT JOIN bookings b ON b.trainer_id = tc2.trainer_id AND b.client_id = tc2.client_id
+    GROUP BY tc2.id
+) fresh
+WHERE tc.id = fresh.id
+  AND (tc.total_bookings IS DISTINCT FROM fresh.total
+       OR tc.completed_bookings IS DISTINCT FROM fresh.completed
+       OR tc.cancelled_bookings IS DISTINCT FROM fresh.cancelled
+       OR tc.last_booking_at IS DISTINCT FROM fresh.last_at);
+
+UPDATE clubs c
+SET total_trainers = fresh.trainers,
+    total_clients = fresh.clients,
+    total_bookings = fresh.bookings
+FROM (
+    SELECT c2.id,
+           (SELECT COUNT(*) FROM users u
+            WHERE u.club_id = c2.id AND UPPER(u.role::text) = 'TRAINER') AS trainers,
+           (SELECT COUNT(DISTINCT b.client_id) FROM bookings b WHERE b.club_id = c2.id) AS clients,
+           (SELECT COUNT(*) FROM bookings b WHERE b.club_id = c2.id) AS bookings
+    FROM clubs c2
+) fresh
+WHERE c.id = fresh.id
+  AND (c.total_trainers IS DISTINCT FROM fresh.trainers
+       OR c.total_clients IS DISTINCT FROM fresh.clients
+       OR c.total_bookings IS DISTINCT FROM fresh.bookings);
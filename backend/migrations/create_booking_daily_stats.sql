@@ -0,0 +1,63 @@
+-- Daily booking rollup maintained from bookings changed since a watermark
+-- Date: 2026-10-19
+
+-- Change tracking on bookings; existing rows get NOW(), so the first run backfills everything
+ALTER TABLE bookings ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+CREATE INDEX IF NOT EXISTS ix_bookings_updated_at ON bookings (updated_at);
+
+-- Raw SQL writes bump updated_at too
+CREATE OR REPLACE FUNCTION update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_bookings_updated_at ON bookings;
+CREATE TRIGGER update_bookings_updated_at
+    BEFORE UPDATE ON bookings
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TABLE IF NOT EXISTS booking_daily_stats (
+    id BIGSERIAL PRIMARY KEY,
+    day DATE NOT NULL,
+    club_id INTEGER,
+    trainer_id INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    bookings INTEGER NOT NULL DEFAULT 0,
+    revenue BIGINT NOT NULL DEFAULT 0,
+    clients INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_booking_daily_stats_trainer_day ON booking_daily_stats (trainer_id, day);
+CREATE INDEX IF NOT EXISTS idx_booking_daily_stats_club_day ON booking_daily_stats (club_id, day);
+CREATE INDEX IF NOT EXISTS idx_booking_daily_stats_day ON booking_daily_stats (day);
+
+-- One row per group (refresh upserts on it); overlapping runs may have left duplicates
+DELETE FROM booking_daily_stats a
+USING booking_daily_stats b
+WHERE a.id > b.id
+  AND a.day = b.day
+  AND a.club_id IS NOT DISTINCT FROM b.club_id
+  AND a.trainer_id = b.trainer_id
+  AND a.status = b.status;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_booking_daily_stats_group
+ON booking_daily_stats (day, club_id, trainer_id, status) NULLS NOT DISTINCT;
+
+-- Day each booking was last counted under; deleted bookings leave a NULL key behind
+CREATE TABLE IF NOT EXISTS booking_rollup_keys (
+    id BIGSERIAL PRIMARY KEY,
+    booking_id INTEGER UNIQUE REFERENCES bookings(id) ON DELETE SET NULL,
+    trainer_id INTEGER NOT NULL,
+    day DATE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_booking_rollup_keys_orphaned
+ON booking_rollup_keys (id) WHERE booking_id IS NULL;
+
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+    name VARCHAR(50) PRIMARY KEY,
+    value TIMESTAMP WITH TIME ZONE
+);
@@ -0,0 +1,15 @@
+-- Client home read model (profile, trainers with balances, upcoming trainings)
+-- Date: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS client_home (
+    client_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    telegram_id VARCHAR(50) NOT NULL UNIQUE,
+    data JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Rows are written on the client's next booking, balance, relationship or
+-- profile change; until then readers compute the document, so no backfill
+-- is needed here.
+
+COMMENT ON TABLE client_home IS 'Denormalized per-client read model for mini app and bot /my command';
@@ -0,0 +1,16 @@
+-- Transactional outbox for domain events (relayed to Redis Streams)
+-- Date: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS outbox_events (
+    id BIGSERIAL PRIMARY KEY,
+    event_type VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    published_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Relay reads unpublished rows in id order; published rows fall out of the index
+CREATE INDEX IF NOT EXISTS idx_outbox_unpublished
+ON outbox_events (id) WHERE published_at IS NULL;
+
+COMMENT ON TABLE outbox_events IS 'Domain events written with the change, relayed to the events stream';
@@ -0,0 +1,37 @@
+-- Trigram indexes for admin and catalog text search (services/search.py)
+-- Date: 2026-10-19
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Index expressions must match services/search.py normalized_text() and
+-- normalized_digits(), otherwise the planner falls back to a sequential scan
+
+-- Users: names, usernames and specializations (lowercase, ё -> е)
+CREATE INDEX IF NOT EXISTS idx_users_search_name
+ON users USING gin (translate(lower(name), 'ё', 'е') gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_users_search_username
+ON users USING gin (translate(lower(telegram_username), 'ё', 'е') gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_users_search_specialization
+ON users USING gin (translate(lower(specialization), 'ё', 'е') gin_trgm_ops);
+
+-- Users: phones and Telegram ids (digits only)
+CREATE INDEX IF NOT EXISTS idx_users_search_phone
+ON users USING gin (regexp_replace(phone, '[^0-9]', '', 'g') gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_users_search_telegram_id
+ON users USING gin (regexp_replace(telegram_id, '[^0-9]', '', 'g') gin_trgm_ops);
+
+-- Clubs
+CREATE INDEX IF NOT EXISTS idx_clubs_search_name
+ON clubs USING gin (translate(lower(name), 'ё', 'е') gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_clubs_search_address
+ON clubs USING gin (translate(lower(address), 'ё', 'е') gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_clubs_search_email
+ON clubs USING gin (translate(lower(email), 'ё', 'е') gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_clubs_search_phone
+ON clubs USING gin (regexp_replace(phone, '[^0-9]', '', 'g') gin_trgm_ops);
@@ -12,6 +12,15 @@ from .club_v2 import Club, ClubTariff
 from .booking_v2 import Booking, BookingStatus
 from .schedule_v2 import Schedule, TimeSlot, DayOfWeek, SlotStatus
 
+# Read models
+from .client_home import ClientHome
+
+# Domain events
+from .outbox import OutboxEvent
+
+# Analytics rollups
+from .booking_stats import BookingDailyStat, BookingRollupKey, RollupWatermark
+
 __all__ = [
     # Admin models
     "ClubAdmin", "ClubPayment", "ClubQRCode",
@@ -24,5 +33,14 @@ __all__ = [
     "User", "UserRole", "TrainerClient",
     "Club", "ClubTariff",
     "Booking", "BookingStatus",
-    "Schedule", "TimeSlot", "DayOfWeek", "SlotStatus"
+    "Schedule", "TimeSlot", "DayOfWeek", "SlotStatus",
+
+    # Read models
+    "ClientHome",
+
+    # Domain events
+    "OutboxEvent",
+
+    # Analytics rollups
+    "BookingDailyStat", "BookingRollupKey", "RollupWatermark"
 ]
\ No newline at end of file
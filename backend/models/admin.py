@@ -22,6 +22,8 @@ class ClubAdmin(Base):
     role = Column(String(20), default="admin")  # super_admin, club_owner, club_admin
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Tokens issued before this are rejected
+    password_changed_at = Column(DateTime(timezone=True))
 
     # Note: No back_populates to avoid circular dependency with Club model
 
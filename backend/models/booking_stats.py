@@ -0,0 +1,61 @@
+"""
+Daily booking rollup
+
+booking_daily_stats holds per (day, club, trainer, status) booking counts,
+revenue and distinct clients, rebuilt incrementally from bookings changed
+since the last run by services/booking_stats.py. Days are trainer-local.
+"""
+
+from sqlalchemy import Column, BigInteger, Integer, String, Date, DateTime, ForeignKey, Index
+
+from db.base_sync import Base
+
+
+class BookingDailyStat(Base):
+    __tablename__ = "booking_daily_stats"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    day = Column(Date, nullable=False)
+    club_id = Column(Integer)
+    trainer_id = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False)  # BookingStatus name
+
+    bookings = Column(Integer, nullable=False, default=0)
+    revenue = Column(BigInteger, nullable=False, default=0)  # sum of booking prices
+    clients = Column(Integer, nullable=False, default=0)  # distinct clients that day
+
+    __table_args__ = (
+        Index("idx_booking_daily_stats_trainer_day", "trainer_id", "day"),
+        Index("idx_booking_daily_stats_club_day", "club_id", "day"),
+        Index("idx_booking_daily_stats_day", "day"),
+        # One row per group; upserts conflict on it
+        Index(
+            "uq_booking_daily_stats_group", "day", "club_id", "trainer_id", "status",
+            unique=True, postgresql_nulls_not_distinct=True
+        ),
+    )
+
+    def __repr__(self):
+        return f"<BookingDailyStat {self.day} trainer:{self.trainer_id} {self.status}: {self.bookings}>"
+
+
+class BookingRollupKey(Base):
+    """Trainer and day each booking was last counted under"""
+    __tablename__ = "booking_rollup_keys"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    # Deleting a booking nulls its key, which marks the day for recount
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="SET NULL"), unique=True)
+    trainer_id = Column(Integer, nullable=False)
+    day = Column(Date, nullable=False)
+
+    __table_args__ = (
+        Index("idx_booking_rollup_keys_orphaned", "id", postgresql_where=booking_id.is_(None)),
+    )
+
+
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String(50), primary_key=True)
+    value = Column(DateTime(timezone=True))
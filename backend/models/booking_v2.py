@@ -57,6 +57,8 @@ class Booking(Base):
 
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped on every change; the daily rollup picks up rows changed since its watermark
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
     confirmed_at = Column(DateTime(timezone=True))
     cancelled_at = Column(DateTime(timezone=True))
     completed_at = Column(DateTime(timezone=True))
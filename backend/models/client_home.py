@@ -0,0 +1,27 @@
+"""
+Client home read model
+
+Denormalized per-client document with profile, trainers with balances and
+upcoming trainings. Maintained by services/client_home.py, read by the client
+mini app and the bot's /my command with one keyed lookup.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from sqlalchemy.sql import func
+
+from db.base_sync import Base
+
+
+class ClientHome(Base):
+    __tablename__ = "client_home"
+
+    client_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    telegram_id = Column(String(50), unique=True, nullable=False, index=True)
+
+    # {"profile": {...}, "trainers": [...], "upcoming": [...]}
+    data = Column(JSON, nullable=False, default={})
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ClientHome client:{self.client_id}>"
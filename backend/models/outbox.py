@@ -0,0 +1,31 @@
+"""
+Transactional outbox
+
+Domain events are inserted here in the same transaction as the change that
+produced them, then relayed to the Redis event stream by workers/events.py.
+"""
+
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, JSON, Index
+from sqlalchemy.sql import func
+
+from db.base_sync import Base
+
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+
+    # SQLite autoincrements only INTEGER primary keys (local runs)
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    event_type = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False, default={})
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    published_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Relay scans only unpublished rows
+        Index("idx_outbox_unpublished", "id", postgresql_where=published_at.is_(None)),
+    )
+
+    def __repr__(self):
+        return f"<OutboxEvent {self.id} {self.event_type}>"
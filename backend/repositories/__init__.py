@@ -0,0 +1,8 @@
+"""
+Async data access for API endpoints
+
+Functions take an AsyncSession (db.base.get_db) so request handlers await
+the database instead of blocking the event loop. Sync services that are
+shared with the bot and Celery (state machine, slot finder, read models)
+are reached through AsyncSession.run_sync, on the same transaction.
+"""
@@ -0,0 +1,160 @@
+"""
+Booking queries and writes
+"""
+
+from datetime import datetime
+from typing import FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from models import User, Booking, BookingStatus, Club
+from services import booking_state
+from services.booking_state import BookingTransition
+from services.events import emit_booking_created, emit_booking_rescheduled
+from repositories.read_models import ReadModel
+
+ACTIVE_STATUSES = (BookingStatus.CONFIRMED, BookingStatus.PENDING)
+
+Trainer = aliased(User, name="trainer")
+Client = aliased(User, name="client")
+
+
+async def get_booking(db: AsyncSession, booking_id: int) -> Optional[Booking]:
+    return await db.get(Booking, booking_id)
+
+
+async def find_conflict(
+    db: AsyncSession,
+    trainer_id: int,
+    at: datetime,
+    exclude_booking_id: Optional[int] = None
+) -> Optional[Booking]:
+    """Active booking of the trainer starting exactly at `at`"""
+    statement = select(Booking).where(
+        Booking.trainer_id == trainer_id,
+        Booking.datetime == at,
+        Booking.status.in_(ACTIVE_STATUSES)
+    )
+    if exclude_booking_id is not None:
+        statement = statement.where(Booking.id != exclude_booking_id)
+    return (await db.execute(statement.limit(1))).scalars().first()
+
+
+async def list_bookings(db: AsyncSession, *criteria) -> List[Tuple[Booking, Optional[User], Optional[User], Optional[str]]]:
+    """
+    Bookings matching criteria with trainer, client and club name, in one query.
+
+    Returns:
+        (booking, trainer, client, club_name) tuples ordered by datetime
+    """
+    rows = await db.execute(
+        select(Booking, Trainer, Client, Club.name)
+        .outerjoin(Trainer, Trainer.id == Booking.trainer_id)
+        .outerjoin(Client, Client.id == Booking.client_id)
+        .outerjoin(Club, Club.id == Booking.club_id)
+        .where(*criteria)
+        .order_by(Booking.datetime.asc())
+    )
+    return [tuple(row) for row in rows]
+
+
+class BookingRow(ReadModel):
+    """Booking list item, the fields of api/v1/bookings.BookingResponse"""
+
+    __slots__ = (
+        "id", "trainer_id", "client_id", "club_id", "datetime", "duration", "price",
+        "status", "notes", "is_paid", "created_at", "trainer_name", "client_name",
+        "club_name", "trainer_telegram_id", "client_telegram_id",
+        "trainer_telegram_username", "trainer_timezone", "trainer_found",
+    )
+
+    def as_dict(self) -> dict:
+        fields = super().as_dict()
+        # Without a trainer row the response keeps its default timezone
+        if fields.pop("trainer_found") is None:
+            del fields["trainer_timezone"]
+        return fields
+
+
+BOOKING_ROW_COLUMNS = (
+    Booking.id, Booking.trainer_id, Booking.client_id, Booking.club_id, Booking.datetime,
+    Booking.duration, Booking.price, Booking.status, Booking.notes, Booking.is_paid,
+    Booking.created_at, Trainer.name, Client.name, Club.name, Trainer.telegram_id,
+    Client.telegram_id, Trainer.telegram_username, Trainer.timezone, Trainer.id,
+)
+
+
+async def list_booking_rows(db: AsyncSession, *criteria) -> List[BookingRow]:
+    """list_bookings() projected to BookingRow: response columns only, no ORM instances"""
+    rows = await db.execute(
+        select(*BOOKING_ROW_COLUMNS)
+        .outerjoin(Trainer, Trainer.id == Booking.trainer_id)
+        .outerjoin(Client, Client.id == Booking.client_id)
+        .outerjoin(Club, Club.id == Booking.club_id)
+        .where(*criteria)
+        .order_by(Booking.datetime.asc())
+    )
+    return BookingRow.from_rows(rows)
+
+
+async def get_booking_details(db: AsyncSession, booking_id: int) -> Optional[Tuple[Booking, Optional[User], Optional[User], Optional[str]]]:
+    """One booking with trainer, client and club name"""
+    rows = await list_bookings(db, Booking.id == booking_id)
+    return rows[0] if rows else None
+
+
+async def count_by_local_day(db: AsyncSession, trainer_id: int, start: datetime, end: datetime, tz_name: str) -> list:
+    """(day, status, count) rows for trainer's bookings, days in tz_name"""
+    local_day = func.date_trunc("day", func.timezone(tz_name, Booking.datetime))
+    return (await db.execute(
+        select(local_day.label("day"), Booking.status, func.count(Booking.id))
+        .where(
+            Booking.trainer_id == trainer_id,
+            Booking.datetime >= start,
+            Booking.datetime < end
+        )
+        .group_by(local_day, Booking.status)
+    )).all()
+
+
+async def add_booking(db: AsyncSession, booking: Booking, created_by: Optional[str] = None) -> Booking:
+    """Insert a booking and, for a known creator, its booking.created event. Does not commit."""
+    db.add(booking)
+    await db.flush()
+    if created_by is not None:
+        await db.run_sync(emit_booking_created, booking, created_by)
+    return booking
+
+
+async def reschedule(db: AsyncSession, booking: Booking, values: dict, actor: str) -> Booking:
+    """Set fields of a booking, emitting booking.rescheduled if its time changed. Does not commit."""
+    previous_datetime = booking.datetime
+    for field, value in values.items():
+        setattr(booking, field, value)
+    await db.flush()
+    if booking.datetime != previous_datetime:
+        await db.run_sync(emit_booking_rescheduled, booking, previous_datetime, actor)
+    return booking
+
+
+async def transition(
+    db: AsyncSession,
+    booking_id: int,
+    status: BookingStatus,
+    *criteria,
+    actor: Optional[str] = None,
+    reason: Optional[str] = None,
+    values: Optional[dict] = None,
+    allowed: Optional[FrozenSet[BookingStatus]] = None
+) -> Optional[BookingTransition]:
+    """
+    booking_state.transition on the request's transaction. Does not commit.
+
+    A loaded instance of the booking is expired; refresh it before reading.
+    """
+    return await db.run_sync(
+        booking_state.transition, booking_id, status, *criteria,
+        actor=actor, reason=reason, values=values, allowed=allowed
+    )
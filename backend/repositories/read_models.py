@@ -0,0 +1,57 @@
+"""
+Read models for list endpoints
+
+A list page used to load full ORM entities (settings JSON, relationship
+state, identity map bookkeeping) only to copy a few fields into Pydantic
+models. List queries now select just the response columns into ReadModel
+subclasses: plain objects whose __slots__ name the columns, in select
+order. dump_json() validates and serializes them with a TypeAdapter of the
+endpoint's response model, in pydantic-core, so coercions and schema
+defaults (e.g. an int rating served as a float) give the body the
+response_model did, without hydrating entities or building model
+instances in Python. scripts/bench_read_models.py compares both paths.
+"""
+
+import functools
+from typing import Iterable, List, Sequence, Type, TypeVar
+
+from pydantic import BaseModel, TypeAdapter
+
+M = TypeVar("M", bound="ReadModel")
+
+
+class ReadModel:
+    """Row of selected columns; subclasses list the column names in __slots__"""
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        # Extra trailing values (e.g. a window count) are ignored
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    @classmethod
+    def from_rows(cls: Type[M], rows: Iterable[Sequence]) -> List[M]:
+        return [cls(*row) for row in rows]
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        return type(other) is type(self) and self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+@functools.lru_cache(maxsize=None)
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+def dump_json(items: Iterable, model: Type[BaseModel]) -> bytes:
+    """JSON array of read models (or dicts) as response_model=List[model] would give it"""
+    adapter = _list_adapter(model)
+    values = [item.as_dict() if isinstance(item, ReadModel) else item for item in items]
+    return adapter.dump_json(adapter.validate_python(values))
@@ -0,0 +1,48 @@
+"""
+Free slot lookups
+
+The slot finder is shared with the bot, so it runs on the request's
+connection through run_sync.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import User
+from services import slot_finder
+
+
+async def get_work_hours(db: AsyncSession, trainer: User) -> Dict[str, dict]:
+    """Trainer's weekly work hours (see slot_finder.get_work_hours)"""
+    return await db.run_sync(slot_finder.get_work_hours, trainer)
+
+
+async def suggest_slots(
+    db: AsyncSession,
+    trainer: User,
+    around: datetime,
+    duration: Optional[int] = None,
+    exclude_booking_id: Optional[int] = None
+) -> List[datetime]:
+    """Nearest free start times around a taken one"""
+    return await db.run_sync(
+        slot_finder.suggest_slots, trainer, around,
+        duration=duration,
+        exclude_booking_id=exclude_booking_id
+    )
+
+
+async def is_slot_free(
+    db: AsyncSession,
+    trainer: User,
+    start: datetime,
+    duration: Optional[int] = None,
+    exclude_booking_id: Optional[int] = None
+) -> bool:
+    """Check a single start time against trainer's active bookings"""
+    return await db.run_sync(
+        slot_finder.is_slot_free, trainer, start, duration,
+        exclude_booking_id=exclude_booking_id
+    )
@@ -0,0 +1,64 @@
+"""
+Trainer-client relationship queries
+"""
+
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import User, TrainerClient
+from services.client_stats import trainer_clients_statement
+
+
+async def get_relation(db: AsyncSession, trainer_id: int, client_id: int) -> Optional[TrainerClient]:
+    """Active relationship between a trainer and a client"""
+    return (await db.execute(
+        select(TrainerClient).where(
+            TrainerClient.trainer_id == trainer_id,
+            TrainerClient.client_id == client_id,
+            TrainerClient.is_active == True
+        ).limit(1)
+    )).scalar_one_or_none()
+
+
+async def list_trainer_clients(
+    db: AsyncSession,
+    trainer_id: int,
+    sort: str = "created",
+    descending: bool = False,
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> Tuple[list, int]:
+    """
+    Page of trainer's clients with stats (see services.client_stats).
+
+    Returns:
+        Rows and total number of active clients before limit/offset
+    """
+    rows = (await db.execute(trainer_clients_statement(
+        trainer_id, sort=sort, descending=descending, limit=limit, offset=offset
+    ))).all()
+
+    if rows:
+        return rows, rows[0].total_count
+    if not offset:
+        return rows, 0
+    # Page past the end: count separately
+    total = (await db.execute(
+        select(func.count(TrainerClient.id)).where(
+            TrainerClient.trainer_id == trainer_id,
+            TrainerClient.is_active == True
+        )
+    )).scalar_one()
+    return rows, total
+
+
+async def get_client_trainers(db: AsyncSession, client_id: int) -> List[User]:
+    """Trainers the client is actively working with"""
+    return (await db.execute(
+        select(User)
+        .join(TrainerClient, TrainerClient.trainer_id == User.id)
+        .where(TrainerClient.client_id == client_id, TrainerClient.is_active == True)
+        .order_by(TrainerClient.id)
+    )).scalars().all()
@@ -0,0 +1,44 @@
+"""
+User queries
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import User, UserRole, TrainerClient
+from services.client_home import get_client_home
+
+
+async def get_user(db: AsyncSession, telegram_id: str, role: Optional[UserRole] = None) -> Optional[User]:
+    """User by telegram_id, optionally of a given role"""
+    statement = select(User).where(User.telegram_id == telegram_id)
+    if role is not None:
+        statement = statement.where(User.role == role)
+    return (await db.execute(statement.limit(1))).scalar_one_or_none()
+
+
+async def get_users(db: AsyncSession, ids: Iterable[int]) -> Dict[int, User]:
+    """Users by id in one query"""
+    ids = {i for i in ids if i}
+    if not ids:
+        return {}
+    users = (await db.execute(select(User).where(User.id.in_(ids)))).scalars().all()
+    return {user.id: user for user in users}
+
+
+async def get_trainer_stats(db: AsyncSession, trainer_id: int) -> Tuple[int, int]:
+    """Active clients and total bookings from trainer_clients counters"""
+    row = (await db.execute(
+        select(
+            func.count(TrainerClient.id).filter(TrainerClient.is_active == True),
+            func.coalesce(func.sum(TrainerClient.total_bookings), 0)
+        ).where(TrainerClient.trainer_id == trainer_id)
+    )).one()
+    return row[0], row[1]
+
+
+async def get_client_document(db: AsyncSession, telegram_id: str) -> Optional[dict]:
+    """Client's client_home document (computed if the client has no row yet)"""
+    return await db.run_sync(get_client_home, telegram_id)
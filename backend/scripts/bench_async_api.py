@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark: sync Session vs AsyncSession in async handlers
+
+Serves two variants of the same pair of endpoints from one uvicorn worker:
+  sync  - `async def` handler on db.session (psycopg2), as api/v1 used to be
+  async - `async def` handler on db.base.get_db (asyncpg), as api/v1 is now
+
+and fires a mix of slow (pg_sleep) and fast (user lookup) requests at each.
+A blocking driver call stalls the worker's event loop, so in the sync
+variant every fast request waits behind slow ones.
+
+Requires PostgreSQL in DATABASE_URL:
+
+    python scripts/bench_async_api.py --requests 500 --concurrency 50 --slow-ratio 0.1 --slow-ms 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import httpx
+import uvicorn
+from fastapi import Depends, FastAPI
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from db import base, session as sync_session
+from models import User
+
+SLOW_QUERY = text("SELECT pg_sleep(:seconds)")
+FAST_QUERY = select(User.id).limit(1)
+
+app = FastAPI()
+
+
+@app.get("/sync/slow")
+async def sync_slow(seconds: float, db: Session = Depends(sync_session.get_db)):
+    db.execute(SLOW_QUERY, {"seconds": seconds})
+    return {}
+
+
+@app.get("/sync/fast")
+async def sync_fast(db: Session = Depends(sync_session.get_db)):
+    db.execute(FAST_QUERY).first()
+    return {}
+
+
+@app.get("/async/slow")
+async def async_slow(seconds: float, db: AsyncSession = Depends(base.get_db)):
+    await db.execute(SLOW_QUERY, {"seconds": seconds})
+    return {}
+
+
+@app.get("/async/fast")
+async def async_fast(db: AsyncSession = Depends(base.get_db)):
+    (await db.execute(FAST_QUERY)).first()
+    return {}
+
+
+def start_server(port: int) -> uvicorn.Server:
+    """One uvicorn worker in a background thread"""
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+async def run(base_url: str, variant: str, requests: int, concurrency: int, slow_ratio: float, slow_ms: int) -> dict:
+    rng = random.Random(42)
+    plan = [rng.random() < slow_ratio for _ in range(requests)]
+    fast_latencies, slow_latencies = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        # Warm up both connection pools
+        await client.get(f"/{variant}/fast")
+
+        async def one(slow: bool):
+            async with semaphore:
+                started = time.perf_counter()
+                if slow:
+                    response = await client.get(f"/{variant}/slow", params={"seconds": slow_ms / 1000})
+                else:
+                    response = await client.get(f"/{variant}/fast")
+                response.raise_for_status()
+                (slow_latencies if slow else fast_latencies).append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(slow) for slow in plan))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "variant": variant,
+        "rps": requests / elapsed,
+        "fast_p50": percentile(fast_latencies, 0.5) * 1000,
+        "fast_p95": percentile(fast_latencies, 0.95) * 1000,
+        "slow_p95": percentile(slow_latencies, 0.95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--slow-ratio", type=float, default=0.1)
+    parser.add_argument("--slow-ms", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if not sync_session.SQLALCHEMY_DATABASE_URL.startswith("postgresql"):
+        sys.exit("DATABASE_URL must point to PostgreSQL (slow requests use pg_sleep)")
+    sync_session.engine.echo = False
+    base.engine.echo = False
+
+    start_server(args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    print(
+        f"{args.requests} requests, concurrency {args.concurrency}, "
+        f"{args.slow_ratio:.0%} slow ({args.slow_ms} ms), 1 worker"
+    )
+    print(f"{'variant':<8} {'req/s':>8} {'fast p50':>10} {'fast p95':>10} {'slow p95':>10}")
+    for variant in ("sync", "async"):
+        result = asyncio.run(run(
+            base_url, variant, args.requests, args.concurrency, args.slow_ratio, args.slow_ms
+        ))
+        print(
+            f"{result['variant']:<8} {result['rps']:>8.1f} {result['fast_p50']:>8.1f}ms "
+            f"{result['fast_p95']:>8.1f}ms {result['slow_p95']:>8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
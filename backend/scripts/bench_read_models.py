@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Read model benchmark: ORM hydration vs column projection for booking lists
+
+Seeds --bookings bookings (trainers carry a realistic settings JSON) and
+times, per path, query + serialization of the whole list as the trainer /
+client booking endpoints return it:
+
+    orm         list_bookings() -> Booking/User instances -> BookingResponse
+                (from_orm) -> jsonable_encoder -> json.dumps
+    projection  list_booking_rows() -> BookingRow (__slots__) -> dump_json
+
+Reports the median wall time and the tracemalloc peak of one run. Uses an
+in-memory SQLite database unless --url is given (an async URL whose schema
+is already migrated; the seeded rows are rolled back):
+
+    python scripts/bench_read_models.py --bookings 10000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from api.v1.bookings import BookingResponse, booking_response
+from db.base_sync import Base
+from models import Booking, BookingStatus, Club, User, UserRole
+from repositories import bookings as booking_repo
+from repositories.read_models import dump_json
+
+TRAINERS = 50
+CLIENTS = 500
+
+WORK_HOURS = {
+    day: {"start": "08:00", "end": "21:00", "breaks": [{"start": "13:00", "end": "14:00"}]}
+    for day in ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+}
+
+
+async def seed(db: AsyncSession, bookings: int):
+    club = Club(name="Bench club", address="Street 1")
+    db.add(club)
+    await db.flush()
+
+    trainers = [
+        User(
+            telegram_id=f"bench-t{i}", name=f"Trainer {i}", role=UserRole.TRAINER, club_id=club.id,
+            price=2000, description="Functional training, " * 20, settings={"work_hours": WORK_HOURS}
+        )
+        for i in range(TRAINERS)
+    ]
+    clients = [User(telegram_id=f"bench-c{i}", name=f"Client {i}", role=UserRole.CLIENT) for i in range(CLIENTS)]
+    db.add_all(trainers + clients)
+    await db.flush()
+
+    start = datetime(2026, 1, 1, 8, tzinfo=timezone.utc)
+    db.add_all([
+        Booking(
+            trainer_id=trainers[i % TRAINERS].id, client_id=clients[i % CLIENTS].id, club_id=club.id,
+            datetime=start + timedelta(hours=i), duration=60, price=2000,
+            status=BookingStatus.COMPLETED, notes="Bench booking"
+        )
+        for i in range(bookings)
+    ])
+    await db.flush()
+
+
+async def orm_path(db: AsyncSession) -> bytes:
+    rows = await booking_repo.list_bookings(db, Booking.club_id.isnot(None))
+    body = json.dumps(jsonable_encoder([booking_response(*row) for row in rows])).encode()
+    # Hydrated instances stay in the identity map until the session lets go
+    db.expunge_all()
+    return body
+
+
+async def projection_path(db: AsyncSession) -> bytes:
+    return dump_json(await booking_repo.list_booking_rows(db, Booking.club_id.isnot(None)), BookingResponse)
+
+
+async def measure(db: AsyncSession, path, repeat: int):
+    """Median milliseconds, peak MiB of one run and response size"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = await path(db)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    await path(db)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak / 2 ** 20, len(body)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bookings", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--url", help="async database URL (default: in-memory SQLite)")
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_async_engine(args.url)
+    else:
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        db = AsyncSession(bind=conn, expire_on_commit=False)
+        try:
+            started = time.perf_counter()
+            await seed(db, args.bookings)
+            db.expunge_all()
+            print(f"seeded {args.bookings} bookings in {time.perf_counter() - started:.1f}s")
+
+            print(f"{'path':<12} {'median':>10} {'peak':>10} {'bytes':>10}")
+            for name, path in (("orm", orm_path), ("projection", projection_path)):
+                ms, mib, size = await measure(db, path, args.repeat)
+                print(f"{name:<12} {ms:>8.1f}ms {mib:>7.1f}MiB {size:>10}")
+        finally:
+            await db.close()
+            await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Search benchmark: leading-wildcard ILIKE vs pg_trgm indexes
+
+Seeds a scratch schema (search_bench) with --users synthetic users, builds
+the indexes from migrations/create_search_indexes.sql there and times, per
+search term, the old admin filter
+
+    name ILIKE '%q%' OR telegram_id ILIKE '%q%' OR phone ILIKE '%q%'
+
+against services.search (normalized columns, trigram indexes, similarity
+ranking). Misspelt terms only match with fuzzy search. The public schema is
+only read (column types); the scratch schema is dropped unless --keep.
+
+Requires PostgreSQL with pg_trgm in DATABASE_URL and the users table migrated:
+
+    python scripts/bench_search.py --users 1000000 --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import or_, select, text
+
+from db import session as sync_session
+from models import User
+from services.search import WORD_SIMILARITY_THRESHOLD, search_users
+
+SCHEMA = "search_bench"
+INDEXES = os.path.join(os.path.dirname(os.path.dirname(__file__)), "migrations", "create_search_indexes.sql")
+
+FIRST_NAMES = ["Иван", "Пётр", "Анна", "Мария", "Алексей", "Ольга", "Дмитрий", "Елена", "Сергей", "Наталья"]
+LAST_NAMES = [
+    "Иванов", "Петров", "Смирнов", "Кузнецов", "Попов", "Соколов", "Лебедев", "Козлов",
+    "Новиков", "Морозов", "Волков", "Алексеев", "Фёдоров", "Михайлов", "Беляев", "Тарасов"
+]
+
+# (label, query): exact surname, typo, phone fragment, username, Telegram id
+TERMS = [
+    ("surname", "Смирнов"),
+    ("typo", "Смирнав"),
+    ("phone", "916 123"),
+    ("username", "user12345"),
+    ("telegram id", "100777"),
+]
+
+SEED = """
+INSERT INTO {schema}.users (id, telegram_id, telegram_username, name, role, phone, is_active)
+SELECT
+    g,
+    (100000000 + g)::text,
+    'user' || g,
+    (:first_names)[1 + g % {first}] || ' ' || (:last_names)[1 + (g / {first}) % {last}],
+    (CASE WHEN g % 50 = 0 THEN 'TRAINER' ELSE 'CLIENT' END)::userrole,
+    '+7 (9' || lpad((g % 100)::text, 2, '0') || ') ' || lpad(((g * 7919) % 10000000)::text, 7, '0'),
+    true
+FROM generate_series(1, :users) AS g
+"""
+
+
+def legacy_filter(query: str):
+    return or_(
+        User.name.ilike(f"%{query}%"),
+        User.telegram_id.ilike(f"%{query}%"),
+        User.phone.ilike(f"%{query}%")
+    )
+
+
+def timed(conn, statement, repeat: int):
+    """Median wall time (ms) and row count of a statement"""
+    timings = []
+    rows = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = conn.execute(statement).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), len(rows)
+
+
+def seed(engine, users: int):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        conn.execute(text(f"CREATE TABLE {SCHEMA}.users (LIKE public.users INCLUDING DEFAULTS)"))
+        conn.execute(text(f"ALTER TABLE {SCHEMA}.users ADD PRIMARY KEY (id)"))
+        conn.execute(
+            text(SEED.format(schema=SCHEMA, first=len(FIRST_NAMES), last=len(LAST_NAMES))),
+            {"first_names": FIRST_NAMES, "last_names": LAST_NAMES, "users": users}
+        )
+
+        started = time.perf_counter()
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        conn.execute(text(f"SET LOCAL search_path TO {SCHEMA}, public"))
+        with open(INDEXES) as f:
+            for chunk in f.read().split(";"):
+                statement = "\n".join(l for l in chunk.splitlines() if not l.strip().startswith("--")).strip()
+                if statement.startswith("CREATE INDEX"):
+                    conn.execute(text(statement))
+        print(f"indexes built in {time.perf_counter() - started:.1f}s")
+        conn.execute(text(f"ANALYZE {SCHEMA}.users"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema")
+    args = parser.parse_args()
+
+    if not sync_session.SQLALCHEMY_DATABASE_URL.startswith("postgresql"):
+        sys.exit("DATABASE_URL must point to PostgreSQL (pg_trgm)")
+    sync_session.engine.echo = False
+
+    started = time.perf_counter()
+    seed(sync_session.engine, args.users)
+    print(f"seeded {args.users} users in {time.perf_counter() - started:.1f}s")
+
+    engine = sync_session.engine.execution_options(schema_translate_map={None: SCHEMA})
+    try:
+        with engine.connect() as conn:
+            conn.execute(text(
+                f"SELECT set_config('pg_trgm.word_similarity_threshold', '{WORD_SIMILARITY_THRESHOLD}', false)"
+            ))
+            print(f"{'term':<12} {'query':<10} {'ilike':>10} {'rows':>6} {'trigram':>10} {'rows':>6} {'fuzzy':>10} {'rows':>6}")
+            for label, query in TERMS:
+                legacy = select(User.id).where(legacy_filter(query)).order_by(User.id.desc()).limit(args.limit)
+                results = [timed(conn, legacy, args.repeat)]
+                for fuzzy in (False, True):
+                    condition, rank = search_users("postgresql", query, fuzzy=fuzzy)
+                    statement = select(User.id).where(condition).order_by(rank.desc(), User.id.desc()).limit(args.limit)
+                    results.append(timed(conn, statement, args.repeat))
+                print(f"{label:<12} {query:<10}" + "".join(f" {ms:>8.1f}ms {rows:>6}" for ms, rows in results))
+    finally:
+        if not args.keep:
+            with sync_session.engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
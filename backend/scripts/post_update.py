@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Replay recorded Telegram updates against the webhook route
+
+Run the API with BOT_MODE=webhook (BOT_WEBHOOK_URL unset, so no webhook is
+registered with Telegram) and POST one or more Update JSON files to it:
+
+    BOT_MODE=webhook BOT_WEBHOOK_SECRET=dev uvicorn main:app --port 8000
+    python scripts/post_update.py update1.json update2.json --secret dev
+
+A file may hold one update or a list of them. Handler replies still go to the
+Bot API, so use a test bot token and chats you own.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import httpx
+
+from core.config import settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("files", nargs="+", help="Update JSON files")
+    parser.add_argument("--url", default="http://localhost:8000/api/telegram/webhook")
+    parser.add_argument("--secret", default=settings.BOT_WEBHOOK_SECRET)
+    args = parser.parse_args()
+
+    headers = {"X-Telegram-Bot-Api-Secret-Token": args.secret}
+    with httpx.Client(timeout=10) as client:
+        for path in args.files:
+            with open(path) as f:
+                data = json.load(f)
+            for update in data if isinstance(data, list) else [data]:
+                response = client.post(args.url, json=update, headers=headers)
+                print(f"update {update.get('update_id')}: {response.status_code} {response.text}")
+
+
+if __name__ == "__main__":
+    main()
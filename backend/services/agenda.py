@@ -0,0 +1,252 @@
+"""
+Bot agendas: trainer /schedule, /today, /tomorrow and client /my
+
+All views are built from one async query over v2 bookings for the next
+7 days with counterpart names. Rendered text is cached per user and view;
+session hooks drop a user's entries when their bookings change, after the
+transaction commits.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+
+from core.cache import cache
+from db.base import async_session
+from models import User, UserRole, Booking, BookingStatus, Club
+from services.booking_state import BookingTransition, subscribe
+
+logger = logging.getLogger(__name__)
+
+AGENDA_DAYS = 7
+
+# Safety net for day rollover and counterpart renames; booking changes invalidate explicitly
+CACHE_TTL = 300
+
+ACTIVE_STATUSES = [BookingStatus.PENDING, BookingStatus.CONFIRMED]
+
+TRAINER_VIEWS = ("schedule", "today", "tomorrow")
+CLIENT_VIEWS = ("my",)
+
+DAY_NAMES_RU = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+
+_PENDING_KEY = "agenda_pending_users"
+_INVALIDATE_KEY = "agenda_invalidate_telegram_ids"
+
+
+def _cache_key(telegram_id: str, view: str) -> str:
+    return f"agenda:{telegram_id}:{view}"
+
+
+async def fetch_agenda(db: AsyncSession, telegram_id: str, role: UserRole) -> List[dict]:
+    """
+    Active bookings of the user for today and the next 6 days, one query.
+
+    Returns:
+        List of dicts with local datetime (trainer's timezone), status,
+        counterpart name and club name, in chronological order
+    """
+    me = aliased(User)
+    other = aliased(User)
+    if role == UserRole.TRAINER:
+        my_id, other_id, trainer_tz = Booking.trainer_id, Booking.client_id, me.timezone
+    else:
+        my_id, other_id, trainer_tz = Booking.client_id, Booking.trainer_id, other.timezone
+
+    now = datetime.now(timezone.utc)
+    result = await db.execute(
+        select(Booking.datetime, Booking.status, other.name, Club.name, trainer_tz)
+        .join(me, and_(me.id == my_id, me.telegram_id == telegram_id, me.role == role))
+        .join(other, other.id == other_id)
+        .outerjoin(Club, Club.id == Booking.club_id)
+        .where(
+            Booking.status.in_(ACTIVE_STATUSES),
+            # One day of slack on both sides, exact local days are cut below
+            Booking.datetime >= now - timedelta(days=1),
+            Booking.datetime < now + timedelta(days=AGENDA_DAYS + 1)
+        )
+        .order_by(Booking.datetime)
+    )
+
+    items = []
+    for start, status, name, club_name, tz_name in result.all():
+        try:
+            tz = ZoneInfo(tz_name or "Europe/Moscow")
+        except Exception:
+            tz = ZoneInfo("Europe/Moscow")
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        local = start.astimezone(tz)
+        today = datetime.now(tz).date()
+        if not today <= local.date() < today + timedelta(days=AGENDA_DAYS):
+            continue
+        items.append({
+            "datetime": local,
+            "offset": (local.date() - today).days,
+            "status": status,
+            "name": name or "Неизвестный",
+            "club_name": club_name
+        })
+    return items
+
+
+def render_trainer_schedule(items: List[dict]) -> str:
+    today = [i for i in items if i["offset"] == 0]
+    if not today:
+        return (
+            "📅 *Ваше расписание на сегодня*\n\n"
+            "У вас пока нет записей на сегодня."
+        )
+
+    message = "📅 *Ваше расписание на сегодня*\n\n"
+    for item in today:
+        status_emoji = "✅" if item["status"] == BookingStatus.CONFIRMED else "⏳"
+        message += f"{item['datetime'].strftime('%H:%M')} - {item['name']} {status_emoji}\n"
+    message += "\n✅ - подтверждено\n⏳ - ожидает подтверждения"
+    return message
+
+
+def render_trainer_day(items: List[dict], offset: int) -> str:
+    day_label = "сегодня" if offset == 0 else "завтра"
+    day_items = [i for i in items if i["offset"] == offset]
+    if not day_items:
+        return (
+            f"👥 *Клиенты на {day_label}*\n\n"
+            f"У вас пока нет записей на {day_label}."
+        )
+
+    message = f"👥 *Клиенты на {day_label}*\n\n"
+    for i, item in enumerate(day_items, 1):
+        message += f"{i}. {item['datetime'].strftime('%H:%M')} - {item['name']}\n"
+    message += f"\nВсего: {len(day_items)} клиент(ов)"
+    return message
+
+
+def render_client_upcoming(items: List[dict]) -> str:
+    now = datetime.now(timezone.utc)
+    upcoming = [i for i in items if i["datetime"] >= now]
+    if not upcoming:
+        return (
+            "📋 *Ваши предстоящие тренировки*\n\n"
+            "У вас нет тренировок на ближайшие 7 дней."
+        )
+
+    message = "📋 *Ваши предстоящие тренировки*\n"
+    current_offset = None
+    for item in upcoming:
+        if item["offset"] != current_offset:
+            current_offset = item["offset"]
+            if current_offset == 0:
+                day_label = "Сегодня"
+            elif current_offset == 1:
+                day_label = "Завтра"
+            else:
+                day = item["datetime"]
+                day_label = f"{DAY_NAMES_RU[day.weekday()]}, {day.strftime('%d.%m')}"
+            message += f"\n*{day_label}:*\n"
+
+        club = f" ({item['club_name']})" if item["club_name"] else ""
+        status = " ⏳" if item["status"] == BookingStatus.PENDING else ""
+        message += f"{item['datetime'].strftime('%H:%M')} - {item['name']}{club}{status}\n"
+
+    message += "\n⏳ - ожидает подтверждения\nДля отмены используйте /cancel"
+    return message
+
+
+async def get_agenda_text(telegram_id: str, view: str) -> str:
+    """
+    Rendered agenda for a bot view, served from cache when possible.
+
+    Args:
+        view: "schedule", "today", "tomorrow" (trainer) or "my" (client)
+    """
+    key = _cache_key(telegram_id, view)
+    cached = await cache.aget(key)
+    if cached is not None:
+        return cached
+
+    role = UserRole.CLIENT if view in CLIENT_VIEWS else UserRole.TRAINER
+    async with async_session() as db:
+        items = await fetch_agenda(db, telegram_id, role)
+
+    if view == "schedule":
+        text = render_trainer_schedule(items)
+    elif view == "today":
+        text = render_trainer_day(items, 0)
+    elif view == "tomorrow":
+        text = render_trainer_day(items, 1)
+    else:
+        text = render_client_upcoming(items)
+
+    await cache.aset(key, text, CACHE_TTL)
+    return text
+
+
+def _agenda_keys(telegram_ids) -> List[str]:
+    return [
+        _cache_key(telegram_id, view)
+        for telegram_id in telegram_ids if telegram_id
+        for view in TRAINER_VIEWS + CLIENT_VIEWS
+    ]
+
+
+def invalidate_agenda(*telegram_ids: str):
+    """Drop cached agendas of these users (in the background when called on an event loop)"""
+    cache.delete_soon(*_agenda_keys(telegram_ids))
+
+
+async def ainvalidate_agenda(*telegram_ids: str):
+    await cache.adelete(*_agenda_keys(telegram_ids))
+
+
+def _after_flush(session: Session, flush_context):
+    user_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Booking):
+            user_ids.update((obj.trainer_id, obj.client_id))
+    if user_ids:
+        session.info.setdefault(_PENDING_KEY, set()).update(user_ids)
+
+
+def _on_transition(session: Session, change: BookingTransition):
+    session.info.setdefault(_PENDING_KEY, set()).update((change.trainer_id, change.client_id))
+
+
+def _before_commit(session: Session):
+    # Commit flushes after this hook, so flush here to collect this transaction's changes
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+
+    user_ids = session.info.pop(_PENDING_KEY, None)
+    if user_ids:
+        telegram_ids = session.execute(
+            select(User.telegram_id).where(User.id.in_(user_ids))
+        ).scalars().all()
+        session.info.setdefault(_INVALIDATE_KEY, set()).update(telegram_ids)
+
+
+def _after_commit(session: Session):
+    telegram_ids = session.info.pop(_INVALIDATE_KEY, None)
+    if telegram_ids:
+        invalidate_agenda(*telegram_ids)
+
+
+def _clear_pending(session: Session, *args):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_INVALIDATE_KEY, None)
+
+
+def install_agenda_hooks():
+    """Register session hooks invalidating cached agendas. Idempotent."""
+    if event.contains(Session, "after_flush", _after_flush):
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "before_commit", _before_commit)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_soft_rollback", _clear_pending)
+    subscribe(_on_transition)
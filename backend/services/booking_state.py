@@ -0,0 +1,181 @@
+"""
+Booking state machine
+
+Every status change goes through transition(): one conditional
+`UPDATE bookings ... WHERE id = :id AND status IN (:allowed) RETURNING ...`,
+so two concurrent actors (client confirming while auto-cancel runs) cannot
+both win; the loser gets None and reports the current state.
+
+A successful transition produces a BookingTransition event. Subscribers run
+inside the same transaction (counters, read models, cache invalidation);
+callers use the returned event for notifications after commit.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from models import Booking, BookingStatus
+
+logger = logging.getLogger(__name__)
+
+# Target status -> statuses it can be reached from
+TRANSITIONS: Dict[BookingStatus, FrozenSet[BookingStatus]] = {
+    # Reschedule request: trainer or client proposes a new time
+    BookingStatus.PENDING: frozenset({BookingStatus.PENDING, BookingStatus.CONFIRMED, BookingStatus.CANCELLED}),
+    BookingStatus.CONFIRMED: frozenset({BookingStatus.PENDING}),
+    BookingStatus.CANCELLED: frozenset({BookingStatus.PENDING, BookingStatus.CONFIRMED}),
+    BookingStatus.COMPLETED: frozenset({BookingStatus.PENDING, BookingStatus.CONFIRMED}),
+    BookingStatus.NO_SHOW: frozenset({BookingStatus.PENDING, BookingStatus.CONFIRMED}),
+}
+
+# Timestamp column set when a status is entered
+_TIMESTAMPS = {
+    BookingStatus.CONFIRMED: "confirmed_at",
+    BookingStatus.CANCELLED: "cancelled_at",
+    BookingStatus.COMPLETED: "completed_at",
+}
+
+# Actors recorded on events
+TRAINER = "trainer"
+CLIENT = "client"
+SYSTEM = "system"
+
+
+class BookingTransition:
+    """Domain event: a booking moved from one status to another"""
+
+    __slots__ = (
+        "booking_id", "trainer_id", "client_id", "club_id",
+        "previous_status", "status", "previous_datetime", "datetime",
+        "actor", "reason"
+    )
+
+    def __init__(self, booking_id, trainer_id, client_id, club_id,
+                 previous_status, status, previous_datetime, datetime,
+                 actor=None, reason=None):
+        self.booking_id = booking_id
+        self.trainer_id = trainer_id
+        self.client_id = client_id
+        self.club_id = club_id
+        self.previous_status = previous_status
+        self.status = status
+        self.previous_datetime = previous_datetime
+        self.datetime = datetime
+        self.actor = actor
+        self.reason = reason
+
+    @property
+    def rescheduled(self) -> bool:
+        return self.previous_datetime != self.datetime
+
+    def __repr__(self):
+        return f"<BookingTransition {self.booking_id} {self.previous_status} -> {self.status} by {self.actor}>"
+
+
+_subscribers: List[Callable[[Session, BookingTransition], None]] = []
+
+
+def subscribe(handler: Callable[[Session, BookingTransition], None]):
+    """Run handler(session, event) inside the transaction of every transition. Idempotent."""
+    if handler not in _subscribers:
+        _subscribers.append(handler)
+
+
+def transition(
+    db: Session,
+    booking_id: int,
+    status: BookingStatus,
+    *criteria,
+    actor: Optional[str] = None,
+    reason: Optional[str] = None,
+    values: Optional[dict] = None,
+    allowed: Optional[FrozenSet[BookingStatus]] = None
+) -> Optional[BookingTransition]:
+    """
+    Move a booking to `status` with one conditional UPDATE.
+
+    Args:
+        criteria: Extra WHERE conditions on Booking, e.g. ownership checks
+        actor: TRAINER, CLIENT or SYSTEM, passed to the event
+        reason: Stored as cancellation_reason when cancelling
+        values: Other columns to set in the same statement (e.g. datetime)
+        allowed: Source statuses, defaults to TRANSITIONS[status]
+
+    Returns:
+        The event, or None if the booking does not exist, is not in an allowed
+        status or does not match criteria. Does not commit.
+    """
+    allowed = allowed if allowed is not None else TRANSITIONS[status]
+
+    new_values = dict(values or {})
+    new_values["status"] = status
+    if status in _TIMESTAMPS:
+        new_values[_TIMESTAMPS[status]] = datetime.now(timezone.utc)
+    if status == BookingStatus.CANCELLED:
+        new_values["cancellation_reason"] = reason
+
+    conditions = [Booking.status.in_(list(allowed)), *criteria]
+    returning = [Booking.trainer_id, Booking.client_id, Booking.club_id, Booking.datetime]
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Row lock + pre-update values in the same statement; a concurrent
+        # transition waits on the lock and then sees the new status
+        previous = (
+            select(Booking.id, Booking.status, Booking.datetime)
+            .where(Booking.id == booking_id)
+            .with_for_update()
+            .subquery()
+        )
+        statement = (
+            update(Booking)
+            .where(Booking.id == previous.c.id, *conditions)
+            .returning(*returning, previous.c.status, previous.c.datetime)
+        )
+    else:
+        # SQLite (local runs) evaluates UPDATE ... FROM after the update and
+        # serializes writers, so read the previous values first
+        previous = db.execute(
+            select(Booking.status, Booking.datetime).where(Booking.id == booking_id)
+        ).first()
+        if previous is None:
+            return None
+        statement = (
+            update(Booking)
+            .where(Booking.id == booking_id, *conditions)
+            .returning(*returning)
+        )
+
+    row = db.execute(
+        statement.values(**new_values).execution_options(synchronize_session=False)
+    ).first()
+
+    if row is None:
+        return None
+    previous_status, previous_datetime = row[4:] if len(row) > 4 else previous
+
+    # Loaded instance holds pre-update values
+    instance = db.identity_map.get(db.identity_key(Booking, booking_id))
+    if instance is not None:
+        db.expire(instance)
+
+    event = BookingTransition(
+        booking_id=booking_id,
+        trainer_id=row[0],
+        client_id=row[1],
+        club_id=row[2],
+        previous_status=previous_status,
+        status=status,
+        previous_datetime=previous_datetime,
+        datetime=row[3],
+        actor=actor,
+        reason=reason
+    )
+    for handler in _subscribers:
+        handler(db, event)
+
+    logger.info(f"{event!r}")
+    return event
@@ -0,0 +1,263 @@
+"""
+Daily booking rollup (booking_daily_stats)
+
+Analytics read pre-aggregated rows instead of scanning bookings. Each run of
+refresh_booking_stats:
+
+1. reads bookings with updated_at past the watermark (minus WATERMARK_LAG,
+   so rows from transactions that committed late are not skipped);
+2. collects the (trainer, day) pairs they are in now, the pairs they were
+   counted under before (booking_rollup_keys) and the pairs of deleted
+   bookings (keys whose booking_id was nulled by the FK);
+3. recomputes those pairs from bookings with one grouped INSERT ... SELECT
+   ... ON CONFLICT DO UPDATE per trainer, after deleting the groups that no
+   longer have bookings.
+
+Recomputing whole (trainer, day) pairs makes a run idempotent, so overlapping
+windows and retries are harmless. Runs themselves are serialized with a
+transaction-level advisory lock on PostgreSQL, and the unique index on
+(day, club_id, trainer_id, status) keeps a row per group regardless. Days are trainer-local on PostgreSQL and
+UTC on SQLite (local runs and tests).
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Date, String, cast, delete, distinct, exists, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import Booking, BookingStatus, TrainerClient, User
+from models.booking_stats import BookingDailyStat, BookingRollupKey, RollupWatermark
+from services.slot_finder import get_trainer_timezone
+
+WATERMARK = "booking_daily_stats"
+WATERMARK_LAG = timedelta(minutes=10)
+DEFAULT_TIMEZONE = "Europe/Moscow"
+
+# pg_advisory_xact_lock key serializing refresh runs
+REFRESH_LOCK = 4_220_001
+
+# Keep IN (...) lists bounded on backfill
+CHUNK = 1000
+
+COMPLETED = BookingStatus.COMPLETED.name
+CANCELLED = BookingStatus.CANCELLED.name
+
+
+def local_day(dialect_name: str):
+    """Booking's trainer-local date; needs bookings joined to the trainer (User)"""
+    if dialect_name == "postgresql":
+        tz = func.coalesce(User.timezone, DEFAULT_TIMEZONE)
+        return cast(func.timezone(tz, Booking.datetime), Date)
+    return func.date(Booking.datetime, type_=Date)
+
+
+def _chunks(items: List, size: int = CHUNK) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def refresh_booking_stats(db: Session) -> Dict[str, int]:
+    """Bring booking_daily_stats up to date with bookings changed since the last run. Does not commit."""
+    if db.get_bind().dialect.name == "postgresql":
+        # Runs overlap when one outlasts the beat interval; the second waits for
+        # the first to commit and then starts from its watermark
+        db.execute(select(func.pg_advisory_xact_lock(REFRESH_LOCK)))
+
+    watermark = db.get(RollupWatermark, WATERMARK)
+    if watermark is None:
+        watermark = RollupWatermark(name=WATERMARK)
+        db.add(watermark)
+
+    day = local_day(db.get_bind().dialect.name)
+    changed_query = (
+        select(Booking.id, Booking.trainer_id, day.label("day"), Booking.updated_at)
+        .join(User, User.id == Booking.trainer_id)
+    )
+    if watermark.value is not None:
+        changed_query = changed_query.where(Booking.updated_at > watermark.value - WATERMARK_LAG)
+    changed = db.execute(changed_query).all()
+
+    affected = defaultdict(set)
+    for row in changed:
+        affected[row.trainer_id].add(row.day)
+
+    # Where changed bookings were counted before, and where deleted ones were
+    changed_ids = [row.id for row in changed]
+    previous = [BookingRollupKey.booking_id.is_(None)]
+    previous += [BookingRollupKey.booking_id.in_(ids) for ids in _chunks(changed_ids)]
+    for trainer_id, previous_day in db.execute(
+        select(BookingRollupKey.trainer_id, BookingRollupKey.day).where(or_(*previous))
+    ):
+        affected[trainer_id].add(previous_day)
+
+    for trainer_id, days in affected.items():
+        _recount(db, day, trainer_id, sorted(days))
+
+    db.execute(delete(BookingRollupKey).where(or_(*previous)))
+    if changed:
+        db.execute(insert(BookingRollupKey), [
+            {"booking_id": row.id, "trainer_id": row.trainer_id, "day": row.day} for row in changed
+        ])
+        latest = max(row.updated_at for row in changed if row.updated_at is not None)
+        if watermark.value is None or latest > watermark.value:
+            watermark.value = latest
+    db.flush()
+
+    return {"bookings": len(changed), "days": sum(len(days) for days in affected.values())}
+
+
+def _recount(db: Session, day, trainer_id: int, days: List[date]):
+    """Upsert a trainer's rollup rows for the given days, drop groups that are gone"""
+    status = cast(Booking.status, String)
+    aggregates = (
+        select(
+            day.label("day"),
+            Booking.club_id,
+            Booking.trainer_id,
+            status.label("status"),
+            func.count(Booking.id),
+            func.coalesce(func.sum(Booking.price), 0),
+            func.count(distinct(Booking.client_id)),
+        )
+        .join(User, User.id == Booking.trainer_id)
+        .where(
+            Booking.trainer_id == trainer_id,
+            # Bound by datetime so the index is used; local days are within a day of UTC
+            Booking.datetime >= datetime.combine(days[0] - timedelta(days=1), datetime.min.time()),
+            Booking.datetime < datetime.combine(days[-1] + timedelta(days=2), datetime.min.time()),
+            day.in_(days),
+        )
+        .group_by(day, Booking.club_id, Booking.trainer_id, status)
+    )
+
+    fresh = aggregates.subquery()
+    db.execute(delete(BookingDailyStat).where(
+        BookingDailyStat.trainer_id == trainer_id,
+        BookingDailyStat.day.in_(days),
+        or_(
+            # NULL clubs are only unique on PostgreSQL; rewrite them instead of upserting
+            BookingDailyStat.club_id.is_(None),
+            ~exists().where(
+                fresh.c.day == BookingDailyStat.day,
+                fresh.c.club_id == BookingDailyStat.club_id,
+                fresh.c.status == BookingDailyStat.status,
+            ),
+        ),
+    ))
+
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as upsert
+
+    stmt = upsert(BookingDailyStat).from_select(
+        ["day", "club_id", "trainer_id", "status", "bookings", "revenue", "clients"],
+        aggregates
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[BookingDailyStat.day, BookingDailyStat.club_id, BookingDailyStat.trainer_id, BookingDailyStat.status],
+        set_={
+            "bookings": stmt.excluded.bookings,
+            "revenue": stmt.excluded.revenue,
+            "clients": stmt.excluded.clients,
+        }
+    ))
+
+
+def period_counts_statement(today: date, week_start: date, month_start: date, club_id: Optional[int] = None):
+    """Bookings by status and by period (today / week / month) in one pass over the rollup"""
+    statement = select(
+        func.coalesce(func.sum(BookingDailyStat.bookings), 0),
+        *(
+            func.coalesce(func.sum(BookingDailyStat.bookings).filter(BookingDailyStat.status == s.name), 0)
+            for s in (BookingStatus.CONFIRMED, BookingStatus.PENDING, BookingStatus.COMPLETED, BookingStatus.CANCELLED)
+        ),
+        func.coalesce(func.sum(BookingDailyStat.bookings).filter(BookingDailyStat.day == today), 0),
+        func.coalesce(func.sum(BookingDailyStat.bookings).filter(BookingDailyStat.day >= week_start), 0),
+        func.coalesce(func.sum(BookingDailyStat.bookings).filter(BookingDailyStat.day >= month_start), 0),
+    )
+    if club_id is not None:
+        statement = statement.where(BookingDailyStat.club_id == club_id)
+    return statement
+
+
+def series_start(today: date, months: int) -> date:
+    """First day of the month months - 1 months before today's, so the current month is included"""
+    month_index = today.year * 12 + today.month - 1 - (months - 1)
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+async def daily_series(
+    db: AsyncSession,
+    start: date,
+    end: date,
+    trainer_id: Optional[int] = None,
+    club_id: Optional[int] = None
+) -> List[dict]:
+    """Per-day totals between start and end (inclusive), days without bookings included"""
+    statement = (
+        select(
+            BookingDailyStat.day,
+            func.sum(BookingDailyStat.bookings),
+            func.coalesce(func.sum(BookingDailyStat.bookings).filter(BookingDailyStat.status == COMPLETED), 0),
+            func.coalesce(func.sum(BookingDailyStat.bookings).filter(BookingDailyStat.status == CANCELLED), 0),
+            func.coalesce(func.sum(BookingDailyStat.revenue).filter(BookingDailyStat.status == COMPLETED), 0),
+        )
+        .where(BookingDailyStat.day >= start, BookingDailyStat.day <= end)
+        .group_by(BookingDailyStat.day)
+    )
+    if trainer_id is not None:
+        statement = statement.where(BookingDailyStat.trainer_id == trainer_id)
+    if club_id is not None:
+        statement = statement.where(BookingDailyStat.club_id == club_id)
+
+    rows = {row[0]: row for row in (await db.execute(statement)).all()}
+    series = []
+    current = start
+    while current <= end:
+        row = rows.get(current)
+        series.append({
+            "date": current.isoformat(),
+            "bookings": row[1] if row else 0,
+            "completed": row[2] if row else 0,
+            "cancelled": row[3] if row else 0,
+            "revenue": row[4] if row else 0,
+        })
+        current += timedelta(days=1)
+    return series
+
+
+async def trainer_stats(db: AsyncSession, trainer: User) -> dict:
+    """Month and all-time figures for the trainer's /stats command"""
+    month_start = datetime.now(get_trainer_timezone(trainer)).date().replace(day=1)
+    is_month = BookingDailyStat.day >= month_start
+    is_completed = BookingDailyStat.status == COMPLETED
+
+    bookings = (await db.execute(
+        select(
+            func.coalesce(func.sum(BookingDailyStat.bookings).filter(is_month, is_completed), 0),
+            func.coalesce(func.sum(BookingDailyStat.bookings).filter(is_month, BookingDailyStat.status == CANCELLED), 0),
+            func.coalesce(func.sum(BookingDailyStat.revenue).filter(is_month, is_completed), 0),
+            func.coalesce(func.sum(BookingDailyStat.bookings).filter(is_completed), 0),
+        ).where(BookingDailyStat.trainer_id == trainer.id)
+    )).one()
+
+    # Client counts are not additive over days; take them from the relationships
+    clients = (await db.execute(
+        select(
+            func.count(TrainerClient.id),
+            func.count(TrainerClient.id).filter(TrainerClient.created_at >= month_start),
+        ).where(TrainerClient.trainer_id == trainer.id, TrainerClient.is_active == True)
+    )).one()
+
+    return {
+        "month_completed": bookings[0],
+        "month_cancelled": bookings[1],
+        "month_new_clients": clients[1],
+        "month_revenue": bookings[2],
+        "total_clients": clients[0],
+        "total_completed": bookings[3],
+    }
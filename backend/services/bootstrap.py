@@ -0,0 +1,257 @@
+"""
+Mini app bootstrap documents
+
+On startup the trainer and client mini apps need profile, settings, weekly
+template, bookings and balances. Instead of one HTTP round trip per piece,
+these are gathered here concurrently (one async session per independent
+query) and returned as a single document.
+
+The client document is served from the client_home read model.
+
+Every bootstrap runs under a query budget: statements are counted on the
+async engine, and exceeding the budget is logged so N+1 regressions show up
+in logs instead of in time-to-interactive.
+"""
+
+import asyncio
+import logging
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import select, func, event
+
+from db.base import engine, async_session
+from models import User, UserRole, TrainerClient, Booking, Club, Schedule
+from services.slot_finder import get_trainer_timezone
+from services.client_home import get_client_home
+from services.client_stats import trainer_clients_statement, serialize_client_row
+
+logger = logging.getLogger(__name__)
+
+# Expected statements: trainer lookup, stats, schedule, bookings, clients
+TRAINER_QUERY_BUDGET = 5
+# client_home read model lookup, bookings
+CLIENT_QUERY_BUDGET = 2
+
+# Date tabs in the trainer app: two days back, four days ahead
+DAYS_BEFORE = 2
+DAYS_AFTER = 4
+
+_current_budget: ContextVar[Optional["QueryBudget"]] = ContextVar("bootstrap_query_budget", default=None)
+
+
+class QueryBudget:
+    """Counts SQL statements executed while one bootstrap document is built"""
+
+    __slots__ = ("name", "limit", "used", "_token")
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.used = 0
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_budget.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_budget.reset(self._token)
+        if self.used > self.limit:
+            logger.warning(
+                "%s bootstrap used %d queries, budget is %d", self.name, self.used, self.limit
+            )
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    budget = _current_budget.get()
+    if budget is not None:
+        budget.used += 1
+
+
+async def _fetch_all(statement) -> list:
+    """Run one statement in its own session so callers can be gathered"""
+    async with async_session() as session:
+        result = await session.execute(statement)
+        return result.all()
+
+
+def serialize_schedule(trainer: User, schedule: List[Schedule]) -> List[dict]:
+    """Weekly template in the format of GET /slots/trainer/{id}/schedule"""
+    if trainer.settings and 'work_hours' in trainer.settings:
+        return [
+            {
+                "id": None,  # No database ID for settings-based schedule
+                "day_of_week": day_name.capitalize(),
+                "start_time": day_info.get('start', '09:00'),
+                "end_time": day_info.get('end', '18:00'),
+                "is_recurring": True,
+                "is_active": day_info.get('is_working', True),
+                "is_break": False,
+                "has_break": day_info.get('hasBreak', False)  # Lunch break flag
+            }
+            for day_name, day_info in trainer.settings['work_hours'].items()
+        ]
+
+    return [
+        {
+            "id": s.id,
+            "day_of_week": s.day_of_week,
+            "start_time": s.start_time.strftime("%H:%M"),
+            "end_time": s.end_time.strftime("%H:%M"),
+            "is_recurring": s.is_recurring,
+            "is_active": s.is_active,
+            "is_break": False
+        }
+        for s in schedule
+    ]
+
+
+def _booking_dict(booking: Booking, trainer: User, client_name: str, client_telegram_id: str, club_name: Optional[str]) -> dict:
+    """Booking with names, same fields as BookingResponse"""
+    return {
+        "id": booking.id,
+        "trainer_id": booking.trainer_id,
+        "client_id": booking.client_id,
+        "club_id": booking.club_id,
+        "datetime": booking.datetime,
+        "duration": booking.duration,
+        "price": booking.price,
+        "status": booking.status,
+        "notes": booking.notes,
+        "is_paid": booking.is_paid,
+        "created_at": booking.created_at,
+        "trainer_name": trainer.name,
+        "client_name": client_name,
+        "club_name": club_name,
+        "trainer_telegram_id": trainer.telegram_id,
+        "client_telegram_id": client_telegram_id,
+        "trainer_telegram_username": trainer.telegram_username,
+        "trainer_timezone": trainer.timezone or "Europe/Moscow"
+    }
+
+
+async def _trainer_stats(trainer: User) -> dict:
+    rows = await _fetch_all(
+        select(
+            func.count(TrainerClient.id).filter(TrainerClient.is_active == True),
+            func.coalesce(func.sum(TrainerClient.total_bookings), 0)
+        ).where(TrainerClient.trainer_id == trainer.id)
+    )
+    return {"total_clients": rows[0][0], "total_bookings": rows[0][1]}
+
+
+async def _trainer_schedule(trainer: User) -> List[dict]:
+    if trainer.settings and 'work_hours' in trainer.settings:
+        return serialize_schedule(trainer, [])
+
+    rows = await _fetch_all(
+        select(Schedule)
+        .where(Schedule.trainer_id == trainer.id)
+        .order_by(Schedule.day_of_week, Schedule.start_time)
+    )
+    return serialize_schedule(trainer, [row[0] for row in rows])
+
+
+async def _trainer_bookings(trainer: User, window_start: datetime, window_end: datetime) -> List[dict]:
+    rows = await _fetch_all(
+        select(Booking, User, Club.name)
+        .join(User, User.id == Booking.client_id)
+        .outerjoin(Club, Club.id == Booking.club_id)
+        .where(
+            Booking.trainer_id == trainer.id,
+            Booking.datetime >= window_start,
+            Booking.datetime < window_end
+        )
+        .order_by(Booking.datetime.asc())
+    )
+    return [
+        _booking_dict(booking, trainer, client.name, client.telegram_id, club_name)
+        for booking, client, club_name in rows
+    ]
+
+
+async def _trainer_clients(trainer: User) -> List[dict]:
+    rows = await _fetch_all(trainer_clients_statement(trainer.id))
+    now = datetime.now(timezone.utc)
+    return [serialize_client_row(row, trainer.price, now) for row in rows]
+
+
+async def build_trainer_bootstrap(telegram_id: str) -> Optional[dict]:
+    """
+    Everything the trainer mini app needs on startup.
+
+    Returns:
+        Dict with trainer, stats, schedule, bookings (date tabs window) and
+        clients, or None if trainer is not found
+    """
+    with QueryBudget("trainer", TRAINER_QUERY_BUDGET) as budget:
+        rows = await _fetch_all(
+            select(User).where(User.telegram_id == telegram_id, User.role == UserRole.TRAINER)
+        )
+        if not rows:
+            return None
+        trainer = rows[0][0]
+
+        # Window of the date tabs in trainer's local time
+        tz = get_trainer_timezone(trainer)
+        today = datetime.now(tz).date()
+        window_start = datetime.combine(today - timedelta(days=DAYS_BEFORE), datetime.min.time(), tzinfo=tz)
+        window_end = datetime.combine(today + timedelta(days=DAYS_AFTER + 1), datetime.min.time(), tzinfo=tz)
+
+        stats, schedule, bookings, clients = await asyncio.gather(
+            _trainer_stats(trainer),
+            _trainer_schedule(trainer),
+            _trainer_bookings(trainer, window_start, window_end),
+            _trainer_clients(trainer)
+        )
+
+    return {
+        "trainer": trainer,
+        "stats": stats,
+        "schedule": schedule,
+        "bookings": bookings,
+        "clients": clients,
+        "queries": budget.used
+    }
+
+
+async def _client_bookings(profile: dict) -> List[dict]:
+    rows = await _fetch_all(
+        select(Booking, User, Club.name)
+        .join(User, User.id == Booking.trainer_id)
+        .outerjoin(Club, Club.id == Booking.club_id)
+        .where(Booking.client_id == profile["id"])
+        .order_by(Booking.datetime.asc())
+    )
+    return [
+        _booking_dict(booking, trainer, profile["name"], profile["telegram_id"], club_name)
+        for booking, trainer, club_name in rows
+    ]
+
+
+async def build_client_bootstrap(telegram_id: str) -> Optional[dict]:
+    """
+    Everything the client mini app needs on startup.
+
+    Profile and trainers with balances come from the client_home read model.
+
+    Returns:
+        Dict with client (read model document) and bookings,
+        or None if client is not found
+    """
+    with QueryBudget("client", CLIENT_QUERY_BUDGET) as budget:
+        async with async_session() as session:
+            home = await session.run_sync(get_client_home, telegram_id)
+        if not home:
+            return None
+
+        bookings = await _client_bookings(home["profile"])
+
+    return {
+        "client": home,
+        "bookings": bookings,
+        "queries": budget.used
+    }
@@ -0,0 +1,244 @@
+"""
+Client home read model maintenance
+
+The client mini app and the bot's /my command need the same things: next
+trainings, per-trainer balance and remaining sessions, and trainer names.
+Instead of computing them across users, bookings and trainer_clients on every
+read, a denormalized document per client is kept in `client_home`.
+
+Documents are refreshed from session hooks: any flushed change to a Booking,
+TrainerClient or user profile marks affected clients, and their documents are
+rebuilt in the same transaction right before commit. Readers do one keyed
+lookup by telegram_id and never write: a client without a row (none of
+their data changed since the table was added) gets the document computed
+from the source tables, and the row is stored by the next change.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, aliased
+
+from models import User, UserRole, TrainerClient, Booking, BookingStatus, Club, ClientHome
+from services.booking_state import BookingTransition, subscribe
+
+logger = logging.getLogger(__name__)
+
+# Upcoming trainings stored in the document
+UPCOMING_LIMIT = 20
+
+# Trainer fields shown to clients; changing them refreshes all trainer's clients
+TRAINER_FIELDS = (
+    "name", "telegram_username", "phone", "email", "specialization", "price",
+    "session_duration", "description", "rating", "timezone"
+)
+
+PROFILE_FIELDS = (
+    "id", "telegram_id", "telegram_username", "name", "phone", "email", "club_id",
+    "specialization", "price", "session_duration", "description", "rating",
+    "is_active", "created_at", "timezone", "reminder_1_days_before", "reminder_1_time",
+    "reminder_2_hours_after", "reminder_3_hours_after", "auto_cancel_hours_after",
+    "client_reminder_2h_enabled", "client_reminder_1h_enabled", "client_reminder_15m_enabled"
+)
+
+_PENDING_KEY = "client_home_pending"
+_PENDING_TRAINERS_KEY = "client_home_pending_trainers"
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    return value
+
+
+def build_client_home(db: Session, client: User) -> dict:
+    """Compute client's document from source tables (two queries)"""
+    now = datetime.now(timezone.utc)
+    profile = {field: _json_value(getattr(client, field, None)) for field in PROFILE_FIELDS}
+    profile["role"] = _json_value(client.role)
+
+    trainers = []
+    trainer_rows = db.execute(
+        select(TrainerClient.balance, User)
+        .join(User, User.id == TrainerClient.trainer_id)
+        .where(
+            TrainerClient.client_id == client.id,
+            TrainerClient.is_active == True
+        )
+        .order_by(TrainerClient.id)
+    ).all()
+    for balance, trainer in trainer_rows:
+        price = trainer.price or 2000
+        trainers.append({
+            "id": trainer.id,
+            "telegram_id": trainer.telegram_id,
+            "telegram_username": trainer.telegram_username,
+            "name": trainer.name,
+            "phone": trainer.phone,
+            "email": trainer.email,
+            "specialization": trainer.specialization,
+            "price": trainer.price,
+            "session_duration": trainer.session_duration,
+            "description": trainer.description,
+            "rating": trainer.rating,
+            "timezone": trainer.timezone or "Europe/Moscow",
+            "balance": balance or 0,
+            "remaining_trainings": max(0, (balance or 0) // price)
+        })
+
+    trainer_alias = aliased(User)
+    booking_rows = db.execute(
+        select(Booking, trainer_alias.name, trainer_alias.timezone, Club.name)
+        .join(trainer_alias, trainer_alias.id == Booking.trainer_id)
+        .outerjoin(Club, Club.id == Booking.club_id)
+        .where(
+            Booking.client_id == client.id,
+            Booking.status.in_([BookingStatus.PENDING, BookingStatus.CONFIRMED]),
+            Booking.datetime >= now
+        )
+        .order_by(Booking.datetime.asc())
+        .limit(UPCOMING_LIMIT)
+    ).all()
+    upcoming = [
+        {
+            "id": booking.id,
+            "trainer_id": booking.trainer_id,
+            "trainer_name": trainer_name,
+            "trainer_timezone": trainer_tz or "Europe/Moscow",
+            "club_name": club_name,
+            "datetime": _json_value(booking.datetime),
+            "duration": booking.duration,
+            "status": _json_value(booking.status)
+        }
+        for booking, trainer_name, trainer_tz, club_name in booking_rows
+    ]
+
+    return {"profile": profile, "trainers": trainers, "upcoming": upcoming}
+
+
+def refresh_client_home(db: Session, client_id: int) -> Optional[dict]:
+    """Rebuild and upsert one client's document. Does not commit."""
+    client = db.get(User, client_id)
+    if not client or client.role != UserRole.CLIENT:
+        return None
+
+    data = build_client_home(db, client)
+
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    stmt = insert(ClientHome).values(client_id=client.id, telegram_id=client.telegram_id, data=data)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[ClientHome.client_id],
+        set_={"telegram_id": stmt.excluded.telegram_id, "data": stmt.excluded.data, "updated_at": datetime.now(timezone.utc)}
+    ))
+    return data
+
+
+def get_client_home(db: Session, telegram_id: str) -> Optional[dict]:
+    """
+    Client's document by telegram_id, computed if it has no row yet. Read only.
+
+    Returns:
+        Document with upcoming trainings that already started filtered out,
+        or None if client is not found
+    """
+    data = db.execute(
+        select(ClientHome.data).where(ClientHome.telegram_id == telegram_id)
+    ).scalar_one_or_none()
+
+    if data is None:
+        client = db.execute(
+            select(User).where(User.telegram_id == telegram_id, User.role == UserRole.CLIENT)
+        ).scalar_one_or_none()
+        if not client:
+            return None
+        data = build_client_home(db, client)
+
+    now = datetime.now(timezone.utc)
+    data["upcoming"] = [
+        b for b in data.get("upcoming", [])
+        if datetime.fromisoformat(b["datetime"]) >= now
+    ]
+    return data
+
+
+def mark_clients(session: Session, client_ids: Iterable[int]):
+    """Schedule documents of these clients for refresh before commit"""
+    session.info.setdefault(_PENDING_KEY, set()).update(i for i in client_ids if i)
+
+
+def _trainer_fields_changed(trainer: User) -> bool:
+    state = inspect(trainer)
+    return any(state.attrs[field].history.has_changes() for field in TRAINER_FIELDS)
+
+
+def _after_flush(session: Session, flush_context):
+    client_ids = set()
+    trainer_ids = set()
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Booking, TrainerClient)):
+            client_ids.add(obj.client_id)
+        elif isinstance(obj, User):
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            if obj.role == UserRole.CLIENT:
+                client_ids.add(obj.id)
+            elif obj.role == UserRole.TRAINER and obj in session.dirty and _trainer_fields_changed(obj):
+                trainer_ids.add(obj.id)
+
+    if client_ids:
+        mark_clients(session, client_ids)
+    if trainer_ids:
+        session.info.setdefault(_PENDING_TRAINERS_KEY, set()).update(trainer_ids)
+
+
+def _before_commit(session: Session):
+    # Commit flushes after this hook, so flush here to collect this transaction's changes
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+
+    if not session.info.get(_PENDING_KEY) and not session.info.get(_PENDING_TRAINERS_KEY):
+        return
+
+    trainer_ids = session.info.pop(_PENDING_TRAINERS_KEY, set())
+    if trainer_ids:
+        mark_clients(session, session.execute(
+            select(TrainerClient.client_id).where(TrainerClient.trainer_id.in_(trainer_ids))
+        ).scalars())
+
+    for client_id in sorted(session.info.pop(_PENDING_KEY, set())):
+        # Savepoint: a failed refresh leaves a stale document, never a failed commit
+        try:
+            with session.begin_nested():
+                refresh_client_home(session, client_id)
+        except Exception as e:
+            logger.error(f"Failed to refresh client_home for client {client_id}: {e}")
+
+
+def _on_transition(session: Session, change: BookingTransition):
+    mark_clients(session, [change.client_id])
+
+
+def _clear_pending(session: Session, *args):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_PENDING_TRAINERS_KEY, None)
+
+
+def install_client_home_hooks():
+    """Register session hooks keeping client_home up to date. Idempotent."""
+    if event.contains(Session, "after_flush", _after_flush):
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "before_commit", _before_commit)
+    event.listen(Session, "after_soft_rollback", _clear_pending)
+    subscribe(_on_transition)
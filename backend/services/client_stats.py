@@ -0,0 +1,120 @@
+"""
+Trainer's client list with per-client statistics
+
+Total spent and confirmed count for every client of a trainer come from one
+GROUP BY over the trainer's bookings, joined to trainer_clients and users.
+Sorting, pagination and the total row count are part of the same statement.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select, func, case
+from sqlalchemy.sql import Select
+
+from models import User, TrainerClient, Booking, BookingStatus
+
+# Sort keys accepted by GET /users/trainer/{id}/clients
+SORT_COLUMNS = {
+    "created": TrainerClient.id,
+    "name": User.name,
+    "balance": TrainerClient.balance,
+    "last_booking": TrainerClient.last_booking_at,
+    # Aggregate of the statement itself, see trainer_clients_statement
+    "spent": None,
+}
+
+
+def trainer_clients_statement(
+    trainer_id: int,
+    sort: str = "created",
+    descending: bool = False,
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> Select:
+    """
+    Active clients of a trainer with balance and booking stats, one query.
+
+    Rows have a `total_count` column with the number of clients before
+    pagination.
+    """
+    stats = (
+        select(
+            Booking.client_id.label("client_id"),
+            func.sum(case((Booking.is_charged == True, Booking.price), else_=0)).label("total_spent"),
+            func.sum(case((Booking.status == BookingStatus.CONFIRMED, 1), else_=0)).label("confirmed_count")
+        )
+        .where(Booking.trainer_id == trainer_id)
+        .group_by(Booking.client_id)
+        .subquery()
+    )
+    total_spent = func.coalesce(stats.c.total_spent, 0).label("total_spent")
+
+    if sort == "spent":
+        sort_column = total_spent
+    else:
+        sort_column = SORT_COLUMNS.get(sort, TrainerClient.id)
+    sort_clause = sort_column.desc() if descending else sort_column.asc()
+
+    statement = (
+        select(
+            User.id,
+            User.telegram_id,
+            User.telegram_username,
+            User.name,
+            User.phone,
+            User.email,
+            TrainerClient.balance,
+            TrainerClient.total_bookings,
+            TrainerClient.completed_bookings,
+            TrainerClient.cancelled_bookings,
+            TrainerClient.created_at,
+            total_spent,
+            func.coalesce(stats.c.confirmed_count, 0).label("confirmed_count"),
+            func.count().over().label("total_count")
+        )
+        .join(User, User.id == TrainerClient.client_id)
+        .outerjoin(stats, stats.c.client_id == TrainerClient.client_id)
+        .where(
+            TrainerClient.trainer_id == trainer_id,
+            TrainerClient.is_active == True
+        )
+        .order_by(sort_clause.nulls_last(), TrainerClient.id)
+        .offset(offset)
+    )
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
+
+def serialize_client_row(row, trainer_price: Optional[int], now: Optional[datetime] = None) -> dict:
+    """Row of trainer_clients_statement as ClientWithBalanceResponse fields"""
+    now = now or datetime.now(timezone.utc)
+    trainer_price = trainer_price or 2000
+    balance = row.balance or 0
+
+    if row.created_at:
+        created_at = row.created_at
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        months_active = max(1, (now - created_at).days / 30)
+        avg_bookings_per_month = round(row.confirmed_count / months_active, 1)
+    else:
+        avg_bookings_per_month = 0.0
+
+    return {
+        "id": row.id,
+        "telegram_id": row.telegram_id,
+        "telegram_username": row.telegram_username,
+        "name": row.name,
+        "phone": row.phone,
+        "email": row.email,
+        "balance": balance,
+        "remaining_trainings": max(0, balance // trainer_price) if trainer_price > 0 else 0,
+        "total_bookings": row.total_bookings or 0,
+        "completed_bookings": row.completed_bookings or 0,
+        "cancelled_bookings": row.cancelled_bookings or 0,
+        "total_spent": int(row.total_spent),
+        "avg_bookings_per_month": avg_bookings_per_month,
+        "created_at": row.created_at
+    }
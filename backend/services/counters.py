@@ -0,0 +1,364 @@
+"""
+Denormalized booking counters
+
+TrainerClient.total_bookings / completed_bookings / cancelled_bookings /
+last_booking_at and Club.total_trainers / total_clients / total_bookings are
+maintained incrementally: every flushed booking create, status change or
+delete, and every booking_state transition (confirm, cancel, complete,
+no-show), emits atomic `counter = counter ± n` UPDATEs on the same
+connection, so counters commit or roll back together with the booking. Trainer club changes adjust
+Club.total_trainers the same way.
+
+Definitions (also used by the nightly reconciliation):
+    TrainerClient.total_bookings      all bookings of the pair
+    TrainerClient.completed_bookings  bookings in COMPLETED status
+    TrainerClient.cancelled_bookings  bookings in CANCELLED status
+    TrainerClient.last_booking_at     latest booking datetime of the pair
+    Club.total_trainers               trainers with this club_id
+    Club.total_clients                distinct clients with bookings at the club
+    Club.total_bookings               bookings with this club_id
+
+Deletes cannot move last_booking_at back; reconciliation repairs that and any
+drift from raw SQL writes.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, event, exists, func, inspect, or_, select, update
+from sqlalchemy.orm import Session, aliased
+
+from models import User, UserRole, TrainerClient, Booking, BookingStatus, Club
+from services.booking_state import BookingTransition, subscribe
+
+logger = logging.getLogger(__name__)
+
+_TOUCHED_KEY = "counters_touched"
+
+PAIR_COUNTERS = ("total_bookings", "completed_bookings", "cancelled_bookings", "last_booking_at")
+CLUB_COUNTERS = ("total_trainers", "total_clients", "total_bookings")
+
+
+def _status_flags(status) -> Tuple[int, int]:
+    """(completed, cancelled) indicator for a status"""
+    return int(status == BookingStatus.COMPLETED), int(status == BookingStatus.CANCELLED)
+
+
+# Statement builders
+
+def pair_counters_statement(
+    trainer_id: int,
+    client_id: int,
+    total: int = 0,
+    completed: int = 0,
+    cancelled: int = 0,
+    booked_at: Optional[datetime] = None
+):
+    """Atomic delta update of one TrainerClient row"""
+    values = {}
+    if total:
+        values["total_bookings"] = func.coalesce(TrainerClient.total_bookings, 0) + total
+    if completed:
+        values["completed_bookings"] = func.coalesce(TrainerClient.completed_bookings, 0) + completed
+    if cancelled:
+        values["cancelled_bookings"] = func.coalesce(TrainerClient.cancelled_bookings, 0) + cancelled
+    if booked_at is not None:
+        values["last_booking_at"] = case(
+            (or_(TrainerClient.last_booking_at.is_(None), TrainerClient.last_booking_at < booked_at), booked_at),
+            else_=TrainerClient.last_booking_at
+        )
+    if not values:
+        return None
+    return update(TrainerClient).where(
+        TrainerClient.trainer_id == trainer_id,
+        TrainerClient.client_id == client_id
+    ).values(**values)
+
+
+def club_counter_statement(club_id: int, column: str, delta: int, condition=None):
+    """Atomic delta update of one Club counter, optionally guarded by a condition"""
+    counter = getattr(Club, column)
+    statement = update(Club).where(Club.id == club_id).values(
+        **{column: func.coalesce(counter, 0) + delta}
+    )
+    if condition is not None:
+        statement = statement.where(condition)
+    return statement
+
+
+def _client_has_other_bookings(club_id: int, client_id: int, exclude_ids: Iterable[int]):
+    other = aliased(Booking)
+    condition = and_(other.club_id == club_id, other.client_id == client_id)
+    exclude_ids = list(exclude_ids)
+    if exclude_ids:
+        condition = and_(condition, other.id.notin_(exclude_ids))
+    return exists().where(condition)
+
+
+# Session hook
+
+def _history(obj, attr):
+    return inspect(obj).attrs[attr].history
+
+
+def _collect_statements(session: Session):
+    """Translate this flush's booking/trainer changes into counter UPDATEs"""
+    pairs: Dict[Tuple[int, int], Dict[str, object]] = defaultdict(
+        lambda: {"total": 0, "completed": 0, "cancelled": 0, "booked_at": None}
+    )
+    club_bookings: Dict[int, int] = defaultdict(int)
+    club_trainers: Dict[int, int] = defaultdict(int)
+    new_club_clients: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+    removed_club_clients: Set[Tuple[int, int]] = set()
+
+    def bump_booked_at(pair, value):
+        current = pairs[pair]["booked_at"]
+        if value is not None and (current is None or value > current):
+            pairs[pair]["booked_at"] = value
+
+    for obj in session.new:
+        if isinstance(obj, Booking):
+            pair = (obj.trainer_id, obj.client_id)
+            completed, cancelled = _status_flags(obj.status)
+            pairs[pair]["total"] += 1
+            pairs[pair]["completed"] += completed
+            pairs[pair]["cancelled"] += cancelled
+            bump_booked_at(pair, obj.datetime)
+            if obj.club_id:
+                club_bookings[obj.club_id] += 1
+                new_club_clients[(obj.club_id, obj.client_id)].add(obj.id)
+        elif isinstance(obj, User) and obj.role == UserRole.TRAINER and obj.club_id:
+            club_trainers[obj.club_id] += 1
+
+    for obj in session.dirty:
+        if isinstance(obj, Booking):
+            pair = (obj.trainer_id, obj.client_id)
+            status = _history(obj, "status")
+            if status.has_changes() and status.deleted:
+                old_completed, old_cancelled = _status_flags(status.deleted[0])
+                new_completed, new_cancelled = _status_flags(obj.status)
+                pairs[pair]["completed"] += new_completed - old_completed
+                pairs[pair]["cancelled"] += new_cancelled - old_cancelled
+            if _history(obj, "datetime").has_changes():
+                bump_booked_at(pair, obj.datetime)
+        elif isinstance(obj, User) and obj.role == UserRole.TRAINER:
+            club = _history(obj, "club_id")
+            if club.has_changes():
+                for old_club in club.deleted:
+                    if old_club:
+                        club_trainers[old_club] -= 1
+                if obj.club_id:
+                    club_trainers[obj.club_id] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Booking):
+            pair = (obj.trainer_id, obj.client_id)
+            completed, cancelled = _status_flags(obj.status)
+            pairs[pair]["total"] -= 1
+            pairs[pair]["completed"] -= completed
+            pairs[pair]["cancelled"] -= cancelled
+            if obj.club_id:
+                club_bookings[obj.club_id] -= 1
+                removed_club_clients.add((obj.club_id, obj.client_id))
+        elif isinstance(obj, User) and obj.role == UserRole.TRAINER and obj.club_id:
+            club_trainers[obj.club_id] -= 1
+
+    statements = []
+    for (trainer_id, client_id), delta in pairs.items():
+        statement = pair_counters_statement(trainer_id, client_id, **delta)
+        if statement is not None:
+            statements.append(statement)
+    for club_id, delta in club_bookings.items():
+        if delta:
+            statements.append(club_counter_statement(club_id, "total_bookings", delta))
+    for club_id, delta in club_trainers.items():
+        if delta:
+            statements.append(club_counter_statement(club_id, "total_trainers", delta))
+    for (club_id, client_id), booking_ids in new_club_clients.items():
+        # First booking(s) of this client at the club
+        statements.append(club_counter_statement(
+            club_id, "total_clients", 1, ~_client_has_other_bookings(club_id, client_id, booking_ids)
+        ))
+    for club_id, client_id in removed_club_clients:
+        # Last booking of this client at the club is gone
+        statements.append(club_counter_statement(
+            club_id, "total_clients", -1, ~_client_has_other_bookings(club_id, client_id, [])
+        ))
+
+    touched = {
+        "pairs": set(pairs),
+        "clubs": set(club_bookings) | set(club_trainers) | {club for club, _ in new_club_clients} | {club for club, _ in removed_club_clients}
+    }
+    return statements, touched
+
+
+def _after_flush(session: Session, flush_context):
+    statements, touched = _collect_statements(session)
+    if not statements:
+        return
+
+    # Same connection and transaction as the flush itself
+    connection = session.connection()
+    for statement in statements:
+        connection.execute(statement)
+
+    info = session.info.setdefault(_TOUCHED_KEY, {"pairs": set(), "clubs": set()})
+    info["pairs"].update(touched["pairs"])
+    info["clubs"].update(touched["clubs"])
+
+
+def _after_flush_postexec(session: Session, flush_context):
+    # Loaded TrainerClient/Club objects hold pre-update counter values
+    touched = session.info.pop(_TOUCHED_KEY, None)
+    if not touched:
+        return
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, TrainerClient) and (obj.trainer_id, obj.client_id) in touched["pairs"]:
+            session.expire(obj, PAIR_COUNTERS)
+        elif isinstance(obj, Club) and obj.id in touched["clubs"]:
+            session.expire(obj, CLUB_COUNTERS)
+
+
+def _on_transition(session: Session, change: BookingTransition):
+    # Transitions are Core UPDATEs and do not go through the flush hooks
+    old_completed, old_cancelled = _status_flags(change.previous_status)
+    new_completed, new_cancelled = _status_flags(change.status)
+    statement = pair_counters_statement(
+        change.trainer_id,
+        change.client_id,
+        completed=new_completed - old_completed,
+        cancelled=new_cancelled - old_cancelled,
+        booked_at=change.datetime if change.rescheduled else None
+    )
+    if statement is None:
+        return
+    session.execute(statement, execution_options={"synchronize_session": False})
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, TrainerClient) and (obj.trainer_id, obj.client_id) == (change.trainer_id, change.client_id):
+            session.expire(obj, PAIR_COUNTERS)
+
+
+def _track_previous_value(target, value, oldvalue, initiator):
+    # No-op; registered with active_history so the old value of an expired
+    # attribute is loaded before assignment and shows up in history
+    pass
+
+
+def install_counter_hooks():
+    """Register session hooks maintaining booking counters. Idempotent."""
+    if event.contains(Session, "after_flush", _after_flush):
+        return
+    event.listen(Booking.status, "set", _track_previous_value, active_history=True)
+    event.listen(User.club_id, "set", _track_previous_value, active_history=True)
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "after_flush_postexec", _after_flush_postexec)
+    subscribe(_on_transition)
+
+
+# Reconciliation
+
+def reconcile_counters(db: Session) -> Dict[str, int]:
+    """
+    Recompute all counters from bookings with one set-based UPDATE per table.
+
+    Only rows whose stored values drifted are written. Does not commit.
+
+    Returns:
+        Number of repaired rows per table
+    """
+    pair_stats = (
+        select(
+            Booking.trainer_id,
+            Booking.client_id,
+            func.count(Booking.id).label("total"),
+            func.sum(case((Booking.status == BookingStatus.COMPLETED, 1), else_=0)).label("completed"),
+            func.sum(case((Booking.status == BookingStatus.CANCELLED, 1), else_=0)).label("cancelled"),
+            func.max(Booking.datetime).label("last_at")
+        )
+        .group_by(Booking.trainer_id, Booking.client_id)
+        .subquery()
+    )
+    pair = aliased(TrainerClient)
+    fresh_pairs = (
+        select(
+            pair.id,
+            func.coalesce(pair_stats.c.total, 0).label("total"),
+            func.coalesce(pair_stats.c.completed, 0).label("completed"),
+            func.coalesce(pair_stats.c.cancelled, 0).label("cancelled"),
+            pair_stats.c.last_at
+        )
+        .outerjoin(pair_stats, and_(
+            pair_stats.c.trainer_id == pair.trainer_id,
+            pair_stats.c.client_id == pair.client_id
+        ))
+        .subquery()
+    )
+    pairs_result = db.execute(
+        update(TrainerClient)
+        .where(
+            TrainerClient.id == fresh_pairs.c.id,
+            or_(
+                TrainerClient.total_bookings.is_distinct_from(fresh_pairs.c.total),
+                TrainerClient.completed_bookings.is_distinct_from(fresh_pairs.c.completed),
+                TrainerClient.cancelled_bookings.is_distinct_from(fresh_pairs.c.cancelled),
+                TrainerClient.last_booking_at.is_distinct_from(fresh_pairs.c.last_at)
+            )
+        )
+        .values(
+            total_bookings=fresh_pairs.c.total,
+            completed_bookings=fresh_pairs.c.completed,
+            cancelled_bookings=fresh_pairs.c.cancelled,
+            last_booking_at=fresh_pairs.c.last_at
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    trainer_stats = (
+        select(User.club_id, func.count(User.id).label("trainers"))
+        .where(User.role == UserRole.TRAINER, User.club_id.isnot(None))
+        .group_by(User.club_id)
+        .subquery()
+    )
+    booking_stats = (
+        select(
+            Booking.club_id,
+            func.count(func.distinct(Booking.client_id)).label("clients"),
+            func.count(Booking.id).label("bookings")
+        )
+        .where(Booking.club_id.isnot(None))
+        .group_by(Booking.club_id)
+        .subquery()
+    )
+    club = aliased(Club)
+    fresh_clubs = (
+        select(
+            club.id,
+            func.coalesce(trainer_stats.c.trainers, 0).label("trainers"),
+            func.coalesce(booking_stats.c.clients, 0).label("clients"),
+            func.coalesce(booking_stats.c.bookings, 0).label("bookings")
+        )
+        .outerjoin(trainer_stats, trainer_stats.c.club_id == club.id)
+        .outerjoin(booking_stats, booking_stats.c.club_id == club.id)
+        .subquery()
+    )
+    clubs_result = db.execute(
+        update(Club)
+        .where(
+            Club.id == fresh_clubs.c.id,
+            or_(
+                Club.total_trainers.is_distinct_from(fresh_clubs.c.trainers),
+                Club.total_clients.is_distinct_from(fresh_clubs.c.clients),
+                Club.total_bookings.is_distinct_from(fresh_clubs.c.bookings)
+            )
+        )
+        .values(
+            total_trainers=fresh_clubs.c.trainers,
+            total_clients=fresh_clubs.c.clients,
+            total_bookings=fresh_clubs.c.bookings
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    return {"trainer_clients": pairs_result.rowcount, "clubs": clubs_result.rowcount}
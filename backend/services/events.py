@@ -0,0 +1,158 @@
+"""
+Domain events: transactional outbox and Redis Streams relay
+
+Producers call emit() inside their transaction; the event row commits or
+rolls back with the change. The relay (workers/events.py) moves committed
+rows to one Redis Stream, where each consumer group (notifications,
+cache, ...) reads in batches, acknowledges what it handled and can be
+rewound for replay.
+
+There is no ordering guarantee, not even per booking: outbox ids are
+assigned before commit, several relays skip each other's locked rows, and
+consumers retry and claim entries out of turn. Events carry the transition
+they describe, and handlers read anything else from the current row.
+
+Delivery is at least once: a relay crash between XADD and marking rows
+published re-sends them, so consumers skip outbox ids they already handled.
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import redis
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from models import Booking, OutboxEvent
+from services.booking_state import BookingTransition, subscribe
+
+logger = logging.getLogger(__name__)
+
+STREAM = "events"
+# Approximate stream length kept for replay
+STREAM_MAXLEN = 100_000
+# Published outbox rows are kept this long for audit
+OUTBOX_RETENTION_DAYS = 7
+
+# Event types
+BOOKING_CREATED = "booking.created"
+BOOKING_TRANSITION = "booking.transition"
+BOOKING_RESCHEDULED = "booking.rescheduled"
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    return value
+
+
+def emit(db: Session, event_type: str, payload: dict) -> OutboxEvent:
+    """Add an event to the outbox of the current transaction. Does not commit."""
+    event = OutboxEvent(
+        event_type=event_type,
+        payload={key: _json_value(value) for key, value in payload.items()}
+    )
+    db.add(event)
+    return event
+
+
+def emit_booking_created(db: Session, booking: Booking, created_by: str) -> OutboxEvent:
+    return emit(db, BOOKING_CREATED, {
+        "booking_id": booking.id,
+        "trainer_id": booking.trainer_id,
+        "client_id": booking.client_id,
+        "datetime": booking.datetime,
+        "created_by": created_by
+    })
+
+
+def emit_booking_rescheduled(db: Session, booking: Booking, previous_datetime: datetime, actor: str) -> OutboxEvent:
+    return emit(db, BOOKING_RESCHEDULED, {
+        "booking_id": booking.id,
+        "trainer_id": booking.trainer_id,
+        "client_id": booking.client_id,
+        "previous_datetime": previous_datetime,
+        "datetime": booking.datetime,
+        "actor": actor
+    })
+
+
+def _on_transition(session: Session, change: BookingTransition):
+    emit(session, BOOKING_TRANSITION, {
+        slot: getattr(change, slot) for slot in BookingTransition.__slots__
+    })
+
+
+def install_event_hooks():
+    """Write booking_state transitions to the outbox. Idempotent."""
+    subscribe(_on_transition)
+
+
+# Relay
+
+_redis: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis
+
+
+def relay_outbox(db: Session, limit: int = 500) -> int:
+    """
+    Publish a batch of committed, unpublished outbox rows to the stream.
+
+    Rows are locked with SKIP LOCKED so several relays can run side by side;
+    each batch is sent in id order, but batches interleave.
+
+    Returns:
+        Number of published events
+    """
+    events = db.execute(
+        select(OutboxEvent)
+        .where(OutboxEvent.published_at.is_(None))
+        .order_by(OutboxEvent.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not events:
+        db.rollback()
+        return 0
+
+    pipe = get_redis().pipeline(transaction=False)
+    for event in events:
+        pipe.xadd(STREAM, {
+            "outbox_id": event.id,
+            "type": event.event_type,
+            "payload": json.dumps(event.payload)
+        }, maxlen=STREAM_MAXLEN, approximate=True)
+    pipe.execute()
+
+    db.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_([event.id for event in events]))
+        .values(published_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return len(events)
+
+
+def purge_outbox(db: Session, days: int = OUTBOX_RETENTION_DAYS) -> int:
+    """Delete published outbox rows older than `days`"""
+    result = db.execute(
+        delete(OutboxEvent).where(
+            OutboxEvent.published_at < datetime.now(timezone.utc) - timedelta(days=days)
+        )
+    )
+    db.commit()
+    return result.rowcount
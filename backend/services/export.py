@@ -0,0 +1,198 @@
+"""
+Bookings and balances export for club accounting
+
+Rows are read through a server-side cursor (yield_per) and encoded into
+chunks as they arrive, so memory stays flat whatever the range. The same
+chunk generator feeds both the streaming endpoint (api/admin/export.py) and
+the background job that writes a gzipped file for very large ranges
+(tasks/export.py).
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import date, datetime, time, timedelta
+from enum import Enum
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, aliased
+
+from core.cache import cache
+from core.config import settings
+from db.session import SessionLocal
+from models import Booking, TrainerClient, User
+
+KINDS = ("bookings", "balances")
+FORMATS = ("csv", "ndjson")
+
+# Rows fetched per round trip from the server-side cursor
+BATCH_SIZE = 1000
+# Bytes buffered before a chunk is handed to the response / file
+CHUNK_SIZE = 64 * 1024
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+BOOKING_COLUMNS = [
+    "id", "datetime", "duration", "price", "status", "is_paid", "payment_method",
+    "is_charged", "charged_at", "trainer_id", "trainer_name", "client_id",
+    "client_name", "client_phone", "club_id", "created_at", "cancelled_at",
+    "cancellation_reason",
+]
+
+BALANCE_COLUMNS = [
+    "trainer_id", "trainer_name", "client_id", "client_name", "client_phone",
+    "balance", "total_bookings", "completed_bookings", "cancelled_bookings",
+    "last_booking_at",
+]
+
+
+def bookings_statement(club_id: Optional[int], start: date, end: date):
+    """Bookings with start <= datetime < end + 1 day, oldest first"""
+    trainer = aliased(User)
+    client = aliased(User)
+    statement = (
+        select(
+            Booking.id, Booking.datetime, Booking.duration, Booking.price, Booking.status,
+            Booking.is_paid, Booking.payment_method, Booking.is_charged, Booking.charged_at,
+            Booking.trainer_id, trainer.name, Booking.client_id, client.name, client.phone,
+            Booking.club_id, Booking.created_at, Booking.cancelled_at, Booking.cancellation_reason,
+        )
+        .join(trainer, trainer.id == Booking.trainer_id)
+        .join(client, client.id == Booking.client_id)
+        .where(
+            Booking.datetime >= datetime.combine(start, time.min),
+            Booking.datetime < datetime.combine(end + timedelta(days=1), time.min),
+        )
+        .order_by(Booking.datetime, Booking.id)
+    )
+    if club_id is not None:
+        statement = statement.where(Booking.club_id == club_id)
+    return statement
+
+
+def balances_statement(club_id: Optional[int]):
+    """Client balances per trainer, for the club's trainers"""
+    trainer = aliased(User)
+    client = aliased(User)
+    statement = (
+        select(
+            TrainerClient.trainer_id, trainer.name, TrainerClient.client_id, client.name, client.phone,
+            TrainerClient.balance, TrainerClient.total_bookings, TrainerClient.completed_bookings,
+            TrainerClient.cancelled_bookings, TrainerClient.last_booking_at,
+        )
+        .join(trainer, trainer.id == TrainerClient.trainer_id)
+        .join(client, client.id == TrainerClient.client_id)
+        .order_by(TrainerClient.trainer_id, TrainerClient.client_id)
+    )
+    if club_id is not None:
+        statement = statement.where(trainer.club_id == club_id)
+    return statement
+
+
+def export_query(kind: str, club_id: Optional[int], start: date, end: date) -> Tuple[List[str], object]:
+    """Column names and statement for an export kind"""
+    if kind == "bookings":
+        return BOOKING_COLUMNS, bookings_statement(club_id, start, end)
+    return BALANCE_COLUMNS, balances_statement(club_id)
+
+
+def _value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+# Spreadsheets evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_value(value):
+    """Quote user-entered text (names, notes) that would run as a formula"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def encode_rows(columns: List[str], rows, fmt: str) -> Iterator[bytes]:
+    """Encode rows as CSV (with header and BOM for Excel) or NDJSON, in CHUNK_SIZE pieces"""
+    buffer = io.StringIO()
+    if fmt == "csv":
+        writer = csv.writer(buffer)
+        buffer.write("\ufeff")
+        writer.writerow(columns)
+    for row in rows:
+        values = [_value(value) for value in row]
+        if fmt == "csv":
+            writer.writerow([_csv_value(value) for value in values])
+        else:
+            buffer.write(json.dumps(dict(zip(columns, values)), ensure_ascii=False))
+            buffer.write("\n")
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def stream_rows(db: Session, statement) -> Iterator[tuple]:
+    """Rows of a statement from a server-side cursor, BATCH_SIZE at a time"""
+    result = db.execute(statement.execution_options(yield_per=BATCH_SIZE))
+    for partition in result.partitions():
+        yield from partition
+
+
+def iter_export(kind: str, fmt: str, club_id: Optional[int], start: date, end: date) -> Iterator[bytes]:
+    """
+    Encoded export chunks. Opens its own session: the response body is
+    produced after the endpoint has returned.
+    """
+    columns, statement = export_query(kind, club_id, start, end)
+    db = SessionLocal()
+    try:
+        yield from encode_rows(columns, stream_rows(db, statement), fmt)
+    finally:
+        db.close()
+
+
+def export_filename(kind: str, fmt: str, start: date, end: date) -> str:
+    if kind == "bookings":
+        return f"bookings_{start.isoformat()}_{end.isoformat()}.{fmt}"
+    return f"balances_{end.isoformat()}.{fmt}"
+
+
+def job_key(job_id: str) -> str:
+    return f"admin:export:{job_id}"
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    raw = cache.get(job_key(job_id))
+    return json.loads(raw) if raw else None
+
+
+def update_job(job_id: str, **fields) -> dict:
+    """Merge fields into a background export job's state, renewing its EXPORT_TTL"""
+    job = get_job(job_id) or {}
+    job.update(fields)
+    cache.set(job_key(job_id), json.dumps(job), settings.EXPORT_TTL)
+    return job
+
+
+def export_path(job_id: str, fmt: str) -> str:
+    return os.path.join(settings.EXPORT_DIR, f"{job_id}.{fmt}.gz")
+
+
+def write_export_file(path: str, kind: str, fmt: str, club_id: Optional[int], start: date, end: date) -> int:
+    """Write a gzipped export to path (atomically) and return its size in bytes"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    partial = f"{path}.part"
+    with gzip.open(partial, "wb") as file:
+        for chunk in iter_export(kind, fmt, club_id, start, end):
+            file.write(chunk)
+    os.replace(partial, path)
+    return os.path.getsize(path)
@@ -13,6 +13,7 @@ from sqlalchemy.orm import Session
 
 from core.config import settings
 from models import User, Booking, BookingStatus
+from services.booking_state import BookingTransition, SYSTEM, TRAINER
 
 
 class NotificationService:
@@ -526,6 +527,36 @@ async def notify_booking_rescheduled(
         )
 
 
+async def notify_transition(change: BookingTransition):
+    """Send notifications for a committed booking_state transition"""
+    from db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        booking = db.query(Booking).filter_by(id=change.booking_id).first()
+        trainer = db.query(User).filter_by(id=change.trainer_id).first()
+        client = db.query(User).filter_by(id=change.client_id).first()
+        if not booking or not trainer or not client:
+            return
+
+        if change.status == BookingStatus.CONFIRMED:
+            await notification_service.send_booking_confirmed(booking, trainer, client, db)
+        elif change.status == BookingStatus.CANCELLED:
+            if change.actor == SYSTEM:
+                await notification_service.send_auto_cancel_notification(booking, trainer, client)
+                await notification_service.send_auto_cancel_to_trainer(booking, trainer, client)
+            else:
+                await notification_service.send_booking_cancelled(
+                    booking, trainer, client, change.reason, change.actor or TRAINER
+                )
+        elif change.status == BookingStatus.PENDING and change.rescheduled:
+            await notification_service.send_booking_rescheduled(
+                booking, change.previous_datetime, trainer, client, change.actor or TRAINER
+            )
+    finally:
+        db.close()
+
+
 # New simplified notification functions according to TZ 10.6
 async def notify_booking_created_by_trainer(booking: Booking, db: Session):
     """
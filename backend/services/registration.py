@@ -2,9 +2,11 @@
 Registration service for trainers and clients
 """
 
-from sqlalchemy.orm import Session
-from db.session import SessionLocal
+from sqlalchemy import select
+from db.base import async_session
 from models import User, UserRole, TrainerClient, Club
+from repositories import trainer_clients as trainer_client_repo, users as user_repo
+from services.snapshots import UserSnapshot, aget_user_snapshot
 from typing import Optional, Dict, Any
 import logging
 
@@ -23,61 +25,59 @@ async def register_trainer(
     telegram_last_name: Optional[str] = None
 ) -> User:
     """Register a new trainer"""
-    db = SessionLocal()
-    try:
-        # Check if user already exists
-        existing_user = db.query(User).filter_by(telegram_id=telegram_id).first()
-        if existing_user:
-            # Update existing user to trainer
-            existing_user.role = UserRole.TRAINER
-            existing_user.name = name
-            existing_user.phone = phone
-            existing_user.price = price
-            existing_user.club_id = club_id
-            existing_user.specialization = specialization or "fitness"
-            db.commit()
-            db.refresh(existing_user)
-            logger.info(f"Updated existing user {telegram_id} to trainer")
-            return existing_user
-
-        # Create new trainer
-        trainer = User(
-            telegram_id=telegram_id,
-            telegram_username=telegram_username,
-            telegram_first_name=telegram_first_name,
-            telegram_last_name=telegram_last_name,
-            name=name,
-            phone=phone,
-            role=UserRole.TRAINER,
-            price=price,
-            club_id=club_id,
-            specialization=specialization or "fitness",
-            description="",
-            settings={
-                "work_hours": {
-                    "monday": {"start": "09:00", "end": "18:00", "is_working": True},
-                    "tuesday": {"start": "09:00", "end": "18:00", "is_working": True},
-                    "wednesday": {"start": "09:00", "end": "18:00", "is_working": True},
-                    "thursday": {"start": "09:00", "end": "18:00", "is_working": True},
-                    "friday": {"start": "09:00", "end": "18:00", "is_working": True},
-                    "saturday": {"start": "09:00", "end": "13:00", "is_working": True},
-                    "sunday": {"start": "09:00", "end": "18:00", "is_working": False}
+    async with async_session() as db:
+        try:
+            # Check if user already exists
+            existing_user = await user_repo.get_user(db, telegram_id)
+            if existing_user:
+                # Update existing user to trainer
+                existing_user.role = UserRole.TRAINER
+                existing_user.name = name
+                existing_user.phone = phone
+                existing_user.price = price
+                existing_user.club_id = club_id
+                existing_user.specialization = specialization or "fitness"
+                await db.commit()
+                await db.refresh(existing_user)
+                logger.info(f"Updated existing user {telegram_id} to trainer")
+                return existing_user
+
+            # Create new trainer
+            trainer = User(
+                telegram_id=telegram_id,
+                telegram_username=telegram_username,
+                telegram_first_name=telegram_first_name,
+                telegram_last_name=telegram_last_name,
+                name=name,
+                phone=phone,
+                role=UserRole.TRAINER,
+                price=price,
+                club_id=club_id,
+                specialization=specialization or "fitness",
+                description="",
+                settings={
+                    "work_hours": {
+                        "monday": {"start": "09:00", "end": "18:00", "is_working": True},
+                        "tuesday": {"start": "09:00", "end": "18:00", "is_working": True},
+                        "wednesday": {"start": "09:00", "end": "18:00", "is_working": True},
+                        "thursday": {"start": "09:00", "end": "18:00", "is_working": True},
+                        "friday": {"start": "09:00", "end": "18:00", "is_working": True},
+                        "saturday": {"start": "09:00", "end": "13:00", "is_working": True},
+                        "sunday": {"start": "09:00", "end": "18:00", "is_working": False}
+                    }
                 }
-            }
-        )
-        db.add(trainer)
-        db.commit()
-        db.refresh(trainer)
+            )
+            db.add(trainer)
+            await db.commit()
+            await db.refresh(trainer)
 
-        logger.info(f"Registered new trainer: {trainer.name} ({telegram_id})")
-        return trainer
+            logger.info(f"Registered new trainer: {trainer.name} ({telegram_id})")
+            return trainer
 
-    except Exception as e:
-        logger.error(f"Error registering trainer: {e}")
-        db.rollback()
-        raise
-    finally:
-        db.close()
+        except Exception as e:
+            logger.error(f"Error registering trainer: {e}")
+            await db.rollback()
+            raise
 
 
 async def register_client(
@@ -90,194 +90,146 @@ async def register_client(
     telegram_last_name: Optional[str] = None
 ) -> User:
     """Register a new client"""
-    db = SessionLocal()
-    try:
-        # Check if user already exists
-        existing_user = db.query(User).filter_by(telegram_id=telegram_id).first()
-        if existing_user:
-            # Update existing user
-            existing_user.name = name
-            existing_user.phone = phone
-            db.commit()
-            db.refresh(existing_user)
-            logger.info(f"Updated existing client {telegram_id}")
-            client = existing_user
-        else:
-            # Create new client
-            client = User(
-                telegram_id=telegram_id,
-                telegram_username=telegram_username,
-                telegram_first_name=telegram_first_name,
-                telegram_last_name=telegram_last_name,
-                name=name,
-                role=UserRole.CLIENT,
-                phone=phone,
-                settings={"notifications": True}
-            )
-            db.add(client)
-            db.commit()
-            db.refresh(client)
-            logger.info(f"Registered new client: {client.name} ({telegram_id})")
-
-        # If trainer_id is provided, create relationship
-        if trainer_id:
-            trainer = db.query(User).filter_by(
-                telegram_id=trainer_id,
-                role=UserRole.TRAINER
-            ).first()
-
-            if trainer:
-                # Check if relationship already exists
-                existing_rel = db.query(TrainerClient).filter_by(
-                    trainer_id=trainer.id,
-                    client_id=client.id
-                ).first()
-
-                if not existing_rel:
-                    relationship = TrainerClient(
+    async with async_session() as db:
+        try:
+            # Check if user already exists
+            existing_user = await user_repo.get_user(db, telegram_id)
+            if existing_user:
+                # Update existing user
+                existing_user.name = name
+                existing_user.phone = phone
+                await db.commit()
+                await db.refresh(existing_user)
+                logger.info(f"Updated existing client {telegram_id}")
+                client = existing_user
+            else:
+                # Create new client
+                client = User(
+                    telegram_id=telegram_id,
+                    telegram_username=telegram_username,
+                    telegram_first_name=telegram_first_name,
+                    telegram_last_name=telegram_last_name,
+                    name=name,
+                    role=UserRole.CLIENT,
+                    phone=phone,
+                    settings={"notifications": True}
+                )
+                db.add(client)
+                await db.commit()
+                await db.refresh(client)
+                logger.info(f"Registered new client: {client.name} ({telegram_id})")
+
+            # If trainer_id is provided, create relationship
+            if trainer_id:
+                trainer = await user_repo.get_user(db, trainer_id, UserRole.TRAINER)
+
+                if trainer:
+                    # Check if relationship already exists
+                    existing_rel = (await db.execute(select(TrainerClient).filter_by(
                         trainer_id=trainer.id,
-                        client_id=client.id,
-                        source="link"
-                    )
-                    db.add(relationship)
-                    db.commit()
-                    logger.info(f"Created trainer-client relationship: {trainer.id} -> {client.id}")
-
-        return client
-
-    except Exception as e:
-        logger.error(f"Error registering client: {e}")
-        db.rollback()
-        raise
-    finally:
-        db.close()
-
-
-def get_user_by_telegram_id(telegram_id: str) -> Optional[User]:
-    """Get user by telegram ID"""
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter_by(telegram_id=telegram_id).first()
-        return user
-    finally:
-        db.close()
-
-
-def get_trainer_clients(trainer_telegram_id: str) -> list[User]:
-    """Get all clients of a trainer"""
-    db = SessionLocal()
-    try:
-        trainer = db.query(User).filter_by(
-            telegram_id=trainer_telegram_id,
-            role=UserRole.TRAINER
-        ).first()
+                        client_id=client.id
+                    ))).scalars().first()
 
-        if not trainer:
-            return []
+                    if not existing_rel:
+                        relationship = TrainerClient(
+                            trainer_id=trainer.id,
+                            client_id=client.id,
+                            source="link"
+                        )
+                        db.add(relationship)
+                        await db.commit()
+                        logger.info(f"Created trainer-client relationship: {trainer.id} -> {client.id}")
 
-        # Get all trainer-client relationships
-        relationships = db.query(TrainerClient).filter_by(
-            trainer_id=trainer.id,
-            is_active=True
-        ).all()
+            return client
 
-        # Get client users
-        client_ids = [rel.client_id for rel in relationships]
-        clients = db.query(User).filter(User.id.in_(client_ids)).all() if client_ids else []
+        except Exception as e:
+            logger.error(f"Error registering client: {e}")
+            await db.rollback()
+            raise
 
-        return clients
 
-    finally:
-        db.close()
+async def get_user_by_telegram_id(telegram_id: str) -> Optional[UserSnapshot]:
+    """Get user by telegram ID (cached snapshot, for role and name checks)"""
+    async with async_session() as db:
+        return await aget_user_snapshot(db, telegram_id)
 
 
-def get_client_trainers(client_telegram_id: str) -> list[User]:
-    """Get all trainers of a client"""
-    db = SessionLocal()
-    try:
-        client = db.query(User).filter_by(
-            telegram_id=client_telegram_id,
-            role=UserRole.CLIENT
-        ).first()
+async def get_trainer_clients(trainer_telegram_id: str) -> list[User]:
+    """Get all clients of a trainer"""
+    async with async_session() as db:
+        trainer = await user_repo.get_user(db, trainer_telegram_id, UserRole.TRAINER)
 
-        if not client:
+        if not trainer:
             return []
 
-        # Get all trainer-client relationships
-        relationships = db.query(TrainerClient).filter_by(
-            client_id=client.id,
-            is_active=True
-        ).all()
+        # Client users of active trainer-client relationships
+        result = await db.execute(
+            select(User)
+            .join(TrainerClient, TrainerClient.client_id == User.id)
+            .where(TrainerClient.trainer_id == trainer.id, TrainerClient.is_active == True)
+        )
+        return result.scalars().all()
 
-        # Get trainer users
-        trainer_ids = [rel.trainer_id for rel in relationships]
-        trainers = db.query(User).filter(User.id.in_(trainer_ids)).all() if trainer_ids else []
 
-        return trainers
+async def get_client_trainers(client_telegram_id: str) -> list[User]:
+    """Get all trainers of a client"""
+    async with async_session() as db:
+        client = await user_repo.get_user(db, client_telegram_id, UserRole.CLIENT)
+
+        if not client:
+            return []
 
-    finally:
-        db.close()
+        return await trainer_client_repo.get_client_trainers(db, client.id)
 
 
-def get_clubs() -> list[Club]:
+async def get_clubs() -> list[Club]:
     """Get all active clubs"""
-    db = SessionLocal()
-    try:
-        clubs = db.query(Club).filter_by(is_active=True).all()
-        return clubs
-    finally:
-        db.close()
+    async with async_session() as db:
+        result = await db.execute(select(Club).filter_by(is_active=True))
+        return result.scalars().all()
 
 
 async def link_client_to_trainer(client_telegram_id: str, trainer_telegram_id: str) -> bool:
     """Link existing client to trainer"""
-    db = SessionLocal()
-    try:
-        # Get client
-        client = db.query(User).filter_by(
-            telegram_id=client_telegram_id,
-            role=UserRole.CLIENT
-        ).first()
-
-        if not client:
-            logger.error(f"Client {client_telegram_id} not found")
-            return False
-
-        # Get trainer
-        trainer = db.query(User).filter_by(
-            telegram_id=trainer_telegram_id,
-            role=UserRole.TRAINER
-        ).first()
-
-        if not trainer:
-            logger.error(f"Trainer {trainer_telegram_id} not found")
-            return False
-
-        # Check if relationship already exists
-        existing_rel = db.query(TrainerClient).filter_by(
-            trainer_id=trainer.id,
-            client_id=client.id
-        ).first()
+    async with async_session() as db:
+        try:
+            # Get client
+            client = await user_repo.get_user(db, client_telegram_id, UserRole.CLIENT)
+
+            if not client:
+                logger.error(f"Client {client_telegram_id} not found")
+                return False
+
+            # Get trainer
+            trainer = await user_repo.get_user(db, trainer_telegram_id, UserRole.TRAINER)
+
+            if not trainer:
+                logger.error(f"Trainer {trainer_telegram_id} not found")
+                return False
+
+            # Check if relationship already exists
+            existing_rel = (await db.execute(select(TrainerClient).filter_by(
+                trainer_id=trainer.id,
+                client_id=client.id
+            ))).scalars().first()
+
+            if existing_rel:
+                logger.info(f"Relationship already exists between trainer {trainer.id} and client {client.id}")
+                return True
+
+            # Create new relationship
+            relationship = TrainerClient(
+                trainer_id=trainer.id,
+                client_id=client.id,
+                source="link"
+            )
+            db.add(relationship)
+            await db.commit()
 
-        if existing_rel:
-            logger.info(f"Relationship already exists between trainer {trainer.id} and client {client.id}")
+            logger.info(f"Created trainer-client relationship: {trainer.id} -> {client.id}")
             return True
 
-        # Create new relationship
-        relationship = TrainerClient(
-            trainer_id=trainer.id,
-            client_id=client.id,
-            source="link"
-        )
-        db.add(relationship)
-        db.commit()
-
-        logger.info(f"Created trainer-client relationship: {trainer.id} -> {client.id}")
-        return True
-
-    except Exception as e:
-        logger.error(f"Error linking client to trainer: {e}")
-        db.rollback()
-        return False
-    finally:
-        db.close()
\ No newline at end of file
+        except Exception as e:
+            logger.error(f"Error linking client to trainer: {e}")
+            await db.rollback()
+            return False
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""
+Text search over users and clubs
+
+On PostgreSQL every searchable column has a pg_trgm GIN index on its
+normalized form (migrations/create_search_indexes.sql):
+
+    text columns   translate(lower(col), 'ё', 'е')
+    digit columns  regexp_replace(col, '[^0-9]', '', 'g')
+
+search() builds the filter and a rank from the same expressions, so
+`LIKE '%term%'` is answered from the index instead of a sequential scan, and
+with fuzzy=True the word similarity operator (`term <% col`) also matches
+misspelt words. Results are ranked by similarity.
+
+SQLite (tests, local runs) has no pg_trgm or regexp_replace: text columns
+are only lowercased, phones lose the usual punctuation, matches are
+substring-only and the rank is exact > prefix > substring.
+"""
+
+import re
+from typing import Optional, Sequence, Tuple
+
+from sqlalchemy import case, false, func, literal, literal_column, or_
+from sqlalchemy.orm import Session
+
+from models import Club, User
+
+# Trigram indexes cannot serve shorter digit patterns
+MIN_DIGITS = 3
+
+# Word similarity needed for a fuzzy match; pg_trgm's default 0.6 rejects
+# a one-letter typo in a six-letter surname ("ивонов" vs "иванов" is 0.4)
+WORD_SIMILARITY_THRESHOLD = 0.35
+
+_SPACES = re.compile(r"\s+")
+_NOT_DIGITS = re.compile(r"[^0-9]")
+
+
+def normalize_text(value: str) -> str:
+    """Search form of a text value; matches normalized_text() in SQL"""
+    return _SPACES.sub(" ", value.strip().lower().replace("ё", "е"))
+
+
+def normalize_digits(value: str) -> str:
+    """Digits-only form of a phone or id; matches normalized_digits() in SQL"""
+    return _NOT_DIGITS.sub("", value)
+
+
+# Constants are inlined rather than bound: an index expression only matches
+# a query expression with the same literals, and prepared statements
+# (asyncpg) would otherwise compare against placeholders
+def normalized_text(column, dialect_name: str):
+    if dialect_name == "postgresql":
+        return func.translate(func.lower(column), literal_column("'ё'"), literal_column("'е'"))
+    return func.lower(column)
+
+
+def normalized_digits(column, dialect_name: str):
+    if dialect_name == "postgresql":
+        return func.regexp_replace(
+            column, literal_column("'[^0-9]'"), literal_column("''"), literal_column("'g'")
+        )
+    # No regexp_replace in SQLite; strip the usual phone punctuation
+    for char in "+-() ":
+        column = func.replace(column, char, "")
+    return column
+
+
+def _like(expression, term: str, pattern: str):
+    escaped = term.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+    return expression.like(pattern.format(escaped), escape="!")
+
+
+def set_fuzzy_threshold(db: Session):
+    """Apply WORD_SIMILARITY_THRESHOLD for the rest of the transaction (PostgreSQL only)"""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(
+            func.set_config("pg_trgm.word_similarity_threshold", str(WORD_SIMILARITY_THRESHOLD), True).select()
+        )
+
+
+def search(
+    dialect_name: str,
+    query: str,
+    text_columns: Sequence = (),
+    digit_columns: Sequence = (),
+    fuzzy: bool = False
+) -> Tuple[Optional[object], Optional[object]]:
+    """
+    Filter and rank for a search query over the given columns
+
+    Returns:
+        (condition, rank); (None, None) for a blank query. The rank is a
+        number in 0..1, higher is better.
+    """
+    term = normalize_text(query)
+    if not term:
+        return None, None
+    digits = normalize_digits(term)
+    is_postgresql = dialect_name == "postgresql"
+
+    conditions = []
+    ranks = []
+    exact = []
+    prefix = []
+    for column in text_columns:
+        expression = normalized_text(column, dialect_name)
+        conditions.append(_like(expression, term, "%{}%"))
+        if is_postgresql:
+            if fuzzy:
+                conditions.append(literal(term).op("<%")(expression))
+            ranks.append(func.word_similarity(term, expression))
+        else:
+            exact.append(expression == term)
+            prefix.append(_like(expression, term, "{}%"))
+
+    if len(digits) >= MIN_DIGITS:
+        for column in digit_columns:
+            expression = normalized_digits(column, dialect_name)
+            contains = _like(expression, digits, "%{}%")
+            conditions.append(contains)
+            exact.append(expression == digits)
+            if is_postgresql:
+                ranks.append(case((expression == digits, 1.0), (contains, 0.9), else_=0.0))
+
+    if not conditions:
+        return false(), literal(0.0)
+
+    if is_postgresql:
+        rank = func.greatest(*ranks) if len(ranks) > 1 else ranks[0]
+    else:
+        rank = case(
+            (or_(*exact) if exact else false(), 1.0),
+            (or_(*prefix) if prefix else false(), 0.8),
+            else_=0.5
+        )
+    return or_(*conditions), rank
+
+
+def search_users(dialect_name: str, query: str, fuzzy: bool = False):
+    """search() over user names, usernames, phones and Telegram ids"""
+    return search(
+        dialect_name, query,
+        text_columns=(User.name, User.telegram_username),
+        digit_columns=(User.phone, User.telegram_id),
+        fuzzy=fuzzy
+    )
+
+
+def search_clubs(dialect_name: str, query: str, fuzzy: bool = False):
+    """search() over club names, addresses, emails and phones"""
+    return search(
+        dialect_name, query,
+        text_columns=(Club.name, Club.address, Club.email),
+        digit_columns=(Club.phone,),
+        fuzzy=fuzzy
+    )
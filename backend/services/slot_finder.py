@@ -0,0 +1,285 @@
+"""
+Nearest free slot search for trainers
+
+Used when a requested time is taken (booking conflict) or when a client
+declines a rescheduled time: instead of trial and error the user gets the
+K closest start times that fit the trainer's work hours and session duration.
+
+All busy time in the search window is loaded with one indexed query and kept
+in an ordered, merged interval list, so every candidate check is a bisect.
+"""
+
+from bisect import bisect_right
+from datetime import datetime, date, time, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.orm import Session
+
+from models import User, Booking, BookingStatus, Schedule
+
+
+DAY_NAMES = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Default schedule from registration: Mon-Fri 09:00-18:00, Sat 09:00-13:00, Sun off
+DEFAULT_WORK_HOURS = {
+    day: {"start": "09:00", "end": "13:00" if day == "saturday" else "18:00", "is_working": day != "sunday"}
+    for day in DAY_NAMES
+}
+
+# Lunch break used by the mini app when "hasBreak" is enabled for a day
+LUNCH_BREAK = (time(12, 0), time(13, 0))
+
+# How many days around the requested time are searched
+SEARCH_DAYS = 7
+
+ACTIVE_STATUSES = [BookingStatus.PENDING, BookingStatus.CONFIRMED]
+
+
+def _parse_time(value) -> time:
+    if isinstance(value, time):
+        return value
+    return datetime.strptime(str(value)[:5], "%H:%M").time()
+
+
+def get_trainer_timezone(trainer: User) -> ZoneInfo:
+    """Trainer's IANA timezone, falling back to Moscow"""
+    try:
+        return ZoneInfo(getattr(trainer, "timezone", None) or "Europe/Moscow")
+    except Exception:
+        return ZoneInfo("Europe/Moscow")
+
+
+def get_work_hours(db: Session, trainer: User) -> Dict[str, dict]:
+    """
+    Resolve trainer's weekly work hours in the same order as the mini app:
+    settings['work_hours'] -> Schedule table -> registration defaults.
+
+    Returns:
+        Dict day_name -> {"start": "HH:MM", "end": "HH:MM", "is_working": bool, "hasBreak": bool}
+    """
+    if trainer.settings and trainer.settings.get("work_hours"):
+        return {day.lower(): info for day, info in trainer.settings["work_hours"].items()}
+
+    schedule = db.query(Schedule).filter_by(trainer_id=trainer.id).all()
+    if schedule:
+        work_hours = {}
+        for s in schedule:
+            day = s.day_of_week.value if hasattr(s.day_of_week, "value") else str(s.day_of_week)
+            work_hours[day.lower()] = {
+                "start": s.start_time.strftime("%H:%M"),
+                "end": s.end_time.strftime("%H:%M"),
+                "is_working": bool(s.is_active),
+            }
+        return work_hours
+
+    return DEFAULT_WORK_HOURS
+
+
+class BusyIntervals:
+    """Ordered, merged list of busy [start, end) intervals in UTC"""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, intervals: List[Tuple[datetime, datetime]]):
+        merged: List[List[datetime]] = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = [i[0] for i in merged]
+        self.ends = [i[1] for i in merged]
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        """Check that [start, end) does not intersect any busy interval"""
+        idx = bisect_right(self.starts, start) - 1
+        # Interval starting at or before `start` must end before it
+        if idx >= 0 and self.ends[idx] > start:
+            return False
+        # Next interval must start at or after `end`
+        nxt = idx + 1
+        if nxt < len(self.starts) and self.starts[nxt] < end:
+            return False
+        return True
+
+    def __len__(self):
+        return len(self.starts)
+
+
+def day_candidates(
+    day: date,
+    work_hours: Dict[str, dict],
+    duration: int,
+    tz: ZoneInfo
+) -> List[datetime]:
+    """Start times for one local day on the same grid the mini app shows"""
+    info = work_hours.get(DAY_NAMES[day.weekday()])
+    if not info or not info.get("is_working", info.get("isWorkingDay", True)):
+        return []
+
+    try:
+        day_start = datetime.combine(day, _parse_time(info.get("start", "09:00")), tzinfo=tz)
+        day_end = datetime.combine(day, _parse_time(info.get("end", "18:00")), tzinfo=tz)
+    except ValueError:
+        return []
+
+    has_break = info.get("hasBreak", info.get("has_break", False))
+    break_start = datetime.combine(day, LUNCH_BREAK[0], tzinfo=tz)
+    break_end = datetime.combine(day, LUNCH_BREAK[1], tzinfo=tz)
+
+    step = timedelta(minutes=duration)
+    result = []
+    current = day_start
+    while current + step <= day_end:
+        if has_break and current < break_end and current + step > break_start:
+            # Jump over lunch break, keeping the grid anchored after it
+            current = break_end
+            continue
+        result.append(current)
+        current += step
+    return result
+
+
+def find_nearest_free_slots(
+    work_hours: Dict[str, dict],
+    busy: BusyIntervals,
+    around: datetime,
+    duration: int,
+    tz: ZoneInfo,
+    k: int = 3,
+    not_before: Optional[datetime] = None,
+    search_days: int = SEARCH_DAYS
+) -> List[datetime]:
+    """
+    Find K free start times nearest to `around`.
+
+    Days are scanned outwards from the requested day, and scanning stops as
+    soon as a further day cannot contain anything closer than what was found.
+
+    Returns:
+        List of timezone-aware datetimes (trainer's timezone) in chronological order
+    """
+    if around.tzinfo is None:
+        around = around.replace(tzinfo=timezone.utc)
+    local_around = around.astimezone(tz)
+    step = timedelta(minutes=duration)
+
+    found: List[Tuple[float, datetime]] = []
+    base_day = local_around.date()
+
+    for offset in range(search_days + 1):
+        if len(found) >= k:
+            worst = sorted(found)[k - 1][0]
+            # Closest possible start on a day `offset` away is at least (offset - 1) days
+            if (offset - 1) * 86400 > worst:
+                break
+
+        days = [base_day] if offset == 0 else [base_day - timedelta(days=offset), base_day + timedelta(days=offset)]
+        for day in days:
+            for start in day_candidates(day, work_hours, duration, tz):
+                if not_before and start < not_before:
+                    continue
+                if start == local_around:
+                    continue
+                if busy.is_free(start, start + step):
+                    found.append((abs((start - local_around).total_seconds()), start))
+
+    found.sort()
+    return sorted(start for _, start in found[:k])
+
+
+def load_busy_intervals(
+    db: Session,
+    trainer: User,
+    window_start: datetime,
+    window_end: datetime,
+    default_duration: int,
+    exclude_booking_id: Optional[int] = None
+) -> BusyIntervals:
+    """Load trainer's active bookings in the window with one indexed query"""
+    query = db.query(Booking.datetime, Booking.duration).filter(
+        Booking.trainer_id == trainer.id,
+        Booking.status.in_(ACTIVE_STATUSES),
+        Booking.datetime >= window_start,
+        Booking.datetime <= window_end
+    )
+    if exclude_booking_id:
+        query = query.filter(Booking.id != exclude_booking_id)
+
+    intervals = []
+    for start, booked_duration in query.all():
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        intervals.append((start, start + timedelta(minutes=booked_duration or default_duration)))
+
+    return BusyIntervals(intervals)
+
+
+def suggest_slots(
+    db: Session,
+    trainer: User,
+    around: datetime,
+    k: int = 3,
+    duration: Optional[int] = None,
+    exclude_booking_id: Optional[int] = None
+) -> List[datetime]:
+    """
+    Load trainer's busy time around `around` with one query and return
+    the K nearest free start times.
+
+    Args:
+        exclude_booking_id: Booking being moved, its own time does not count as busy
+    """
+    duration = duration or trainer.session_duration or 60
+    if around.tzinfo is None:
+        around = around.replace(tzinfo=timezone.utc)
+
+    busy = load_busy_intervals(
+        db, trainer,
+        around - timedelta(days=SEARCH_DAYS + 1),
+        around + timedelta(days=SEARCH_DAYS + 1),
+        duration,
+        exclude_booking_id
+    )
+
+    return find_nearest_free_slots(
+        work_hours=get_work_hours(db, trainer),
+        busy=busy,
+        around=around,
+        duration=duration,
+        tz=get_trainer_timezone(trainer),
+        k=k,
+        not_before=datetime.now(timezone.utc)
+    )
+
+
+def is_slot_free(
+    db: Session,
+    trainer: User,
+    start: datetime,
+    duration: Optional[int] = None,
+    exclude_booking_id: Optional[int] = None
+) -> bool:
+    """Check a single start time against trainer's active bookings"""
+    duration = duration or trainer.session_duration or 60
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    end = start + timedelta(minutes=duration)
+
+    # Longest session is 240 minutes, anything starting earlier cannot overlap
+    busy = load_busy_intervals(
+        db, trainer,
+        start - timedelta(minutes=240), end,
+        duration, exclude_booking_id
+    )
+    return busy.is_free(start, end)
+
+
+def serialize_slot(slot: datetime) -> dict:
+    """JSON representation used by API responses"""
+    return {
+        "datetime": slot.isoformat(),
+        "date": slot.strftime("%Y-%m-%d"),
+        "time": slot.strftime("%H:%M")
+    }
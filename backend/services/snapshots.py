@@ -0,0 +1,204 @@
+"""
+Cached snapshots of users, clubs and trainer public profiles
+
+Most requests and bot handlers start by resolving a telegram_id to a user,
+and trainer / club details are re-read for every profile view. Read-only
+paths take snapshots from core.entity_cache instead: immutable NamedTuples
+of the fields they need, shared by API, bot and Celery processes.
+
+Session hooks invalidate after commit: any flushed User, Club or
+TrainerClient change drops the affected user, club and trainer profile
+entries (without blocking the event loop on AsyncSession commits, see
+EntityCache.invalidate). Booking counters are updated with set-based statements that
+bypass the hooks; profiles carry them and are kept PROFILE_TTL seconds.
+
+Paths that modify users keep loading ORM instances (repositories.users).
+"""
+
+import logging
+from typing import NamedTuple, Optional
+
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core.entity_cache import EntityCache
+from models import User, UserRole, Club, TrainerClient
+
+logger = logging.getLogger(__name__)
+
+USER_TTL = 600
+CLUB_TTL = 600
+PROFILE_TTL = 60
+
+_PENDING_KEY = "snapshots_pending"
+_INVALIDATE_KEY = "snapshots_invalidate"
+
+
+class UserSnapshot(NamedTuple):
+    id: int
+    telegram_id: str
+    telegram_username: Optional[str]
+    name: str
+    role: UserRole
+    phone: Optional[str]
+    email: Optional[str]
+    club_id: Optional[int]
+    specialization: Optional[str]
+    price: Optional[int]
+    session_duration: Optional[int]
+    description: Optional[str]
+    rating: Optional[int]
+    timezone: Optional[str]
+    is_active: Optional[bool]
+
+
+class ClubSnapshot(NamedTuple):
+    id: int
+    name: str
+    address: Optional[str]
+    phone: Optional[str]
+    email: Optional[str]
+    city: Optional[str]
+    metro: Optional[str]
+    logo_url: Optional[str]
+    is_active: Optional[bool]
+
+
+class TrainerProfile(NamedTuple):
+    """Public trainer card (api/v1/trainers.TrainerPublicInfo)"""
+    id: int
+    telegram_id: str
+    telegram_username: Optional[str]
+    name: str
+    specialization: Optional[str]
+    price: Optional[int]
+    description: Optional[str]
+    rating: Optional[float]
+    club_id: Optional[int]
+    club_name: Optional[str]
+    total_clients: int
+    total_sessions: int
+    is_active: Optional[bool]
+
+
+USER_COLUMNS = [getattr(User, field) for field in UserSnapshot._fields]
+CLUB_COLUMNS = [getattr(Club, field) for field in ClubSnapshot._fields]
+
+users: EntityCache[UserSnapshot] = EntityCache(
+    "user", UserSnapshot, USER_TTL,
+    decode=lambda fields: UserSnapshot(**{**fields, "role": UserRole(fields["role"])})
+)
+clubs: EntityCache[ClubSnapshot] = EntityCache("club", ClubSnapshot, CLUB_TTL)
+trainer_profiles: EntityCache[TrainerProfile] = EntityCache("trainer_profile", TrainerProfile, PROFILE_TTL)
+
+
+def _user_key(telegram_id: str) -> str:
+    return f"tg:{telegram_id}"
+
+
+def _with_role(user: Optional[UserSnapshot], role: Optional[UserRole]) -> Optional[UserSnapshot]:
+    if user is None or (role is not None and user.role != role):
+        return None
+    return user
+
+
+def get_user_snapshot(db: Session, telegram_id: str, role: Optional[UserRole] = None) -> Optional[UserSnapshot]:
+    """User by telegram_id, optionally of a given role"""
+    def load():
+        row = db.execute(select(*USER_COLUMNS).where(User.telegram_id == telegram_id).limit(1)).first()
+        return UserSnapshot(*row) if row else None
+
+    return _with_role(users.get_or_load(_user_key(telegram_id), load), role)
+
+
+async def aget_user_snapshot(
+    db: AsyncSession, telegram_id: str, role: Optional[UserRole] = None
+) -> Optional[UserSnapshot]:
+    async def load():
+        row = (await db.execute(select(*USER_COLUMNS).where(User.telegram_id == telegram_id).limit(1))).first()
+        return UserSnapshot(*row) if row else None
+
+    return _with_role(await users.aget_or_load(_user_key(telegram_id), load), role)
+
+
+def get_club_snapshot(db: Session, club_id: Optional[int]) -> Optional[ClubSnapshot]:
+    if not club_id:
+        return None
+
+    def load():
+        row = db.execute(select(*CLUB_COLUMNS).where(Club.id == club_id)).first()
+        return ClubSnapshot(*row) if row else None
+
+    return clubs.get_or_load(str(club_id), load)
+
+
+# Invalidation
+
+def _pending(session: Session) -> dict:
+    return session.info.setdefault(_PENDING_KEY, {"users": set(), "clubs": set(), "trainer_ids": set()})
+
+
+def _after_flush(session: Session, flush_context):
+    pending = None
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            pending = pending or _pending(session)
+            # The previous telegram_id too, if it just changed
+            history = inspect(obj).attrs.telegram_id.history
+            pending["users"].update(set(history.deleted or ()) | {obj.telegram_id})
+        elif isinstance(obj, Club):
+            pending = pending or _pending(session)
+            pending["clubs"].add(obj.id)
+        elif isinstance(obj, TrainerClient):
+            pending = pending or _pending(session)
+            pending["trainer_ids"].add(obj.trainer_id)
+
+
+def _before_commit(session: Session):
+    # Commit flushes after this hook, so flush here to collect this transaction's changes
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    profiles = set(pending["users"])
+    if pending["clubs"] or pending["trainer_ids"]:
+        # Trainer cards show the club name and client counts
+        profiles.update(session.execute(
+            select(User.telegram_id).where(
+                User.role == UserRole.TRAINER,
+                or_(User.club_id.in_(pending["clubs"]), User.id.in_(pending["trainer_ids"]))
+            )
+        ).scalars().all())
+
+    invalidate = session.info.setdefault(_INVALIDATE_KEY, {"users": set(), "clubs": set(), "profiles": set()})
+    invalidate["users"].update(_user_key(telegram_id) for telegram_id in pending["users"])
+    invalidate["clubs"].update(str(club_id) for club_id in pending["clubs"])
+    invalidate["profiles"].update(profiles)
+
+
+def _after_commit(session: Session):
+    invalidate = session.info.pop(_INVALIDATE_KEY, None)
+    if not invalidate:
+        return
+    users.invalidate(*invalidate["users"])
+    clubs.invalidate(*invalidate["clubs"])
+    trainer_profiles.invalidate(*invalidate["profiles"])
+
+
+def _clear_pending(session: Session, *args):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_INVALIDATE_KEY, None)
+
+
+def install_snapshot_hooks():
+    """Register session hooks invalidating cached snapshots. Idempotent."""
+    if event.contains(Session, "after_flush", _after_flush):
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "before_commit", _before_commit)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_soft_rollback", _clear_pending)
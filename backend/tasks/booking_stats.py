@@ -0,0 +1,31 @@
+"""
+Celery task maintaining the daily booking rollup
+"""
+
+from datetime import datetime
+from sqlalchemy.orm import Session
+from celery_app import celery_app
+from db.session import SessionLocal
+from services.booking_stats import refresh_booking_stats as refresh
+
+
+@celery_app.task(name="tasks.booking_stats.refresh_booking_stats")
+def refresh_booking_stats():
+    """
+    Recount booking_daily_stats for days touched by bookings changed since the
+    last run. The first run (no watermark yet) backfills all bookings.
+    """
+    print(f"[{datetime.now()}] Running refresh_booking_stats task...")
+
+    db: Session = SessionLocal()
+    try:
+        refreshed = refresh(db)
+        db.commit()
+        print(f"[{datetime.now()}] Finished refresh_booking_stats: {refreshed['bookings']} bookings, {refreshed['days']} trainer-days recounted")
+        return refreshed
+    except Exception as e:
+        db.rollback()
+        print(f"Error in refresh_booking_stats: {e}")
+        raise
+    finally:
+        db.close()
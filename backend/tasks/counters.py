@@ -0,0 +1,34 @@
+"""
+Celery task repairing denormalized booking counters
+"""
+
+from datetime import datetime
+from sqlalchemy.orm import Session
+from celery_app import celery_app
+from db.session import SessionLocal
+from services.counters import reconcile_counters as reconcile
+
+
+@celery_app.task(name="tasks.counters.reconcile_counters")
+def reconcile_counters():
+    """
+    Nightly task recomputing trainer_clients and clubs counters from bookings.
+
+    Counters are maintained incrementally by session hooks; this repairs drift
+    from raw SQL writes and last_booking_at after deletes, one set-based
+    UPDATE per table.
+    """
+    print(f"[{datetime.now()}] Running reconcile_counters task...")
+
+    db: Session = SessionLocal()
+    try:
+        repaired = reconcile(db)
+        db.commit()
+        print(f"[{datetime.now()}] Finished reconcile_counters: {repaired['trainer_clients']} trainer_clients, {repaired['clubs']} clubs repaired")
+        return repaired
+    except Exception as e:
+        db.rollback()
+        print(f"Error in reconcile_counters: {e}")
+        raise
+    finally:
+        db.close()
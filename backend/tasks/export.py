@@ -0,0 +1,46 @@
+"""
+Celery tasks for admin exports too large to stream
+"""
+
+import os
+import time
+from datetime import date, datetime
+from typing import Optional
+
+from celery_app import celery_app
+from core.config import settings
+from services.export import export_path, update_job, write_export_file
+
+
+@celery_app.task(name="tasks.export.export_to_file", time_limit=3600, soft_time_limit=3500)
+def export_to_file(job_id: str, kind: str, fmt: str, club_id: Optional[int], start: str, end: str):
+    """Write a gzipped export for a job created by POST /api/admin/export/{kind}/jobs"""
+    print(f"[{datetime.now()}] Running export job {job_id} ({kind}, {fmt}, {start}..{end})...")
+    update_job(job_id, status="running")
+    try:
+        size = write_export_file(
+            export_path(job_id, fmt), kind, fmt, club_id, date.fromisoformat(start), date.fromisoformat(end)
+        )
+    except Exception as e:
+        update_job(job_id, status="failed", error=str(e))
+        print(f"Error in export job {job_id}: {e}")
+        raise
+    update_job(job_id, status="done", size=size)
+    print(f"[{datetime.now()}] Finished export job {job_id}: {size} bytes")
+    return size
+
+
+@celery_app.task(name="tasks.export.cleanup_exports")
+def cleanup_exports():
+    """Delete export files older than EXPORT_TTL (their jobs have expired)"""
+    if not os.path.isdir(settings.EXPORT_DIR):
+        return 0
+    removed = 0
+    cutoff = time.time() - settings.EXPORT_TTL
+    for name in os.listdir(settings.EXPORT_DIR):
+        path = os.path.join(settings.EXPORT_DIR, name)
+        if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            removed += 1
+    print(f"[{datetime.now()}] Removed {removed} expired export files")
+    return removed
@@ -10,6 +10,7 @@ from sqlalchemy import text
 from celery_app import celery_app
 from db.session import SessionLocal
 from models import User, Booking, BookingStatus
+from services.booking_state import transition, SYSTEM
 from services.notifications import notification_service
 
 
@@ -116,18 +117,19 @@ def check_and_send_reminders():
                         hours_since_third = (datetime.now() - reminder_3_sent_at).total_seconds() / 3600
                         if hours_since_third >= auto_cancel_hours:
                             print(f"Auto-canceling booking {booking.id} (not confirmed)")
-                            booking.status = BookingStatus.CANCELLED
-                            booking.cancelled_at = datetime.now()
-                            booking.cancellation_reason = "Автоотмена: не подтверждено клиентом"
-
-                            # Send auto-cancel notification to client
-                            asyncio.run(_send_auto_cancel_notification(booking, trainer, client, db))
-
-                            # Send auto-cancel notification to trainer
-                            asyncio.run(_send_auto_cancel_to_trainer(booking, trainer, client, db))
-
+                            # Only if still PENDING: the client may have confirmed meanwhile
+                            change = transition(
+                                db, booking.id, BookingStatus.CANCELLED,
+                                actor=SYSTEM,
+                                reason="Автоотмена: не подтверждено клиентом",
+                                allowed=frozenset({BookingStatus.PENDING})
+                            )
+                            # Client and trainer are notified from the transition event
                             db.commit()
 
+                            if not change:
+                                print(f"Booking {booking.id} was confirmed or cancelled meanwhile, skipping auto-cancel")
+
         print(f"[{datetime.now()}] Finished check_and_send_reminders task")
 
     except Exception as e:
@@ -241,36 +243,6 @@ async def _send_reminder_async(
         print(f"Error sending reminder: {e}")
 
 
-async def _send_auto_cancel_notification(
-    booking: Booking,
-    trainer: User,
-    client: User,
-    db: Session
-):
-    """Wrapper to send auto-cancel notification to client"""
-    try:
-        await notification_service.send_auto_cancel_notification(
-            booking, trainer, client
-        )
-    except Exception as e:
-        print(f"Error sending auto-cancel notification: {e}")
-
-
-async def _send_auto_cancel_to_trainer(
-    booking: Booking,
-    trainer: User,
-    client: User,
-    db: Session
-):
-    """Wrapper to send auto-cancel notification to trainer"""
-    try:
-        await notification_service.send_auto_cancel_to_trainer(
-            booking, trainer, client
-        )
-    except Exception as e:
-        print(f"Error sending auto-cancel notification to trainer: {e}")
-
-
 @celery_app.task(name="tasks.reminders.send_client_reminders")
 def send_client_reminders():
     """
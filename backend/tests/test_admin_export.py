@@ -0,0 +1,109 @@
+"""
+Tests for streaming bookings and balances exports
+"""
+
+import csv
+import io
+import json
+import pytest
+from datetime import date, datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db.base_sync import Base
+from models import User, UserRole, Booking, BookingStatus, Club, TrainerClient
+from services import export
+from services.export import BOOKING_COLUMNS, BALANCE_COLUMNS, bookings_statement, balances_statement, encode_rows, stream_rows
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def clubs(db):
+    ours, theirs = Club(name="Ours", address="Street 1"), Club(name="Theirs", address="Street 2")
+    db.add_all([ours, theirs])
+    db.flush()
+    trainer = User(telegram_id="100", name="Trainer", role=UserRole.TRAINER, club_id=ours.id)
+    other = User(telegram_id="101", name="Other", role=UserRole.TRAINER, club_id=theirs.id)
+    client = User(telegram_id="200", name="Клиент, \"VIP\"", role=UserRole.CLIENT, phone="+79161234567")
+    db.add_all([trainer, other, client])
+    db.flush()
+    for day in (1, 2, 3):
+        db.add(Booking(
+            trainer_id=trainer.id, client_id=client.id, club_id=ours.id,
+            datetime=datetime(2026, 3, day, 10, 0), duration=60, price=1500, status=BookingStatus.COMPLETED
+        ))
+    db.add(Booking(
+        trainer_id=other.id, client_id=client.id, club_id=theirs.id,
+        datetime=datetime(2026, 3, 2, 10, 0), duration=60, price=900, status=BookingStatus.PENDING
+    ))
+    db.add_all([
+        TrainerClient(trainer_id=trainer.id, client_id=client.id, balance=3000),
+        TrainerClient(trainer_id=other.id, client_id=client.id, balance=-900),
+    ])
+    db.commit()
+    return ours, theirs
+
+
+def export_bytes(columns, rows, fmt):
+    return b"".join(encode_rows(columns, rows, fmt)).decode("utf-8")
+
+
+class TestExport:
+    """Test export rows, scoping and encodings"""
+
+    def test_bookings_csv_scoped_to_club_and_range(self, db, clubs):
+        """Test that only the club's bookings in the inclusive range are exported"""
+        ours, _ = clubs
+        statement = bookings_statement(ours.id, date(2026, 3, 2), date(2026, 3, 3))
+        text = export_bytes(BOOKING_COLUMNS, stream_rows(db, statement), "csv")
+
+        assert text.startswith("\ufeff")
+        rows = list(csv.DictReader(io.StringIO(text[1:])))
+        assert [row["datetime"][:10] for row in rows] == ["2026-03-02", "2026-03-03"]
+        assert {row["club_id"] for row in rows} == {str(ours.id)}
+        assert rows[0]["client_name"] == "Клиент, \"VIP\""
+        assert rows[0]["status"] == BookingStatus.COMPLETED.value
+
+    def test_csv_neutralizes_formulas(self):
+        """Test that text cells starting like a formula are prefixed with a quote in CSV only"""
+        columns = ["name", "phone", "price", "notes"]
+        rows = [("=HYPERLINK(\"http://x\")", "+79161234567", -900, "@SUM(A1)"), ("\tTab", "\rCR", 0, "-1")]
+
+        text = export_bytes(columns, rows, "csv")
+        exported = list(csv.reader(io.StringIO(text[1:])))[1:]
+        assert exported == [
+            ["'=HYPERLINK(\"http://x\")", "'+79161234567", "-900", "'@SUM(A1)"],
+            ["'\tTab", "'\rCR", "0", "'-1"],
+        ]
+
+        ndjson = [json.loads(line) for line in export_bytes(columns, rows, "ndjson").splitlines()]
+        assert ndjson[0]["name"] == "=HYPERLINK(\"http://x\")"
+        assert ndjson[0]["price"] == -900
+
+    def test_ndjson_streamed_in_chunks(self, db, clubs, monkeypatch):
+        """Test that NDJSON is emitted chunk by chunk instead of in one piece"""
+        ours, _ = clubs
+        monkeypatch.setattr(export, "CHUNK_SIZE", 10)
+        statement = bookings_statement(ours.id, date(2026, 3, 1), date(2026, 3, 31))
+        chunks = list(encode_rows(BOOKING_COLUMNS, stream_rows(db, statement), "ndjson"))
+
+        assert len(chunks) == 3
+        assert [json.loads(chunk)["price"] for chunk in chunks] == [1500, 1500, 1500]
+
+    def test_balances_scoped_to_club_trainers(self, db, clubs):
+        """Test that club admins get balances with their trainers only"""
+        ours, _ = clubs
+        text = export_bytes(BALANCE_COLUMNS, stream_rows(db, balances_statement(ours.id)), "ndjson")
+        assert [json.loads(line)["balance"] for line in text.splitlines()] == [3000]
+
+        everything = list(stream_rows(db, balances_statement(None)))
+        assert sorted(row.balance for row in everything) == [-900, 3000]
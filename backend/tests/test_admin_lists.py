@@ -0,0 +1,149 @@
+"""
+Tests for the single-query admin list endpoints
+"""
+
+import asyncio
+import json
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from fastapi.encoders import jsonable_encoder
+
+from db.base import Base as AdminBase
+from db.base_sync import Base
+from models import User, UserRole, Booking, BookingStatus, Club, ClubAdmin, TrainerClient
+from services.counters import install_counter_hooks
+from api.admin.clients import list_clients
+from api.admin.trainers import TrainerListItem, list_trainers
+from api.admin.clubs import list_clubs
+
+SUPER_ADMIN = SimpleNamespace(role="super_admin", club_id=None)
+
+
+@pytest.fixture
+def engine():
+    install_counter_hooks()
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    AdminBase.metadata.create_all(engine, tables=[ClubAdmin.__table__])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def populate(db, clubs: int, trainers_per_club: int, clients_per_trainer: int):
+    """Clubs with one admin each, trainers and clients with one booking per pair"""
+    start = datetime(2026, 3, 10, 12, 0)
+    offset = db.query(Club).count()
+    for c in range(offset, offset + clubs):
+        club = Club(name=f"Club {c}", address="Street 1")
+        db.add(club)
+        db.flush()
+        db.add(ClubAdmin(club_id=club.id, email=f"admin{c}@example.com", password_hash="x", name="Admin"))
+        for t in range(trainers_per_club):
+            trainer = User(telegram_id=f"t{c}-{t}", name=f"Trainer {c}-{t}", role=UserRole.TRAINER, club_id=club.id)
+            db.add(trainer)
+            db.flush()
+            for n in range(clients_per_trainer):
+                client = User(telegram_id=f"c{c}-{t}-{n}", name=f"Client {c}-{t}-{n}", role=UserRole.CLIENT)
+                db.add(client)
+                db.flush()
+                db.add(TrainerClient(trainer_id=trainer.id, client_id=client.id))
+                db.flush()
+                db.add(Booking(
+                    trainer_id=trainer.id, client_id=client.id, club_id=club.id,
+                    datetime=start + timedelta(hours=n), duration=60, price=1000,
+                    status=BookingStatus.COMPLETED
+                ))
+    db.commit()
+
+
+def run(engine, endpoint, **kwargs):
+    """Call a list endpoint, returning items, X-Total-Count and the number of statements"""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        response = asyncio.run(endpoint(**kwargs))
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    items = [SimpleNamespace(**item) for item in json.loads(response.body)]
+    return items, int(response.headers["X-Total-Count"]), len(statements)
+
+
+def list_args(db, admin=SUPER_ADMIN, **kwargs):
+    args = {"admin": admin, "db": db, "search": None, "is_active": None, "skip": 0, "limit": 500}
+    args.update(kwargs)
+    return args
+
+
+class TestAdminLists:
+    """Test that list pages cost a constant number of queries"""
+
+    def test_query_count_independent_of_page_size(self, engine, db):
+        """Test that a bigger page runs the same number of statements"""
+        populate(db, clubs=1, trainers_per_club=1, clients_per_trainer=1)
+        _, _, small = run(engine, list_clients, **list_args(db, trainer_id=None))
+        populate(db, clubs=2, trainers_per_club=3, clients_per_trainer=4)
+
+        items, total, large = run(engine, list_clients, **list_args(db, trainer_id=None))
+
+        assert large == small == 1
+        assert total == len(items) == 25
+        _, _, trainers = run(engine, list_trainers, **list_args(db, club_id=None))
+        _, _, clubs = run(engine, list_clubs, **list_args(db, tariff=None))
+        assert trainers == clubs == 1
+
+    def test_counters_scoping_and_total(self, db, engine):
+        """Test counters per row, club admin scoping and the total beyond the page"""
+        populate(db, clubs=2, trainers_per_club=2, clients_per_trainer=3)
+        club = db.query(Club).filter(Club.name == "Club 1").one()
+        club_admin = SimpleNamespace(role="admin", club_id=club.id)
+
+        clients, total, _ = run(engine, list_clients, **list_args(db, club_admin, trainer_id=None, limit=2))
+        assert total == 6
+        assert len(clients) == 2
+        assert all(c.name.startswith("Client 1-") for c in clients)
+        assert all(c.total_trainers == 1 and c.total_bookings == 1 for c in clients)
+
+        trainers, total, _ = run(engine, list_trainers, **list_args(db, club_admin, club_id=None))
+        assert total == 2
+        assert {t.club_name for t in trainers} == {"Club 1"}
+        assert all(t.total_clients == 3 and t.total_bookings == 3 for t in trainers)
+
+        clubs, total, _ = run(engine, list_clubs, **list_args(db, tariff=None))
+        assert total == 2
+        assert all(c.total_trainers == 2 and c.total_admins == 1 for c in clubs)
+
+        _, total, _ = run(engine, list_clubs, **list_args(db, tariff=None, skip=10))
+        assert total == 2
+
+    def test_body_matches_response_model(self, db, engine):
+        """Test that projected rows get the response model's types, as the old ORM path did"""
+        populate(db, clubs=1, trainers_per_club=1, clients_per_trainer=1)
+        trainer = db.query(User).filter(User.role == UserRole.TRAINER).one()
+        row = {
+            "id": trainer.id, "telegram_id": trainer.telegram_id, "name": trainer.name,
+            "phone": trainer.phone, "club_id": trainer.club_id, "club_name": "Club 0",
+            "specialization": trainer.specialization, "price": trainer.price, "rating": trainer.rating,
+            "is_active": trainer.is_active, "total_clients": 1, "total_bookings": 1,
+            "created_at": trainer.created_at,
+        }
+        expected = json.loads(json.dumps(jsonable_encoder([TrainerListItem(**row)])))
+
+        response = asyncio.run(list_trainers(**list_args(db, club_id=None)))
+
+        assert json.loads(response.body) == expected
+        assert b'"rating":50.0' in response.body
@@ -0,0 +1,160 @@
+"""
+Tests for the cached admin principal in get_current_admin
+"""
+
+import asyncio
+import time
+import uuid
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+from sqlalchemy import event, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from models import ClubAdmin
+from core.jwt import ALGORITHM, SECRET_KEY, create_access_token
+from core.password import hash_password
+from api.admin.auth import ChangePasswordRequest, change_password, get_current_admin
+from api.admin.principals import invalidate_admin
+
+
+def credentials(admin: ClubAdmin, **claims) -> HTTPAuthorizationCredentials:
+    data = {"email": admin.email, "role": admin.role, "club_id": admin.club_id, **claims}
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token(data))
+
+
+class TestAdminPrincipalCache:
+    """Test that admins authenticate from cache until their row changes"""
+
+    @pytest.fixture
+    def setup(self):
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        selects = []
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+
+        async def create():
+            async with engine.begin() as conn:
+                await conn.run_sync(ClubAdmin.__table__.create)
+            async with async_sessionmaker(engine)() as db:
+                admin = ClubAdmin(
+                    email=f"{uuid.uuid4().hex}@example.com", name="Admin", role="admin", club_id=1,
+                    password_hash=hash_password("old-password")
+                )
+                db.add(admin)
+                await db.commit()
+                await db.refresh(admin)
+                return admin
+
+        admin = asyncio.run(create())
+        selects.clear()
+        yield engine, async_sessionmaker(engine), admin, selects
+        asyncio.run(invalidate_admin(admin.email))
+        asyncio.run(engine.dispose())
+
+    def test_repeated_requests_read_database_once(self, setup):
+        """Test that parallel requests with one token share a single lookup"""
+        engine, sessions, admin, selects = setup
+        token = credentials(admin)
+
+        async def main():
+            first = []
+            async with sessions() as db:
+                first.append(await get_current_admin(token, db))
+            async with sessions() as db:
+                return first + list(await asyncio.gather(*(get_current_admin(token, db) for _ in range(5))))
+
+        admins = asyncio.run(main())
+
+        assert len(selects) == 1
+        assert {(a.id, a.club_id, a.role) for a in admins} == {(admin.id, 1, "admin")}
+        assert admins[0].password_hash is None
+
+    def test_deactivation_and_role_change_take_effect(self, setup):
+        """Test that invalidation exposes deactivation and outdated role snapshots"""
+        engine, sessions, admin, selects = setup
+        token = credentials(admin)
+
+        async def change(**values):
+            async with sessions() as db:
+                await db.execute(update(ClubAdmin).where(ClubAdmin.id == admin.id).values(**values))
+                await db.commit()
+            await invalidate_admin(admin.email)
+
+        async def authenticate():
+            async with sessions() as db:
+                return await get_current_admin(token, db)
+
+        async def main():
+            await authenticate()
+            await change(role="owner")
+            with pytest.raises(HTTPException) as role_changed:
+                await authenticate()
+            await change(role="admin", is_active=False)
+            with pytest.raises(HTTPException) as deactivated:
+                await authenticate()
+            return role_changed.value.status_code, deactivated.value.status_code
+
+        assert asyncio.run(main()) == (401, 403)
+
+    def test_password_change_revokes_older_tokens(self, setup):
+        """Test that tokens issued before a password change stop working, the returned one works"""
+        engine, sessions, admin, selects = setup
+        # Issued a minute ago (create_access_token stamps the current time)
+        stolen = HTTPAuthorizationCredentials(scheme="Bearer", credentials=jwt.encode(
+            {"email": admin.email, "role": admin.role, "club_id": admin.club_id,
+             "iat": int(time.time()) - 60, "exp": int(time.time()) + 3600},
+            SECRET_KEY, algorithm=ALGORITHM
+        ))
+
+        async def authenticate(token):
+            async with sessions() as db:
+                return await get_current_admin(token, db)
+
+        async def main():
+            current = await authenticate(stolen)
+            # As db.base.async_session
+            async with sessions(expire_on_commit=False) as db:
+                response = await change_password(
+                    ChangePasswordRequest(old_password="old-password", new_password="new-password"), current, db
+                )
+            with pytest.raises(HTTPException) as revoked:
+                await authenticate(stolen)
+            fresh = HTTPAuthorizationCredentials(scheme="Bearer", credentials=response.access_token)
+            return revoked.value.status_code, (await authenticate(fresh)).id
+
+        assert asyncio.run(main()) == (401, admin.id)
+
+    def test_invalidation_during_load_is_not_overwritten(self, setup):
+        """Test that a principal read before a change is not cached after the change's invalidation"""
+        engine, sessions, admin, selects = setup
+        token = credentials(admin)
+
+        class ChangedWhileLoading:
+            """Session whose read is followed by another request deactivating the admin"""
+
+            def __init__(self, db):
+                self.db = db
+
+            async def execute(self, statement):
+                result = await self.db.execute(statement)
+                async with sessions() as other:
+                    await other.execute(update(ClubAdmin).where(ClubAdmin.id == admin.id).values(is_active=False))
+                    await other.commit()
+                await invalidate_admin(admin.email)
+                return result
+
+        async def main():
+            async with sessions() as db:
+                stale = await get_current_admin(token, ChangedWhileLoading(db))
+            with pytest.raises(HTTPException) as deactivated:
+                async with sessions() as db:
+                    await get_current_admin(token, db)
+            return stale.is_active, deactivated.value.status_code
+
+        assert asyncio.run(main()) == (True, 403)
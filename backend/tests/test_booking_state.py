@@ -0,0 +1,97 @@
+"""
+Tests for booking state machine transitions
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db.base_sync import Base
+from models import User, UserRole, TrainerClient, Booking, BookingStatus
+from services import booking_state
+from services.booking_state import transition, subscribe, CLIENT, SYSTEM
+from services.counters import install_counter_hooks
+
+
+@pytest.fixture
+def db():
+    install_counter_hooks()
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def booking(db):
+    trainer = User(telegram_id="100", name="Trainer", role=UserRole.TRAINER)
+    client = User(telegram_id="200", name="Client", role=UserRole.CLIENT)
+    db.add_all([trainer, client])
+    db.flush()
+    db.add(TrainerClient(trainer_id=trainer.id, client_id=client.id))
+    booking = Booking(
+        trainer_id=trainer.id,
+        client_id=client.id,
+        datetime=datetime.now(timezone.utc) + timedelta(days=2),
+        duration=60,
+        price=1000,
+        status=BookingStatus.PENDING
+    )
+    db.add(booking)
+    db.commit()
+    return booking
+
+
+class TestTransition:
+    """Test conditional single-statement transitions"""
+
+    def test_confirm_pending(self, db, booking):
+        """Test that a pending booking is confirmed and the event carries the previous status"""
+        change = transition(db, booking.id, BookingStatus.CONFIRMED, actor=CLIENT)
+        db.commit()
+
+        assert change.previous_status == BookingStatus.PENDING
+        assert change.status == BookingStatus.CONFIRMED
+        assert booking.status == BookingStatus.CONFIRMED
+        assert booking.confirmed_at is not None
+
+    def test_loser_of_race_gets_none(self, db, booking):
+        """Test that confirming after auto-cancel is rejected without changes"""
+        assert transition(
+            db, booking.id, BookingStatus.CANCELLED,
+            actor=SYSTEM, allowed=frozenset({BookingStatus.PENDING})
+        )
+        db.commit()
+
+        assert transition(db, booking.id, BookingStatus.CONFIRMED, actor=CLIENT) is None
+        assert booking.status == BookingStatus.CANCELLED
+
+    def test_criteria_are_part_of_the_update(self, db, booking):
+        """Test that ownership conditions reject other users"""
+        change = transition(
+            db, booking.id, BookingStatus.CONFIRMED,
+            Booking.client_id == booking.client_id + 1000
+        )
+        assert change is None
+
+    def test_subscribers_and_counters_run_in_transaction(self, db, booking):
+        """Test that subscribers see the event and counters follow the transition"""
+        seen = []
+
+        def handler(session, change):
+            seen.append(change.booking_id)
+
+        subscribe(handler)
+        try:
+            transition(db, booking.id, BookingStatus.CANCELLED, actor=CLIENT, reason="Не могу")
+            db.commit()
+        finally:
+            booking_state._subscribers.remove(handler)
+
+        relation = db.query(TrainerClient).one()
+        assert booking.id in seen
+        assert booking.cancellation_reason == "Не могу"
+        assert relation.cancelled_bookings == 1
@@ -0,0 +1,117 @@
+"""
+Tests for the incrementally maintained daily booking rollup
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from db.base_sync import Base
+from models import User, UserRole, Booking, BookingStatus, Club, BookingDailyStat
+from services.booking_stats import refresh_booking_stats
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+
+    # Deleted bookings null their rollup key through the FK
+    @event.listens_for(engine, "connect")
+    def enable_foreign_keys(connection, record):
+        connection.execute("PRAGMA foreign_keys=ON")
+
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def people(db):
+    club = Club(name="Club", address="Street 1")
+    db.add(club)
+    db.flush()
+    trainer = User(telegram_id="100", name="Trainer", role=UserRole.TRAINER, club_id=club.id)
+    first = User(telegram_id="200", name="First", role=UserRole.CLIENT)
+    second = User(telegram_id="201", name="Second", role=UserRole.CLIENT)
+    db.add_all([trainer, first, second])
+    db.commit()
+    return club, trainer, first, second
+
+
+DAY = datetime(2026, 3, 10, 12, 0)
+
+
+def book(db, trainer, client, club, at, status, price=1500):
+    booking = Booking(
+        trainer_id=trainer.id, client_id=client.id, club_id=club.id if club else None,
+        datetime=at, duration=60, price=price, status=status
+    )
+    db.add(booking)
+    return booking
+
+
+def rollup(db):
+    rows = db.execute(select(
+        BookingDailyStat.day, BookingDailyStat.status,
+        BookingDailyStat.bookings, BookingDailyStat.revenue, BookingDailyStat.clients
+    ).order_by(BookingDailyStat.day, BookingDailyStat.status)).all()
+    return [tuple(row) for row in rows]
+
+
+class TestBookingDailyStats:
+    """Test that the rollup follows creates, changes and deletes"""
+
+    def test_backfill_groups_by_day_and_status(self, db, people):
+        """Test that the first run aggregates counts, revenue and distinct clients"""
+        club, trainer, first, second = people
+        book(db, trainer, first, club, DAY, BookingStatus.COMPLETED)
+        book(db, trainer, second, club, DAY + timedelta(hours=2), BookingStatus.COMPLETED, price=2000)
+        book(db, trainer, first, club, DAY + timedelta(days=1), BookingStatus.CANCELLED)
+        db.commit()
+
+        refresh_booking_stats(db)
+        db.commit()
+
+        assert rollup(db) == [
+            (DAY.date(), "COMPLETED", 2, 3500, 2),
+            ((DAY + timedelta(days=1)).date(), "CANCELLED", 1, 1500, 1),
+        ]
+
+    def test_changed_and_deleted_bookings_recounted(self, db, people):
+        """Test that a moved booking leaves its old day and a deleted one disappears"""
+        club, trainer, first, second = people
+        moved = book(db, trainer, first, club, DAY, BookingStatus.PENDING)
+        deleted = book(db, trainer, second, club, DAY, BookingStatus.CONFIRMED)
+        db.commit()
+        refresh_booking_stats(db)
+        db.commit()
+
+        moved.datetime = DAY + timedelta(days=2)
+        moved.status = BookingStatus.CONFIRMED
+        db.delete(deleted)
+        db.commit()
+        refresh_booking_stats(db)
+        db.commit()
+
+        assert rollup(db) == [((DAY + timedelta(days=2)).date(), "CONFIRMED", 1, 1500, 1)]
+
+    def test_recount_updates_groups_in_place(self, db, people):
+        """Test that a recount upserts existing groups and counts club-less bookings once"""
+        club, trainer, first, second = people
+        changed = book(db, trainer, first, club, DAY, BookingStatus.COMPLETED)
+        book(db, trainer, second, None, DAY, BookingStatus.COMPLETED)
+        db.commit()
+        refresh_booking_stats(db)
+        db.commit()
+        row_id = db.execute(select(BookingDailyStat.id).where(BookingDailyStat.club_id == club.id)).scalar_one()
+
+        changed.price = 2500
+        db.commit()
+        refresh_booking_stats(db)
+        db.commit()
+
+        assert db.execute(select(BookingDailyStat.id).where(BookingDailyStat.club_id == club.id)).scalar_one() == row_id
+        assert sorted(rollup(db)) == [(DAY.date(), "COMPLETED", 1, 1500, 1), (DAY.date(), "COMPLETED", 1, 2500, 1)]
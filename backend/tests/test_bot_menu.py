@@ -0,0 +1,49 @@
+"""
+Tests for skipping up-to-date command menus on /start
+"""
+
+import asyncio
+import random
+
+from bot.main import set_user_commands
+from bot.utils.menu import forget_menu
+
+
+class RecordingBot:
+    """Bot stand-in that records menu calls"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def set_my_commands(self, commands, scope=None):
+        self.calls.append("set_my_commands")
+
+    async def set_chat_menu_button(self, chat_id=None, menu_button=None):
+        self.calls.append("set_chat_menu_button")
+
+
+class TestSetUserCommands:
+    """Test that menus are sent once per role until invalidated"""
+
+    def test_menu_sent_once_until_forgotten(self):
+        """Test that repeated /start skips the Bot API and a role change resends"""
+        user_id = random.randint(1, 2**31)
+        bot = RecordingBot()
+
+        async def main():
+            await set_user_commands(bot, user_id, "client")
+            first = len(bot.calls)
+            await set_user_commands(bot, user_id, "client")
+            repeated = len(bot.calls) - first
+
+            await forget_menu(user_id)
+            await set_user_commands(bot, user_id, "trainer")
+            after_switch = len(bot.calls) - first - repeated
+            await forget_menu(user_id)
+            return first, repeated, after_switch
+
+        first, repeated, after_switch = asyncio.run(main())
+
+        assert first == 2
+        assert repeated == 0
+        assert after_switch == 2
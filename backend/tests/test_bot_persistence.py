@@ -0,0 +1,58 @@
+"""
+Tests for Redis-backed bot persistence
+"""
+
+import asyncio
+import random
+
+from bot.utils.persistence import RedisPersistence, USER_KEY
+from core.cache import cache
+
+
+class TestRedisPersistence:
+    """Test write-behind storage and local reads of user_data"""
+
+    def test_flow_survives_restart(self):
+        """Test that user_data written by one process is picked up by a fresh one"""
+        user_id = random.randint(1, 2**31)
+
+        async def main():
+            before = RedisPersistence()
+            await before.update_user_data(user_id, {"registration_step": "trainer_price", "name": "Anna"})
+            await before.flush()
+
+            after = RedisPersistence()
+            user_data = {}
+            await after.refresh_user_data(user_id, user_data)
+            return user_data
+
+        user_data = asyncio.run(main())
+
+        assert user_data == {"registration_step": "trainer_price", "name": "Anna"}
+
+    def test_hot_reads_stay_local(self):
+        """Test that a recently synced entry is not re-read, and unsaved changes are kept"""
+        user_id = random.randint(1, 2**31)
+        key = USER_KEY.format(user_id)
+
+        async def main():
+            persistence = RedisPersistence(local_ttl=60)
+            user_data = {}
+            await persistence.refresh_user_data(user_id, user_data)
+            # Another process moves the flow on
+            await cache.aset(key, '{"registration_step": "client_contact"}', 60)
+
+            await persistence.refresh_user_data(user_id, user_data)
+            fresh = dict(user_data)
+
+            persistence.local_ttl = 0
+            user_data["registration_step"] = "trainer_contact"
+            await persistence.refresh_user_data(user_id, user_data)
+            unsaved = dict(user_data)
+            await cache.adelete(key)
+            return fresh, unsaved
+
+        fresh, unsaved = asyncio.run(main())
+
+        assert fresh == {}
+        assert unsaved == {"registration_step": "trainer_contact"}
@@ -0,0 +1,117 @@
+"""
+Tests for collapsing repeated inline button taps
+"""
+
+import asyncio
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from bot.utils.taps import BUSY_TEXT, DONE_TEXT, collapse_taps
+from core.cache import cache
+
+
+class RecordingQuery:
+    """CallbackQuery stand-in that records answers"""
+
+    def __init__(self, user_id: int, data: str):
+        self.from_user = SimpleNamespace(id=user_id)
+        self.data = data
+        self.answers = []
+
+    async def answer(self, text=None):
+        self.answers.append(text)
+
+
+class TestCollapseTaps:
+    """Test that a burst of identical taps runs the handler once"""
+
+    def test_repeated_taps_absorbed(self):
+        """Test that a concurrent tap is collapsed and a later one answered from cache"""
+        user_id = random.randint(1, 2**31)
+        runs = []
+
+        @collapse_taps
+        async def handler(update, context):
+            runs.append(update.callback_query.data)
+            await asyncio.sleep(0.05)
+            return DONE_TEXT
+
+        def tap():
+            return SimpleNamespace(callback_query=RecordingQuery(user_id, "confirm_attendance:1"))
+
+        async def main():
+            first, second, third = tap(), tap(), tap()
+            await asyncio.gather(handler(first, None), handler(second, None))
+            await handler(third, None)
+            return second.callback_query.answers, third.callback_query.answers
+
+        second_answers, third_answers = asyncio.run(main())
+
+        assert runs == ["confirm_attendance:1"]
+        assert second_answers == [BUSY_TEXT]
+        assert third_answers == [DONE_TEXT]
+
+    def test_failed_tap_is_not_cached(self):
+        """Test that a tap whose handler failed or raised runs the handler again"""
+        user_id = random.randint(1, 2**31)
+        outcomes = [None, RuntimeError("db is down"), DONE_TEXT]
+        runs = []
+
+        @collapse_taps
+        async def handler(update, context):
+            runs.append(1)
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        def tap():
+            return SimpleNamespace(callback_query=RecordingQuery(user_id, "topup_confirm:1:2:500"))
+
+        async def main():
+            await handler(tap(), None)
+            with pytest.raises(RuntimeError):
+                await handler(tap(), None)
+            await handler(tap(), None)
+            last = tap()
+            await handler(last, None)
+            return last.callback_query.answers
+
+        assert asyncio.run(main()) == [DONE_TEXT]
+        assert len(runs) == 3
+
+    def test_slow_tap_keeps_next_lock(self):
+        """Test that a handler outliving its lock does not release the lock of the tap after it"""
+        user_id = random.randint(1, 2**31)
+        data = "cancel_booking:1"
+        runs = []
+
+        @collapse_taps
+        async def handler(update, context):
+            runs.append(1)
+            if len(runs) == 1:
+                # Failed: no cached result answers the later taps
+                await asyncio.sleep(0.1)
+                return None
+            await asyncio.sleep(0.2)
+            return DONE_TEXT
+
+        def tap():
+            return SimpleNamespace(callback_query=RecordingQuery(user_id, data))
+
+        async def main():
+            slow = asyncio.create_task(handler(tap(), None))
+            await asyncio.sleep(0.02)
+            # The first tap's lock expires while its handler still runs
+            await cache.adelete(f"bot:tap:{user_id}:{data}:lock")
+            second = asyncio.create_task(handler(tap(), None))
+            await slow
+            third = tap()
+            await handler(third, None)
+            await second
+            return third.callback_query.answers
+
+        assert asyncio.run(main()) == [BUSY_TEXT]
+        assert len(runs) == 2
@@ -0,0 +1,91 @@
+"""
+Tests for concurrent bot update processing
+"""
+
+import asyncio
+from datetime import datetime
+
+from telegram import Chat, Message, Update, User as TelegramUser
+from telegram.ext import ApplicationBuilder, TypeHandler
+
+from bot.utils.updates import ChatOrderedApplication
+
+
+def make_update(update_id: int, chat_id: int, text: str) -> Update:
+    chat = Chat(id=chat_id, type=Chat.PRIVATE)
+    sender = TelegramUser(id=chat_id, first_name="User", is_bot=False)
+    message = Message(message_id=update_id, date=datetime.now(), chat=chat, from_user=sender, text=text)
+    return Update(update_id=update_id, message=message)
+
+
+class TestChatOrderedApplication:
+    """Test that updates run concurrently across chats and in order within a chat"""
+
+    def test_order_within_chat(self):
+        """Test that a fast update waits for the slow one before it in the same chat only"""
+        done = []
+
+        async def handler(update, context):
+            if update.message.text == "slow":
+                await asyncio.sleep(0.05)
+            done.append((update.effective_chat.id, update.message.text))
+
+        async def main():
+            application = (
+                ApplicationBuilder()
+                .token("123:TEST")
+                .application_class(ChatOrderedApplication)
+                .concurrent_updates(8)
+                .build()
+            )
+            application.add_handler(TypeHandler(Update, handler))
+            # initialize() calls getMe; handlers do not need the network here
+            application._initialized = True
+            await asyncio.gather(
+                application.process_update(make_update(1, 1, "slow")),
+                application.process_update(make_update(2, 1, "fast")),
+                application.process_update(make_update(3, 2, "fast")),
+            )
+
+        asyncio.run(main())
+
+        assert done == [(2, "fast"), (1, "slow"), (1, "fast")]
+
+    def test_busy_chat_does_not_take_every_slot(self):
+        """Test through the update queue that a burst from one chat leaves slots for other chats"""
+        done = []
+        running = []
+        peak = []
+
+        async def handler(update, context):
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.05 if update.effective_chat.id == 1 else 0)
+            running.pop()
+            done.append((update.effective_chat.id, update.update_id))
+
+        async def main():
+            application = (
+                ApplicationBuilder()
+                .token("123:TEST")
+                .application_class(ChatOrderedApplication)
+                .concurrent_updates(2)
+                .build()
+            )
+            application.add_handler(TypeHandler(Update, handler))
+            application._initialized = True
+            await application.start()
+            # Five taps of chat 1, more than there are slots, then chats 2 and 3
+            for update_id in range(1, 6):
+                await application.update_queue.put(make_update(update_id, 1, "tap"))
+            await application.update_queue.put(make_update(6, 2, "tap"))
+            await application.update_queue.put(make_update(7, 3, "tap"))
+            await application.update_queue.join()
+            await application.stop()
+
+        asyncio.run(main())
+
+        assert [update_id for chat_id, update_id in done if chat_id == 1] == [1, 2, 3, 4, 5]
+        # Other chats finish while chat 1 is still on its first tap
+        assert done[:2] == [(2, 6), (3, 7)]
+        assert max(peak) <= 2
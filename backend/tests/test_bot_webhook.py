@@ -0,0 +1,175 @@
+"""
+Tests for the bot webhook route
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from telegram import Update
+from telegram.ext import ApplicationBuilder, TypeHandler
+
+from bot import webhook
+from bot.utils.updates import ChatOrderedApplication
+from core.cache import cache
+from core.config import settings
+
+
+def recorded_update(update_id: int, chat_id: int = 42) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": 1,
+            "date": 1760000000,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "User"},
+            "text": "/start",
+        },
+    }
+
+
+class TestWebhookRoute:
+    """Test secret checking and update_id dedup of the webhook route"""
+
+    def setup_method(self):
+        self.secret = settings.BOT_WEBHOOK_SECRET
+        settings.BOT_WEBHOOK_SECRET = "test-secret"
+        self.handled = []
+        self.fail_next = False
+        webhook.application = (
+            ApplicationBuilder().token("123:TEST").application_class(ChatOrderedApplication).build()
+        )
+        webhook.application.add_handler(TypeHandler(Update, self.handle))
+        webhook.application.add_error_handler(webhook._record_error, block=True)
+        # initialize() calls getMe; handlers do not need the network here
+        webhook.application._initialized = True
+        app = FastAPI()
+        app.include_router(webhook.router, prefix="/api/telegram")
+        self.client = TestClient(app)
+
+    async def handle(self, update, context):
+        if self.fail_next:
+            self.fail_next = False
+            raise RuntimeError("handler failed")
+        self.handled.append(update.update_id)
+
+    def teardown_method(self):
+        settings.BOT_WEBHOOK_SECRET = self.secret
+        webhook.application = None
+
+    def test_rejects_wrong_secret(self):
+        """Test that an update without the secret token is refused and not queued"""
+        response = self.client.post(
+            "/api/telegram/webhook",
+            json=recorded_update(9001),
+            headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"},
+        )
+
+        assert response.status_code == 403
+        assert webhook.application.update_queue.qsize() == 0
+
+    def test_rejects_missing_secret(self):
+        """Test that an update without the header is refused, also when no secret is configured"""
+        response = self.client.post("/api/telegram/webhook", json=recorded_update(9002))
+        assert response.status_code == 403
+
+        settings.BOT_WEBHOOK_SECRET = ""
+        response = self.client.post(
+            "/api/telegram/webhook",
+            json=recorded_update(9002),
+            headers={"X-Telegram-Bot-Api-Secret-Token": ""},
+        )
+        assert response.status_code == 403
+        assert webhook.application.update_queue.qsize() == 0
+
+    def test_malformed_body_is_bad_request(self):
+        """Test that a body that is not JSON is answered with 400"""
+        response = self.client.post(
+            "/api/telegram/webhook",
+            content=b"{not json",
+            headers={"X-Telegram-Bot-Api-Secret-Token": "test-secret"},
+        )
+
+        assert response.status_code == 400
+
+    def test_start_requires_secret(self):
+        """Test that webhook mode refuses to start without a secret token"""
+        settings.BOT_WEBHOOK_SECRET = ""
+        with pytest.raises(RuntimeError):
+            asyncio.run(webhook.start_webhook_bot())
+
+    def test_duplicate_update_is_handled_once(self):
+        """Test that a redelivered update_id is acknowledged but not handled again"""
+        headers = {"X-Telegram-Bot-Api-Secret-Token": "test-secret"}
+        # Dedup keys outlive the test when Redis is up
+        update_id = random.randint(1, 2**31)
+        first = self.client.post("/api/telegram/webhook", json=recorded_update(update_id), headers=headers)
+        second = self.client.post("/api/telegram/webhook", json=recorded_update(update_id), headers=headers)
+
+        assert first.json() == {"ok": True}
+        assert second.json() == {"ok": True, "duplicate": True}
+        assert self.handled == [update_id]
+
+    def test_failed_update_is_handled_on_redelivery(self):
+        """Test that an update whose handler raised is not marked done, so the retry runs it"""
+        headers = {"X-Telegram-Bot-Api-Secret-Token": "test-secret"}
+        update_id = random.randint(1, 2**31)
+        self.fail_next = True
+        first = self.client.post("/api/telegram/webhook", json=recorded_update(update_id), headers=headers)
+        second = self.client.post("/api/telegram/webhook", json=recorded_update(update_id), headers=headers)
+
+        assert first.status_code == 500
+        assert second.json() == {"ok": True}
+        assert self.handled == [update_id]
+
+    def test_update_in_flight_is_retried_later(self):
+        """Test that a redelivery of an update still being processed elsewhere gets 503"""
+        headers = {"X-Telegram-Bot-Api-Secret-Token": "test-secret"}
+        update_id = random.randint(1, 2**31)
+        asyncio.run(cache.aset(f"bot:update:{update_id}", webhook.PROCESSING, 60))
+        response = self.client.post("/api/telegram/webhook", json=recorded_update(update_id), headers=headers)
+
+        assert response.status_code == 503
+        assert self.handled == []
+
+
+class TestChatTurns:
+    """Test that updates of one chat run in update_id order across replicas"""
+
+    def test_later_update_waits_for_earlier_one(self):
+        """Test that an update arriving first still waits for a lower update_id in flight"""
+        chat_key = random.randint(1, 2**31)
+        order = []
+
+        async def replica(update_id, delay, work):
+            await asyncio.sleep(delay)
+            await cache.aadd(f"bot:update:{update_id}", webhook.PROCESSING, 60)
+            assert await webhook._wait_turn(chat_key, update_id)
+            await asyncio.sleep(work)
+            order.append(update_id)
+            await cache.aqueue_remove(f"bot:chat:{chat_key}:turns", str(update_id))
+
+        async def main():
+            base = random.randint(1, 2**30)
+            # The later update is quick but must not finish before the slow one before it
+            await asyncio.gather(replica(base, 0, 0.1), replica(base + 1, 0.02, 0))
+            return base
+
+        base = asyncio.run(main())
+        assert order == [base, base + 1]
+
+    def test_abandoned_turn_is_skipped(self):
+        """Test that an entry of a replica that died (marker expired) does not block the chat"""
+        chat_key = random.randint(1, 2**31)
+        update_id = random.randint(1, 2**30)
+
+        async def main():
+            # Queued by a dead replica: its processing marker is gone
+            await cache.aqueue_push(f"bot:chat:{chat_key}:turns", str(update_id), update_id, 60)
+            await cache.aadd(f"bot:update:{update_id + 1}", webhook.PROCESSING, 60)
+            return await webhook._wait_turn(chat_key, update_id + 1)
+
+        assert asyncio.run(main())
@@ -0,0 +1,44 @@
+"""
+Tests for the shared cache's non-blocking invalidation
+"""
+
+import asyncio
+
+from core import cache as cache_module
+from core.cache import cache
+
+
+class TestDeleteSoon:
+    """Test that delete_soon stays off the event loop's thread"""
+
+    def test_blocking_delete_without_loop(self, monkeypatch):
+        """Test that without a running loop the keys are deleted right away"""
+        deleted = []
+        monkeypatch.setattr(cache, "delete", lambda *keys: deleted.extend(keys))
+
+        cache.delete_soon("a", "b")
+        assert deleted == ["a", "b"]
+
+    def test_scheduled_on_running_loop(self, monkeypatch):
+        """Test that on a loop the Redis call is an awaited task, local entries go at once"""
+        deleted = []
+
+        def blocking(*keys):
+            raise AssertionError("blocking delete on the event loop")
+
+        async def adelete(*keys):
+            deleted.extend(keys)
+
+        monkeypatch.setattr(cache, "delete", blocking)
+        monkeypatch.setattr(cache, "adelete", adelete)
+        cache._local_set("test:soon", "1", 60)
+
+        async def main():
+            cache.delete_soon("test:soon")
+            local = cache._local_get("test:soon")
+            await asyncio.gather(*cache_module._background)
+            return local
+
+        assert asyncio.run(main()) is None
+        assert deleted == ["test:soon"]
+        assert not cache_module._background
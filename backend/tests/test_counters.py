@@ -0,0 +1,127 @@
+"""
+Tests for incrementally maintained booking counters
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from db.base_sync import Base
+from models import User, UserRole, TrainerClient, Booking, BookingStatus, Club
+from services.counters import install_counter_hooks, reconcile_counters
+
+
+@pytest.fixture
+def db():
+    install_counter_hooks()
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def pair(db):
+    club = Club(name="Club", address="Street 1")
+    db.add(club)
+    db.flush()
+    trainer = User(telegram_id="100", name="Trainer", role=UserRole.TRAINER, club_id=club.id)
+    client = User(telegram_id="200", name="Client", role=UserRole.CLIENT)
+    db.add_all([trainer, client])
+    db.flush()
+    relation = TrainerClient(trainer_id=trainer.id, client_id=client.id)
+    db.add(relation)
+    db.commit()
+    return club, trainer, client, relation
+
+
+def book(db, trainer, client, club, days, status=BookingStatus.PENDING):
+    booking = Booking(
+        trainer_id=trainer.id,
+        client_id=client.id,
+        club_id=club.id,
+        datetime=datetime.now(timezone.utc) + timedelta(days=days),
+        duration=60,
+        price=1000,
+        status=status
+    )
+    db.add(booking)
+    return booking
+
+
+class TestCounterHooks:
+    """Test counters follow booking transitions in the same transaction"""
+
+    def test_create_updates_pair_and_club(self, db, pair):
+        """Test that new bookings increment pair and club counters"""
+        club, trainer, client, relation = pair
+        book(db, trainer, client, club, 1)
+        book(db, trainer, client, club, 2)
+        db.commit()
+
+        assert relation.total_bookings == 2
+        assert relation.last_booking_at is not None
+        assert club.total_bookings == 2
+        assert club.total_clients == 1
+        assert club.total_trainers == 1
+
+    def test_status_transitions(self, db, pair):
+        """Test complete, cancel and revert of expired bookings"""
+        club, trainer, client, relation = pair
+        first = book(db, trainer, client, club, 1)
+        second = book(db, trainer, client, club, 2)
+        db.commit()
+
+        first.status = BookingStatus.COMPLETED
+        second.status = BookingStatus.CANCELLED
+        db.commit()
+        assert (relation.completed_bookings, relation.cancelled_bookings) == (1, 1)
+
+        second.status = BookingStatus.CONFIRMED
+        db.commit()
+        assert relation.cancelled_bookings == 0
+
+    def test_rollback_discards_counters(self, db, pair):
+        """Test that counters roll back together with the booking"""
+        club, trainer, client, relation = pair
+        book(db, trainer, client, club, 1)
+        db.flush()
+        db.rollback()
+
+        assert relation.total_bookings == 0
+        assert club.total_bookings == 0
+
+    def test_delete_last_booking_drops_club_client(self, db, pair):
+        """Test that deleting the client's only club booking decrements total_clients"""
+        club, trainer, client, relation = pair
+        booking = book(db, trainer, client, club, 1)
+        db.commit()
+
+        db.delete(booking)
+        db.commit()
+        assert relation.total_bookings == 0
+        assert (club.total_clients, club.total_bookings) == (0, 0)
+
+
+class TestReconcile:
+    """Test nightly drift repair"""
+
+    def test_repairs_only_drifted_rows(self, db, pair):
+        """Test that reconciliation fixes drift and is a no-op afterwards"""
+        club, trainer, client, relation = pair
+        book(db, trainer, client, club, 1, BookingStatus.COMPLETED)
+        db.commit()
+        db.execute(update(TrainerClient).values(total_bookings=42))
+        db.execute(update(Club).values(total_clients=7))
+        db.commit()
+
+        assert reconcile_counters(db) == {"trainer_clients": 1, "clubs": 1}
+        db.commit()
+        db.expire_all()
+        assert (relation.total_bookings, relation.completed_bookings) == (1, 1)
+        assert club.total_clients == 1
+
+        assert reconcile_counters(db) == {"trainer_clients": 0, "clubs": 0}
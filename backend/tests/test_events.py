@@ -0,0 +1,134 @@
+"""
+Tests for the domain event outbox
+"""
+
+import asyncio
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db.base_sync import Base
+from models import User, UserRole, Booking, BookingStatus, OutboxEvent
+from services.booking_state import transition, CLIENT
+from services.events import (
+    install_event_hooks,
+    emit_booking_created,
+    emit_booking_rescheduled,
+    BOOKING_CREATED,
+    BOOKING_TRANSITION
+)
+from workers import events as worker
+
+
+@pytest.fixture
+def db():
+    install_event_hooks()
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def booking(db):
+    trainer = User(telegram_id="100", name="Trainer", role=UserRole.TRAINER)
+    client = User(telegram_id="200", name="Client", role=UserRole.CLIENT)
+    db.add_all([trainer, client])
+    db.flush()
+    booking = Booking(
+        trainer_id=trainer.id,
+        client_id=client.id,
+        datetime=datetime.now(timezone.utc) + timedelta(days=2),
+        duration=60,
+        price=1000,
+        status=BookingStatus.PENDING
+    )
+    db.add(booking)
+    db.commit()
+    return booking
+
+
+class TestOutbox:
+    """Test events are written in the producer's transaction"""
+
+    def test_event_commits_with_change(self, db, booking):
+        """Test that an emitted event is stored as unpublished JSON"""
+        emit_booking_created(db, booking, "client")
+        db.commit()
+
+        event = db.query(OutboxEvent).one()
+        assert event.event_type == BOOKING_CREATED
+        assert event.payload["booking_id"] == booking.id
+        assert event.payload["datetime"].endswith("+00:00")
+        assert event.published_at is None
+
+    def test_event_rolls_back_with_change(self, db, booking):
+        """Test that a rolled back transaction leaves no event behind"""
+        emit_booking_created(db, booking, "client")
+        db.flush()
+        db.rollback()
+
+        assert db.query(OutboxEvent).count() == 0
+
+    def test_transition_writes_event(self, db, booking):
+        """Test that state machine transitions are recorded with statuses as values"""
+        transition(db, booking.id, BookingStatus.CONFIRMED, actor=CLIENT)
+        db.commit()
+
+        event = db.query(OutboxEvent).one()
+        assert event.event_type == BOOKING_TRANSITION
+        assert event.payload["previous_status"] == "pending"
+        assert event.payload["status"] == "confirmed"
+        assert event.payload["actor"] == CLIENT
+
+
+class TestOutOfOrderDelivery:
+    """Test notification handlers act on the booking's current state"""
+
+    @pytest.fixture
+    def sent(self, db, monkeypatch):
+        sent = []
+
+        async def record(booking, *args, **kwargs):
+            sent.append(booking.id)
+
+        monkeypatch.setattr(worker, "SessionLocal", lambda: db)
+        monkeypatch.setattr(db, "close", lambda: None)
+        monkeypatch.setattr(worker, "notify_booking_created_by_client", record)
+        monkeypatch.setattr(worker, "notify_booking_rescheduled", record)
+        return sent
+
+    def payload(self, db):
+        event = db.query(OutboxEvent).order_by(OutboxEvent.id.desc()).first()
+        return event.event_type, event.payload
+
+    def test_created_after_cancellation_is_skipped(self, db, booking, sent):
+        emit_booking_created(db, booking, "client")
+        db.commit()
+        created = self.payload(db)
+        transition(db, booking.id, BookingStatus.CANCELLED, actor=CLIENT)
+        db.commit()
+
+        asyncio.run(worker.handle_notification(*created))
+        assert sent == []
+
+    def test_superseded_reschedule_is_skipped(self, db, booking, sent):
+        previous = booking.datetime
+        booking.datetime = previous + timedelta(hours=1)
+        emit_booking_rescheduled(db, booking, previous, CLIENT)
+        db.commit()
+        first = self.payload(db)
+
+        booking.datetime = previous + timedelta(hours=2)
+        emit_booking_rescheduled(db, booking, previous + timedelta(hours=1), CLIENT)
+        db.commit()
+        second = self.payload(db)
+
+        # Delivered newest first
+        asyncio.run(worker.handle_notification(*second))
+        asyncio.run(worker.handle_notification(*first))
+        assert sent == [booking.id]
@@ -0,0 +1,102 @@
+"""
+Tests for off-loop password hashing, rehash on login and the login limiter
+"""
+
+import asyncio
+import uuid
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from starlette.requests import Request
+
+from core.config import settings
+from core.password import ahash_password, averify_password, hash_password, needs_rehash
+from models import ClubAdmin
+from api.admin.auth import LoginRequest, login
+
+
+def client_request(ip: str) -> Request:
+    return Request({"type": "http", "client": (ip, 0), "headers": []})
+
+
+class TestPassword:
+    """Test hashing helpers"""
+
+    def test_async_roundtrip_and_rehash(self, monkeypatch):
+        """Test that async helpers agree with bcrypt and outdated costs are detected"""
+        monkeypatch.setattr(settings, "PASSWORD_BCRYPT_ROUNDS", 4)
+
+        async def main():
+            hashed = await ahash_password("secret")
+            return hashed, await averify_password("secret", hashed), await averify_password("wrong", hashed)
+
+        hashed, valid, invalid = asyncio.run(main())
+        assert (valid, invalid) == (True, False)
+        assert not needs_rehash(hashed)
+        assert needs_rehash(hash_password("secret", rounds=5))
+        assert needs_rehash("not-a-bcrypt-hash")
+
+
+class TestLogin:
+    """Test login rehashing and attempt limits"""
+
+    @pytest.fixture
+    def sessions(self, monkeypatch):
+        monkeypatch.setattr(settings, "PASSWORD_BCRYPT_ROUNDS", 4)
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+        async def create():
+            async with engine.begin() as conn:
+                await conn.run_sync(ClubAdmin.__table__.create)
+
+        asyncio.run(create())
+        yield async_sessionmaker(engine, expire_on_commit=False)
+        asyncio.run(engine.dispose())
+
+    def add_admin(self, sessions, password_hash: str) -> str:
+        email = f"{uuid.uuid4().hex}@example.com"
+
+        async def create():
+            async with sessions() as db:
+                db.add(ClubAdmin(email=email, password_hash=password_hash, name="Admin", role="admin", club_id=1))
+                await db.commit()
+
+        asyncio.run(create())
+        return email
+
+    def test_login_upgrades_hash_cost(self, sessions):
+        """Test that a successful login rehashes with the configured cost"""
+        email = self.add_admin(sessions, hash_password("secret", rounds=5))
+
+        async def main():
+            async with sessions() as db:
+                await login(LoginRequest(email=email, password="secret"), client_request("10.0.0.1"), db)
+            async with sessions() as db:
+                return (await db.execute(ClubAdmin.__table__.select().where(ClubAdmin.email == email))).one()
+
+        row = asyncio.run(main())
+        assert row.password_hash.startswith("$2b$04$")
+
+    def test_attempts_limited_per_email(self, sessions, monkeypatch):
+        """Test that attempts past the limit get 429 without checking the password"""
+        # One window for the whole test
+        monkeypatch.setattr(settings, "ADMIN_LOGIN_WINDOW", 10 ** 9)
+        email = self.add_admin(sessions, hash_password("secret", rounds=4))
+        ip = f"10.1.{uuid.uuid4().int % 250}.{uuid.uuid4().int % 250}"
+
+        async def attempt(password):
+            async with sessions() as db:
+                try:
+                    await login(LoginRequest(email=email, password=password), client_request(ip), db)
+                    return 200
+                except HTTPException as e:
+                    return e.status_code
+
+        async def main():
+            codes = [await attempt("wrong") for _ in range(settings.ADMIN_LOGIN_MAX_ATTEMPTS_PER_EMAIL)]
+            return codes, await attempt("secret")
+
+        codes, last = asyncio.run(main())
+        assert codes == [401] * settings.ADMIN_LOGIN_MAX_ATTEMPTS_PER_EMAIL
+        assert last == 429
@@ -0,0 +1,137 @@
+"""
+Tests for the async repository layer
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.pool import StaticPool
+
+from db.base_sync import Base
+from models import User, UserRole, TrainerClient, Booking, BookingStatus, Club
+from repositories import bookings as booking_repo, trainer_clients as trainer_client_repo, users as user_repo
+from repositories.read_models import dump_json
+from api.v1.bookings import BookingResponse, booking_response
+from services.booking_state import CLIENT
+from services.client_stats import SORT_COLUMNS, trainer_clients_statement
+from services.counters import install_counter_hooks
+
+
+async def _seed(db: AsyncSession) -> Booking:
+    club = Club(name="Club")
+    db.add(club)
+    await db.flush()
+    trainer = User(telegram_id="100", name="Trainer", role=UserRole.TRAINER, club_id=club.id)
+    client = User(telegram_id="200", name="Client", role=UserRole.CLIENT)
+    db.add_all([trainer, client])
+    await db.flush()
+    db.add(TrainerClient(trainer_id=trainer.id, client_id=client.id))
+    booking = await booking_repo.add_booking(db, Booking(
+        trainer_id=trainer.id,
+        client_id=client.id,
+        club_id=club.id,
+        datetime=datetime.now(timezone.utc) + timedelta(days=2),
+        duration=60,
+        price=1000,
+        status=BookingStatus.PENDING
+    ))
+    await db.commit()
+    return booking
+
+
+def run(scenario):
+    """Run scenario(db, booking) on a fresh in-memory database"""
+    async def main():
+        install_counter_hooks()
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        db = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+        try:
+            await scenario(db, await _seed(db))
+        finally:
+            await db.close()
+            await engine.dispose()
+
+    asyncio.run(main())
+
+
+class TestRepositories:
+    """Test queries and writes on AsyncSession"""
+
+    def test_list_bookings_joins_parties(self):
+        """Test that names and club come with the bookings"""
+        run(self._list_bookings_joins_parties)
+
+    async def _list_bookings_joins_parties(self, db, booking):
+        rows = await booking_repo.list_bookings(db, Booking.trainer_id == booking.trainer_id)
+
+        assert len(rows) == 1
+        found, trainer, client, club_name = rows[0]
+        assert found.id == booking.id
+        assert (trainer.name, client.name, club_name) == ("Trainer", "Client", "Club")
+
+    def test_booking_rows_serialize_like_responses(self):
+        """Test that projected booking rows give the same JSON as ORM responses"""
+        run(self._booking_rows_serialize_like_responses)
+
+    async def _booking_rows_serialize_like_responses(self, db, booking):
+        # A booking whose trainer row is gone keeps the schema's default timezone
+        await db.execute(insert(Booking).values(
+            trainer_id=booking.trainer_id + 1000, client_id=booking.client_id,
+            datetime=booking.datetime + timedelta(days=1), duration=60, price=None,
+            status=BookingStatus.CONFIRMED
+        ))
+        await db.commit()
+        criteria = Booking.client_id == booking.client_id
+        # Both paths read values as stored, not the seeded instances
+        db.expunge_all()
+        rows = await booking_repo.list_booking_rows(db, criteria)
+        responses = [booking_response(*row) for row in await booking_repo.list_bookings(db, criteria)]
+
+        assert not hasattr(rows[0], "__dict__")
+        assert (rows[0].client_name, rows[0].club_name) == ("Client", "Club")
+        body = dump_json(rows, BookingResponse)
+        assert json.loads(body) == jsonable_encoder(responses)
+        assert json.loads(body)[1]["trainer_timezone"] == "Europe/Moscow"
+
+    def test_transition_runs_sync_subscribers(self):
+        """Test that the state machine and counters work on the async transaction"""
+        run(self._transition_runs_sync_subscribers)
+
+    async def _transition_runs_sync_subscribers(self, db, booking):
+        change = await booking_repo.transition(db, booking.id, BookingStatus.CANCELLED, actor=CLIENT)
+        await db.commit()
+        await db.refresh(booking)
+
+        relation = await trainer_client_repo.get_relation(db, booking.trainer_id, booking.client_id)
+        await db.refresh(relation)
+        assert change.previous_status == BookingStatus.PENDING
+        assert booking.status == BookingStatus.CANCELLED
+        assert relation.cancelled_bookings == 1
+
+    def test_conflicts_and_lookups(self):
+        """Test conflict detection and role-filtered user lookup"""
+        run(self._conflicts_and_lookups)
+
+    async def _conflicts_and_lookups(self, db, booking):
+        assert await booking_repo.find_conflict(db, booking.trainer_id, booking.datetime)
+        assert not await booking_repo.find_conflict(
+            db, booking.trainer_id, booking.datetime, exclude_booking_id=booking.id
+        )
+        assert await user_repo.get_user(db, "100", UserRole.TRAINER)
+        assert not await user_repo.get_user(db, "100", UserRole.CLIENT)
+
+    def test_client_list_sort_keys(self):
+        """Test that every sort key orders by its column, spent by the aggregate"""
+        def order_by(sort):
+            sql = str(trainer_clients_statement(1, sort=sort, descending=True))
+            return sql[sql.index("ORDER BY"):]
+
+        assert order_by("spent").startswith("ORDER BY coalesce(anon_1.total_spent")
+        assert order_by("name").startswith("ORDER BY users.name DESC")
+        assert order_by("unknown") == order_by("created")
+        assert set(SORT_COLUMNS) == {"created", "name", "balance", "last_booking", "spent"}
@@ -0,0 +1,68 @@
+"""
+Tests for user and club text search (SQLite fallback)
+"""
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from db.base_sync import Base
+from models import User, UserRole
+from services.search import normalize_digits, normalize_text, search_users
+from api.v1.trainers import search_trainers
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        User(telegram_id="111", name="Anna Smith", role=UserRole.CLIENT, phone="+7 (916) 123-45-67"),
+        User(telegram_id="222", name="Annabel Lee", role=UserRole.TRAINER, specialization="yoga"),
+        User(telegram_id="333", name="Joanna Ray", role=UserRole.TRAINER, telegram_username="ann"),
+        User(telegram_id="444", name="Bob Stone", role=UserRole.TRAINER, specialization="boxing", phone="+7 999 000-11-22"),
+    ])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def ranked_names(db, query):
+    condition, rank = search_users("sqlite", query)
+    return db.execute(select(User.name).where(condition).order_by(rank.desc(), User.id)).scalars().all()
+
+
+class TestSearch:
+    """Test normalization, matching and ranking"""
+
+    def test_normalize(self):
+        """Test that queries are lowercased, ё folded and phones reduced to digits"""
+        assert normalize_text("  Фёдор   ИВАНОВ ") == "федор иванов"
+        assert normalize_digits("+7 (916) 123-45-67") == "79161234567"
+
+    def test_exact_then_prefix_then_substring(self, db):
+        """Test that an exact username beats a prefix, which beats a substring"""
+        assert ranked_names(db, "ANN") == ["Joanna Ray", "Anna Smith", "Annabel Lee"]
+
+    def test_phone_matches_any_formatting(self, db):
+        """Test that formatted and bare phone fragments both match"""
+        assert ranked_names(db, "916 123") == ["Anna Smith"]
+        assert ranked_names(db, "8-916-1234") == []
+        assert ranked_names(db, "9161234567") == ["Anna Smith"]
+
+    def test_wildcards_are_literal(self, db):
+        """Test that % and _ in a query do not match everything"""
+        assert ranked_names(db, "%") == []
+        assert ranked_names(db, "_") == []
+
+    def test_public_trainer_search(self, db):
+        """Test that public search returns active trainers only, by specialization too"""
+        assert [t.name for t in search_trainers(q="ann", club_id=None, limit=20, db=db)] == ["Joanna Ray", "Annabel Lee"]
+        assert [t.name for t in search_trainers(q="box", club_id=None, limit=20, db=db)] == ["Bob Stone"]
+
+    def test_public_trainer_search_ignores_phones(self, db):
+        """Test that trainers cannot be looked up by phone number without admin rights"""
+        assert search_trainers(q="999 000", club_id=None, limit=20, db=db) == []
+        assert search_trainers(q="79990001122", club_id=None, limit=20, db=db) == []
@@ -0,0 +1,130 @@
+"""
+Tests for nearest free slot search
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from services.slot_finder import (
+    BusyIntervals,
+    find_nearest_free_slots,
+    DEFAULT_WORK_HOURS
+)
+
+
+MOSCOW = ZoneInfo("Europe/Moscow")
+
+
+def local(year, month, day, hour, minute=0):
+    return datetime(year, month, day, hour, minute, tzinfo=MOSCOW)
+
+
+class TestBusyIntervals:
+    """Test ordered interval structure"""
+
+    def test_empty_is_free(self):
+        """Test that everything is free without bookings"""
+        busy = BusyIntervals([])
+        assert busy.is_free(local(2025, 10, 13, 10), local(2025, 10, 13, 11))
+
+    def test_overlapping_intervals_are_merged(self):
+        """Test that overlapping bookings collapse into one interval"""
+        busy = BusyIntervals([
+            (local(2025, 10, 13, 10), local(2025, 10, 13, 11)),
+            (local(2025, 10, 13, 10, 30), local(2025, 10, 13, 12)),
+            (local(2025, 10, 13, 15), local(2025, 10, 13, 16)),
+        ])
+        assert len(busy) == 2
+
+    def test_adjacent_slot_is_free(self):
+        """Test that a slot ending exactly at booking start is free"""
+        busy = BusyIntervals([(local(2025, 10, 13, 10), local(2025, 10, 13, 11))])
+
+        assert busy.is_free(local(2025, 10, 13, 9), local(2025, 10, 13, 10))
+        assert busy.is_free(local(2025, 10, 13, 11), local(2025, 10, 13, 12))
+
+    def test_partial_overlap_is_busy(self):
+        """Test that partial overlaps on both sides are detected"""
+        busy = BusyIntervals([(local(2025, 10, 13, 10), local(2025, 10, 13, 11))])
+
+        assert not busy.is_free(local(2025, 10, 13, 9, 30), local(2025, 10, 13, 10, 30))
+        assert not busy.is_free(local(2025, 10, 13, 10, 30), local(2025, 10, 13, 11, 30))
+        assert not busy.is_free(local(2025, 10, 13, 9), local(2025, 10, 13, 12))
+
+
+class TestFindNearestFreeSlots:
+    """Test nearest slot search"""
+
+    @pytest.fixture
+    def work_hours(self):
+        """Registration default: Mon-Fri 9-18, Sat 9-13, Sun off"""
+        return DEFAULT_WORK_HOURS
+
+    def test_neighbours_of_taken_slot(self, work_hours):
+        """Test that closest slots on both sides are returned"""
+        # Monday 13 October 2025, 12:00 is taken
+        busy = BusyIntervals([(local(2025, 10, 13, 12), local(2025, 10, 13, 13))])
+
+        slots = find_nearest_free_slots(
+            work_hours, busy, local(2025, 10, 13, 12), 60, MOSCOW, k=2
+        )
+
+        assert slots == [local(2025, 10, 13, 11), local(2025, 10, 13, 13)]
+
+    def test_results_are_chronological(self, work_hours):
+        """Test that suggestions are sorted by time, not by distance"""
+        busy = BusyIntervals([])
+
+        slots = find_nearest_free_slots(
+            work_hours, busy, local(2025, 10, 13, 12), 60, MOSCOW, k=4
+        )
+
+        assert slots == sorted(slots)
+        assert len(slots) == 4
+
+    def test_skips_day_off(self, work_hours):
+        """Test that Sunday is never suggested"""
+        # Saturday 18 October, whole working day booked
+        busy = BusyIntervals([(local(2025, 10, 18, 9), local(2025, 10, 18, 13))])
+
+        slots = find_nearest_free_slots(
+            work_hours, busy, local(2025, 10, 18, 12), 60, MOSCOW, k=1,
+            not_before=local(2025, 10, 18, 0)
+        )
+
+        assert slots == [local(2025, 10, 20, 9)]
+
+    def test_respects_not_before(self, work_hours):
+        """Test that past times are not suggested"""
+        busy = BusyIntervals([(local(2025, 10, 13, 12), local(2025, 10, 13, 13))])
+
+        slots = find_nearest_free_slots(
+            work_hours, busy, local(2025, 10, 13, 12), 60, MOSCOW, k=1,
+            not_before=local(2025, 10, 13, 12, 30)
+        )
+
+        assert slots == [local(2025, 10, 13, 13)]
+
+    def test_lunch_break_is_skipped(self):
+        """Test that slots overlapping 12:00-13:00 break are not offered"""
+        work_hours = {
+            "monday": {"start": "11:00", "end": "14:00", "is_working": True, "hasBreak": True}
+        }
+        busy = BusyIntervals([])
+
+        slots = find_nearest_free_slots(
+            work_hours, busy, local(2025, 10, 13, 12), 60, MOSCOW, k=5, search_days=0
+        )
+
+        assert slots == [local(2025, 10, 13, 11), local(2025, 10, 13, 13)]
+
+    def test_utc_input_is_converted(self, work_hours):
+        """Test that requested time in UTC is matched against local work hours"""
+        busy = BusyIntervals([])
+        # 06:00 UTC = 09:00 Moscow
+        around = datetime(2025, 10, 13, 6, 0, tzinfo=timezone.utc)
+
+        slots = find_nearest_free_slots(work_hours, busy, around, 60, MOSCOW, k=1)
+
+        assert slots[0] - local(2025, 10, 13, 10) == timedelta(0)
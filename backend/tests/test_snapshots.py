@@ -0,0 +1,210 @@
+"""
+Tests for the two-tier entity cache and user / club / trainer snapshots
+"""
+
+import asyncio
+import json
+from typing import NamedTuple
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from core import cache as cache_module
+from core import entity_cache
+from core.cache import cache
+from core.entity_cache import EntityCache, handle_invalidation
+from db.base_sync import Base
+from models import User, UserRole, Club
+from services import snapshots
+from services.snapshots import get_user_snapshot, install_snapshot_hooks
+from api.v1.trainers import get_trainer
+
+
+class Point(NamedTuple):
+    x: int
+    y: int
+
+
+@pytest.fixture(autouse=True)
+def no_listener(monkeypatch):
+    monkeypatch.setattr(entity_cache, "_ensure_listener", lambda: None)
+
+
+def clear(*caches):
+    for item in caches:
+        item.clear_local()
+        for key in list(cache._local):
+            if key.startswith(f"entity:{item.name}:"):
+                cache._local.pop(key)
+
+
+class TestEntityCache:
+    def test_read_through_tiers_and_stats(self):
+        points = EntityCache("test_point", Point, ttl=60)
+        clear(points)
+        loads = []
+
+        def load():
+            loads.append(1)
+            return Point(1, 2)
+
+        assert points.get_or_load("a", load) == Point(1, 2)
+        assert points.get_or_load("a", load) == Point(1, 2)
+        assert len(loads) == 1
+
+        # Another process: empty LRU, value from the shared tier
+        points.clear_local()
+        assert points.get_or_load("a", load) == Point(1, 2)
+        assert len(loads) == 1
+
+        stats = points.stats()
+        assert (stats["local_hits"], stats["shared_hits"], stats["misses"]) == (1, 1, 1)
+        assert stats["hit_ratio"] == pytest.approx(2 / 3, abs=1e-3)
+
+    def test_missing_values_are_not_cached(self):
+        points = EntityCache("test_missing", Point, ttl=60)
+        clear(points)
+        loads = []
+        assert points.get_or_load("a", lambda: loads.append(1)) is None
+        assert points.get_or_load("a", lambda: loads.append(1)) is None
+        assert len(loads) == 2
+
+    def test_invalidate_publishes_and_drops_both_tiers(self, monkeypatch):
+        points = EntityCache("test_invalidate", Point, ttl=60)
+        clear(points)
+        published = []
+        monkeypatch.setattr(cache, "publish", lambda channel, message: published.append(message))
+
+        points.set("a", Point(1, 2))
+        points.invalidate("a")
+
+        assert points.get("a") is None
+        assert json.loads(published[0]) == {"cache": "test_invalidate", "keys": ["a"]}
+
+    def test_fill_racing_invalidation_is_not_stored(self, monkeypatch):
+        """Test that a value loaded before an invalidation does not outlive it"""
+        points = EntityCache("test_race", Point, ttl=60)
+        clear(points)
+        monkeypatch.setattr(cache, "publish", lambda channel, message: None)
+        loads = []
+
+        def stale_load():
+            # A commit lands and invalidates while this load is in flight
+            loads.append(1)
+            points.invalidate("a")
+            return Point(0, 0)
+
+        assert points.get_or_load("a", stale_load) == Point(0, 0)
+        assert points.get("a") is None
+        assert points.get_or_load("a", lambda: loads.append(1) or Point(1, 2)) == Point(1, 2)
+        assert points.get("a") == Point(1, 2)
+        assert len(loads) == 2
+
+    def test_invalidate_on_event_loop_does_not_block(self, monkeypatch):
+        """Test that on a running loop the shared tier is invalidated by an awaited task"""
+        points = EntityCache("test_loop", Point, ttl=60)
+        clear(points)
+        published = []
+
+        def blocking(*args):
+            raise AssertionError("blocking cache call on the event loop")
+
+        async def apublish(channel, message):
+            published.append(message)
+
+        for name in ("incr", "delete", "publish"):
+            monkeypatch.setattr(cache, name, blocking)
+        monkeypatch.setattr(cache, "apublish", apublish)
+        points._local_set("a", Point(1, 2))
+        asyncio.run(cache.aset(points._shared_key("a"), points._encode(Point(1, 2)), 60))
+
+        async def main():
+            points.invalidate("a")
+            local = points._local_get("a")
+            await asyncio.gather(*cache_module._background)
+            return local
+
+        assert asyncio.run(main()) is None
+        assert asyncio.run(cache.aget(points._shared_key("a"))) is None
+        assert asyncio.run(cache.aget(points._generation_key("a"))) is not None
+        assert json.loads(published[0]) == {"cache": "test_loop", "keys": ["a"]}
+
+    def test_invalidation_message_drops_local_entry(self):
+        points = EntityCache("test_message", Point, ttl=60)
+        clear(points)
+        points.set("a", Point(1, 2))
+
+        handle_invalidation(json.dumps({"cache": "test_message", "keys": ["a"]}))
+        assert points._local_get("a") is None
+        # The shared tier is left to the publisher
+        assert points.get("a") == Point(1, 2)
+
+        handle_invalidation("not json")
+
+
+@pytest.fixture
+def db():
+    install_snapshot_hooks()
+    clear(snapshots.users, snapshots.clubs, snapshots.trainer_profiles)
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    session.statements = statements
+    yield session
+    session.close()
+    engine.dispose()
+    clear(snapshots.users, snapshots.clubs, snapshots.trainer_profiles)
+
+
+class TestSnapshots:
+    def test_user_snapshot_cached_and_invalidated_on_commit(self, db):
+        db.add(User(telegram_id="s1", name="Anna", role=UserRole.TRAINER, settings={"big": "x" * 1000}))
+        db.commit()
+
+        user = get_user_snapshot(db, "s1")
+        assert (user.name, user.role) == ("Anna", UserRole.TRAINER)
+        assert not hasattr(user, "settings")
+        assert get_user_snapshot(db, "s1", UserRole.CLIENT) is None
+
+        db.statements.clear()
+        assert get_user_snapshot(db, "s1") == user
+        assert db.statements == []
+
+        db.get(User, user.id).name = "Anna K"
+        db.commit()
+        assert get_user_snapshot(db, "s1").name == "Anna K"
+
+    def test_rolled_back_change_keeps_cache(self, db):
+        db.add(User(telegram_id="s2", name="Oleg", role=UserRole.CLIENT))
+        db.commit()
+        get_user_snapshot(db, "s2")
+
+        db.query(User).filter_by(telegram_id="s2").one().name = "Changed"
+        db.flush()
+        db.rollback()
+
+        db.statements.clear()
+        assert get_user_snapshot(db, "s2").name == "Oleg"
+        assert db.statements == []
+
+    def test_trainer_profile_follows_club_rename(self, db):
+        club = Club(name="Fit")
+        db.add(club)
+        db.flush()
+        db.add(User(telegram_id="s3", name="Ivan", role=UserRole.TRAINER, club_id=club.id, rating=45))
+        db.commit()
+
+        profile = get_trainer("s3", db)
+        assert (profile.club_name, profile.rating) == ("Fit", 4.5)
+
+        db.statements.clear()
+        assert get_trainer("s3", db) == profile
+        assert db.statements == []
+
+        db.get(Club, club.id).name = "Fit Pro"
+        db.commit()
+        assert get_trainer("s3", db).club_name == "Fit Pro"
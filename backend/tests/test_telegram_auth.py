@@ -6,14 +6,20 @@ import pytest
 import hmac
 import hashlib
 import json
+import time
 from urllib.parse import urlencode
 from fastapi import HTTPException
 
+from core import telegram_auth
+from core.jwt import create_access_token
 from core.telegram_auth import (
     validate_telegram_web_app_data,
     get_telegram_user_id,
     validate_init_data_header,
-    get_user_id_from_header
+    get_user_id_from_header,
+    create_session_token,
+    get_session_user_id,
+    get_telegram_id
 )
 
 
@@ -55,7 +61,7 @@ class TestTelegramAuth:
 
         # Create data for hashing (before URL encoding)
         data_for_hash = {
-            "auth_date": str(auth_date or 1234567890),
+            "auth_date": str(auth_date or int(time.time())),
             "query_id": query_id,
             "user": user_json
         }
@@ -80,7 +86,7 @@ class TestTelegramAuth:
 
         # Return as URL-encoded string with hash
         result_data = {
-            "auth_date": str(auth_date or 1234567890),
+            "auth_date": str(auth_date or int(time.time())),
             "hash": hash_value,
             "query_id": query_id,
             "user": user_json
@@ -112,7 +118,7 @@ class TestTelegramAuth:
         data = {
             "query_id": "AAH",
             "user": json.dumps(user_data),
-            "auth_date": "1234567890"
+            "auth_date": str(int(time.time()))
         }
         init_data = urlencode(data)  # No hash
 
@@ -160,7 +166,7 @@ class TestTelegramAuth:
         # Generate init_data without user
         data = {
             "query_id": "AAH",
-            "auth_date": "1234567890"
+            "auth_date": str(int(time.time()))
         }
         data_check_string = '\n'.join([f"{k}={v}" for k, v in sorted(data.items())])
         secret_key = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
@@ -206,7 +212,7 @@ class TestTelegramAuth:
         data_for_hash = {
             "query_id": "AAH",
             "user": invalid_user,
-            "auth_date": "1234567890"
+            "auth_date": str(int(time.time()))
         }
 
         # Create hash on non-encoded data (as Telegram does)
@@ -216,7 +222,7 @@ class TestTelegramAuth:
 
         # Build init_data with hash
         result_data = {
-            "auth_date": "1234567890",
+            "auth_date": str(int(time.time())),
             "hash": hash_value,
             "query_id": "AAH",
             "user": invalid_user
@@ -243,3 +249,85 @@ class TestTelegramAuth:
 
         assert result['user']['first_name'] == "Иван"
         assert result['user']['last_name'] == "Петров"
+
+
+class TestInitDataCacheAndSessions:
+    """Expiry, verified init_data cache and session tokens"""
+
+    user_data = {"id": 123456789, "first_name": "John"}
+
+    @pytest.fixture
+    def bot_token(self):
+        from core.config import settings
+        return settings.BOT_TOKEN
+
+    def make_init_data(self, bot_token, auth_date=None):
+        return TestTelegramAuth().generate_init_data(self.user_data, bot_token, auth_date=auth_date)
+
+    def test_expired_init_data_rejected(self, bot_token):
+        from core.config import settings
+        init_data = self.make_init_data(bot_token, auth_date=int(time.time()) - settings.TELEGRAM_INIT_DATA_TTL - 60)
+
+        with pytest.raises(HTTPException) as exc_info:
+            validate_telegram_web_app_data(init_data, bot_token)
+
+        assert exc_info.value.status_code == 401
+        assert "expired" in exc_info.value.detail
+
+    def test_verified_init_data_cached_until_expiry(self, bot_token, monkeypatch):
+        init_data = self.make_init_data(bot_token)
+        first = validate_telegram_web_app_data(init_data, bot_token)
+
+        calls = []
+        monkeypatch.setattr(telegram_auth.hmac, "new", lambda *args: calls.append(args))
+        assert validate_telegram_web_app_data(init_data, bot_token) is first
+        assert calls == []
+
+        # Past auth_date + TTL the entry is dropped and the data rejected
+        monkeypatch.undo()
+        later = time.time() + 10 ** 7
+        monkeypatch.setattr(telegram_auth.time, "time", lambda: later)
+        with pytest.raises(HTTPException):
+            validate_telegram_web_app_data(init_data, bot_token)
+
+    def test_cache_is_per_bot_token(self, bot_token):
+        init_data = self.make_init_data(bot_token)
+        validate_telegram_web_app_data(init_data, bot_token)
+
+        with pytest.raises(HTTPException) as exc_info:
+            validate_telegram_web_app_data(init_data, "987654:other-token")
+        assert "Invalid init_data hash" in exc_info.value.detail
+
+    def test_session_token_round_trip(self):
+        token, expires_in = create_session_token("123456789")
+
+        assert expires_in > 0
+        assert get_session_user_id(f"Bearer {token}") == "123456789"
+        assert get_telegram_id(f"Bearer {token}", None) == "123456789"
+
+    def test_init_data_header_still_accepted(self, bot_token):
+        assert get_telegram_id(None, self.make_init_data(bot_token)) == "123456789"
+
+    def test_admin_token_is_not_a_session(self):
+        admin_token = create_access_token({"email": "admin@example.com", "role": "super_admin"})
+
+        with pytest.raises(HTTPException) as exc_info:
+            get_session_user_id(f"Bearer {admin_token}")
+        assert exc_info.value.status_code == 401
+
+    def test_session_endpoint(self, bot_token):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from api.v1 import auth
+
+        app = FastAPI()
+        app.include_router(auth.router, prefix="/auth")
+        client = TestClient(app)
+
+        response = client.post("/auth/session", headers={"X-Telegram-Init-Data": self.make_init_data(bot_token)})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["telegram_id"] == "123456789"
+        assert get_session_user_id(f"Bearer {body['access_token']}") == "123456789"
+
+        assert client.post("/auth/session").status_code == 401
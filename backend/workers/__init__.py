@@ -0,0 +1,3 @@
+"""
+Long-running worker processes outside Celery
+"""
@@ -0,0 +1,285 @@
+"""
+Domain event worker: outbox relay and stream consumer groups
+
+    python -m workers.events relay
+    python -m workers.events consume notifications [--consumer NAME]
+    python -m workers.events consume cache
+    python -m workers.events replay notifications --from 0
+
+Each consumer group reads the events stream independently, so groups can be
+scaled (several `consume` processes with different --consumer names share a
+group's entries) and restarted without affecting each other. Entries may
+arrive in any order (services/events.py), so handlers are idempotent and
+must not depend on seeing an earlier event of the same booking first.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict
+
+import redis
+import redis.asyncio as aioredis
+
+from core.config import settings
+from db.session import SessionLocal
+from models import User, Booking, BookingStatus
+from services.booking_state import BookingTransition, TRAINER
+from services.events import (
+    STREAM,
+    BOOKING_CREATED,
+    BOOKING_TRANSITION,
+    BOOKING_RESCHEDULED,
+    relay_outbox,
+    purge_outbox
+)
+from services.agenda import ainvalidate_agenda
+from services.notifications import (
+    notify_transition,
+    notify_booking_rescheduled,
+    notify_booking_created_by_trainer,
+    notify_booking_created_by_client
+)
+
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+RELAY_BATCH = 500
+RELAY_IDLE_SLEEP = 0.5
+PURGE_INTERVAL = 3600
+
+CONSUMER_BATCH = 50
+BLOCK_MS = 5000
+# Entries unacked this long are taken over from dead or stuck consumers
+CLAIM_IDLE_MS = 60_000
+# Deliveries after which an entry is acked and logged instead of retried
+MAX_DELIVERIES = 5
+# Handled outbox ids are remembered this long to skip relay re-sends
+DONE_TTL = 7 * 24 * 3600
+
+
+def _done_key(group: str, outbox_id: str) -> str:
+    return f"events:done:{group}:{outbox_id}"
+
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _superseded(booking: Booking, payload: dict) -> bool:
+    """The booking was rescheduled again after this event"""
+    current = booking.datetime
+    if current.tzinfo is None:
+        current = current.replace(tzinfo=timezone.utc)
+    return current != _parse_datetime(payload["datetime"])
+
+
+# Consumer handlers
+
+async def handle_notification(event_type: str, payload: dict):
+    if event_type == BOOKING_TRANSITION:
+        await notify_transition(BookingTransition(
+            booking_id=payload["booking_id"],
+            trainer_id=payload["trainer_id"],
+            client_id=payload["client_id"],
+            club_id=payload["club_id"],
+            previous_status=BookingStatus(payload["previous_status"]),
+            status=BookingStatus(payload["status"]),
+            previous_datetime=_parse_datetime(payload["previous_datetime"]),
+            datetime=_parse_datetime(payload["datetime"]),
+            actor=payload["actor"],
+            reason=payload["reason"]
+        ))
+        return
+
+    if event_type not in (BOOKING_CREATED, BOOKING_RESCHEDULED):
+        return
+
+    db = SessionLocal()
+    try:
+        # Current state, whatever happened to the booking since the event
+        booking = db.query(Booking).filter_by(id=payload["booking_id"]).first()
+        if not booking or booking.status == BookingStatus.CANCELLED:
+            # The cancellation has its own event
+            return
+        if event_type == BOOKING_RESCHEDULED and _superseded(booking, payload):
+            return
+        if event_type == BOOKING_CREATED:
+            if payload["created_by"] == "trainer":
+                await notify_booking_created_by_trainer(booking, db)
+            else:
+                await notify_booking_created_by_client(booking, db)
+        else:
+            await notify_booking_rescheduled(
+                booking, _parse_datetime(payload["previous_datetime"]), db,
+                rescheduled_by_trainer=payload["actor"] == TRAINER
+            )
+    finally:
+        db.close()
+
+
+async def handle_cache(event_type: str, payload: dict):
+    # Writers without session hooks (scripts, other services) still reach the caches
+    user_ids = [payload.get("trainer_id"), payload.get("client_id")]
+    db = SessionLocal()
+    try:
+        telegram_ids = [
+            row[0] for row in db.query(User.telegram_id).filter(User.id.in_([i for i in user_ids if i])).all()
+        ]
+    finally:
+        db.close()
+    await ainvalidate_agenda(*telegram_ids)
+
+
+GROUPS: Dict[str, Callable[[str, dict], Awaitable[None]]] = {
+    "notifications": handle_notification,
+    "cache": handle_cache,
+}
+
+
+# Relay
+
+def run_relay():
+    """Move committed outbox rows to the stream until stopped"""
+    logger.info("Outbox relay started")
+    last_purge = 0.0
+    while True:
+        db = SessionLocal()
+        try:
+            published = relay_outbox(db, RELAY_BATCH)
+            if published:
+                logger.info(f"Relayed {published} events")
+            if time.monotonic() - last_purge > PURGE_INTERVAL:
+                purged = purge_outbox(db)
+                if purged:
+                    logger.info(f"Purged {purged} published outbox rows")
+                last_purge = time.monotonic()
+        except Exception as e:
+            db.rollback()
+            published = 0
+            logger.error(f"Outbox relay failed: {e}")
+        finally:
+            db.close()
+
+        # Full batch means there is a backlog: continue right away
+        if published < RELAY_BATCH:
+            time.sleep(RELAY_IDLE_SLEEP)
+
+
+# Consumers
+
+async def _ensure_group(client: aioredis.Redis, group: str):
+    try:
+        await client.xgroup_create(STREAM, group, id="0", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def _handle_entry(client: aioredis.Redis, group: str, entry_id: str, fields: dict) -> bool:
+    """Run the group's handler for one entry. Returns True if it can be acked."""
+    outbox_id = fields.get("outbox_id", entry_id)
+    if await client.exists(_done_key(group, outbox_id)):
+        return True
+    try:
+        await GROUPS[group](fields["type"], json.loads(fields["payload"]))
+    except Exception as e:
+        logger.error(f"[{group}] event {entry_id} ({fields.get('type')}) failed: {e}")
+        return False
+    await client.set(_done_key(group, outbox_id), 1, ex=DONE_TTL)
+    return True
+
+
+async def _handle_batch(client: aioredis.Redis, group: str, entries) -> int:
+    acked = [
+        entry_id for entry_id, fields in entries
+        if await _handle_entry(client, group, entry_id, fields)
+    ]
+    if acked:
+        await client.xack(STREAM, group, *acked)
+    return len(acked)
+
+
+async def _claim_stale(client: aioredis.Redis, group: str, consumer: str):
+    """Take over entries left unacked by crashed consumers, drop poison entries"""
+    _, entries, _ = await client.xautoclaim(STREAM, group, consumer, CLAIM_IDLE_MS, count=CONSUMER_BATCH)
+    retry = []
+    for entry_id, fields in entries:
+        pending = await client.xpending_range(STREAM, group, min=entry_id, max=entry_id, count=1)
+        if pending and pending[0]["times_delivered"] > MAX_DELIVERIES:
+            logger.error(f"[{group}] giving up on event {entry_id} after {MAX_DELIVERIES} deliveries: {fields}")
+            await client.xack(STREAM, group, entry_id)
+        else:
+            retry.append((entry_id, fields))
+    if retry:
+        await _handle_batch(client, group, retry)
+
+
+async def consume(group: str, consumer: str):
+    """Read the group's entries in batches, handle and ack them until stopped"""
+    client = aioredis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    await _ensure_group(client, group)
+    logger.info(f"Consumer {consumer} started in group {group}")
+
+    # Entries this consumer received before a restart but never acked
+    response = await client.xreadgroup(group, consumer, {STREAM: "0"}, count=10_000)
+    if response and response[0][1]:
+        await _handle_batch(client, group, response[0][1])
+
+    last_claim = 0.0
+    while True:
+        if time.monotonic() - last_claim > CLAIM_IDLE_MS / 1000:
+            await _claim_stale(client, group, consumer)
+            last_claim = time.monotonic()
+
+        response = await client.xreadgroup(
+            group, consumer, {STREAM: ">"}, count=CONSUMER_BATCH, block=BLOCK_MS
+        )
+        if response:
+            await _handle_batch(client, group, response[0][1])
+
+
+def replay(group: str, from_id: str):
+    """Rewind a group to a stream id; entries after it are delivered again"""
+    client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    client.xgroup_setid(STREAM, group, from_id)
+    # Forget handled ids so replayed entries are not skipped as duplicates
+    keys = list(client.scan_iter(match=_done_key(group, "*"), count=1000))
+    for start in range(0, len(keys), 1000):
+        client.delete(*keys[start:start + 1000])
+    logger.info(f"Group {group} rewound to {from_id}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Domain event worker")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("relay", help="Relay outbox rows to the events stream")
+
+    consume_parser = commands.add_parser("consume", help="Run a consumer of a group")
+    consume_parser.add_argument("group", choices=sorted(GROUPS))
+    consume_parser.add_argument("--consumer", default=f"{socket.gethostname()}-{os.getpid()}")
+
+    replay_parser = commands.add_parser("replay", help="Rewind a group for replay")
+    replay_parser.add_argument("group", choices=sorted(GROUPS))
+    replay_parser.add_argument("--from", dest="from_id", default="0")
+
+    args = parser.parse_args()
+    if args.command == "relay":
+        run_relay()
+    elif args.command == "consume":
+        asyncio.run(consume(args.group, args.consumer))
+    else:
+        replay(args.group, args.from_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -132,11 +132,16 @@ const authAPI = {
         method: 'PUT',
         body: JSON.stringify(data)
     }),
-    changePassword: (oldPassword, newPassword) => apiRequest('/auth/change-password', {
-        method: 'PUT',
-        body: JSON.stringify({
-            old_password: oldPassword,
-            new_password: newPassword
-        })
-    })
+    // Older tokens are revoked; continue with the one returned
+    changePassword: async (oldPassword, newPassword) => {
+        const data = await apiRequest('/auth/change-password', {
+            method: 'PUT',
+            body: JSON.stringify({
+                old_password: oldPassword,
+                new_password: newPassword
+            })
+        });
+        saveToken(data.access_token);
+        return data;
+    }
 };
@@ -185,6 +185,19 @@ async function initializeAPI() {
 // Load client data
 async function loadClientData() {
     try {
+        // Profile, trainers with balances and bookings in one request
+        const bootstrapResponse = await fetchWithRetry(`${API_BASE_URL}/users/client/${clientId}/bootstrap`);
+        if (bootstrapResponse.ok) {
+            const data = await bootstrapResponse.json();
+            clientData = data.client;
+            trainers = clientData.trainers || [];
+            bookings = data.bookings || [];
+            console.log('Client bootstrap loaded:', data);
+            return;
+        }
+        console.error('Failed to load bootstrap:', bootstrapResponse.status, bootstrapResponse.statusText);
+
+        // Fallback to separate requests
         // Load client info with trainers
         const clientResponse = await fetchWithRetry(`${API_BASE_URL}/users/client/${clientId}`);
         if (clientResponse.ok) {
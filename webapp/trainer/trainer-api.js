@@ -269,11 +269,16 @@ async function initializeAPI() {
         return;
     }
 
-    // Load trainer data
-    await loadTrainerData();
+    // Profile, schedule template, clients and date tabs bookings in one request
+    const bootstrapped = await loadBootstrap();
 
-    // Load today's schedule
-    await loadSchedule();
+    if (!bootstrapped) {
+        // Fallback to separate requests
+        await loadWorkingHours();
+        await loadTrainerData();
+        await loadSchedule();
+        await loadCalendarCounts();
+    }
 
     // Update UI with real data
     updateUIWithData();
@@ -288,6 +293,40 @@ async function initializeAPI() {
     console.log('API initialization complete');
 }
 
+// Load everything needed on startup with a single request
+async function loadBootstrap() {
+    try {
+        const response = await fetchWithRetry(`${API_BASE_URL}/users/trainer/${trainerId}/bootstrap`);
+        if (!response.ok) {
+            console.error('Failed to load bootstrap:', response.status, response.statusText);
+            return false;
+        }
+
+        const data = await response.json();
+        trainerData = data.trainer;
+        clients = data.clients || [];
+        applyWorkingHours(data.schedule || []);
+
+        // Bookings cover all date tabs: count them for badges, keep the opened day
+        window.calendarDays = {};
+        (data.bookings || []).forEach(b => {
+            const d = new Date(b.datetime);
+            const dateStr = `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
+            const dayCounts = window.calendarDays[dateStr] || (window.calendarDays[dateStr] = { date: dateStr });
+            const status = b.status.toLowerCase();
+            dayCounts[status] = (dayCounts[status] || 0) + 1;
+        });
+        bookings = (data.bookings || []).filter(b => new Date(b.datetime).toDateString() === currentDate.toDateString());
+        generateDateTabs();
+
+        console.log('Bootstrap loaded:', data);
+        return true;
+    } catch (error) {
+        console.error('Failed to load bootstrap:', error);
+        return false;
+    }
+}
+
 // Load trainer data
 async function loadTrainerData() {
     try {
@@ -355,6 +394,35 @@ async function loadSchedule() {
     }
 }
 
+// Per-day booking counters: { 'YYYY-MM-DD': { pending, confirmed, cancelled, free, ... } }
+window.calendarDays = {};
+
+// Load compact month calendar for months covered by date tabs
+async function loadCalendarCounts() {
+    const today = new Date();
+    const months = new Set();
+    for (let i = -2; i <= 4; i++) {
+        const date = new Date(today);
+        date.setDate(today.getDate() + i);
+        months.add(`${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}`);
+    }
+
+    try {
+        for (const month of months) {
+            const response = await fetchWithRetry(`${API_BASE_URL}/bookings/trainer/${trainerId}/calendar?month=${month}`);
+            if (response.ok) {
+                const days = await response.json();
+                days.forEach(day => { window.calendarDays[day.date] = day; });
+            } else {
+                console.error('Failed to load calendar:', response.status, response.statusText);
+            }
+        }
+        generateDateTabs();
+    } catch (error) {
+        console.error('Failed to load calendar:', error);
+    }
+}
+
 // Update UI with real data
 function updateUIWithData() {
     // Update header stats
@@ -521,6 +589,13 @@ function generateDateTabs() {
         if (!isWorkingDay) {
             displayText += ' 🚫';
             button.style.opacity = '0.6';
+        } else if (window.calendarDays && window.calendarDays[dateStr]) {
+            // Number of active bookings from month calendar
+            const dayCounts = window.calendarDays[dateStr];
+            const active = (dayCounts.pending || 0) + (dayCounts.confirmed || 0);
+            if (active > 0) {
+                displayText += ` · ${active}`;
+            }
         }
 
         button.textContent = displayText;
@@ -1263,7 +1338,16 @@ window.confirmBooking = async function() {
                     });
                 } else {
                     const error = await response.json();
-                    showNotification(`❌ Ошибка: ${error.detail || 'Не удалось создать запись'}`);
+                    if (error.suggestions && error.suggestions.length > 0) {
+                        // Slot is taken - show nearest free times returned by API
+                        const currentDateStr = `${currentDate.getFullYear()}-${String(currentDate.getMonth() + 1).padStart(2, '0')}-${String(currentDate.getDate()).padStart(2, '0')}`;
+                        const times = error.suggestions
+                            .map(s => s.date === currentDateStr ? s.time : `${s.date.slice(8, 10)}.${s.date.slice(5, 7)} ${s.time}`)
+                            .join(', ');
+                        showNotification(`❌ Время занято. Свободно: ${times}`);
+                    } else {
+                        showNotification(`❌ Ошибка: ${error.detail || 'Не удалось создать запись'}`);
+                    }
                 }
             } catch (error) {
                 console.error('Failed to create booking:', error);
@@ -1483,51 +1567,7 @@ async function loadWorkingHours() {
         const response = await fetchWithRetry(`${API_BASE_URL}/slots/trainer/${trainerId}/schedule`);
         if (response.ok) {
             const schedules = await response.json();
-
-            // Convert to UI format - initialize empty object
-            const workingHoursData = {};
-
-            schedules.forEach(schedule => {
-                const day = schedule.day_of_week.toLowerCase();
-                if (schedule.is_active) {
-                    // Active working schedule
-                    workingHoursData[day] = {
-                        isWorkingDay: true,
-                        start: schedule.start_time,
-                        end: schedule.end_time,
-                        hasBreak: schedule.has_break || false
-                    };
-                } else {
-                    // Inactive schedule - day off
-                    workingHoursData[day] = {
-                        isWorkingDay: false,
-                        start: schedule.start_time,
-                        end: schedule.end_time,
-                        hasBreak: schedule.has_break || false
-                    };
-                }
-            });
-
-            // Update global variable
-            window.workingHoursData = workingHoursData;
-
-            // Update UI display
-            Object.keys(workingHoursData).forEach(day => {
-                const hoursDisplay = document.getElementById(`hours-${day}`);
-                if (hoursDisplay) {
-                    const dayData = workingHoursData[day];
-                    if (dayData.isWorkingDay) {
-                        hoursDisplay.textContent = `${dayData.start} - ${dayData.end}`;
-                    } else {
-                        hoursDisplay.textContent = 'Выходной';
-                    }
-                }
-            });
-
-            // Regenerate date tabs with loaded working hours
-            generateDateTabs();
-
-            return workingHoursData;
+            return applyWorkingHours(schedules);
         }
     } catch (error) {
         console.error('Failed to load working hours from API, using defaults:', error);
@@ -1540,6 +1580,54 @@ async function loadWorkingHours() {
     return window.workingHoursData;
 }
 
+// Apply weekly schedule template (API format) to UI
+function applyWorkingHours(schedules) {
+    // Convert to UI format - initialize empty object
+    const workingHoursData = {};
+
+    schedules.forEach(schedule => {
+        const day = schedule.day_of_week.toLowerCase();
+        if (schedule.is_active) {
+            // Active working schedule
+            workingHoursData[day] = {
+                isWorkingDay: true,
+                start: schedule.start_time,
+                end: schedule.end_time,
+                hasBreak: schedule.has_break || false
+            };
+        } else {
+            // Inactive schedule - day off
+            workingHoursData[day] = {
+                isWorkingDay: false,
+                start: schedule.start_time,
+                end: schedule.end_time,
+                hasBreak: schedule.has_break || false
+            };
+        }
+    });
+
+    // Update global variable
+    window.workingHoursData = workingHoursData;
+
+    // Update UI display
+    Object.keys(workingHoursData).forEach(day => {
+        const hoursDisplay = document.getElementById(`hours-${day}`);
+        if (hoursDisplay) {
+            const dayData = workingHoursData[day];
+            if (dayData.isWorkingDay) {
+                hoursDisplay.textContent = `${dayData.start} - ${dayData.end}`;
+            } else {
+                hoursDisplay.textContent = 'Выходной';
+            }
+        }
+    });
+
+    // Regenerate date tabs with loaded working hours
+    generateDateTabs();
+
+    return workingHoursData;
+}
+
 // Simple function to immediately show slots
 function showDefaultSlots() {
     const scheduleSection = document.getElementById('scheduleSection');
@@ -1636,8 +1724,7 @@ if (document.readyState === 'loading') {
         // Update date display
         updateDateDisplay();
 
-        // Then load real data and update
-        await loadWorkingHours(); // This now regenerates tabs internally
+        // Then load real data and update (bootstrap regenerates tabs internally)
         await initializeAPI();
     });
 } else {
@@ -1657,11 +1744,8 @@ if (document.readyState === 'loading') {
     // Update date display
     updateDateDisplay();
 
-    // Then load real data
-    loadWorkingHours().then(() => {
-        initializeAPI();
-        // loadWorkingHours already regenerates tabs
-    });
+    // Then load real data (bootstrap regenerates tabs internally)
+    initializeAPI();
 }
 
 // Update trainer settings with real data
@@ -2226,7 +2310,10 @@ async function loadBookingData() {
             return false;
         }
 
-        const response = await fetchWithRetry(`https://trenergram.ru/api/v1/bookings/trainer/${trainerId}`);
+        // Only bookings of the opened day are needed to check availability
+        const day = window.currentDate;
+        const dateStr = `${day.getFullYear()}-${String(day.getMonth() + 1).padStart(2, '0')}-${String(day.getDate()).padStart(2, '0')}`;
+        const response = await fetchWithRetry(`${API_BASE_URL}/bookings/trainer/${trainerId}?from_date=${dateStr}T00:00:00&to_date=${dateStr}T23:59:59`);
         if (!response.ok) {
             console.error('Failed to load bookings:', response.status);
             return false;